@@ -1,17 +1,17 @@
-# __init__.py (im Package-Root, also in deim_paket/__init__.py)
-"""
-dein_paket
-==========
-
-Hauptpaket, enthält Config-, Hardware- und GUI-Module.
-"""
-
-__all__ = [
-    # Core-Subpakete
-    "config",
-    "hardware",
-    "gui",
-]
-
-# Optional: Versionsangabe
-__version__ = "0.1.0"
+# __init__.py (im Package-Root, also in deim_paket/__init__.py)
+"""
+dein_paket
+==========
+
+Hauptpaket, enthält Config-, Hardware- und GUI-Module.
+"""
+
+__all__ = [
+    # Core-Subpakete
+    "config",
+    "hardware",
+    "gui",
+]
+
+# Optional: Versionsangabe
+__version__ = "0.1.0"
@@ -1,44 +1,75 @@
-#!/usr/bin/env python3
-import tkinter as tk
-
-from config.config_manager import ConfigManager
-from hardware.hardware_manager import HardwareManager
-from gui.main_tab import MainTab
-
-
-class App(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Sonnenscheinsensor Prüfstand")
-
-        # Fensterrahmen entfernen und Bildschirmgröße setzen
-        self.overrideredirect(True)
-        self.screen_width = self.winfo_screenwidth()
-        self.screen_height = self.winfo_screenheight()
-        self.geometry(f"{self.screen_width}x{self.screen_height}+0+0")
-
-        # Tastaturfokus setzen und Escape binden
-        self.focus_force()
-        self.bind_all("<Escape>", self.exit_fullscreen)
-
-        # Config & Hardware
-        self.config = ConfigManager()
-        self.serial_numbers = {i: "" for i in range(8)}
-        self.hardware = HardwareManager(self.config, self)
-
-        # MainTab direkt anzeigen
-        self.main_tab = MainTab(self, self)
-        self.main_tab.pack(fill="both", expand=True)
-
-    def exit_fullscreen(self, event=None):
-        self.overrideredirect(False)
-        self.geometry("1200x800")  # Standardgröße nach Verlassen
-
-
-def main():
-    app = App()
-    app.mainloop()
-
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+import argparse
+import tkinter as tk
+from tkinter import ttk
+from typing import Optional
+
+from config.config_manager import ConfigManager
+from config.logging_config import setup_logging
+from hardware.hardware_manager import HardwareManager
+from gui.main_tab import MainTab
+from gui.archive_viewer import ArchiveViewerTab
+
+
+class App(tk.Tk):
+    def __init__(self, replay: Optional[str] = None, simulate: bool = False):
+        super().__init__()
+        self.title("Sonnenscheinsensor Prüfstand")
+
+        # Fensterrahmen entfernen und Bildschirmgröße setzen
+        self.overrideredirect(True)
+        self.screen_width = self.winfo_screenwidth()
+        self.screen_height = self.winfo_screenheight()
+        self.geometry(f"{self.screen_width}x{self.screen_height}+0+0")
+
+        # Tastaturfokus setzen und Escape binden
+        self.focus_force()
+        self.bind_all("<Escape>", self.exit_fullscreen)
+
+        # Config & Hardware
+        self.config = ConfigManager()
+        setup_logging(self.config.config.logging)
+        self.config.start_watching()
+        self.serial_numbers = {i: "" for i in range(8)}
+        if replay:
+            self.hardware = self._create_replay_hardware(replay)
+        elif simulate:
+            from hardware.simulation import SimulatedHardwareManager
+            self.hardware = SimulatedHardwareManager(self.config, self)
+        else:
+            self.hardware = HardwareManager(self.config, self)
+
+        # Prüfstand und Archivansicht als Tabs
+        self.notebook = ttk.Notebook(self)
+        self.main_tab = MainTab(self.notebook, self)
+        self.archive_tab = ArchiveViewerTab(self.notebook, self)
+        self.notebook.add(self.main_tab, text="Prüfstand")
+        self.notebook.add(self.archive_tab, text="Archiv")
+        self.notebook.pack(fill="both", expand=True)
+
+    def _create_replay_hardware(self, path: str):
+        # Letzten Lauf unter `path` statt der echten Hardware abspielen
+        from hardware.replay import ReplayHardwareManager
+        from storage.archive_reader import find_runs
+        runs = find_runs(path)
+        if not runs:
+            raise SystemExit(f"Keine Archivdateien unter {path} gefunden")
+        files = runs[list(runs)[-1]]
+        return ReplayHardwareManager(files, self.config, self)
+
+    def exit_fullscreen(self, event=None):
+        self.overrideredirect(False)
+        self.geometry("1200x800")  # Standardgröße nach Verlassen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sonnenscheinsensor Prüfstand")
+    parser.add_argument("--replay", help="Archivierten Lauf (Verzeichnis oder CSV) statt Hardware abspielen")
+    parser.add_argument("--simulate", action="store_true", help="Simulierte Hardware (Sensormodell mit Fehlern) statt Prüfstand")
+    args = parser.parse_args()
+    app = App(replay=args.replay, simulate=args.simulate)
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
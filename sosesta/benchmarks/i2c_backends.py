@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark der I2C-Backends: vergleicht die Latenz eines vollständigen INA219-Lesens
+(Busspannung, Strom, Leistung) über Blinka (busio/adafruit_tca9548a/adafruit_ina219)
+mit dem i2c-dev-Schnellpfad (DirectTCA9548A/DirectINA219, eine kombinierte Transaktion; die Kanalwahl läuft
+bei einem Wechsel als eigene Transaktion).
+
+Gemessen wird nur der Bustransfer, nicht die ADC-Wandlungszeit: die Kanäle werden
+einmal initialisiert und danach reihum gelesen.
+
+Aufruf (im Paketverzeichnis):
+    python -m benchmarks.i2c_backends --samples 2000              # auf dem Prüfstand
+    python -m benchmarks.i2c_backends --simulated --speed 400000  # ohne Hardware
+
+Mit --simulated laufen beide Pfade gegen denselben SimulatedI2CBus; zusätzlich werden
+Transaktionen, Nachrichten und Bytes pro Lesen gezählt und daraus die reine Busdauer
+beim angegebenen Takt geschätzt.
+"""
+import argparse
+import logging
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+from config.config_manager import ConfigManager
+from hardware.i2c_direct import DirectINA219, DirectTCA9548A, init_i2c_dev
+from hardware.i2c_sim import SimulatedI2CBus
+from hardware.ina219 import INA219SensorManager
+
+
+def _blinka_multiplexer(bus: Optional[SimulatedI2CBus], cfg):
+    if bus is None:
+        from hardware.tca import init_i2c
+        return init_i2c(retries=cfg.i2c["retries"], delay=cfg.i2c["delay"])
+    from adafruit_tca9548a import TCA9548A
+    return TCA9548A(bus)
+
+
+def _i2c_dev_multiplexer(bus: Optional[SimulatedI2CBus], cfg):
+    if bus is None:
+        return init_i2c_dev(bus=int(cfg.i2c["bus"]), speed=int(cfg.i2c["speed"]), mux_address=int(cfg.i2c["mux_address"]))
+    return DirectTCA9548A(bus, bus.mux_address)
+
+
+BACKENDS: Dict[str, Callable] = {
+    "blinka": _blinka_multiplexer,
+    "i2c_dev": _i2c_dev_multiplexer,
+}
+
+
+def _bus_speed(cfg) -> int:
+    return int(cfg.i2c.get("speed") or 100000)
+
+
+def run_backend(name: str, channels: List[int], samples: int, bus: Optional[SimulatedI2CBus], cfg) -> Dict[str, float]:
+    """
+    Initialisiert alle Kanäle über das Backend und misst danach `samples` Lesezugriffe reihum.
+
+    Returns:
+        Dict mit Latenzen in s ('mean', 'p50', 'p99') und – bei simuliertem Bus –
+        Transaktionen, Nachrichten und Bytes pro Lesen.
+    """
+    manager = INA219SensorManager(
+        multiplexer=BACKENDS[name](bus, cfg),
+        calibration=cfg.ina219["calibration"],
+        retries=1,
+        retry_delay=0.0,
+        adc_profile="12bit:continuous",
+        sensor_factory=DirectINA219 if name == "i2c_dev" else None
+    )
+    for ch in channels:
+        manager.read(ch)
+    if bus is not None:
+        bus.reset_counters()
+
+    latencies = []
+    for i in range(samples):
+        sensor = manager.sensors[channels[i % len(channels)]]
+        start = time.perf_counter()
+        manager._read_values(sensor)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    result = {
+        "mean": statistics.fmean(latencies),
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+    if bus is not None:
+        result.update(
+            transactions=bus.transactions / samples,
+            messages=bus.messages / samples,
+            bytes=bus.bytes / samples,
+            wire=bus.wire_time(_bus_speed(cfg)) / samples,
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="I2C-Backends (Blinka vs. i2c-dev) benchmarken")
+    parser.add_argument("--channels", type=int, nargs="+", default=[0, 1], help="Multiplexer-Kanäle, die reihum gelesen werden")
+    parser.add_argument("--samples", type=int, default=2000, help="Lesezugriffe pro Backend")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--simulated", action="store_true", help="Simulierten Bus statt /dev/i2c verwenden")
+    parser.add_argument("--speed", type=int, help="Bustakt in Hz (überschreibt i2c.speed)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    cfg = ConfigManager().config
+    if args.speed:
+        cfg.i2c["speed"] = args.speed
+
+    header = f"{'Backend':<10}{'Ø [µs]':>10}{'p50 [µs]':>10}{'p99 [µs]':>10}"
+    if args.simulated:
+        header += f"{'Trans.':>8}{'Nachr.':>8}{'Bytes':>8}{'Bus [µs]':>10}"
+    print(header)
+    for name in args.backends:
+        bus = SimulatedI2CBus(args.channels) if args.simulated else None
+        try:
+            result = run_backend(name, args.channels, args.samples, bus, cfg)
+        except ImportError as e:
+            print(f"{name:<10}nicht verfügbar: {e}")
+            continue
+        line = f"{name:<10}{result['mean'] * 1e6:>10.1f}{result['p50'] * 1e6:>10.1f}{result['p99'] * 1e6:>10.1f}"
+        if args.simulated:
+            line += f"{result['transactions']:>8.1f}{result['messages']:>8.1f}{result['bytes']:>8.1f}{result['wire'] * 1e6:>10.1f}"
+        print(line)
+    if args.simulated:
+        print(f"Busdauer geschätzt bei {_bus_speed(cfg)} Hz; Ø/p50/p99 enthalten nur den Python-Overhead.")
+
+
+if __name__ == "__main__":
+    main()
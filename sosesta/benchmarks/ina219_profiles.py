@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark der INA219-ADC-Profile: misst für jede Auflösung/Mittelung im getriggerten
+und kontinuierlichen Modus die tatsächliche Leserate eines Kanals und stellt sie der
+Datenblatt-Rate gegenüber.
+
+Aufruf (im Paketverzeichnis, auf dem Prüfstand):
+    python -m benchmarks.ina219_profiles --channel 0 --samples 100
+"""
+import argparse
+import logging
+
+from config.config_manager import ConfigManager
+from hardware.tca import init_i2c
+from hardware.ina219 import INA219SensorManager, ADC_RESOLUTIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INA219 ADC-Profile benchmarken")
+    parser.add_argument("--channel", type=int, default=0, help="Multiplexer-Kanal")
+    parser.add_argument("--samples", type=int, default=100, help="Messungen pro Profil")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    cfg = ConfigManager().config
+    tca = init_i2c(retries=cfg.i2c["retries"], delay=cfg.i2c["delay"])
+
+    print(f"{'Profil':<24}{'Datenblatt [Hz]':>16}{'gemessen [Hz]':>16}{'Latenz [ms]':>14}")
+    for resolution in ADC_RESOLUTIONS:
+        for mode in ("continuous", "triggered"):
+            spec = f"{resolution}:{mode}"
+            manager = INA219SensorManager(
+                multiplexer=tca,
+                calibration=cfg.ina219["calibration"],
+                retries=1,
+                retry_delay=0.0,
+                adc_profile=spec
+            )
+            result = manager.benchmark(args.channel, args.samples)
+            print(
+                f"{spec:<24}{result['expected_rate']:>16.1f}"
+                f"{result['measured_rate']:>16.1f}{result['mean_latency'] * 1000:>14.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
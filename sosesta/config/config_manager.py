@@ -1,54 +1,145 @@
-from pathlib import Path
-import json
-import logging
-from deepmerge import always_merger
-from typing import Optional
-from .constants import ConfigSchema
-
-logger = logging.getLogger(__name__)
-
-DEFAULT_CONFIG = ConfigSchema()
-
-class ConfigManager:
-    """
-    Lädt, validiert und speichert die Anwendungskonfiguration.
-
-    Args:
-        filepath: Pfad zur JSON-Konfigurationsdatei. Wenn sie nicht existiert,
-                  werden die Default-Werte verwendet.
-    """
-    def __init__(self, filepath: Optional[Path] = None) -> None:
-        self.filepath: Path = filepath or Path("config/config.json")
-        self.config: ConfigSchema = DEFAULT_CONFIG
-        self._load_config()
-
-    def _load_config(self) -> None:
-        """
-        Intern: Liest die JSON-Datei ein, merged sie rekursiv mit den Defaults
-        und validiert das Ergebnis anhand des Pydantic-Schemas.
-        """
-        if not self.filepath.exists():
-            logger.warning("Konfigurationsdatei %s nicht gefunden, verwende Default-Werte", self.filepath)
-            return
-        try:
-            raw = json.loads(self.filepath.read_text(encoding="utf-8"))
-            merged = always_merger.merge(self.config.dict(), raw)
-            self.config = ConfigSchema(**merged)
-            logger.info("Konfiguration geladen und validiert von %s", self.filepath)
-        except json.JSONDecodeError:
-            logger.error("Konfigurationsdatei %s fehlerhaft formatiert, verwende Default-Werte", self.filepath)
-        except Exception as e:
-            logger.exception("Unerwarteter Fehler beim Laden der Konfiguration: %s", e)
-
-    def save_config(self) -> None:
-        """
-        Speichert die aktuelle Konfiguration im JSON-Format zurück in die Datei.
-        Erzeugt ggf. fehlende Verzeichnisse.
-        """
-        try:
-            self.filepath.parent.mkdir(parents=True, exist_ok=True)
-            text = self.config.json(indent=2, ensure_ascii=False)
-            self.filepath.write_text(text, encoding="utf-8")
-            logger.info("Konfiguration in %s gespeichert", self.filepath)
-        except Exception as e:
-            logger.exception("Fehler beim Speichern der Konfiguration: %s", e)
+from pathlib import Path
+import json
+import logging
+import threading
+from deepmerge import always_merger
+from typing import Any, Callable, Dict, List, Optional
+from .constants import ConfigSchema
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = ConfigSchema()
+
+class ConfigManager:
+    """
+    Lädt, validiert und speichert die Anwendungskonfiguration.
+
+    Die aktive Konfiguration wird nie an Ort und Stelle verändert: jede Änderung
+    (Editor oder geänderte config.json) erzeugt ein neu validiertes ConfigSchema,
+    das atomar nach `self.config` getauscht und an registrierte Listener gemeldet wird.
+
+    Args:
+        filepath: Pfad zur JSON-Konfigurationsdatei. Wenn sie nicht existiert,
+                  werden die Default-Werte verwendet.
+    """
+    def __init__(self, filepath: Optional[Path] = None) -> None:
+        self.filepath: Path = filepath or Path("config/config.json")
+        self.config: ConfigSchema = DEFAULT_CONFIG
+        self._mtime: Optional[float] = None
+        self._listeners: List[Callable[[ConfigSchema], None]] = []
+        self._watch_stop = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._load_config()
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return self.filepath.stat().st_mtime
+        except OSError:
+            return None
+
+    def _read_file(self) -> Optional[ConfigSchema]:
+        """
+        Intern: Liest die JSON-Datei ein, merged sie rekursiv mit den Defaults
+        und validiert das Ergebnis anhand des Pydantic-Schemas.
+        """
+        if not self.filepath.exists():
+            logger.warning("Konfigurationsdatei %s nicht gefunden, verwende Default-Werte", self.filepath)
+            return None
+        try:
+            raw = json.loads(self.filepath.read_text(encoding="utf-8"))
+            merged = always_merger.merge(DEFAULT_CONFIG.dict(), raw)
+            config = ConfigSchema(**merged)
+            logger.info("Konfiguration geladen und validiert von %s", self.filepath)
+            return config
+        except json.JSONDecodeError:
+            logger.error("Konfigurationsdatei %s fehlerhaft formatiert, verwende Default-Werte", self.filepath)
+        except Exception as e:
+            logger.exception("Unerwarteter Fehler beim Laden der Konfiguration: %s", e)
+        return None
+
+    def _load_config(self) -> None:
+        self._mtime = self._file_mtime()
+        config = self._read_file()
+        if config is not None:
+            self.config = config
+
+    def add_listener(self, callback: Callable[[ConfigSchema], None]) -> None:
+        """
+        Registriert einen Callback, der nach jedem Konfigurationswechsel mit dem neuen
+        ConfigSchema aufgerufen wird (ggf. aus dem Watcher-Thread).
+        """
+        self._listeners.append(callback)
+
+    def _activate(self, config: ConfigSchema) -> None:
+        self.config = config
+        for callback in self._listeners:
+            try:
+                callback(config)
+            except Exception as e:
+                logger.exception("Fehler in Konfigurations-Listener: %s", e)
+
+    def update(self, changes: Dict[str, Any]) -> ConfigSchema:
+        """
+        Validiert geänderte Werte gegen das Schema und aktiviert die neue Konfiguration.
+
+        Raises:
+            pydantic.ValidationError: Wenn die Änderungen ungültig sind.
+        """
+        merged = {**self.config.dict(), **changes}
+        config = ConfigSchema(**merged)
+        self._activate(config)
+        logger.info("Konfiguration aktualisiert: %s", ", ".join(changes))
+        return config
+
+    def reload_if_changed(self) -> bool:
+        """
+        Lädt config.json neu, wenn sich die Änderungszeit seit dem letzten Laden geändert hat.
+        Ungültige Dateien werden verworfen; die aktive Konfiguration bleibt dann bestehen.
+
+        Returns:
+            True, wenn eine neue Konfiguration aktiviert wurde.
+        """
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        config = self._read_file()
+        if config is None:
+            return False
+        self._activate(config)
+        return True
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Überwacht config.json in einem Hintergrund-Thread auf Änderungen (mtime)."""
+        if self._watch_thread and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+
+        def watch():
+            while not self._watch_stop.wait(interval):
+                self.reload_if_changed()
+
+        self._watch_thread = threading.Thread(target=watch, name="ConfigWatcher", daemon=True)
+        self._watch_thread.start()
+        logger.info("Überwache %s auf Änderungen (alle %.1f s)", self.filepath, interval)
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        if self._watch_thread:
+            self._watch_thread.join(1.0)
+            self._watch_thread = None
+
+    def save_config(self) -> None:
+        """
+        Speichert die aktuelle Konfiguration im JSON-Format zurück in die Datei.
+        Erzeugt ggf. fehlende Verzeichnisse.
+        """
+        try:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            text = self.config.json(indent=2, ensure_ascii=False)
+            self.filepath.write_text(text, encoding="utf-8")
+            # Eigene Schreibvorgänge nicht als externe Änderung neu laden
+            self._mtime = self._file_mtime()
+            logger.info("Konfiguration in %s gespeichert", self.filepath)
+        except Exception as e:
+            logger.exception("Fehler beim Speichern der Konfiguration: %s", e)
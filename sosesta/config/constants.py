@@ -1,41 +1,201 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, List, Tuple, Union
-
-class ConfigSchema(BaseModel):
-    test_duration: float = 1000.0
-    redlab_pos_threshold: Tuple[float, float] = (2.0, 5.0)
-    redlab_neg_threshold: Tuple[float, float] = (-5.0, -2.0)
-    presence_current_threshold: Tuple[float, float] = (1.3, 1.6)
-    supply_voltage_threshold: Tuple[float, float] = (4.2, 5.5)
-    sensor_channels: List[int] = list(range(8))
-
-    # Neue Felder für Hardware-Unterkonfigurationen:
-    i2c: Dict[str, Union[int, float]] = {
-        "retries": 3,
-        "delay": 0.1
-    }
-
-    ina219: Dict[str, Union[str, int, float]] = {
-        "calibration": "16V_400mA",
-        "retries": 3,
-        "retry_delay": 0.1
-    }
-
-    redlab: Dict[str, Union[int, float]] = {
-        "reconnect_retries": 3,
-        "reconnect_delay": 0.5
-    }
-
-    led: Dict[str, Union[int, bool]] = {
-        "pin": 10,
-        "channel": 0,
-        "count": 8,
-        "freq_hz": 800000,
-        "dma": 10,
-        "brightness": 255,
-        "invert": False
-    }
-
-    relais_pins: List[int] = [14, 15, 18, 23]
-    archive_path: str = "./archive"
-    update_interval: int = 500
+from pydantic import BaseModel, StrictBool, StrictInt, StrictStr, validator
+from typing import Optional, Dict, List, Tuple, Union
+
+# Werte der Hardware-Unterkonfigurationen. Strikte Typen verhindern, dass pydantic
+# beim Laden aus config.json z.B. 0.1 zu int 0 oder zu str "0.1" umwandelt.
+ConfigValue = Union[StrictBool, StrictInt, float, StrictStr]
+
+class ConfigSchema(BaseModel):
+    test_duration: float = 1000.0
+    redlab_pos_threshold: Tuple[float, float] = (2.0, 5.0)
+    redlab_neg_threshold: Tuple[float, float] = (-5.0, -2.0)
+    presence_current_threshold: Tuple[float, float] = (1.3, 1.6)
+    supply_voltage_threshold: Tuple[float, float] = (4.2, 5.5)
+    sensor_channels: List[int] = list(range(8))
+
+    # Statusbewertung: Hysterese (Anteil der Bandbreite) und Entprellung (Samples)
+    rules: Dict[str, ConfigValue] = {
+        "hysteresis": 0.02,
+        "debounce": 3,
+        "absent_current": 0.2  # mA; darunter (oder bei INA219-Lesefehler) gilt der Steckplatz als leer
+    }
+
+    # Neue Felder für Hardware-Unterkonfigurationen:
+    # backend: "blinka" (busio/adafruit) oder "i2c_dev" (direkt über /dev/i2c-<bus>)
+    i2c: Dict[str, ConfigValue] = {
+        "retries": 3,
+        "delay": 0.1,
+        "backend": "blinka",
+        "bus": 1,
+        "speed": 0,           # Bustakt in Hz (nur i2c_dev, 0 = unverändert)
+        "mux_address": 112    # 0x70
+    }
+
+    # adc_profile: '<auflösung>[:triggered|:continuous]', Auflösungen 9bit..12bit und
+    # 12bit_2s..12bit_128s (Hardware-Mittelung); channel_profiles überschreibt je Kanal.
+    ina219: Dict[str, Union[ConfigValue, Dict[str, StrictStr]]] = {
+        "calibration": "16V_400mA",
+        "retries": 3,
+        "retry_delay": 0.1,
+        "adc_profile": "12bit:continuous",
+        "channel_profiles": {}
+    }
+
+    redlab: Dict[str, ConfigValue] = {
+        "reconnect_retries": 3,
+        "reconnect_delay": 0.5
+    }
+
+    led: Dict[str, ConfigValue] = {
+        "pin": 10,
+        "channel": 0,
+        "count": 8,
+        "freq_hz": 800000,
+        "dma": 10,
+        "brightness": 255,
+        "invert": False
+    }
+
+    # Erfassung: "async" liest I2C und RedLab nebenläufig, "sequential" wie bisher
+    acquisition: Dict[str, ConfigValue] = {
+        "engine": "async",
+        "ina219_deadline": 0.5,   # max. Dauer eines INA219-Aufrufs in s (inkl. Retries)
+        "redlab_deadline": 0.5,   # max. Dauer eines RedLab-Aufrufs in s
+        "escalate_after": 3,      # verfehlte Deadlines in Folge bis zum Geräte-Reset (0 = nie)
+        "reset_timeout": 5.0      # max. Dauer eines Geräte-Resets in s
+    }
+
+    # Echtzeitbetrieb des Erfassungspfads (Linux): CPU-Pinning, Scheduling-Priorität, GC zwischen den Zyklen
+    realtime: Dict[str, ConfigValue] = {
+        "enabled": False,
+        "cpus": "3",               # CPUs für den Erfassungspfad, kommagetrennt (leer = nicht pinnen)
+        "isolate": True,           # übrige Threads (GUI, LED, Logging, Upload) auf die restlichen CPUs legen
+        "sched_fifo": False,       # SCHED_FIFO anfordern (braucht CAP_SYS_NICE), sonst Rückfall auf nice
+        "priority": 50,            # FIFO-Priorität 1..99
+        "nice": -10,               # Nice-Wert als Rückfall (0 = Priorität nicht ändern)
+        "gc_freeze": True,         # gc.freeze() nach der Initialisierung, GC nur zwischen den Zyklen
+        "gc_slack": 0.002,         # min. Restzeit in s bis zum nächsten Zyklus für eine GC
+        "spin": 0.0005,            # letzte s vor jedem Zyklus aktiv warten (0 = nur schlafen)
+        "switch_interval": 0.001,  # GIL-Umschaltintervall in s während der Erfassung (0 = Python-Standard)
+        "report_interval": 60.0    # s zwischen Jitter-Berichten im Log (0 = aus)
+    }
+
+    # Ausgabe-Thread für LED-Streifen/Relais
+    actuator: Dict[str, ConfigValue] = {
+        "led_min_interval": 0.05   # minimaler Abstand zwischen zwei strip.show() in s
+    }
+
+    relais_pins: List[int] = [14, 15, 18, 23]
+
+    # Sprungantwort-Messung bei Relaisflanken (RedLab-Burst)
+    response: Dict[str, ConfigValue] = {
+        "enabled": False,
+        "rate": 10000.0,      # Abtastrate pro Kanal in Hz
+        "duration": 0.2,      # Burstdauer in s
+        "settle_band": 0.02,  # Toleranzband relativ zur Sprunghöhe
+        "min_step": 0.1,      # minimale Sprunghöhe in V
+        "pretrigger": 0.02,   # Burst so weit vor der geplanten Flanke anfordern (s); geschaltet wird erst bei laufendem Scan
+        "arm_timeout": 0.1    # max. Verzögerung der Flanke in s, falls der Scan nicht rechtzeitig startet
+    }
+
+    # Zeitgesteuerter Relais-Ablauf (RelaySequencer)
+    relay_sequencer: Dict[str, ConfigValue] = {
+        "profile": "staggered_on",   # staggered_on | staggered_off | cycle
+        "stagger": 0.05,
+        "on_time": 30.0,
+        "off_time": 30.0,
+        "phase_step": 0.0
+    }
+
+    # Kanalsitzungen: jeder Steckplatz läuft mit eigenem Start/Stop und eigener Dauer
+    sessions: Dict[str, ConfigValue] = {
+        "auto_start": False,     # Voreinstellung Auto-Start bei Sensorerkennung mit eingetragener SN
+        "stop_on_remove": True,  # Sitzung beenden und SN-Feld freigeben, sobald der Sensor gezogen wird
+        "rearm_interval": 2.0    # s zwischen zwei Neukalibrierungen eines leeren Steckplatzes
+    }
+
+    # Schnellqualifizierung vor dem Sitzungsstart (Präsenz, Versorgung, Relais OFF/ON mit RedLab-Burst)
+    qualification: Dict[str, ConfigValue] = {
+        "settle": 0.2,          # Einschwingzeit in s nach jedem Relaiswechsel
+        "ina_samples": 4,       # Erfassungszyklen, deren INA219-Werte bewertet werden
+        "rate": 10000.0,        # Burst-Abtastrate pro Kanal in Hz
+        "duration": 0.1,        # Burstdauer je Relaiszustand in s
+        "fallback_reads": 20,   # Einzelmessungen je Kanal, falls kein Burst möglich ist
+        "pass_ratio": 0.98,     # Mindestanteil der Samples im Band
+        "required": False       # Sitzungen nur auf Steckplätzen mit GO starten
+    }
+
+    # Online-Statistik je Kanal und Drift-Erkennung
+    statistics: Dict[str, ConfigValue] = {
+        "ewma_alpha": 0.01,     # Glättung des Trends (kleiner = träger)
+        "error_window": 120,    # Samples pro Fenster der Fehlerrate
+        "min_samples": 120,     # Samples bis zur ersten Drift-Bewertung
+        "drift_margin": 0.1     # Alarm, wenn EWMA näher als dieser Anteil der Bandbreite an einer Schwelle liegt
+    }
+
+    # Live-Server (HTTP/SSE) für die Fernüberwachung im LAN
+    live_server: Dict[str, ConfigValue] = {
+        "enabled": False,
+        "host": "0.0.0.0",
+        "port": 8765,
+        "bench_name": "",          # leer = Hostname
+        "client_queue": 32,        # gepufferte Frames pro Client, danach wird er getrennt
+        "keepalive": 15.0          # s ohne Daten bis zum SSE-Keepalive
+    }
+
+    # Upload abgeschlossener Archivsitzungen und Live-Zusammenfassungen an einen zentralen Collector
+    uploader: Dict[str, ConfigValue] = {
+        "enabled": False,
+        "url": "",                     # z.B. http://leitstand:8780
+        "bench_name": "",              # leer = Hostname
+        "spool_dir": "./spool",        # Warteschlange auf der Platte (überlebt Offline-Phasen und Neustarts)
+        "spool_limit": 500000000,      # max. Größe der Warteschlange in Byte, danach älteste Batches verwerfen
+        "batch_bytes": 4000000,        # Batch schließen ab dieser Rohgröße ...
+        "batch_age": 60.0,             # ... oder spätestens nach dieser Zeit in s
+        "summary_interval": 60.0,      # s zwischen zwei Live-Zusammenfassungen
+        "chunk_size": 262144,          # Byte pro Upload-Anfrage (Wiederaufnahme ab letztem Chunk)
+        "bandwidth": 200000,           # max. Upload-Rate in Byte/s (0 = unbegrenzt)
+        "cpu_share": 0.25,             # max. CPU-Anteil des Komprimierens (1.0 = ungebremst)
+        "compress_level": 6,
+        "retry_max": 300.0             # max. Wartezeit zwischen Verbindungsversuchen in s
+    }
+
+    # Logging: Ausgabe über Queue-Thread, wiederholte Meldungen gedrosselt
+    logging: Dict[str, ConfigValue] = {
+        "level": "INFO",
+        "file": "./logs/sosesta.log",   # leer = nur Konsole
+        "console": True,                # zusätzlich auf die Konsole schreiben
+        "max_bytes": 5000000,
+        "backup_count": 5,
+        "queue_size": 10000,
+        "rate_limit_interval": 60.0,    # Drosselungsfenster in s
+        "rate_limit_burst": 5           # gleiche Meldungen pro Fenster
+    }
+
+    # Archiv: eine Laufdatei für alle Kanäle, Wechsel auf eine neue Datei spätestens nach
+    # dieser Messdauer bzw. Größe (laufende Sitzungen werden darin fortgesetzt; 0 = nie)
+    archive: Dict[str, ConfigValue] = {
+        "max_run_hours": 24.0,
+        "max_run_bytes": 500000000
+    }
+
+    archive_path: str = "./archive"
+    update_interval: int = 500
+
+    @validator(
+        "redlab_pos_threshold",
+        "redlab_neg_threshold",
+        "presence_current_threshold",
+        "supply_voltage_threshold"
+    )
+    def _check_band(cls, value):
+        low, high = value
+        if low > high:
+            raise ValueError(f"Untere Schwelle {low} größer als obere Schwelle {high}")
+        return value
+
+    @validator("test_duration")
+    def _check_duration(cls, value):
+        if value <= 0:
+            raise ValueError("Testdauer muss größer als 0 sein")
+        return value
@@ -1,7 +1,8 @@
-"""
-Konfigurationsmodul: Enthält DEFAULT_CONFIG und ConfigManager.
-"""
-from .constants import DEFAULT_CONFIG, ConfigSchema
-from .config_manager import ConfigManager
-
-__all__ = ["DEFAULT_CONFIG", "ConfigSchema", "ConfigManager"]
\ No newline at end of file
+"""
+Konfigurationsmodul: Enthält DEFAULT_CONFIG und ConfigManager.
+"""
+from .constants import DEFAULT_CONFIG, ConfigSchema
+from .config_manager import ConfigManager
+from .logging_config import setup_logging, shutdown_logging
+
+__all__ = ["DEFAULT_CONFIG", "ConfigSchema", "ConfigManager", "setup_logging", "shutdown_logging"]
\ No newline at end of file
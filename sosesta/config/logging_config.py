@@ -0,0 +1,162 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drosselt wiederholte Meldungen.
+
+    Pro Schlüssel (Logger, Level, unformatierter Formatstring) werden innerhalb von
+    `interval` Sekunden höchstens `burst` Meldungen durchgelassen, nur die erste davon
+    mit Traceback. Die Anzahl der unterdrückten Meldungen wird an die erste Meldung
+    des nächsten Fensters angehängt. Für den Schlüssel wird nichts formatiert; mit
+    %-Formatierung entspricht er der Aufrufstelle.
+
+    Args:
+        interval: Länge des Drosselungsfensters in Sekunden.
+        burst: Maximale Meldungen pro Schlüssel und Fenster.
+        min_level: Meldungen darunter werden nicht gedrosselt.
+        clock: Monotone Zeitquelle.
+    """
+    MAX_KEYS = 1000
+
+    def __init__(self, interval: float = 60.0, burst: int = 5, min_level: int = logging.WARNING, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.min_level = min_level
+        self.clock = clock
+        self._windows: Dict[Tuple[str, int, str], List[float]] = {}   # Schlüssel -> [Fensterstart, Anzahl, unterdrückt]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < self.min_level:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = self.clock()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = int(window[2]) if window else 0
+                if window is None and len(self._windows) >= self.MAX_KEYS:
+                    self._prune(now)
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    if isinstance(record.args, tuple) and record.args:
+                        record.msg = f"{record.msg} (%d gleiche Meldungen unterdrückt)"
+                        record.args = record.args + (suppressed,)
+                    else:
+                        # Ohne Argumente wird nicht %-formatiert (ein "%" im Text bleibt literal)
+                        record.msg = f"{record.msg} ({suppressed} gleiche Meldungen unterdrückt)"
+                return True
+            window[1] += 1
+            if window[1] > self.burst:
+                window[2] += 1
+                return False
+        # Wiederholung innerhalb des Fensters: ohne Traceback
+        record.exc_info = None
+        record.exc_text = None
+        record.stack_info = None
+        return True
+
+    def _prune(self, now: float) -> None:
+        for key in [k for k, w in self._windows.items() if now - w[0] >= self.interval]:
+            del self._windows[key]
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler mit begrenzter Queue: ist sie voll, wird verworfen statt blockiert.
+    Records werden unformatiert übergeben (Argumente und exc_info unverändert);
+    Meldungstext und Traceback erzeugt erst der QueueListener-Thread.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare formatiert Meldung und Traceback im aufrufenden Thread;
+        # die Queue bleibt im Prozess, der Record muss daher nicht serialisierbar sein
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config: Dict[str, Any], clock: Callable[[], float] = time.monotonic) -> logging.handlers.QueueListener:
+    """
+    Richtet die Logging-Pipeline ein: alle Logger schreiben über einen QueueHandler
+    (mit RateLimitFilter) unformatierte Records in eine begrenzte Queue. Im
+    aufrufenden Thread fallen damit nur Filter und Enqueue an; Meldungstext,
+    Traceback und Ausgabeformat erzeugt der QueueListener-Thread, der auch auf
+    Konsole bzw. rotierende Logdatei schreibt.
+
+    Args:
+        config: Dict aus ConfigSchema.logging.
+        clock: Zeitquelle der Drosselungsfenster (virtuelle Zeit im Soak-Test).
+
+    Returns:
+        Der gestartete QueueListener.
+    """
+    global _listener
+    shutdown_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers: List[logging.Handler] = [logging.StreamHandler()] if config.get("console", True) else []
+    path = config.get("file")
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handlers.append(logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=int(config.get("max_bytes", 5_000_000)),
+            backupCount=int(config.get("backup_count", 5)),
+            encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=int(config.get("queue_size", 10000)))
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(
+        interval=float(config.get("rate_limit_interval", 60.0)),
+        burst=int(config.get("rate_limit_burst", 5)),
+        clock=clock
+    ))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(getattr(logging, str(config.get("level", "INFO")).upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Arbeitet die Queue ab und beendet den QueueListener."""
+    global _listener
+    if _listener is None:
+        return
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, DroppingQueueHandler) and handler.dropped:
+            logging.getLogger(__name__).warning("%d Logmeldungen wegen voller Queue verworfen", handler.dropped)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(shutdown_logging)
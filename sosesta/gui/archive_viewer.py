@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk
+
+from storage.archive_reader import RUN_FILE_PATTERN, find_runs, is_run_file, list_sessions
+from storage.pyramid import SummaryPyramid
+
+QUANTITY_LABELS = {
+    "RedLab [V]": "redlab_signal",
+    "Strom [mA]": "current",
+    "Versorgung [V]": "bus_voltage",
+}
+
+# Schwellen je Messgröße (Attribute des ConfigSchema) als Hilfslinien
+QUANTITY_THRESHOLDS = {
+    "redlab_signal": ("redlab_pos_threshold", "redlab_neg_threshold"),
+    "current": ("presence_current_threshold",),
+    "bus_voltage": ("supply_voltage_threshold",),
+}
+
+MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 60, 15, 15, 30
+MIN_SPAN = 1.0  # kleinster Zeitausschnitt in s
+
+
+class ArchiveViewerTab(ttk.Frame):
+    """
+    Archivansicht: zeigt eine Messgröße einer Kanalsitzung über den ganzen Lauf.
+    Gezeichnet wird aus der SummaryPyramid neben der CSV (min/max-Band und Mittelwert),
+    erst bei maximalem Zoom aus den Rohzeilen. Mausrad zoomt um den Cursor,
+    Ziehen verschiebt den Ausschnitt.
+    """
+    def __init__(self, master, app):
+        super().__init__(master)
+        self.app = app
+        self.runs = {}
+        self.files = {}
+        self.pyramid = None
+        self.full_range = (0.0, 0.0)
+        self.view = (0.0, 0.0)
+        self._drag = None
+        self._loading = None
+
+        self._build_toolbar()
+        self.canvas = tk.Canvas(self, background="white", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True, padx=10, pady=5)
+        self.canvas.bind("<Configure>", lambda e: self._redraw())
+        self.canvas.bind("<MouseWheel>", lambda e: self._zoom(e.x, 0.8 if e.delta > 0 else 1.25))
+        self.canvas.bind("<Button-4>", lambda e: self._zoom(e.x, 0.8))
+        self.canvas.bind("<Button-5>", lambda e: self._zoom(e.x, 1.25))
+        self.canvas.bind("<ButtonPress-1>", self._start_drag)
+        self.canvas.bind("<B1-Motion>", self._do_drag)
+
+        self._scan_runs()
+
+    def _build_toolbar(self):
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", padx=10, pady=5)
+
+        ttk.Label(bar, text="Lauf:").pack(side="left")
+        self.run_box = ttk.Combobox(bar, state="readonly", width=20)
+        self.run_box.pack(side="left", padx=5)
+        self.run_box.bind("<<ComboboxSelected>>", lambda e: self._on_run_selected())
+
+        ttk.Label(bar, text="Sensor:").pack(side="left")
+        self.file_box = ttk.Combobox(bar, state="readonly", width=32)
+        self.file_box.pack(side="left", padx=5)
+        self.file_box.bind("<<ComboboxSelected>>", lambda e: self._on_file_selected())
+
+        ttk.Label(bar, text="Größe:").pack(side="left")
+        self.quantity_box = ttk.Combobox(bar, state="readonly", width=15, values=list(QUANTITY_LABELS))
+        self.quantity_box.current(0)
+        self.quantity_box.pack(side="left", padx=5)
+        self.quantity_box.bind("<<ComboboxSelected>>", lambda e: self._redraw())
+
+        ttk.Button(bar, text="🔄 Aktualisieren", command=self._scan_runs).pack(side="left", padx=5)
+        ttk.Button(bar, text="Gesamt", command=self._reset_view).pack(side="left", padx=5)
+
+        self.info_lbl = ttk.Label(bar, text="", foreground="gray")
+        self.info_lbl.pack(side="right")
+
+    # ------------------------------------------------------------ Auswahl
+
+    def _scan_runs(self):
+        self.runs = find_runs(str(self.app.config.config.archive_path))
+        self.run_box.config(values=list(reversed(list(self.runs))))
+        if self.runs and not self.run_box.get():
+            self.run_box.current(0)
+            self._on_run_selected()
+
+    def _on_run_selected(self):
+        files = self.runs.get(self.run_box.get(), [])
+        # Anzeigename -> (Datei, Sitzung); Laufdateien enthalten mehrere Sitzungen
+        self.files = {}
+        for path in files:
+            if is_run_file(path):
+                for session in list_sessions(path):
+                    label = f"{session.serial_number} · Kanal {session.channel + 1} · {session.start:%H:%M:%S}"
+                    self.files[label] = (path, session)
+                continue
+            match = RUN_FILE_PATTERN.match(os.path.basename(path))
+            self.files[match.group(2) if match else os.path.basename(path)] = (path, None)
+        self.file_box.config(values=list(self.files))
+        if self.files:
+            self.file_box.current(0)
+            self._on_file_selected()
+
+    def _on_file_selected(self):
+        selected = self.files.get(self.file_box.get())
+        if not selected:
+            return
+        path, session = selected
+        # Pyramide im Hintergrund öffnen bzw. beim ersten Mal aufbauen
+        self.pyramid = None
+        self.info_lbl.config(text="Zusammenfassung wird erstellt …")
+        self.canvas.delete("all")
+        result = {}
+        self._loading = result
+
+        def load():
+            try:
+                result["pyramid"] = SummaryPyramid.open(path, session=session)
+            except Exception as e:
+                result["error"] = e
+
+        threading.Thread(target=load, name="PyramidBuild", daemon=True).start()
+        self._poll_loading(result)
+
+    def _poll_loading(self, result):
+        if result is not self._loading:
+            return  # inzwischen anderer Sensor gewählt
+        if not result:
+            self.after(100, self._poll_loading, result)
+            return
+        if "error" in result:
+            self.info_lbl.config(text=f"Fehler beim Lesen: {result['error']}")
+            return
+        self.pyramid = result["pyramid"]
+        self.full_range = self.pyramid.time_range
+        self._reset_view()
+
+    # -------------------------------------------------------------- Zoom
+
+    def _reset_view(self):
+        self.view = self.full_range
+        self._redraw()
+
+    def _plot_width(self) -> int:
+        return max(1, self.canvas.winfo_width() - MARGIN_LEFT - MARGIN_RIGHT)
+
+    def _set_view(self, t0: float, t1: float):
+        lo, hi = self.full_range
+        span = min(max(t1 - t0, MIN_SPAN), hi - lo)
+        t0 = min(max(t0, lo), hi - span)
+        self.view = (t0, t0 + span)
+        self._redraw()
+
+    def _zoom(self, x: int, factor: float):
+        if not self.pyramid:
+            return
+        t0, t1 = self.view
+        rel = min(max((x - MARGIN_LEFT) / self._plot_width(), 0.0), 1.0)
+        center = t0 + rel * (t1 - t0)
+        span = (t1 - t0) * factor
+        self._set_view(center - rel * span, center + (1 - rel) * span)
+
+    def _start_drag(self, event):
+        self._drag = (event.x, self.view)
+
+    def _do_drag(self, event):
+        if not self.pyramid or not self._drag:
+            return
+        x0, (t0, t1) = self._drag
+        shift = (x0 - event.x) * (t1 - t0) / self._plot_width()
+        self._set_view(t0 + shift, t1 + shift)
+
+    # ----------------------------------------------------------- Zeichnen
+
+    def _redraw(self):
+        self.canvas.delete("all")
+        if not self.pyramid:
+            return
+        quantity = QUANTITY_LABELS[self.quantity_box.get()]
+        t0, t1 = self.view
+        width = self._plot_width()
+        height = max(1, self.canvas.winfo_height() - MARGIN_TOP - MARGIN_BOTTOM)
+
+        start = time.perf_counter()
+        data = self.pyramid.query(quantity, t0, t1, max_points=width)
+        elapsed = (time.perf_counter() - start) * 1000
+        if not data.times:
+            self.info_lbl.config(text="Keine Daten im Ausschnitt")
+            return
+
+        cfg = self.app.config.config
+        bands = [getattr(cfg, name) for name in QUANTITY_THRESHOLDS[quantity]]
+        y_min = min(min(data.mins), *(b[0] for b in bands))
+        y_max = max(max(data.maxs), *(b[1] for b in bands))
+        pad = (y_max - y_min) * 0.05 or 1.0
+        y_min, y_max = y_min - pad, y_max + pad
+
+        def x_of(t):
+            return MARGIN_LEFT + (t - t0) / ((t1 - t0) or 1.0) * width
+
+        def y_of(v):
+            return MARGIN_TOP + (y_max - v) / (y_max - y_min) * height
+
+        self._draw_axes(t0, t1, y_min, y_max, width, height, x_of, y_of)
+        for low, high in bands:
+            for v in (low, high):
+                self.canvas.create_line(MARGIN_LEFT, y_of(v), MARGIN_LEFT + width, y_of(v), fill="orange", dash=(4, 3))
+
+        xs = [x_of(t) for t in data.times]
+        if data.level >= 0 and len(xs) > 1:
+            # min/max-Band als ein Polygon
+            upper = [c for x, v in zip(xs, data.maxs) for c in (x, y_of(v))]
+            lower = [c for x, v in zip(reversed(xs), reversed(data.mins)) for c in (x, y_of(v))]
+            self.canvas.create_polygon(*upper, *lower, fill="#cfe3f7", outline="")
+        if len(xs) > 1:
+            self.canvas.create_line(*[c for x, v in zip(xs, data.means) for c in (x, y_of(v))], fill="#1f5fa8")
+        else:
+            x, y = xs[0], y_of(data.means[0])
+            self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill="#1f5fa8", outline="")
+        for x, e in zip(xs, data.errors):
+            if e:
+                self.canvas.create_line(x, MARGIN_TOP + height - 4, x, MARGIN_TOP + height, fill="red")
+
+        level = "Rohdaten" if data.level < 0 else f"Ebene {data.level}"
+        self.info_lbl.config(text=f"{self.pyramid.samples} Samples · {level} · {len(xs)} Punkte · {elapsed:.1f} ms")
+
+    def _draw_axes(self, t0, t1, y_min, y_max, width, height, x_of, y_of):
+        c = self.canvas
+        c.create_rectangle(MARGIN_LEFT, MARGIN_TOP, MARGIN_LEFT + width, MARGIN_TOP + height, outline="gray")
+        for i in range(5):
+            v = y_min + (y_max - y_min) * i / 4
+            c.create_text(MARGIN_LEFT - 5, y_of(v), text=f"{v:.2f}", anchor="e", fill="gray")
+        fmt = "%H:%M:%S" if t1 - t0 < 86400 else "%d.%m. %H:%M"
+        for i in range(5):
+            t = t0 + (t1 - t0) * i / 4
+            c.create_text(x_of(t), MARGIN_TOP + height + 5, text=datetime.fromtimestamp(t).strftime(fmt), anchor="n", fill="gray")
@@ -1,66 +1,157 @@
-import tkinter as tk
-from tkinter import ttk
-
-class ChannelWidget(ttk.LabelFrame):
-    def __init__(self, master, channel: int, app):
-        super().__init__(master, text=f"Kanal {channel+1}")
-        self.channel = channel
-        self.app = app
-
-        self.led_canvas = tk.Canvas(self, width=20, height=20)
-        self.led_circle = self.led_canvas.create_oval(2, 2, 18, 18, fill="gray")
-        self.led_canvas.pack(anchor="w", pady=2)
-
-        self.current_lbl = ttk.Label(self, text="Strom: 0.00 mA")
-        self.voltage_lbl = ttk.Label(self, text="Spannung: 0.00 V")
-        self.redlab_lbl = ttk.Label(self, text="RedLab: 0.00 V")
-        self.relay_lbl = ttk.Label(self, text="Relais: OFF")
-        self.status_lbl = ttk.Label(self, text="Status: --", foreground="gray")
-
-        for lbl in [self.current_lbl, self.voltage_lbl, self.redlab_lbl, self.relay_lbl, self.status_lbl]:
-            lbl.pack(anchor="w")
-
-        ttk.Label(self, text="Seriennummer:").pack(anchor="w")
-        self.sn_entry = ttk.Entry(self)
-        self.sn_entry.pack(fill="x")
-        self._was_present = False
-
-    def update_from_data(self, data):
-        # Grunddaten anzeigen
-        self.current_lbl.config(text=f"Strom: {data.current:.2f} mA")
-        self.voltage_lbl.config(text=f"Spannung: {data.bus_voltage:.2f} V")
-        self.redlab_lbl.config(text=f"RedLab: {data.redlab_signal:.2f} V")
-        self.relay_lbl.config(text=f"Relais: {'ON' if self.app.hardware.relays.get_state(data.channel) else 'OFF'}")
-
-        # Zustandslogik – klare Reihenfolge
-        if not data.present:
-            status = "Kein Sensor erkannt"
-            color = "gray"
-        elif not data.supply_ok:
-            status = "Versorgung fehlerhaft"
-            color = "purple"
-        elif data.signal_ok:
-            status = "OK"
-            color = "green"
-        elif data.redlab_signal != 0:
-            status = "Warnung"
-            color = "orange"
-        else:
-            status = "Fehler"
-            color = "red"
-
-        # Statusanzeige
-        self.status_lbl.config(text=f"Status: {status}", foreground=color)
-        self.led_canvas.itemconfig(self.led_circle, fill=color)
-
-        # Seriennummer einmalig bei Erkennung übernehmen und sperren
-        if data.present and not self._was_present:
-            self.app.serial_numbers[data.channel] = self.sn_entry.get()
-            self.sn_entry.config(state="disabled")
-
-        # Merker aktualisieren
-        self._was_present = data.present
-
-
-    def disable_serial_input(self):
-        self.sn_entry.config(state="disabled")
+import tkinter as tk
+from datetime import timedelta
+from tkinter import ttk
+from typing import Callable, Optional
+
+from hardware.rules import STATUS_ABSENT, STATUS_SUPPLY, STATUS_OK, STATUS_WARNING, STATUS_ERROR, STATUS_STALE
+
+# Anzeige je Statusschlüssel: (Text, Farbe)
+STATUS_DISPLAY = {
+    STATUS_ABSENT: ("Kein Sensor erkannt", "gray"),
+    STATUS_SUPPLY: ("Versorgung fehlerhaft", "purple"),
+    STATUS_OK: ("OK", "green"),
+    STATUS_WARNING: ("Warnung", "orange"),
+    STATUS_ERROR: ("Fehler", "red"),
+    STATUS_STALE: ("Keine aktuellen Messwerte", "gray"),
+}
+
+class ChannelWidget(ttk.LabelFrame):
+    """
+    Anzeige und Sitzungssteuerung eines Steckplatzes: Messwerte, Status, Statistik,
+    Seriennummer, Testdauer, Auto-Start und Start/Stop der Kanalsitzung.
+
+    Args:
+        channel: Kanalindex.
+        app: Haupt-Anwendungsobjekt.
+        on_start: Wird mit dem Kanal aufgerufen, wenn Start gedrückt wird.
+        on_stop: Wird mit dem Kanal aufgerufen, wenn Stop gedrückt wird.
+    """
+    def __init__(self, master, channel: int, app, on_start: Optional[Callable[[int], None]] = None, on_stop: Optional[Callable[[int], None]] = None):
+        super().__init__(master, text=f"Kanal {channel+1}")
+        self.channel = channel
+        self.app = app
+        self.on_start = on_start
+        self.on_stop = on_stop
+        self.running = False
+
+        self.led_canvas = tk.Canvas(self, width=20, height=20)
+        self.led_circle = self.led_canvas.create_oval(2, 2, 18, 18, fill="gray")
+        self.led_canvas.pack(anchor="w", pady=2)
+
+        self.current_lbl = ttk.Label(self, text="Strom: 0.00 mA")
+        self.voltage_lbl = ttk.Label(self, text="Spannung: 0.00 V")
+        self.redlab_lbl = ttk.Label(self, text="RedLab: 0.00 V")
+        self.relay_lbl = ttk.Label(self, text="Relais: OFF")
+        self.status_lbl = ttk.Label(self, text="Status: --", foreground="gray")
+
+        self.stats_lbl = ttk.Label(self, text="", foreground="gray")
+        self.alarm_lbl = ttk.Label(self, text="", foreground="orange", wraplength=220)
+        self.qualification_lbl = ttk.Label(self, text="Qualifizierung: --", foreground="gray", wraplength=220)
+
+        for lbl in [self.current_lbl, self.voltage_lbl, self.redlab_lbl, self.relay_lbl, self.status_lbl, self.stats_lbl, self.alarm_lbl, self.qualification_lbl]:
+            lbl.pack(anchor="w")
+
+        ttk.Label(self, text="Seriennummer:").pack(anchor="w")
+        self.sn_entry = ttk.Entry(self)
+        self.sn_entry.pack(fill="x")
+
+        session = ttk.Frame(self)
+        session.pack(fill="x", pady=2)
+        ttk.Label(session, text="Dauer [h]:").pack(side="left")
+        self._default_duration = app.config.config.test_duration
+        self.duration_var = tk.StringVar(value=f"{self._default_duration:g}")
+        self.duration_entry = ttk.Entry(session, textvariable=self.duration_var, width=7)
+        self.duration_entry.pack(side="left", padx=2)
+        self.auto_start_var = tk.BooleanVar(value=bool(app.config.config.sessions.get("auto_start", False)))
+        ttk.Checkbutton(session, text="Auto-Start", variable=self.auto_start_var).pack(side="left", padx=2)
+
+        controls = ttk.Frame(self)
+        controls.pack(fill="x")
+        self.session_btn = ttk.Button(controls, text="▶️ Start", command=self._on_session_button)
+        self.session_btn.pack(side="left")
+        self.timer_lbl = ttk.Label(controls, text="--:--:--", foreground="gray")
+        self.timer_lbl.pack(side="right")
+
+    def update_from_data(self, data):
+        # Grunddaten anzeigen
+        self.current_lbl.config(text=f"Strom: {data.current:.2f} mA")
+        self.voltage_lbl.config(text=f"Spannung: {data.bus_voltage:.2f} V")
+        self.redlab_lbl.config(text=f"RedLab: {data.redlab_signal:.2f} V")
+        self.relay_lbl.config(text=f"Relais: {'ON' if data.relay_on else 'OFF'}")
+
+        # Zustand wird einmal pro Zyklus von der RuleEngine bestimmt
+        status, color = STATUS_DISPLAY[data.status]
+
+        # Statusanzeige
+        self.status_lbl.config(text=f"Status: {status}", foreground=color)
+        self.led_canvas.itemconfig(self.led_circle, fill=color)
+
+    def update_statistics(self, stats):
+        # Laufende Statistik des Testlaufs (hardware.statistics.ChannelStatistics)
+        if stats is None:
+            return
+        on, off = stats.stats["redlab_on"], stats.stats["redlab_off"]
+        errors = stats.signal_errors
+        self.stats_lbl.config(text=(
+            f"Ø ON: {on.mean:.2f} V (σ {on.std:.3f})  Ø OFF: {off.mean:.2f} V\n"
+            f"Fehlerrate: {errors.rate * 100:.1f} % (max {errors.max_rate * 100:.1f} %)"
+        ))
+        self.alarm_lbl.config(text="\n".join(stats.alarms.values()))
+
+    def set_qualification(self, slot) -> None:
+        """Zeigt GO/NO-GO der letzten Schnellqualifizierung (hardware.qualification.SlotQualification, None = keine)."""
+        if slot is None:
+            self.qualification_lbl.config(text="Qualifizierung: --", foreground="gray")
+        elif slot.passed:
+            self.qualification_lbl.config(text="Qualifizierung: GO", foreground="green")
+        elif slot.untestable:
+            self.qualification_lbl.config(text=f"Qualifizierung: nicht prüfbar – {slot.reason}", foreground="orange")
+        else:
+            self.qualification_lbl.config(text=f"Qualifizierung: NO-GO – {slot.reason}", foreground="red")
+
+    @property
+    def serial_number(self) -> str:
+        return self.sn_entry.get().strip()
+
+    @property
+    def auto_start(self) -> bool:
+        return self.auto_start_var.get()
+
+    def duration_hours(self) -> Optional[float]:
+        """Eingetragene Testdauer in Stunden oder None, wenn ungültig."""
+        try:
+            hours = float(self.duration_var.get().replace(",", "."))
+        except ValueError:
+            return None
+        return hours if hours > 0 else None
+
+    def set_default_duration(self, hours: float) -> None:
+        """Übernimmt eine neue Standarddauer, sofern der Wert nicht von Hand geändert wurde."""
+        if not self.running and self.duration_var.get() == f"{self._default_duration:g}":
+            self.duration_var.set(f"{hours:g}")
+        self._default_duration = hours
+
+    def set_session_running(self, running: bool) -> None:
+        """Sperrt Seriennummer und Dauer während der Sitzung; nach dem Ende wird die SN geleert."""
+        self.running = running
+        state = "disabled" if running else "normal"
+        self.sn_entry.config(state=state)
+        self.duration_entry.config(state=state)
+        self.session_btn.config(text="⏹ Stop" if running else "▶️ Start")
+        if not running:
+            self.sn_entry.delete(0, "end")
+            self.timer_lbl.config(text="--:--:--", foreground="gray")
+
+    def focus_serial(self) -> None:
+        """Setzt den Fokus in das (freie) Seriennummernfeld, z.B. nach dem Stecken eines Sensors."""
+        if not self.running:
+            self.sn_entry.focus_set()
+            self.sn_entry.select_range(0, "end")
+
+    def update_session(self, remaining: float) -> None:
+        self.timer_lbl.config(text=str(timedelta(seconds=int(remaining))), foreground="black")
+
+    def _on_session_button(self):
+        callback = self.on_stop if self.running else self.on_start
+        if callback:
+            callback(self.channel)
@@ -1,200 +1,385 @@
-import os
-import csv
-import subprocess
-import sys
-import tkinter as tk
-from tkinter import ttk, messagebox
-from datetime import datetime, timedelta
-
-from gui.channel_widget import ChannelWidget
-
-CHANNEL_COUNT = 8
-
-class MainTab(ttk.Frame):
-    def __init__(self, master, app):
-        super().__init__(master)
-        self.app = app
-        self.channel_widgets = {}
-        self.test_running = False
-        self.test_start_time = None
-        self.test_duration_secs = int(self.app.config.config.test_duration)
-        self.csv_writers = {}
-        self.csv_files = {}
-
-        self._build_ui()
-        self._update_loop()
-
-    def _build_ui(self):
-        self._build_config_display()
-        self._build_channels()
-        self._build_error_display()
-        self._build_controls()
-
-    def _build_config_display(self):
-        cfg = self.app.config.config
-        frame = ttk.LabelFrame(self, text="Aktuelle Konfiguration")
-        frame.pack(fill="x", padx=10, pady=5)
-
-        text = (
-            f"Dauer: {cfg.test_duration} h    "
-            f"PosSchwelle: {cfg.redlab_pos_threshold} V    "
-            f"NegSchwelle: {cfg.redlab_neg_threshold} V    "
-            f"Präsenzstrom: {cfg.presence_current_threshold} mA    "
-            f"Versorgung: {cfg.supply_voltage_threshold} V"
-        )
-        self.config_label = ttk.Label(frame, text=text)
-        self.config_label.pack(side="left", padx=10)
-
-        self.edit_btn = ttk.Button(frame, text="⚙️ Schwellen bearbeiten", command=self._open_config_editor)
-        self.edit_btn.pack(side="right", padx=10)
-
-    def _build_channels(self):
-        grid = ttk.Frame(self)
-        grid.pack(padx=10, pady=10, fill="both", expand=True)
-
-        for i in range(CHANNEL_COUNT):
-            row, col = divmod(i, 4)
-            widget = ChannelWidget(grid, channel=i, app=self.app)
-            widget.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
-            self.channel_widgets[i] = widget
-
-    def _build_error_display(self):
-        self.error_frame = ttk.LabelFrame(self, text="Fehlerübersicht")
-        self.error_frame.pack(fill="x", padx=10, pady=5)
-        self.error_text = tk.Text(self.error_frame, height=2, state="disabled", background="#f8f8f8")
-        self.error_text.pack(fill="x", padx=5, pady=5)
-
-    def _build_controls(self):
-        ctrl = ttk.Frame(self)
-        ctrl.pack(fill="x", padx=10, pady=10)
-
-        self.toggle_btn = ttk.Button(ctrl, text="🔁 Relais toggeln", command=self._toggle_relays)
-        self.start_btn = ttk.Button(ctrl, text="▶️ Start Test", command=self._start_test)
-        self.stop_btn = ttk.Button(ctrl, text="⏹ Stop Test", command=self._stop_test, state="disabled")
-        self.archive_btn = ttk.Button(ctrl, text="📂 Archiv öffnen", command=self._open_archive_folder)
-        self.timer_label = ttk.Label(ctrl, text="00:00:00")
-
-        self.toggle_btn.pack(side="left", padx=5)
-        self.start_btn.pack(side="left", padx=5)
-        self.stop_btn.pack(side="left", padx=5)
-        self.archive_btn.pack(side="left", padx=5)
-        self.timer_label.pack(side="right", padx=5)
-
-    def _open_archive_folder(self):
-        path = str(self.app.config.config.archive_path)
-        try:
-            if sys.platform == "win32":
-                subprocess.Popen(["explorer", os.path.normpath(path)])
-            elif sys.platform == "darwin":
-                subprocess.Popen(["open", path])
-            else:
-                subprocess.Popen(["xdg-open", path])
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Ordner konnte nicht geöffnet werden: {e}")
-
-    def _toggle_relays(self):
-        if not messagebox.askyesno("Sicherheitsabfrage", "Relais manuell toggeln? Nur bei Bedarf."):
-            return
-        self.app.hardware.relays.toggle_all()
-
-    def _start_test(self):
-        self.test_running = True
-        self.test_start_time = datetime.now()
-        self.start_btn.config(state="disabled")
-        self.stop_btn.config(state="normal")
-        self.toggle_btn.config(state="disabled")
-        self.archive_btn.config(state="disabled")
-        for w in self.channel_widgets.values():
-            w.disable_serial_input()
-        self.app.hardware.relays.turn_all_on()
-        self._init_csv()
-
-    def _stop_test(self):
-        self.test_running = False
-        self.start_btn.config(state="normal")
-        self.stop_btn.config(state="disabled")
-        self.toggle_btn.config(state="normal")
-        self.archive_btn.config(state="normal")
-        for f in self.csv_files.values():
-            f.close()
-
-    def _update_loop(self):
-        self.app.hardware.update_sensors()
-        self._update_channels()
-        self._update_errors()
-        self._update_timer()
-        if self.test_running:
-            self._save_csv()
-        self.after(self.app.config.config.update_interval, self._update_loop)
-
-    def _update_channels(self):
-        for i, w in self.channel_widgets.items():
-            data = self.app.hardware.sensor_manager.sensors[i]
-            w.update_from_data(data)
-
-    def _update_errors(self):
-        lines = []
-        for i, s in self.app.hardware.sensor_manager.sensors.items():
-            if not s.present:
-                lines.append(f"Kanal {i+1}: Sensor nicht erkannt")
-            elif not s.supply_ok:
-                lines.append(f"Kanal {i+1}: Versorgungsspannung außerhalb Toleranz")
-            elif not s.signal_ok:
-                lines.append(f"Kanal {i+1}: RedLab-Signal ungültig")
-        self.error_text.config(state="normal")
-        self.error_text.delete("1.0", "end")
-        self.error_text.insert("end", "\n".join(lines))
-        self.error_text.config(state="disabled")
-
-    def _update_timer(self):
-        if not self.test_running or not self.test_start_time:
-            self.timer_label.config(text="00:00:00")
-            return
-        elapsed = datetime.now() - self.test_start_time
-        remaining = max(timedelta(seconds=self.test_duration_secs) - elapsed, timedelta(seconds=0))
-        self.timer_label.config(text=str(remaining).split(".")[0])
-        if remaining.total_seconds() <= 0:
-            self._stop_test()
-
-    def _init_csv(self):
-        self.csv_files.clear()
-        self.csv_writers.clear()
-        base_path = self.app.config.config.archive_path
-        os.makedirs(base_path, exist_ok=True)
-        timestamp = self.test_start_time.strftime("%Y-%m-%d_%H%M%S")
-        cfg = self.app.config.config.dict()
-
-        for i in range(CHANNEL_COUNT):
-            sn = self.app.serial_numbers[i] or f"Kanal{i+1}"
-            folder = os.path.join(base_path, sn)
-            os.makedirs(folder, exist_ok=True)
-            filepath = os.path.join(folder, f"{timestamp}_{sn}.csv")
-            f = open(filepath, mode="w", newline="")
-            writer = csv.writer(f, delimiter=';')
-            writer.writerow(["ConfigSnapshot:", cfg])
-            writer.writerow(["Timestamp","Relay","RedLab [V]","Current [mA]","Bus [V]","Status","SN","Kanal","SupplyErrors","SignalErrors"])
-            self.csv_files[i] = f
-            self.csv_writers[i] = writer
-
-    def _save_csv(self):
-        now = datetime.now().isoformat()
-        for i, data in self.app.hardware.sensor_manager.sensors.items():
-            relay_state = "ON" if self.app.hardware.relays.get_state(i) else "OFF"
-            row = [
-                now, relay_state, 
-                f"{data.redlab_signal:.2f}", 
-                f"{data.current:.2f}",
-                f"{data.bus_voltage:.2f}", 
-                "OK" if data.signal_ok else "FEHLER",
-                data.serial_number, str(i+1),
-                str(data.supply_error_counter), 
-                str(data.signal_error_counter)
-            ]
-            try:
-                self.csv_writers[i].writerow(row)
-            except Exception as e:
-                print(f"CSV-Fehler Kanal {i+1}: {e}")
-
-    def _open_config_editor(self):
-        from gui.config_editor import open_config_editor
-        open_config_editor(self)
+import os
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from gui.channel_widget import ChannelWidget
+from hardware.rules import STATUS_ABSENT, STATUS_SUPPLY, STATUS_WARNING, STATUS_ERROR, STATUS_STALE
+from storage.archive_writer import ArchiveWriter
+
+CHANNEL_COUNT = 8
+
+# Fehlerübersicht je Statusschlüssel (siehe hardware.rules)
+ERROR_MESSAGES = {
+    STATUS_ABSENT: "Sensor nicht erkannt",
+    STATUS_SUPPLY: "Versorgungsspannung außerhalb Toleranz",
+    STATUS_WARNING: "RedLab-Signal ungültig",
+    STATUS_ERROR: "RedLab-Signal ungültig",
+    STATUS_STALE: "Gerät antwortet nicht – Messwerte veraltet",
+}
+
+
+@dataclass
+class ChannelSession:
+    """Laufende Testsitzung eines Steckplatzes."""
+    channel: int
+    serial_number: str
+    start_time: datetime
+    start_mono: float
+    duration_secs: float
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start_mono
+
+    def remaining(self) -> float:
+        return max(self.duration_secs - self.elapsed(), 0.0)
+
+
+class MainTab(ttk.Frame):
+    """
+    Prüfstandsansicht. Jeder Kanal läuft als eigene Sitzung mit eigener Seriennummer,
+    Dauer und Relaissteuerung (Sitzungssätze in der gemeinsamen Laufdatei), sodass ein freier Steckplatz sofort neu
+    bestückt werden kann, ohne auf die übrigen Kanäle zu warten. Vor dem Start können die
+    freien Steckplätze schnell qualifiziert werden; Kanäle mit NO-GO oder ohne Relais-Pin (nicht prüfbar) startet "Alle starten" nicht.
+    """
+    def __init__(self, master, app):
+        super().__init__(master)
+        self.app = app
+        self.channel_widgets = {}
+        self.sessions: Dict[int, ChannelSession] = {}
+        self._was_attached = {i: False for i in range(CHANNEL_COUNT)}
+        self._pending_config = None
+        self._pending_swaps = []
+        self._error_text = ""
+        # Letztes Qualifizierungsergebnis je Kanal (SlotQualification), gilt bis zum Sensortausch bzw. Sitzungsende
+        self.qualification = {}
+        self._qualifying: Optional[dict] = None
+        self._swapped_while_qualifying = set()
+        self.app.config.add_listener(self._on_config_changed)
+        cfg = self.app.config.config
+        self.archive = ArchiveWriter.from_config(cfg.archive_path, range(CHANNEL_COUNT), cfg.archive)
+        if self.app.hardware.response_monitor:
+            self.app.hardware.response_monitor.add_listener(self.archive.write_response)
+        if self.app.hardware.uploader:
+            self.archive.add_listener(self.app.hardware.uploader.submit_files)
+        # Archivierung im Erfassungstakt, unabhängig vom GUI-Refresh
+        self.app.hardware.acquisition.add_listener(self._on_acquired)
+        self.app.hardware.sensor_manager.add_presence_listener(self._on_presence_changed)
+
+        self._build_ui()
+        self._update_loop()
+
+    def _build_ui(self):
+        self._build_config_display()
+        self._build_channels()
+        self._build_error_display()
+        self._build_controls()
+
+    @staticmethod
+    def _config_text(cfg):
+        return (
+            f"Dauer: {cfg.test_duration} h    "
+            f"PosSchwelle: {cfg.redlab_pos_threshold} V    "
+            f"NegSchwelle: {cfg.redlab_neg_threshold} V    "
+            f"Präsenzstrom: {cfg.presence_current_threshold} mA    "
+            f"Versorgung: {cfg.supply_voltage_threshold} V"
+        )
+
+    def _build_config_display(self):
+        cfg = self.app.config.config
+        frame = ttk.LabelFrame(self, text="Aktuelle Konfiguration")
+        frame.pack(fill="x", padx=10, pady=5)
+
+        self.config_label = ttk.Label(frame, text=self._config_text(cfg))
+        self.config_label.pack(side="left", padx=10)
+
+        self.edit_btn = ttk.Button(frame, text="⚙️ Schwellen bearbeiten", command=self._open_config_editor)
+        self.edit_btn.pack(side="right", padx=10)
+
+    def _build_channels(self):
+        grid = ttk.Frame(self)
+        grid.pack(padx=10, pady=10, fill="both", expand=True)
+
+        for i in range(CHANNEL_COUNT):
+            row, col = divmod(i, 4)
+            widget = ChannelWidget(grid, channel=i, app=self.app, on_start=self._start_session, on_stop=self._stop_session)
+            widget.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+            self.channel_widgets[i] = widget
+
+    def _build_error_display(self):
+        self.error_frame = ttk.LabelFrame(self, text="Fehlerübersicht")
+        self.error_frame.pack(fill="x", padx=10, pady=5)
+        self.error_text = tk.Text(self.error_frame, height=2, state="disabled", background="#f8f8f8")
+        self.error_text.pack(fill="x", padx=5, pady=5)
+
+    def _build_controls(self):
+        ctrl = ttk.Frame(self)
+        ctrl.pack(fill="x", padx=10, pady=10)
+
+        self.toggle_btn = ttk.Button(ctrl, text="🔁 Relais toggeln", command=self._toggle_relays)
+        self.qualify_btn = ttk.Button(ctrl, text="🔍 Qualifizieren", command=self._qualify)
+        if getattr(self.app.hardware, "qualification", None) is None:
+            self.qualify_btn.config(state="disabled")
+        self.start_btn = ttk.Button(ctrl, text="▶️ Alle starten", command=self._start_all)
+        self.stop_btn = ttk.Button(ctrl, text="⏹ Alle stoppen", command=self._stop_all, state="disabled")
+        self.archive_btn = ttk.Button(ctrl, text="📂 Archiv öffnen", command=self._open_archive_folder)
+        self.timer_label = ttk.Label(ctrl, text="Keine Sitzung aktiv")
+
+        self.toggle_btn.pack(side="left", padx=5)
+        self.qualify_btn.pack(side="left", padx=5)
+        self.start_btn.pack(side="left", padx=5)
+        self.stop_btn.pack(side="left", padx=5)
+        self.archive_btn.pack(side="left", padx=5)
+        self.timer_label.pack(side="right", padx=5)
+
+    def _open_archive_folder(self):
+        path = str(self.app.config.config.archive_path)
+        try:
+            if sys.platform == "win32":
+                subprocess.Popen(["explorer", os.path.normpath(path)])
+            elif sys.platform == "darwin":
+                subprocess.Popen(["open", path])
+            else:
+                subprocess.Popen(["xdg-open", path])
+        except Exception as e:
+            messagebox.showerror("Fehler", f"Ordner konnte nicht geöffnet werden: {e}")
+
+    def _toggle_relays(self):
+        if not messagebox.askyesno("Sicherheitsabfrage", "Relais manuell toggeln? Nur bei Bedarf."):
+            return
+        self.app.hardware.relay_sequencer.toggle_all()
+
+    def _qualify(self):
+        channels = [ch for ch in self.channel_widgets if ch not in self.sessions]
+        if not channels:
+            messagebox.showinfo("Qualifizierung", "Alle Steckplätze haben eine laufende Sitzung.")
+            return
+        # Relais der freien Kanäle werden direkt geschaltet -> keine Starts/Toggles währenddessen
+        result = {}
+        self._qualifying = result
+        self._swapped_while_qualifying.clear()
+        self.qualify_btn.config(state="disabled")
+        self._update_controls()
+        runner = self.app.hardware.qualification
+
+        def run():
+            try:
+                result["report"] = runner.run(channels)
+            except Exception as e:
+                result["error"] = e
+
+        threading.Thread(target=run, name="Qualification", daemon=True).start()
+        self._poll_qualification(result)
+
+    def _poll_qualification(self, result):
+        if not result:
+            self.after(100, self._poll_qualification, result)
+            return
+        self._qualifying = None
+        self.qualify_btn.config(state="normal")
+        self._update_controls()
+        if "error" in result:
+            messagebox.showerror("Fehler", f"Qualifizierung fehlgeschlagen: {result['error']}")
+            return
+        for channel, slot in result["report"].slots.items():
+            if channel in self._swapped_while_qualifying:
+                continue  # Sensor während des Laufs getauscht -> Ergebnis verwerfen
+            self.qualification[channel] = slot
+            self.channel_widgets[channel].set_qualification(slot)
+
+    def _clear_qualification(self, channel: int):
+        if self.qualification.pop(channel, None) is not None:
+            self.channel_widgets[channel].set_qualification(None)
+
+    def _qualification_allows(self, channel: int, auto: bool) -> bool:
+        slot = self.qualification.get(channel)
+        if slot is not None and slot.passed:
+            return True
+        if auto:
+            return slot is None and not self._qualification_required()
+        if slot is not None:
+            return messagebox.askyesno("Qualifizierung", f"Kanal {channel+1}: {slot.verdict} ({slot.reason}).\nTrotzdem starten?")
+        if self._qualification_required():
+            messagebox.showerror("Fehler", f"Kanal {channel+1}: bitte zuerst qualifizieren")
+            return False
+        return True
+
+    def _qualification_required(self) -> bool:
+        return bool(self.app.config.config.qualification.get("required", False))
+
+    def _start_all(self):
+        required = self._qualification_required()
+        for channel in self.channel_widgets:
+            if channel in self.sessions:
+                continue
+            slot = self.qualification.get(channel)
+            # Nur Steckplätze mit GO (ohne Pflicht auch noch nicht qualifizierte)
+            if (slot is None and not required) or (slot is not None and slot.passed):
+                self._start_session(channel)
+
+    def _stop_all(self):
+        for channel in list(self.sessions):
+            self._stop_session(channel)
+
+    def _start_session(self, channel: int, auto: bool = False):
+        if channel in self.sessions or self._qualifying is not None:
+            return
+        if not self._qualification_allows(channel, auto):
+            return
+        widget = self.channel_widgets[channel]
+        cfg = self.app.config.config
+        hours = widget.duration_hours()
+        if hours is None:
+            if not auto:
+                messagebox.showerror("Fehler", f"Kanal {channel+1}: ungültige Testdauer")
+                return
+            hours = cfg.test_duration
+        session = ChannelSession(
+            channel=channel,
+            serial_number=widget.serial_number,
+            start_time=datetime.now(),
+            start_mono=time.monotonic(),
+            duration_secs=hours * 3600,
+        )
+        self.app.serial_numbers[channel] = session.serial_number
+        self.app.hardware.statistics.reset([channel])
+        self.archive.base_path = cfg.archive_path
+        self.archive.open_channel(channel, session.start_time, session.serial_number, cfg.dict())
+        self.sessions[channel] = session
+        self.app.hardware.relay_sequencer.start_channel(channel)
+        widget.set_session_running(True)
+        self._update_controls()
+
+    def _stop_session(self, channel: int):
+        session = self.sessions.pop(channel, None)
+        if session is None:
+            return
+        self.app.hardware.relay_sequencer.stop_channel(channel)
+        self._write_summary(session)
+        self.archive.close_channel(channel)
+        self.app.serial_numbers[channel] = ""
+        self._clear_qualification(channel)
+        self.channel_widgets[channel].set_session_running(False)
+        self._update_controls()
+
+    def _update_controls(self):
+        active = bool(self.sessions)
+        qualifying = self._qualifying is not None
+        self.start_btn.config(state="normal" if len(self.sessions) < len(self.channel_widgets) and not qualifying else "disabled")
+        self.stop_btn.config(state="normal" if active else "disabled")
+        # Manuelles Toggeln würde laufende Sitzungen bzw. die Qualifizierung stören
+        self.toggle_btn.config(state="disabled" if active or qualifying else "normal")
+
+    def _on_config_changed(self, cfg):
+        # Kann aus dem ConfigWatcher-Thread kommen -> Übernahme im Tk-Loop
+        self._pending_config = cfg
+
+    def _apply_pending_config(self):
+        cfg, self._pending_config = self._pending_config, None
+        if cfg is None:
+            return
+        for w in self.channel_widgets.values():
+            w.set_default_duration(cfg.test_duration)
+        self.config_label.config(text=self._config_text(cfg))
+
+    def _on_presence_changed(self, channel: int, present: bool):
+        # Nur echte Steck-/Zieh-Flanken (Lesefehler/Strom ~0), keine Bandverletzungen.
+        # Erfassungsthread -> Übernahme im Tk-Loop (list.append ist atomar)
+        self._pending_swaps.append((channel, present))
+
+    def _apply_pending_swaps(self):
+        swaps, self._pending_swaps = self._pending_swaps, []
+        stop_on_remove = bool(self.app.config.config.sessions.get("stop_on_remove", True))
+        for channel, present in swaps:
+            widget = self.channel_widgets.get(channel)
+            if widget is None:
+                continue
+            # Ergebnis gehört zum alten Sensor
+            self._clear_qualification(channel)
+            if self._qualifying is not None:
+                self._swapped_while_qualifying.add(channel)
+            if present:
+                # Neuer Sensor im freien Steckplatz: SN-Feld für Scanner/Eingabe bereit
+                if channel not in self.sessions:
+                    widget.focus_serial()
+            elif stop_on_remove and channel in self.sessions:
+                self._stop_session(channel)
+
+    def _on_acquired(self, scheduled: float):
+        # Läuft im Erfassungsthread; geschrieben werden nur Kanäle mit offener Sitzung
+        if self.archive.is_open:
+            self._save_csv()
+
+    def _update_loop(self):
+        # Nur Anzeige; die Erfassung läuft im AcquisitionLoop der Hardware
+        self._apply_pending_config()
+        self._apply_pending_swaps()
+        self._update_channels()
+        self._update_errors()
+        self._update_sessions()
+        self.after(self.app.config.config.update_interval, self._update_loop)
+
+    def _update_channels(self):
+        statistics = self.app.hardware.statistics.channels
+        for i, w in self.channel_widgets.items():
+            data = self.app.hardware.sensor_manager.sensors[i]
+            w.update_from_data(data)
+            w.update_statistics(statistics.get(i))
+
+    def _update_errors(self):
+        lines = []
+        for i, s in self.app.hardware.sensor_manager.sensors.items():
+            message = ERROR_MESSAGES.get(s.status)
+            if message:
+                lines.append(f"Kanal {i+1}: {message}")
+        text = "\n".join(lines)
+        if text == self._error_text:
+            return  # Text-Widget nur bei Änderung neu füllen
+        self._error_text = text
+        self.error_text.config(state="normal")
+        self.error_text.delete("1.0", "end")
+        self.error_text.insert("end", text)
+        self.error_text.config(state="disabled")
+
+    def _update_sessions(self):
+        sensors = self.app.hardware.sensor_manager.sensors
+        # Während der Qualifizierung keine Auto-Starts; Flanken werden danach ausgewertet
+        for channel, widget in ([] if self._qualifying is not None else self.channel_widgets.items()):
+            # Auto-Start, sobald ein Sensor mit eingetragener SN erkannt wird
+            attached = sensors[channel].attached
+            if attached and not self._was_attached[channel] and widget.auto_start and widget.serial_number:
+                self._start_session(channel, auto=True)
+            self._was_attached[channel] = attached
+
+        for channel, session in list(self.sessions.items()):
+            remaining = session.remaining()
+            self.channel_widgets[channel].update_session(remaining)
+            if remaining <= 0:
+                self._stop_session(channel)
+
+        if self.sessions:
+            next_end = min(s.remaining() for s in self.sessions.values())
+            self.timer_label.config(text=f"{len(self.sessions)}/{CHANNEL_COUNT} aktiv – nächstes Ende in {timedelta(seconds=int(next_end))}")
+        else:
+            self.timer_label.config(text="Keine Sitzung aktiv")
+
+    def _write_summary(self, session: ChannelSession):
+        run_info = {
+            "start": session.start_time.isoformat(),
+            "end": datetime.now().isoformat(),
+            "duration_s": round(session.elapsed(), 1),
+        }
+        self.archive.write_summary(self.app.hardware.statistics.summary([session.channel]), run_info)
+
+    def _save_csv(self):
+        self.archive.write_samples(self.app.hardware.sensor_manager.sensors)
+
+    def _open_config_editor(self):
+        from gui.config_editor import open_config_editor
+        open_config_editor(self)
@@ -0,0 +1,100 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+from hardware.realtime import RealtimeController
+from hardware.scheduler import FixedRateScheduler
+
+logger = logging.getLogger(__name__)
+
+
+class AcquisitionLoop:
+    """
+    Führt die Messwerterfassung in einem eigenen Thread mit fester Rate aus.
+
+    Pro Zyklus wird `update` (z.B. HardwareManager.update_sensors) aufgerufen und
+    anschließend jeder registrierte Listener mit dem geplanten Zyklusstart; Listener
+    (Archiv, Statistik, ...) laufen damit im Erfassungstakt und unabhängig von der GUI.
+
+    Args:
+        update: Erfassungsfunktion eines Zyklus.
+        period: Abtastperiode in Sekunden.
+        scheduler: Optionaler, vorkonfigurierter FixedRateScheduler.
+        realtime: Optionaler RealtimeController; wird beim Start im Erfassungsthread
+                  angewendet und übernimmt den Idle-Hook des Schedulers.
+    """
+    def __init__(
+        self,
+        update: Callable[[], None],
+        period: float,
+        scheduler: Optional[FixedRateScheduler] = None,
+        realtime: Optional[RealtimeController] = None
+    ):
+        self.update = update
+        self.scheduler = scheduler or FixedRateScheduler(period)
+        self.realtime = realtime
+        if realtime is not None:
+            self.scheduler.idle = realtime.between_cycles
+        self._listeners: List[Callable[[float], None]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(self, callback: Callable[[float], None]) -> None:
+        """Registriert einen Callback, der nach jedem Zyklus im Erfassungsthread läuft."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[float], None]) -> None:
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _cycle(self, scheduled: float) -> None:
+        self.update()
+        for callback in list(self._listeners):
+            try:
+                callback(scheduled)
+            except Exception as e:
+                logger.error("Fehler in Erfassungs-Listener: %s", e, exc_info=True)
+
+    def _run(self) -> None:
+        if self.realtime is not None:
+            self.realtime.enter(self.scheduler)
+        try:
+            self.scheduler.run(self._cycle)
+        finally:
+            if self.realtime is not None:
+                self.realtime.leave()
+
+    @property
+    def native_id(self) -> Optional[int]:
+        """Thread-ID des Erfassungsthreads (None, solange er nicht läuft)."""
+        return self._thread.native_id if self._thread else None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="Acquisition", daemon=True)
+        self._thread.start()
+        logger.info("Erfassung gestartet: Periode %.0f ms", self.scheduler.period * 1000)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wartet auf das Ende des Erfassungsthreads (z.B. wenn die Wartefunktion des
+        Schedulers Stop meldet).
+
+        Returns:
+            True, wenn der Thread beendet ist.
+        """
+        if self._thread:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self.scheduler.stop()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        stats = self.scheduler.stats()
+        jitter = self.scheduler.jitter()
+        logger.info(
+            "Erfassung beendet: %s Zyklen, %s Overruns, Jitter p99 %.0f µs, max %.0f µs",
+            stats['cycles'], stats['overruns'], jitter['p99'] * 1e6, jitter['max'] * 1e6
+        )
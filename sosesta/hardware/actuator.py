@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional, Union
+from hardware.led_strip import LEDStripController
+from hardware.relays import RelayController
+
+logger = logging.getLogger(__name__)
+
+
+class OutputActuator:
+    """
+    Eigener Thread für alle Anzeige- und Schaltausgaben (LED-Streifen, Relais).
+
+    Aufrufer schreiben nur in einen Soll-Zustandspuffer (`set_color`, `set_relay`) und
+    kehren sofort zurück. Der Actuator-Thread übernimmt geänderte Sollwerte, führt
+    strip.show() nur bei tatsächlich geänderten Pixeln aus (höchstens alle
+    `min_interval` Sekunden) und misst die Dauer jeder Ausgabe.
+
+    Die Methoden `set_color` und `update` entsprechen der Schnittstelle von
+    LEDStripController, sodass der SensorManager den Actuator direkt als
+    `led_controller` verwenden kann.
+
+    Args:
+        led_strip: LEDStripController für die Statusanzeige.
+        relays: Optionaler RelayController für manuelle Relaisbefehle.
+        min_interval: Minimaler Abstand (s) zwischen zwei strip.show()-Aufrufen.
+    """
+    def __init__(self, led_strip: LEDStripController, relays: Optional[RelayController] = None, min_interval: float = 0.05):
+        self.led_strip = led_strip
+        self.relays = relays
+        self.min_interval = min_interval
+        self._led_target: Dict[int, str] = {}
+        self._relay_target: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_show = 0.0
+        # Latenzstatistik der LED-Ausgabe
+        self.show_count = 0
+        self.show_last = 0.0
+        self.show_max = 0.0
+        self._show_total = 0.0
+
+    # --- Soll-Zustand (nicht blockierend) -------------------------------------
+
+    def set_color(self, index: int, status: str) -> None:
+        """Setzt den Soll-Status einer LED; die Ausgabe erfolgt im Actuator-Thread."""
+        with self._lock:
+            if self._led_target.get(index) == status:
+                return
+            self._led_target[index] = status
+        self._wakeup.set()
+
+    def update(self) -> None:
+        """Fordert eine Ausgabe an (nur wirksam, wenn sich ein Sollwert geändert hat)."""
+        self._wakeup.set()
+
+    def set_relay(self, index: int, state: bool) -> None:
+        """Setzt den Soll-Zustand eines Relais; geschaltet wird im Actuator-Thread."""
+        if self.relays is None:
+            logger.warning("OutputActuator ohne RelayController – Relaisbefehl ignoriert")
+            return
+        with self._lock:
+            self._relay_target[index] = state
+        self._wakeup.set()
+
+    # --- Thread ---------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="OutputActuator", daemon=True)
+        self._thread.start()
+        logger.info("OutputActuator gestartet (min. %.0f ms zwischen LED-Ausgaben)", self.min_interval * 1000)
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._running.clear()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        # Letzten Sollzustand noch ausgeben
+        self._apply()
+        self._flush()
+        stats = self.stats()
+        logger.info(
+            "OutputActuator beendet: %s LED-Ausgaben, Ø %.2f ms, max %.2f ms",
+            stats['show_count'], stats['show_mean'] * 1000, stats['show_max'] * 1000
+        )
+
+    def _run(self) -> None:
+        while self._running.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._running.is_set():
+                break
+            self._apply()
+            wait = self._last_show + self.min_interval - time.monotonic()
+            if wait > 0:
+                # Rate-Limit: weitere Änderungen in diesem Fenster werden gesammelt
+                time.sleep(wait)
+                self._apply()
+            self._flush()
+
+    def _apply(self) -> None:
+        with self._lock:
+            leds, self._led_target = self._led_target, {}
+            relays, self._relay_target = self._relay_target, {}
+        for index, state in relays.items():
+            self.relays.set_relay(index, state)
+        for index, status in leds.items():
+            self.led_strip.set_color(index, status)
+
+    def _flush(self) -> None:
+        start = time.perf_counter()
+        if not self.led_strip.update():
+            return
+        end = time.perf_counter()
+        self._last_show = time.monotonic()
+        duration = end - start
+        self.show_count += 1
+        self.show_last = duration
+        self.show_max = max(self.show_max, duration)
+        self._show_total += duration
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Latenzstatistik der LED-Ausgaben (Sekunden)."""
+        return {
+            "show_count": self.show_count,
+            "show_last": self.show_last,
+            "show_max": self.show_max,
+            "show_mean": self._show_total / self.show_count if self.show_count else 0.0,
+        }
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from hardware.ina219 import INA219SensorManager
+from hardware.redlab import RedLabDAQ
+from hardware.relays import RelayController
+from hardware.scheduler import SampleClock
+from hardware.watchdog import DeadlineExceeded, DeviceWatchdog
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Reading:
+    """Rohmesswerte eines Kanals aus einem Erfassungszyklus (None = nicht gelesen)."""
+    channel: int
+    bus_voltage: Optional[float] = None
+    current: Optional[float] = None
+    power: Optional[float] = None
+    redlab_signal: Optional[float] = None
+    relay_on: bool = False
+    timestamp: float = 0.0   # Unix-Zeit (SampleClock) unmittelbar nach der RedLab-Messung
+    stale: bool = False      # mindestens ein Geräteaufruf hat seine Deadline verfehlt
+
+    def reset(self, relay_on: bool) -> "Reading":
+        """Setzt den Messwert für die Wiederverwendung im nächsten Zyklus zurück."""
+        self.bus_voltage = self.current = self.power = self.redlab_signal = None
+        self.relay_on = relay_on
+        self.timestamp = 0.0
+        self.stale = False
+        return self
+
+
+class AsyncDriver:
+    """
+    Basis für asynchrone Gerätetreiber: blockierende Treiberaufrufe laufen im Worker
+    des DeviceWatchdog des Busses, damit Zugriffe auf denselben Bus serialisiert
+    bleiben, unabhängige Busse aber parallel arbeiten. Jeder Aufruf hat die Deadline
+    des Watchdogs; hängende Geräte werden dort gezählt und eskaliert.
+
+    Args:
+        watchdog: DeviceWatchdog des Busses.
+    """
+    def __init__(self, watchdog: DeviceWatchdog):
+        self.watchdog = watchdog
+
+    @property
+    def timeouts(self) -> int:
+        return self.watchdog.timeouts
+
+    async def call(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Führt fn(*args) im Worker des Busses aus.
+
+        Raises:
+            DeadlineExceeded: Wenn der Aufruf die Deadline überschreitet oder das Gerät blockiert ist.
+        """
+        future = self.watchdog.submit(fn, *args)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.watchdog.deadline)
+        except asyncio.TimeoutError:
+            self.watchdog.miss(f"{fn.__name__}{args}: Deadline {self.watchdog.deadline * 1000:.0f} ms überschritten")
+            raise DeadlineExceeded(f"{self.watchdog.name}: Deadline überschritten")
+        self.watchdog.success()
+        return result
+
+
+class AsyncINA219Driver(AsyncDriver):
+    """INA219-Messungen über TCA9548A auf dem I2C-Bus."""
+    def __init__(self, ina: INA219SensorManager, watchdog: DeviceWatchdog):
+        super().__init__(watchdog)
+        self.ina = ina
+
+    async def read(self, channel: int) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        return await self.call(self.ina.read, channel)
+
+
+class AsyncRedLabDriver(AsyncDriver):
+    """Analogmessungen des RedLab-DAQ über USB."""
+    def __init__(self, redlab: RedLabDAQ, watchdog: DeviceWatchdog):
+        super().__init__(watchdog)
+        self.redlab = redlab
+
+    async def read(self, channel: int) -> Optional[float]:
+        return await self.call(self.redlab.read, channel)
+
+
+class AsyncRelayDriver:
+    """Relaiszustände; gelesen wird nur der gespiegelte Zustand (kein GPIO-Zugriff)."""
+    def __init__(self, relays: RelayController):
+        self.relays = relays
+
+    async def snapshot(self) -> Tuple[bool, ...]:
+        return self.relays.snapshot()
+
+
+class AsyncAcquisitionEngine:
+    """
+    Asynchrone Erfassung aller Kanäle eines Zyklus.
+
+    Die INA219-Messungen (I2C) und die RedLab-Messungen (USB) laufen als zwei
+    nebenläufige Sequenzen auf getrennten Executors, sodass die Zykluszeit gegen die
+    des langsamsten Busses statt gegen die Summe aller Geräte geht. Jeder einzelne
+    Aufruf hat eine eigene Deadline (DeviceWatchdog); verfehlte Aufrufe markieren
+    den Messwert als veraltet (Reading.stale). Die Event-Loop läuft in einem eigenen Thread;
+    `acquire()` ist die synchrone Schnittstelle für den SensorManager.
+    Die Reading-Objekte eines Zyklus werden wiederverwendet; das Ergebnis von
+    `acquire()` gilt daher nur bis zum nächsten Zyklus.
+    Die LED-Ausgabe ist bereits über den OutputActuator entkoppelt und braucht
+    daher keinen eigenen Treiber in der Loop.
+
+    Args:
+        ina: INA219SensorManager.
+        redlab: RedLabDAQ.
+        relays: RelayController.
+        ina_watchdog: DeviceWatchdog des I2C-Busses.
+        redlab_watchdog: DeviceWatchdog des RedLab-DAQ.
+        clock: Zeitbasis für die Messzeitstempel.
+    """
+    def __init__(
+        self,
+        ina: INA219SensorManager,
+        redlab: RedLabDAQ,
+        relays: RelayController,
+        ina_watchdog: DeviceWatchdog,
+        redlab_watchdog: DeviceWatchdog,
+        clock: Optional[SampleClock] = None
+    ):
+        self.clock = clock or SampleClock()
+        self.ina = AsyncINA219Driver(ina, ina_watchdog)
+        self.redlab = AsyncRedLabDriver(redlab, redlab_watchdog)
+        self.relays = AsyncRelayDriver(relays)
+        self.cycle_time = 0.0
+        self._channels: Tuple[int, ...] = ()
+        self._readings: Dict[int, Reading] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="AcquisitionLoop", daemon=True)
+        self._thread.start()
+        logger.info("Asynchrone Erfassung gestartet")
+
+    async def _read_ina(self, channels: List[int], readings: Dict[int, Reading]) -> None:
+        for ch in channels:
+            try:
+                readings[ch].bus_voltage, readings[ch].current, readings[ch].power = await self.ina.read(ch)
+            except DeadlineExceeded:
+                readings[ch].stale = True
+
+    async def _read_redlab(self, channels: List[int], readings: Dict[int, Reading]) -> None:
+        for ch in channels:
+            try:
+                readings[ch].redlab_signal = await self.redlab.read(ch)
+            except DeadlineExceeded:
+                readings[ch].stale = True
+            readings[ch].timestamp = self.clock.now()
+
+    async def cycle(self, channels: List[int]) -> Dict[int, Reading]:
+        """Ein Erfassungszyklus: I2C- und RedLab-Sequenz laufen nebenläufig."""
+        start = time.perf_counter()
+        relay_states = await self.relays.snapshot()
+        if tuple(channels) != self._channels:
+            self._channels = tuple(channels)
+            self._readings = {ch: Reading(channel=ch) for ch in channels}
+        readings = self._readings
+        for ch in channels:
+            readings[ch].reset(relay_states[ch] if ch < len(relay_states) else False)
+        await asyncio.gather(
+            self._read_ina(channels, readings),
+            self._read_redlab(channels, readings),
+        )
+        self.cycle_time = time.perf_counter() - start
+        return readings
+
+    def acquire(self, channels: List[int]) -> Dict[int, Reading]:
+        """Synchroner Einstieg: führt `cycle` in der Event-Loop aus und wartet auf das Ergebnis."""
+        return asyncio.run_coroutine_threadsafe(self.cycle(channels), self._loop).result()
+
+    @property
+    def native_id(self) -> Optional[int]:
+        """Thread-ID der Event-Loop."""
+        return self._thread.native_id
+
+    def shutdown(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(1.0)
+        logger.info("Asynchrone Erfassung beendet")
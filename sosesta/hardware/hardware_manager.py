@@ -1,115 +1,316 @@
-import logging
-from config.config_manager import ConfigManager
-from hardware.tca import init_i2c
-from hardware.ina219 import INA219SensorManager
-from hardware.redlab import RedLabDAQ
-from hardware.relays import RelayController
-from hardware.led_strip import LEDStripController
-from hardware.sensors import SensorManager
-
-logger = logging.getLogger(__name__)
-
-class HardwareManager:
-    """
-    Zentrale Klasse für alle Hardware-Komponenten mit robustem Fehlerhandling und zentraler Konfiguration.
-    """
-    def __init__(self, config: ConfigManager, app):
-        """
-        Args:
-            config: ConfigManager mit allen Hardware-Parametern.
-            app: Haupt-Anwendungsobjekt (für Dashboard, serial_numbers).
-        """
-        self.config = config
-        self.app = app
-        self.relays = RelayController(config)
-
-        try:
-            self._initialize_hardware()
-            channels = self.config.config.sensor_channels
-            self.sensor_manager = SensorManager(
-                channels=channels,
-                ina_manager=self.ina219,
-                redlab_manager=self.redlab,
-                relay_controller=self.relays,
-                led_controller=self.led_strip,
-                dashboard=self.app
-            )
-            self.update_sensors(initial=True)
-            logger.info("HardwareManager erfolgreich initialisiert")
-        except Exception as e:
-            logger.error(f"HardwareManager-Initialisierung fehlgeschlagen: {e}", exc_info=True)
-            raise
-
-    def _initialize_hardware(self):
-        """
-        Initialisiert I2C, Multiplexer, INA219, RedLab und LED-Streifen mit Konfigurationsparametern.
-        """
-        i2c_cfg = self.config.config.i2c
-        self.tca = init_i2c(
-            retries=i2c_cfg["retries"],
-            delay=i2c_cfg["delay"]
-        )
-
-        ina_cfg = self.config.config.ina219
-        self.ina219 = INA219SensorManager(
-            multiplexer=self.tca,
-            calibration=ina_cfg["calibration"],
-            retries=ina_cfg["retries"],
-            retry_delay=ina_cfg["retry_delay"]
-        )
-
-        red_cfg = self.config.config.redlab
-        self.redlab = RedLabDAQ(
-            reconnect_retries=red_cfg["reconnect_retries"],
-            reconnect_delay=red_cfg["reconnect_delay"]
-        )
-        self.redlab.connect()
-
-        led_cfg = self.config.config.led
-        self.led_strip = LEDStripController(
-            num_pixels=led_cfg["count"],
-            pin=led_cfg["pin"],
-            channel=led_cfg["channel"],
-            freq_hz=led_cfg["freq_hz"],
-            dma=led_cfg["dma"],
-            brightness=led_cfg["brightness"],
-            invert=led_cfg["invert"]
-        )
-
-        logger.info("I2C, Multiplexer, INA219, RedLab und LED-Streifen initialisiert")
-
-    def update_sensors(self, initial: bool = False) -> None:
-        """
-        Bulk-Update aller Sensorwerte und Aktualisierung von self.sensor_data.
-        """
-        self.sensor_manager.update_all()
-        self.sensor_data = self.sensor_manager.get_all_data()
-        level = logging.INFO if initial else logging.DEBUG
-        logger.log(level, "Sensor-Daten aktualisiert")
-
-    def read_ina(self, channel: int):
-        """Liest einmalig von INA219 auf dem gegebenen Kanal."""
-        return self.ina219.read(channel)
-
-    def read_redlab(self, channel: int):
-        """Liest einmalig von RedLab DAQ auf dem gegebenen Kanal."""
-        return self.redlab.read(channel)
-
-    def cleanup(self) -> None:
-        """Trennt alle Verbindungen und räumt Ressourcen für alle Hardware-Komponenten auf."""
-        try:
-            self.redlab.disconnect()
-        except Exception as e:
-            logger.warning(f"Fehler beim Trennen von RedLab DAQ: {e}", exc_info=True)
-
-        try:
-            self.relays.cleanup()
-        except Exception as e:
-            logger.warning(f"Fehler beim Cleanup der Relais: {e}", exc_info=True)
-
-        try:
-            self.led_strip.clear()
-        except Exception as e:
-            logger.warning(f"Fehler beim Löschen des LED-Streifens: {e}", exc_info=True)
-
-        logger.info("Hardware-Ressourcen freigegeben")
+import logging
+from functools import partial
+from config.config_manager import ConfigManager
+from hardware.tca import init_i2c
+from hardware.i2c_direct import DirectINA219, init_i2c_dev
+from hardware.ina219 import INA219SensorManager
+from hardware.redlab import RedLabDAQ
+from hardware.relays import RelayController
+from hardware.relay_sequencer import RelaySequencer
+from hardware.response_time import ResponseTimeMonitor
+from hardware.led_strip import LEDStripController
+from hardware.actuator import OutputActuator
+from hardware.sensors import SensorManager
+from hardware.async_engine import AsyncAcquisitionEngine
+from hardware.scheduler import FixedRateScheduler, SampleClock
+from hardware.realtime import RealtimeController
+from hardware.acquisition import AcquisitionLoop
+from hardware.watchdog import DeviceWatchdog
+from hardware.qualification import QualificationRunner
+from hardware.statistics import StatisticsEngine
+from remote.live_server import LiveServer
+from remote.uploader import ArchiveUploader
+
+logger = logging.getLogger(__name__)
+
+class HardwareManager:
+    """
+    Zentrale Klasse für alle Hardware-Komponenten mit robustem Fehlerhandling und zentraler Konfiguration.
+    """
+    def __init__(self, config: ConfigManager, app):
+        """
+        Args:
+            config: ConfigManager mit allen Hardware-Parametern.
+            app: Haupt-Anwendungsobjekt (für Dashboard, serial_numbers).
+        """
+        self.config = config
+        self.app = app
+        self.clock = SampleClock()
+        self.relays = RelayController(config)
+        self.relay_sequencer = RelaySequencer(self.relays, self.config.config.relay_sequencer)
+        self.relay_sequencer.start_thread()
+
+        try:
+            self._initialize_hardware()
+            channels = self.config.config.sensor_channels
+            self.sensor_manager = SensorManager(
+                channels=channels,
+                ina_manager=self.ina219,
+                redlab_manager=self.redlab,
+                relay_controller=self.relays,
+                led_controller=self.actuator,
+                dashboard=self.app,
+                engine=self.engine,
+                clock=self.clock,
+                watchdogs=self.watchdogs
+            )
+            self.config.add_listener(self.sensor_manager.rules.reload)
+            self.statistics = StatisticsEngine(channels, self.config.config)
+            self.config.add_listener(self.statistics.reload)
+            self._initialize_response_monitor()
+            self.update_sensors(initial=True)
+            period = self.config.config.update_interval / 1000.0
+            self._initialize_realtime()
+            self.acquisition = AcquisitionLoop(
+                self.update_sensors,
+                period=period,
+                scheduler=FixedRateScheduler(period, spin=self.realtime.spin if self.realtime else 0.0),
+                realtime=self.realtime
+            )
+            self.acquisition.add_listener(lambda scheduled: self.statistics.update(self.sensor_manager.sensors))
+            self.qualification = QualificationRunner(self.sensor_manager, self.acquisition, self.redlab, self.relays, self.config)
+            self._initialize_live_server()
+            self._initialize_uploader()
+            self.acquisition.start()
+            logger.info("HardwareManager erfolgreich initialisiert")
+        except Exception as e:
+            logger.error("HardwareManager-Initialisierung fehlgeschlagen: %s", e, exc_info=True)
+            raise
+
+    def _initialize_hardware(self):
+        """
+        Initialisiert I2C, Multiplexer, INA219, RedLab und LED-Streifen mit Konfigurationsparametern.
+        """
+        i2c_cfg = self.config.config.i2c
+        sensor_factory = None
+        if i2c_cfg.get("backend", "blinka") == "i2c_dev":
+            self.tca = init_i2c_dev(
+                bus=int(i2c_cfg.get("bus", 1)),
+                speed=int(i2c_cfg.get("speed", 0)),
+                mux_address=int(i2c_cfg.get("mux_address", 0x70))
+            )
+            sensor_factory = DirectINA219
+        else:
+            self.tca = init_i2c(
+                retries=i2c_cfg["retries"],
+                delay=i2c_cfg["delay"]
+            )
+
+        ina_cfg = self.config.config.ina219
+        self.ina219 = INA219SensorManager(
+            multiplexer=self.tca,
+            calibration=ina_cfg["calibration"],
+            retries=ina_cfg["retries"],
+            retry_delay=ina_cfg["retry_delay"],
+            adc_profile=ina_cfg["adc_profile"],
+            channel_profiles=ina_cfg["channel_profiles"],
+            sensor_factory=sensor_factory
+        )
+
+        red_cfg = self.config.config.redlab
+        self.redlab = RedLabDAQ(
+            reconnect_retries=red_cfg["reconnect_retries"],
+            reconnect_delay=red_cfg["reconnect_delay"]
+        )
+        self.redlab.connect()
+
+        led_cfg = self.config.config.led
+        self.led_strip = LEDStripController(
+            num_pixels=led_cfg["count"],
+            pin=led_cfg["pin"],
+            channel=led_cfg["channel"],
+            freq_hz=led_cfg["freq_hz"],
+            dma=led_cfg["dma"],
+            brightness=led_cfg["brightness"],
+            invert=led_cfg["invert"]
+        )
+
+        self.actuator = OutputActuator(
+            led_strip=self.led_strip,
+            relays=self.relays,
+            min_interval=self.config.config.actuator["led_min_interval"]
+        )
+        self.actuator.start()
+
+        acq_cfg = self.config.config.acquisition
+        escalate_after = int(acq_cfg["escalate_after"])
+        reset_timeout = float(acq_cfg["reset_timeout"])
+        self.watchdogs = {
+            "ina219": DeviceWatchdog("INA219", float(acq_cfg["ina219_deadline"]), escalate_after, self.ina219.reset, reset_timeout),
+            "redlab": DeviceWatchdog("RedLab", float(acq_cfg["redlab_deadline"]), escalate_after, partial(self.redlab.reset, reset_timeout), reset_timeout),
+        }
+        self.engine = None
+        if acq_cfg["engine"] == "async":
+            self.engine = AsyncAcquisitionEngine(
+                ina=self.ina219,
+                redlab=self.redlab,
+                relays=self.relays,
+                ina_watchdog=self.watchdogs["ina219"],
+                redlab_watchdog=self.watchdogs["redlab"],
+                clock=self.clock
+            )
+
+        logger.info("I2C, Multiplexer, INA219, RedLab und LED-Streifen initialisiert")
+
+    def _initialize_response_monitor(self):
+        """
+        Aktiviert (falls konfiguriert) die Sprungantwort-Messung bei jeder Relaisflanke.
+        """
+        self.response_monitor = None
+        resp_cfg = self.config.config.response
+        if not resp_cfg.get("enabled", False):
+            return
+        self.response_monitor = ResponseTimeMonitor(
+            redlab=self.redlab,
+            channels=self.config.config.sensor_channels,
+            config=resp_cfg,
+            initial_levels=lambda ch: self.sensor_manager.sensors[ch].redlab_signal
+        )
+        self.relay_sequencer.set_pretrigger(self.response_monitor.arm, self.response_monitor.lead, self.response_monitor.arm_timeout)
+        self.relay_sequencer.add_listener(self.response_monitor.on_relay_event)
+        self.response_monitor.start()
+
+    def _initialize_live_server(self):
+        """
+        Startet (falls konfiguriert) den Live-Server und versorgt ihn im Erfassungstakt.
+        """
+        self.live_server = None
+        live_cfg = self.config.config.live_server
+        if not live_cfg.get("enabled", False):
+            return
+        try:
+            self.live_server = LiveServer(
+                host=live_cfg["host"],
+                port=int(live_cfg["port"]),
+                bench_name=live_cfg["bench_name"],
+                client_queue=int(live_cfg["client_queue"]),
+                keepalive=float(live_cfg["keepalive"])
+            )
+        except OSError as e:
+            # Belegter Port o.ä. darf den Prüfstand nicht blockieren
+            logger.error("Live-Server konnte nicht gestartet werden: %s", e)
+            return
+        self.live_server.start()
+        self.acquisition.add_listener(lambda scheduled: self.live_server.publish(self.sensor_manager.sensors))
+
+    def _initialize_realtime(self):
+        """
+        Bereitet (falls konfiguriert) den Echtzeitbetrieb des Erfassungspfads vor:
+        Erfassungsthread, Event-Loop der Engine und Watchdog-Worker.
+        """
+        self.realtime = None
+        rt_cfg = self.config.config.realtime
+        if not rt_cfg.get("enabled", False):
+            return
+        self.realtime = RealtimeController.from_config(rt_cfg)
+        if self.engine:
+            self.realtime.add_thread(lambda: self.engine.native_id)
+        for watchdog in self.watchdogs.values():
+            self.realtime.add_thread(lambda watchdog=watchdog: watchdog.native_id)
+
+    def _initialize_uploader(self):
+        """
+        Startet (falls konfiguriert) den Upload an den zentralen Collector und liefert
+        ihm im Erfassungstakt periodisch die Live-Zusammenfassung.
+        """
+        self.uploader = None
+        up_cfg = self.config.config.uploader
+        if not up_cfg.get("enabled", False):
+            return
+        try:
+            self.uploader = ArchiveUploader(
+                url=up_cfg["url"],
+                archive_path=self.config.config.archive_path,
+                spool_dir=up_cfg["spool_dir"],
+                bench_name=up_cfg["bench_name"],
+                spool_limit=int(up_cfg["spool_limit"]),
+                batch_bytes=int(up_cfg["batch_bytes"]),
+                batch_age=float(up_cfg["batch_age"]),
+                chunk_size=int(up_cfg["chunk_size"]),
+                bandwidth=float(up_cfg["bandwidth"]),
+                cpu_share=float(up_cfg["cpu_share"]),
+                compress_level=int(up_cfg["compress_level"]),
+                retry_max=float(up_cfg["retry_max"])
+            )
+        except (ValueError, OSError) as e:
+            logger.error("Uploader konnte nicht gestartet werden: %s", e)
+            return
+        # Beim Start ist noch keine Sitzung offen: alles im Archiv ist abgeschlossen
+        self.uploader.scan()
+        self.uploader.start()
+
+        interval = float(up_cfg["summary_interval"])
+        next_summary = [0.0]
+
+        def publish_summary(scheduled: float) -> None:
+            if scheduled < next_summary[0]:
+                return
+            next_summary[0] = scheduled + interval
+            self.uploader.submit_summary(self.statistics.summary(), self.clock.to_wall(scheduled))
+
+        self.acquisition.add_listener(publish_summary)
+
+    def update_sensors(self, initial: bool = False) -> None:
+        """
+        Bulk-Update aller Sensorwerte und Aktualisierung von self.sensor_data.
+        """
+        self.sensor_manager.update_all()
+        self.sensor_data = self.sensor_manager.get_all_data()
+        level = logging.INFO if initial else logging.DEBUG
+        logger.log(level, "Sensor-Daten aktualisiert")
+
+    def read_ina(self, channel: int):
+        """Liest einmalig von INA219 auf dem gegebenen Kanal."""
+        return self.ina219.read(channel)
+
+    def read_redlab(self, channel: int):
+        """Liest einmalig von RedLab DAQ auf dem gegebenen Kanal."""
+        return self.redlab.read(channel)
+
+    def cleanup(self) -> None:
+        """Trennt alle Verbindungen und räumt Ressourcen für alle Hardware-Komponenten auf."""
+        self.acquisition.stop()
+
+        if self.live_server:
+            self.live_server.stop()
+
+        if self.uploader:
+            self.uploader.stop()
+
+        try:
+            self.relay_sequencer.shutdown()
+        except Exception as e:
+            logger.warning("Fehler beim Beenden des RelaySequencers: %s", e, exc_info=True)
+
+        if self.response_monitor:
+            self.response_monitor.stop()
+
+        if self.engine:
+            self.engine.shutdown()
+
+        for watchdog in self.watchdogs.values():
+            stats = watchdog.stats()
+            logger.info("Watchdog %s: %s verfehlte Deadlines, %s Resets", watchdog.name, stats['timeouts'], stats['resets'])
+            watchdog.shutdown()
+
+        try:
+            self.redlab.disconnect()
+        except Exception as e:
+            logger.warning("Fehler beim Trennen von RedLab DAQ: %s", e, exc_info=True)
+
+        try:
+            self.relays.cleanup()
+        except Exception as e:
+            logger.warning("Fehler beim Cleanup der Relais: %s", e, exc_info=True)
+
+        try:
+            self.actuator.stop()
+        except Exception as e:
+            logger.warning("Fehler beim Beenden des OutputActuators: %s", e, exc_info=True)
+
+        try:
+            self.led_strip.clear()
+        except Exception as e:
+            logger.warning("Fehler beim Löschen des LED-Streifens: %s", e, exc_info=True)
+
+        logger.info("Hardware-Ressourcen freigegeben")
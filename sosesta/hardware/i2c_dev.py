@@ -0,0 +1,218 @@
+import ctypes
+import fcntl
+import logging
+import os
+import threading
+from typing import List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# linux/i2c-dev.h, linux/i2c.h
+I2C_RDWR = 0x0707
+I2C_M_RD = 0x0001
+I2C_RDWR_MAX_MSGS = 42
+
+# Laufzeit-Baudrate des alten i2c_bcm2708-Treibers; beim i2c-bcm2835-Treiber nur per Device Tree
+_BAUDRATE_PARAMETER = "/sys/module/i2c_bcm2708/parameters/baudrate"
+
+
+class _I2CMsg(ctypes.Structure):
+    _fields_ = [
+        ("addr", ctypes.c_uint16),
+        ("flags", ctypes.c_uint16),
+        ("len", ctypes.c_uint16),
+        ("buf", ctypes.POINTER(ctypes.c_uint8)),
+    ]
+
+
+class _I2CRdwrData(ctypes.Structure):
+    _fields_ = [
+        ("msgs", ctypes.POINTER(_I2CMsg)),
+        ("nmsgs", ctypes.c_uint32),
+    ]
+
+
+class I2CMessage:
+    """
+    Teilnachricht einer I2C-Transaktion: Schreiben von `data` oder Lesen von `length`
+    Bytes. Nach der Ausführung steht das Leseergebnis in `data`.
+    """
+    __slots__ = ("addr", "read", "data")
+
+    def __init__(self, addr: int, read: bool, data: bytes):
+        self.addr = addr
+        self.read = read
+        self.data = data
+
+    @classmethod
+    def write(cls, addr: int, data: Sequence[int]) -> "I2CMessage":
+        return cls(addr, False, bytes(data))
+
+    @classmethod
+    def read_bytes(cls, addr: int, length: int) -> "I2CMessage":
+        return cls(addr, True, bytes(length))
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+class Transaction:
+    """
+    Folge von I2C-Nachrichten, die als eine kombinierte Übertragung (Repeated Start,
+    ein einziger Systemaufruf) ausgeführt wird. Eine Transaktion wird einmal
+    vorbereitet und beliebig oft ausgeführt; das Backend legt seine nativen Puffer
+    beim ersten Ausführen an und verwendet sie danach weiter.
+
+    Args:
+        messages: Nachrichten in Busreihenfolge (max. 42, Grenze von I2C_RDWR).
+    """
+    __slots__ = ("messages", "native")
+
+    def __init__(self, messages: List[I2CMessage]):
+        if not 0 < len(messages) <= I2C_RDWR_MAX_MSGS:
+            raise ValueError(f"Transaktion mit {len(messages)} Nachrichten (erlaubt 1..{I2C_RDWR_MAX_MSGS})")
+        self.messages = messages
+        self.native = None
+
+    def reads(self) -> List[bytes]:
+        """Leseergebnisse der letzten Ausführung in Nachrichtenreihenfolge."""
+        return [m.data for m in self.messages if m.read]
+
+
+class I2CDevBus:
+    """
+    I2C-Transport direkt über `/dev/i2c-<bus>` und das I2C_RDWR-ioctl des Kernels,
+    ohne Blinka/busio. Schreiben des Registerzeigers und Lesen des Registers laufen
+    als kombinierte Nachricht in einer Bustransaktion; mehrere Register eines
+    Geräts können in einem einzigen ioctl gebündelt werden. Ein Multiplexer-Wechsel
+    wirkt erst nach dem STOP und braucht daher eine eigene Transaktion.
+
+    Threadsicher: Transaktionen werden über einen Lock serialisiert.
+
+    Args:
+        bus: Nummer des I2C-Adapters (Raspberry Pi: 1).
+        speed: Gewünschter Bustakt in Hz (0 = unverändert), siehe `set_bus_speed`.
+    """
+    def __init__(self, bus: int = 1, speed: int = 0):
+        self.bus = bus
+        self.path = f"/dev/i2c-{bus}"
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self.transactions = 0
+        self.open()
+        if speed:
+            self.set_bus_speed(speed)
+
+    def open(self) -> None:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR)
+            logger.info("I2C-Adapter %s geöffnet (Bustakt %s Hz)", self.path, self.bus_speed or "unbekannt")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def reopen(self) -> None:
+        """Schließt und öffnet den Adapter neu (Watchdog-Eskalation)."""
+        self.close()
+        self.open()
+
+    # ----------------------------------------------------------------- Transfer
+
+    @staticmethod
+    def _prepare(transaction: Transaction):
+        messages = transaction.messages
+        msgs = (_I2CMsg * len(messages))()
+        buffers = []
+        for msg, native in zip(messages, msgs):
+            buf = (ctypes.c_uint8 * max(1, len(msg)))(*([] if msg.read else msg.data))
+            buffers.append(buf)
+            native.addr = msg.addr
+            native.flags = I2C_M_RD if msg.read else 0
+            native.len = len(msg)
+            native.buf = buf
+        data = _I2CRdwrData(msgs, len(messages))
+        # Puffer müssen so lange leben wie die Transaktion
+        return data, msgs, buffers
+
+    def execute(self, transaction: Transaction) -> List[bytes]:
+        """
+        Führt eine Transaktion als ein ioctl aus.
+
+        Returns:
+            Leseergebnisse in Nachrichtenreihenfolge.
+
+        Raises:
+            OSError: NACK, Arbitrierungsverlust oder Adapterfehler.
+        """
+        if transaction.native is None:
+            transaction.native = self._prepare(transaction)
+        data, _, buffers = transaction.native
+        with self._lock:
+            if self._fd is None:
+                raise OSError(f"I2C-Adapter {self.path} nicht geöffnet")
+            fcntl.ioctl(self._fd, I2C_RDWR, data)
+            self.transactions += 1
+        for msg, buf in zip(transaction.messages, buffers):
+            if msg.read:
+                msg.data = bytes(buf)
+        return transaction.reads()
+
+    def write(self, addr: int, data: Sequence[int]) -> None:
+        self.execute(Transaction([I2CMessage.write(addr, data)]))
+
+    def write_read(self, addr: int, data: Sequence[int], length: int) -> bytes:
+        """Schreibt `data` (z.B. Registerzeiger) und liest `length` Bytes mit Repeated Start."""
+        return self.execute(Transaction([I2CMessage.write(addr, data), I2CMessage.read_bytes(addr, length)]))[0]
+
+    def probe(self, addr: int) -> bool:
+        try:
+            self.execute(Transaction([I2CMessage.read_bytes(addr, 1)]))
+            return True
+        except OSError:
+            return False
+
+    def scan(self) -> List[int]:
+        return [addr for addr in range(0x08, 0x78) if self.probe(addr)]
+
+    # ---------------------------------------------------------------- Bustakt
+
+    @property
+    def bus_speed(self) -> Optional[int]:
+        """Aktueller Bustakt in Hz laut Device Tree bzw. Treiberparameter, sonst None."""
+        try:
+            with open(f"/sys/class/i2c-adapter/i2c-{self.bus}/of_node/clock-frequency", "rb") as f:
+                return int.from_bytes(f.read(4), "big")
+        except OSError:
+            pass
+        try:
+            with open(_BAUDRATE_PARAMETER) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def set_bus_speed(self, speed: int) -> bool:
+        """
+        Setzt den Bustakt zur Laufzeit, soweit der Treiber das erlaubt (i2c_bcm2708).
+        Beim i2c-bcm2835-Treiber ist der Takt nur über `dtparam=i2c_arm_baudrate=<Hz>`
+        in der config.txt einstellbar; dann wird nur gewarnt.
+
+        Returns:
+            True, wenn der Takt gesetzt wurde oder bereits stimmt.
+        """
+        if self.bus_speed == speed:
+            return True
+        try:
+            with open(_BAUDRATE_PARAMETER, "w") as f:
+                f.write(str(speed))
+            logger.info("I2C-Bustakt auf %d Hz gesetzt", speed)
+            return True
+        except OSError:
+            logger.warning(
+                "I2C-Bustakt %d Hz nicht zur Laufzeit einstellbar (aktuell %s Hz), "
+                "dtparam=i2c_arm_baudrate=%d in config.txt setzen",
+                speed, self.bus_speed or "unbekannt", speed
+            )
+            return False
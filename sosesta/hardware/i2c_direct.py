@@ -0,0 +1,268 @@
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from hardware.i2c_dev import I2CDevBus, I2CMessage, Transaction
+
+logger = logging.getLogger(__name__)
+
+TCA9548A_ADDRESS = 0x70
+INA219_ADDRESS = 0x40
+
+# INA219-Register
+REG_CONFIG = 0x00
+REG_SHUNT_VOLTAGE = 0x01
+REG_BUS_VOLTAGE = 0x02
+REG_POWER = 0x03
+REG_CURRENT = 0x04
+REG_CALIBRATION = 0x05
+
+# Konfigurationsregister: BRNG Bit 13, PG Bit 11-12, BADC Bit 7-10, SADC Bit 3-6, MODE Bit 0-2
+_BADC_SHIFT, _SADC_SHIFT = 7, 3
+_ADC_MASK = 0x0F
+_MODE_MASK = 0x07
+_ADC_12BIT = 0x03
+_MODE_SANDBVOLT_CONTINUOUS = 0x07
+
+# Kalibrierprofil -> (Kalibrierwert, Strom-LSB in mA, Leistungs-LSB in W, BRNG, PG) wie adafruit_ina219
+CALIBRATIONS = {
+    "16V_400mA": (8192, 0.05, 0.001, 0, 0),
+    "32V_2A": (4096, 0.1, 0.002, 1, 3),
+}
+
+
+def _signed(raw: int) -> int:
+    return raw - 0x10000 if raw & 0x8000 else raw
+
+
+class DirectChannel:
+    """Kanal-Proxy des DirectTCA9548A (Gegenstück zu adafruit_tca9548a.TCA9548A_Channel)."""
+    __slots__ = ("tca", "channel")
+
+    def __init__(self, tca: "DirectTCA9548A", channel: int):
+        self.tca = tca
+        self.channel = channel
+
+    @property
+    def bus(self):
+        return self.tca.bus
+
+
+class DirectTCA9548A:
+    """
+    TCA9548A-Multiplexer auf dem i2c-dev-Transport. Der zuletzt gewählte Kanal wird
+    gemerkt; umgeschaltet wird nur, wenn sich der Kanal ändert. Die Kanalwahl ist eine
+    eigene Transaktion, da der TCA9548A den neuen Kanal erst mit dem STOP übernimmt.
+    Prüfen des gemerkten Kanals, Umschalten, Transaktion und Aktualisieren laufen unter
+    `lock`, damit kein anderer Thread den Multiplexer dazwischen umschalten kann.
+
+    Args:
+        bus: I2CDevBus (oder ein Objekt mit derselben `execute`-Schnittstelle).
+        address: I2C-Adresse des Multiplexers.
+    """
+    def __init__(self, bus: I2CDevBus, address: int = TCA9548A_ADDRESS):
+        self.bus = bus
+        self.address = address
+        self.selected: Optional[int] = None
+        self.lock = threading.Lock()
+        self._channels = [DirectChannel(self, ch) for ch in range(8)]
+        self._select = [Transaction([self.select_message(ch)]) for ch in range(8)]
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __getitem__(self, channel: int) -> DirectChannel:
+        return self._channels[channel]
+
+    def select_message(self, channel: int) -> I2CMessage:
+        return I2CMessage.write(self.address, [1 << channel])
+
+    def select(self, channel: int) -> None:
+        """Wählt den Kanal (eigene Transaktion mit STOP), falls er nicht schon gewählt ist; Aufrufer hält `lock`."""
+        if self.selected == channel:
+            return
+        self.selected = None
+        self.bus.execute(self._select[channel])
+        self.selected = channel
+
+    def invalidate(self) -> None:
+        """
+        Vergisst den gewählten Kanal; die nächste Transaktion wählt ihn erneut.
+        Ohne Lock, damit ein Reset nicht auf einen hängenden Lesezugriff wartet.
+        """
+        self.selected = None
+
+    def reset(self) -> None:
+        """Öffnet den Adapter neu (Watchdog-Eskalation des INA219SensorManager)."""
+        self.invalidate()
+        reopen = getattr(self.bus, "reopen", None)
+        if reopen:
+            reopen()
+
+
+class DirectINA219:
+    """
+    Registertreiber für den INA219 auf dem i2c-dev-Transport mit derselben
+    Schnittstelle wie adafruit_ina219.INA219 (Kalibrierung, ADC-Auflösung, Modus,
+    Messwerte), sodass er im INA219SensorManager austauschbar ist.
+
+    `read_all` liest Busspannung, Strom und Leistung in einer einzigen kombinierten
+    Transaktion: Kalibrierregister auffrischen (wie adafruit_ina219 vor jedem
+    Stromlesen) und drei Registerzeiger/Lese-Paare. Die Kanalwahl läuft bei einem
+    Wechsel vorab als eigene Transaktion. Die Transaktionen werden einmal vorbereitet
+    und wiederverwendet.
+
+    Args:
+        channel: Kanal-Proxy des DirectTCA9548A.
+        address: I2C-Adresse des INA219.
+    """
+    def __init__(self, channel: DirectChannel, address: int = INA219_ADDRESS):
+        self.tca = channel.tca
+        self.channel = channel.channel
+        self.bus = channel.bus
+        self.address = address
+        self._cal_value, self._current_lsb, self._power_lsb, brng, gain = CALIBRATIONS["32V_2A"]
+        self._config = (brng << 13) | (gain << 11) | (_ADC_12BIT << _BADC_SHIFT) | (_ADC_12BIT << _SADC_SHIFT) | _MODE_SANDBVOLT_CONTINUOUS
+        self._read_all: Transaction = self._prepare_read_all()
+        # Anwesenheit prüfen wie adafruit_bus_device beim Anlegen
+        self._config = self._read_register(REG_CONFIG)
+
+    # ------------------------------------------------------------- Register
+
+    def _execute(self, messages: List[I2CMessage]) -> List[bytes]:
+        tca = self.tca
+        with tca.lock:
+            tca.select(self.channel)
+            return self.bus.execute(Transaction(messages))
+
+    def _read_register(self, register: int) -> int:
+        data = self._execute([I2CMessage.write(self.address, [register]), I2CMessage.read_bytes(self.address, 2)])[0]
+        return (data[0] << 8) | data[1]
+
+    def _write_register(self, register: int, value: int) -> None:
+        self._execute([I2CMessage.write(self.address, [register, (value >> 8) & 0xFF, value & 0xFF])])
+
+    def _prepare_read_all(self) -> Transaction:
+        addr = self.address
+        cal = self._cal_value
+        messages = [
+            I2CMessage.write(addr, [REG_BUS_VOLTAGE]), I2CMessage.read_bytes(addr, 2),
+            I2CMessage.write(addr, [REG_CALIBRATION, (cal >> 8) & 0xFF, cal & 0xFF]),
+            I2CMessage.write(addr, [REG_CURRENT]), I2CMessage.read_bytes(addr, 2),
+            I2CMessage.write(addr, [REG_POWER]), I2CMessage.read_bytes(addr, 2),
+        ]
+        return Transaction(messages)
+
+    # ---------------------------------------------------------- Kalibrierung
+
+    def _calibrate(self, profile: str) -> None:
+        self._cal_value, self._current_lsb, self._power_lsb, brng, gain = CALIBRATIONS[profile]
+        self._write_register(REG_CALIBRATION, self._cal_value)
+        self._config = (brng << 13) | (gain << 11) | (_ADC_12BIT << _BADC_SHIFT) | (_ADC_12BIT << _SADC_SHIFT) | _MODE_SANDBVOLT_CONTINUOUS
+        self._write_register(REG_CONFIG, self._config)
+        self._read_all = self._prepare_read_all()
+
+    def set_calibration_16V_400mA(self) -> None:
+        self._calibrate("16V_400mA")
+
+    def set_calibration_32V_2A(self) -> None:
+        self._calibrate("32V_2A")
+
+    def _set_config_bits(self, shift: int, mask: int, value: int) -> None:
+        self._config = (self._config & ~(mask << shift)) | ((int(value) & mask) << shift)
+        self._write_register(REG_CONFIG, self._config)
+
+    @property
+    def bus_adc_resolution(self) -> int:
+        return (self._config >> _BADC_SHIFT) & _ADC_MASK
+
+    @bus_adc_resolution.setter
+    def bus_adc_resolution(self, value: int) -> None:
+        self._set_config_bits(_BADC_SHIFT, _ADC_MASK, value)
+
+    @property
+    def shunt_adc_resolution(self) -> int:
+        return (self._config >> _SADC_SHIFT) & _ADC_MASK
+
+    @shunt_adc_resolution.setter
+    def shunt_adc_resolution(self, value: int) -> None:
+        self._set_config_bits(_SADC_SHIFT, _ADC_MASK, value)
+
+    @property
+    def mode(self) -> int:
+        return self._config & _MODE_MASK
+
+    @mode.setter
+    def mode(self, value: int) -> None:
+        # Auch bei unverändertem Wert schreiben: startet im getriggerten Modus die Wandlung
+        self._set_config_bits(0, _MODE_MASK, value)
+
+    # ------------------------------------------------------------ Messwerte
+
+    @property
+    def conversion_ready(self) -> bool:
+        return bool(self._read_register(REG_BUS_VOLTAGE) & 0x02)
+
+    @property
+    def bus_voltage(self) -> float:
+        return (self._read_register(REG_BUS_VOLTAGE) >> 3) * 0.004
+
+    @property
+    def shunt_voltage(self) -> float:
+        return _signed(self._read_register(REG_SHUNT_VOLTAGE)) * 0.00001
+
+    @property
+    def current(self) -> float:
+        self._write_register(REG_CALIBRATION, self._cal_value)
+        return _signed(self._read_register(REG_CURRENT)) * self._current_lsb
+
+    @property
+    def power(self) -> float:
+        return self._read_register(REG_POWER) * self._power_lsb
+
+    def read_all(self) -> Tuple[float, float, float]:
+        """
+        Busspannung (V), Strom (mA) und Leistung in einer Bustransaktion (plus
+        Kanalwahl bei Kanalwechsel).
+
+        Returns:
+            Tuple[bus_voltage, current, power] in denselben Einheiten wie die Einzelwerte.
+        """
+        tca = self.tca
+        with tca.lock:
+            tca.select(self.channel)
+            bus_raw, current_raw, power_raw = self.bus.execute(self._read_all)
+        return (
+            (((bus_raw[0] << 8) | bus_raw[1]) >> 3) * 0.004,
+            _signed((current_raw[0] << 8) | current_raw[1]) * self._current_lsb,
+            ((power_raw[0] << 8) | power_raw[1]) * self._power_lsb,
+        )
+
+
+def init_i2c_dev(bus: int = 1, speed: int = 0, mux_address: int = TCA9548A_ADDRESS) -> DirectTCA9548A:
+    """
+    Öffnet den I2C-Adapter über i2c-dev und legt den Multiplexer an
+    (Gegenstück zu hardware.tca.init_i2c für das Backend "i2c_dev").
+
+    Args:
+        bus: Nummer des I2C-Adapters.
+        speed: Gewünschter Bustakt in Hz (0 = unverändert).
+        mux_address: I2C-Adresse des TCA9548A.
+
+    Returns:
+        DirectTCA9548A auf dem geöffneten Adapter.
+
+    Raises:
+        RuntimeError: Wenn der Adapter nicht geöffnet werden kann oder der Multiplexer nicht antwortet.
+    """
+    logger.info("Initialisiere I2C-Bus %s (i2c-dev) und TCA9548A-Multiplexer", bus)
+    try:
+        i2c = I2CDevBus(bus, speed)
+    except OSError as e:
+        logger.error("I2C-Adapter /dev/i2c-%s konnte nicht geöffnet werden", bus, exc_info=True)
+        raise RuntimeError("I2C-Bus Initialisierung fehlgeschlagen") from e
+    if not i2c.probe(mux_address):
+        logger.error("TCA9548A antwortet nicht auf Adresse 0x%02x", mux_address)
+        raise RuntimeError("Multiplexer-Initialisierung fehlgeschlagen")
+    logger.info("TCA9548A-Multiplexer erfolgreich initialisiert (i2c-dev)")
+    return DirectTCA9548A(i2c, mux_address)
@@ -0,0 +1,192 @@
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from hardware.i2c_dev import Transaction
+from hardware.i2c_direct import (
+    INA219_ADDRESS, REG_BUS_VOLTAGE, REG_CALIBRATION, REG_CONFIG, REG_CURRENT, REG_POWER,
+    REG_SHUNT_VOLTAGE, TCA9548A_ADDRESS,
+)
+
+SHUNT_OHMS = 0.1
+_CONFIG_RESET = 0x399F
+
+
+class SimulatedINA219:
+    """
+    Registermodell eines INA219 für Tests ohne Hardware. Strom- und Leistungsregister
+    werden wie im Chip aus Shuntspannung, Busspannung und Kalibrierwert berechnet
+    (inkl. Quantisierung); ohne Kalibrierung bleibt das Stromregister 0.
+
+    Args:
+        bus_voltage: Busspannung in V.
+        current: Laststrom in mA.
+    """
+    def __init__(self, bus_voltage: float = 5.0, current: float = 1.4):
+        self.registers: Dict[int, int] = {REG_CONFIG: _CONFIG_RESET, REG_CALIBRATION: 0}
+        self.pointer = 0
+        self.set_measurement(bus_voltage, current)
+
+    def set_measurement(self, bus_voltage: float, current: float) -> None:
+        self.bus_voltage = bus_voltage
+        self.current = current
+
+    def power_cycle(self) -> None:
+        """Register auf Einschaltwerte zurück (Kalibrierung 0, Config-Reset), wie nach dem Aus- und Einschalten."""
+        self.registers = {REG_CONFIG: _CONFIG_RESET, REG_CALIBRATION: 0}
+        self.pointer = 0
+
+    def _register(self, register: int) -> int:
+        shunt = int(round(self.current / 1000 * SHUNT_OHMS / 0.00001))
+        if register == REG_SHUNT_VOLTAGE:
+            return shunt & 0xFFFF
+        bus = min(int(self.bus_voltage / 0.004), 0x1FFF)
+        if register == REG_BUS_VOLTAGE:
+            return (bus << 3) | 0x02   # CNVR gesetzt
+        current = shunt * self.registers[REG_CALIBRATION] // 4096
+        if register == REG_CURRENT:
+            return current & 0xFFFF
+        if register == REG_POWER:
+            return abs(current) * bus // 5000
+        return self.registers.get(register, 0)
+
+    def write(self, data: bytes) -> None:
+        if not data:
+            return
+        self.pointer = data[0]
+        if len(data) >= 3:
+            self.registers[self.pointer] = (data[1] << 8) | data[2]
+
+    def read(self, length: int) -> bytes:
+        value = self._register(self.pointer)
+        return bytes([(value >> 8) & 0xFF, value & 0xFF])[:length].ljust(length, b"\x00")
+
+
+class SimulatedI2CBus:
+    """
+    In-Process-I2C-Bus mit TCA9548A und je einem simulierten INA219 pro Kanal.
+
+    Bedient sowohl die Transaktionsschnittstelle des I2CDevBus (`execute`) als auch
+    die busio-Schnittstelle (try_lock, writeto, readfrom_into, writeto_then_readfrom),
+    sodass der Blinka-Pfad (adafruit_tca9548a/adafruit_ina219) und der i2c-dev-Pfad
+    gegen dieselben Geräte laufen. Gezählt werden Transaktionen (Start bis Stop),
+    Nachrichten und übertragene Bytes inkl. Adressbytes; daraus schätzt
+    `wire_time` die reine Busdauer bei gegebenem Takt. Wie beim TCA9548A wird ein
+    geschriebenes Steuerregister erst mit dem STOP am Ende der Transaktion wirksam.
+
+    Args:
+        channels: Kanäle mit bestücktem INA219.
+        mux_address: Adresse des TCA9548A.
+    """
+    def __init__(self, channels: Sequence[int] = range(8), mux_address: int = TCA9548A_ADDRESS):
+        self.mux_address = mux_address
+        self.control = 0
+        self._control_next: Optional[int] = None   # geschrieben, wirksam ab STOP
+        self.devices: Dict[int, SimulatedINA219] = {ch: SimulatedINA219() for ch in channels}
+        self._lock = threading.Lock()
+        self.transactions = 0
+        self.messages = 0
+        self.bytes = 0
+        self.fail_next = 0   # Anzahl folgender Transaktionen, die mit NACK scheitern
+
+    def reset_counters(self) -> None:
+        self.transactions = self.messages = self.bytes = 0
+
+    def wire_time(self, speed: int) -> float:
+        """Geschätzte Busdauer aller gezählten Transaktionen (9 Takte pro Byte plus Start/Stop)."""
+        return (self.bytes * 9 + (self.transactions + self.messages) * 2) / float(speed)
+
+    # --------------------------------------------------------------- Geräte
+
+    def _device(self, addr: int) -> Optional[SimulatedINA219]:
+        if addr != INA219_ADDRESS:
+            return None
+        selected = [ch for ch in self.devices if self.control & (1 << ch)]
+        return self.devices[selected[0]] if len(selected) == 1 else None
+
+    def _write(self, addr: int, data: bytes) -> None:
+        self.messages += 1
+        self.bytes += 1 + len(data)
+        if addr == self.mux_address:
+            if data:
+                self._control_next = data[-1]
+            return
+        device = self._device(addr)
+        if device is None:
+            raise OSError(121, "Remote I/O error (NACK)", f"0x{addr:02x}")
+        device.write(data)
+
+    def _read(self, addr: int, length: int) -> bytes:
+        self.messages += 1
+        self.bytes += 1 + length
+        if addr == self.mux_address:
+            return bytes([self.control]) * length
+        device = self._device(addr)
+        if device is None:
+            raise OSError(121, "Remote I/O error (NACK)", f"0x{addr:02x}")
+        return device.read(length)
+
+    def _begin(self) -> None:
+        self.transactions += 1
+        if self.fail_next:
+            self.fail_next -= 1
+            raise OSError(121, "Remote I/O error (NACK)")
+
+    def _stop(self) -> None:
+        if self._control_next is not None:
+            self.control, self._control_next = self._control_next, None
+
+    # -------------------------------------------------- I2CDevBus-Schnittstelle
+
+    def execute(self, transaction: Transaction) -> List[bytes]:
+        with self._lock:
+            self._begin()
+            try:
+                for msg in transaction.messages:
+                    if msg.read:
+                        msg.data = self._read(msg.addr, len(msg))
+                    else:
+                        self._write(msg.addr, msg.data)
+            finally:
+                self._stop()
+        return transaction.reads()
+
+    def probe(self, addr: int) -> bool:
+        return addr == self.mux_address or self._device(addr) is not None
+
+    def reopen(self) -> None:
+        pass
+
+    # ----------------------------------------------------- busio-Schnittstelle
+
+    def try_lock(self) -> bool:
+        return self._lock.acquire(blocking=False)
+
+    def unlock(self) -> None:
+        self._lock.release()
+
+    def scan(self) -> List[int]:
+        return [self.mux_address] + ([INA219_ADDRESS] if self._device(INA219_ADDRESS) else [])
+
+    def writeto(self, address: int, buffer, *, start: int = 0, end: Optional[int] = None) -> None:
+        self._begin()
+        try:
+            self._write(address, bytes(buffer[start:end]))
+        finally:
+            self._stop()
+
+    def readfrom_into(self, address: int, buffer, *, start: int = 0, end: Optional[int] = None) -> None:
+        self._begin()
+        end = len(buffer) if end is None else end
+        try:
+            buffer[start:end] = self._read(address, end - start)
+        finally:
+            self._stop()
+
+    def writeto_then_readfrom(self, address: int, buffer_out, buffer_in, *, out_start: int = 0, out_end: Optional[int] = None, in_start: int = 0, in_end: Optional[int] = None) -> None:
+        self._begin()
+        try:
+            self._write(address, bytes(buffer_out[out_start:out_end]))
+            in_end = len(buffer_in) if in_end is None else in_end
+            buffer_in[in_start:in_end] = self._read(address, in_end - in_start)
+        finally:
+            self._stop()
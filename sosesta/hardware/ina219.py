@@ -1,92 +1,265 @@
-import logging
-import time
-from typing import Optional, Tuple, Dict
-import adafruit_ina219
-
-logger = logging.getLogger(__name__)
-
-class INA219SensorManager:
-    """
-    Verwalter mehrerer INA219-Sensoren über einen TCA9548A-Multiplexer
-    mit konfigurierbarer Kalibrierung und Retry-Logik.
-
-    Args:
-        multiplexer: Instanz des TCA9548A-Multiplexers.
-        calibration: Kalibrierungsprofil ('16V_400mA' oder '32V_2A').
-        retries: Anzahl Leseversuche pro Kanal.
-        retry_delay: Wartezeit (Sekunden) zwischen den Versuchen.
-    """
-    def __init__(
-        self,
-        multiplexer,
-        calibration: str = '16V_400mA',
-        retries: int = 3,
-        retry_delay: float = 0.1
-    ):
-        self.tca = multiplexer
-        self.calibration = calibration
-        self.retries = retries
-        self.retry_delay = retry_delay
-        self.sensors: Dict[int, adafruit_ina219.INA219] = {}
-
-    def _apply_calibration(self, sensor: adafruit_ina219.INA219) -> None:
-        if self.calibration == '16V_400mA':
-            sensor.set_calibration_16V_400mA()
-        elif self.calibration == '32V_2A':
-            sensor.set_calibration_32V_2A()
-        else:
-            logger.warning(f"Unbekanntes Kalibrierungsprofil '{self.calibration}', verwende 16V_400mA")
-            sensor.set_calibration_16V_400mA()
-
-    def _init_sensor(self, channel: int) -> None:
-        try:
-            mux = self.tca[channel]
-            sensor = adafruit_ina219.INA219(mux)
-            self._apply_calibration(sensor)
-            self.sensors[channel] = sensor
-            logger.info(f"INA219 Kanal {channel} initialisiert mit Profil {self.calibration}")
-        except Exception as e:
-            logger.error(f"Fehler bei Initialisierung von INA219 Kanal {channel}: {e}", exc_info=True)
-            raise
-
-    def read(self, channel: int) -> Tuple[Optional[float], Optional[float], Optional[float]]:
-        """
-        Liest Spannung (V), Strom (mA) und Leistung (mW) vom gegebenen Multiplexer-Kanal.
-        Führt bei Fehlern bis zu 'retries' Versuche durch.
-
-        Returns:
-            Tuple[bus_voltage, current, power] oder (None, None, None) bei dauerhaften Fehlern.
-        """
-        for attempt in range(1, self.retries + 1):
-            try:
-                # Prüfen ob Kanal existiert
-                if channel not in range(8):
-                    logger.error(f"Ungültiger INA219-Kanal {channel}")
-                    return None, None, None
-
-                mux = self.tca[channel]
-                if not mux:
-                    logger.warning(f"Multiplexer-Kanal {channel} nicht erreichbar (Versuch {attempt})")
-                    time.sleep(self.retry_delay)
-                    continue
-
-                # Sensor ggf. initialisieren
-                if channel not in self.sensors:
-                    self._init_sensor(channel)
-
-                sensor = self.sensors[channel]
-                bus_v = sensor.bus_voltage
-                cur = sensor.current
-                pwr = sensor.power
-
-                logger.debug(
-                    f"INA219 Kanal {channel}: bus={bus_v:.3f} V, current={cur:.3f} mA, power={pwr:.3f} mW"
-                )
-                return bus_v, cur, pwr
-
-            except Exception as e:
-                logger.warning(f"Fehler beim Lesen INA219 Kanal {channel}, Versuch {attempt}: {e}", exc_info=True)
-                time.sleep(self.retry_delay)
-
-        logger.error(f"INA219 Kanal {channel} konnte nach {self.retries} Versuchen nicht gelesen werden")
-        return None, None, None
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple, Dict
+import adafruit_ina219
+from adafruit_ina219 import ADCResolution, Mode
+
+logger = logging.getLogger(__name__)
+
+# ADC-Auflösung/Mittelung -> (Registerwert, Wandlungszeit in s laut Datenblatt)
+ADC_RESOLUTIONS = {
+    "9bit": (ADCResolution.ADCRES_9BIT_1S, 84e-6),
+    "10bit": (ADCResolution.ADCRES_10BIT_1S, 148e-6),
+    "11bit": (ADCResolution.ADCRES_11BIT_1S, 276e-6),
+    "12bit": (ADCResolution.ADCRES_12BIT_1S, 532e-6),
+    "12bit_2s": (ADCResolution.ADCRES_12BIT_2S, 1.06e-3),
+    "12bit_4s": (ADCResolution.ADCRES_12BIT_4S, 2.13e-3),
+    "12bit_8s": (ADCResolution.ADCRES_12BIT_8S, 4.26e-3),
+    "12bit_16s": (ADCResolution.ADCRES_12BIT_16S, 8.51e-3),
+    "12bit_32s": (ADCResolution.ADCRES_12BIT_32S, 17.02e-3),
+    "12bit_64s": (ADCResolution.ADCRES_12BIT_64S, 34.05e-3),
+    "12bit_128s": (ADCResolution.ADCRES_12BIT_128S, 68.10e-3),
+}
+
+
+@dataclass(frozen=True)
+class ADCProfile:
+    """
+    ADC-Einstellung eines INA219: Auflösung/Hardware-Mittelung für Bus- und Shunt-ADC
+    sowie getriggerte oder kontinuierliche Wandlung.
+
+    Notation in der Konfiguration: '<auflösung>[:triggered|:continuous]',
+    z.B. '12bit_16s:triggered'.
+    """
+    resolution: str = "12bit"
+    triggered: bool = False
+
+    @classmethod
+    def parse(cls, spec: str) -> "ADCProfile":
+        resolution, _, mode = str(spec).partition(":")
+        if resolution not in ADC_RESOLUTIONS:
+            raise ValueError(f"Unbekannte ADC-Auflösung '{resolution}' (erlaubt: {', '.join(ADC_RESOLUTIONS)})")
+        if mode not in ("", "triggered", "continuous"):
+            raise ValueError(f"Unbekannter ADC-Modus '{mode}' (erlaubt: triggered, continuous)")
+        return cls(resolution=resolution, triggered=(mode == "triggered"))
+
+    @property
+    def register_value(self) -> int:
+        return ADC_RESOLUTIONS[self.resolution][0]
+
+    @property
+    def conversion_time(self) -> float:
+        """Dauer einer vollständigen Messung (Shunt- und Bus-ADC nacheinander) in s."""
+        return 2 * ADC_RESOLUTIONS[self.resolution][1]
+
+    @property
+    def expected_rate(self) -> float:
+        """Maximale Messrate pro Kanal (Hz) ohne Bus-Overhead."""
+        return 1.0 / self.conversion_time
+
+    def __str__(self) -> str:
+        return f"{self.resolution}:{'triggered' if self.triggered else 'continuous'}"
+
+
+class INA219SensorManager:
+    """
+    Verwalter mehrerer INA219-Sensoren über einen TCA9548A-Multiplexer
+    mit konfigurierbarer Kalibrierung und Retry-Logik.
+
+    Der Treiber ist austauschbar: standardmäßig adafruit_ina219 über Blinka, mit
+    `sensor_factory=DirectINA219` und einem DirectTCA9548A der i2c-dev-Pfad, der alle
+    Messwerte eines Kanals in einer Bustransaktion liest (`read_all`).
+
+    Args:
+        multiplexer: Instanz des TCA9548A-Multiplexers.
+        calibration: Kalibrierungsprofil ('16V_400mA' oder '32V_2A').
+        retries: Anzahl Leseversuche pro Kanal.
+        retry_delay: Wartezeit (Sekunden) zwischen den Versuchen.
+        adc_profile: Standard-ADC-Profil aller Kanäle (siehe ADCProfile).
+        channel_profiles: Abweichende ADC-Profile je Kanal, z.B. {"3": "12bit_16s:triggered"}.
+        sensor_factory: Erzeugt den Sensortreiber aus einem Multiplexer-Kanal (Standard: adafruit_ina219.INA219).
+    """
+    def __init__(
+        self,
+        multiplexer,
+        calibration: str = '16V_400mA',
+        retries: int = 3,
+        retry_delay: float = 0.1,
+        adc_profile: str = "12bit",
+        channel_profiles: Optional[Dict[str, str]] = None,
+        sensor_factory: Optional[Callable[[Any], Any]] = None
+    ):
+        self.tca = multiplexer
+        self.sensor_factory = sensor_factory or adafruit_ina219.INA219
+        self.calibration = calibration
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.sensors: Dict[int, adafruit_ina219.INA219] = {}
+        self.default_profile = self._parse_profile(adc_profile, ADCProfile())
+        self.profiles: Dict[int, ADCProfile] = {
+            int(ch): self._parse_profile(spec, self.default_profile) for ch, spec in (channel_profiles or {}).items()
+        }
+        self._last_read: Dict[int, float] = {}
+
+    @staticmethod
+    def _parse_profile(spec: str, fallback: ADCProfile) -> ADCProfile:
+        try:
+            return ADCProfile.parse(spec)
+        except ValueError as e:
+            logger.warning("%s, verwende ADC-Profil %s", e, fallback)
+            return fallback
+
+    def profile(self, channel: int) -> ADCProfile:
+        return self.profiles.get(channel, self.default_profile)
+
+    def _apply_adc_profile(self, sensor: adafruit_ina219.INA219, profile: ADCProfile) -> None:
+        # Nach der Kalibrierung setzen: set_calibration_* überschreibt das Config-Register
+        sensor.bus_adc_resolution = profile.register_value
+        sensor.shunt_adc_resolution = profile.register_value
+        sensor.mode = Mode.SANDBVOLT_TRIGGERED if profile.triggered else Mode.SANDBVOLT_CONTINUOUS
+
+    def _wait_for_conversion(self, channel: int, sensor: adafruit_ina219.INA219) -> None:
+        """
+        Sorgt dafür, dass beim folgenden Lesen ein neues Wandlungsergebnis vorliegt.
+
+        Getriggert: startet eine Einzelwandlung, schläft die bekannte Wandlungszeit und
+        prüft danach das Conversion-Ready-Bit (begrenzt auf eine weitere Wandlungszeit).
+        Kontinuierlich: wartet nur, falls seit dem letzten Lesen noch keine volle
+        Wandlung vergangen ist, statt denselben Wert erneut abzufragen.
+        """
+        profile = self.profile(channel)
+        if profile.triggered:
+            sensor.mode = Mode.SANDBVOLT_TRIGGERED
+            time.sleep(profile.conversion_time)
+            deadline = time.monotonic() + profile.conversion_time
+            while not sensor.conversion_ready:
+                if time.monotonic() >= deadline:
+                    logger.debug("INA219 Kanal %s: Conversion-Ready nicht gesetzt", channel)
+                    break
+                time.sleep(profile.conversion_time / 8)
+        else:
+            remaining = self._last_read.get(channel, 0.0) + profile.conversion_time - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    def _apply_calibration(self, sensor: adafruit_ina219.INA219) -> None:
+        if self.calibration == '16V_400mA':
+            sensor.set_calibration_16V_400mA()
+        elif self.calibration == '32V_2A':
+            sensor.set_calibration_32V_2A()
+        else:
+            logger.warning("Unbekanntes Kalibrierungsprofil '%s', verwende 16V_400mA", self.calibration)
+            sensor.set_calibration_16V_400mA()
+
+    def _init_sensor(self, channel: int) -> adafruit_ina219.INA219:
+        try:
+            mux = self.tca[channel]
+            sensor = self.sensor_factory(mux)
+            self._apply_calibration(sensor)
+            self._apply_adc_profile(sensor, self.profile(channel))
+            self.sensors[channel] = sensor
+            logger.info("INA219 Kanal %s initialisiert mit Profil %s, ADC %s", channel, self.calibration, self.profile(channel))
+            return sensor
+        except Exception as e:
+            logger.error("Fehler bei Initialisierung von INA219 Kanal %s: %s", channel, e, exc_info=True)
+            raise
+
+    def reinit(self, channel: int) -> None:
+        """
+        Verwirft den Sensor eines einzelnen Kanals (Sensortausch, Aus- und Einschalten);
+        beim nächsten Lesen dieses Kanals wird er neu angelegt, kalibriert und mit
+        seinem ADC-Profil konfiguriert. Die übrigen Kanäle bleiben unberührt.
+        Darf aus einem anderen Thread als dem lesenden aufgerufen werden.
+        """
+        self.sensors.pop(channel, None)
+        self._last_read.pop(channel, None)
+        logger.debug("INA219 Kanal %s: Neuinitialisierung beim nächsten Lesen", channel)
+
+    def reset(self) -> None:
+        """
+        Verwirft alle initialisierten Sensoren; beim nächsten Lesen werden sie neu
+        angelegt, kalibriert und mit ihrem ADC-Profil konfiguriert (Watchdog-Eskalation).
+        """
+        self.sensors.clear()
+        self._last_read.clear()
+        reset = getattr(self.tca, "reset", None)
+        if reset:
+            reset()
+        logger.warning("INA219-Sensoren zurückgesetzt, Neuinitialisierung beim nächsten Lesen")
+
+    def read(self, channel: int) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """
+        Liest Spannung (V), Strom (mA) und Leistung (mW) vom gegebenen Multiplexer-Kanal.
+        Führt bei Fehlern bis zu 'retries' Versuche durch.
+
+        Returns:
+            Tuple[bus_voltage, current, power] oder (None, None, None) bei dauerhaften Fehlern.
+        """
+        for attempt in range(1, self.retries + 1):
+            try:
+                # Prüfen ob Kanal existiert
+                if channel not in range(8):
+                    logger.error("Ungültiger INA219-Kanal %s", channel)
+                    return None, None, None
+
+                mux = self.tca[channel]
+                if not mux:
+                    logger.warning("Multiplexer-Kanal %s nicht erreichbar (Versuch %s)", channel, attempt)
+                    time.sleep(self.retry_delay)
+                    continue
+
+                # Sensor ggf. initialisieren (lokale Referenz, reinit() kann parallel verwerfen)
+                sensor = self.sensors.get(channel)
+                if sensor is None:
+                    sensor = self._init_sensor(channel)
+
+                self._wait_for_conversion(channel, sensor)
+                bus_v, cur, pwr = self._read_values(sensor)
+                self._last_read[channel] = time.monotonic()
+
+                logger.debug(
+                    "INA219 Kanal %s: bus=%.3f V, current=%.3f mA, power=%.3f mW",
+                    channel, bus_v, cur, pwr
+                )
+                return bus_v, cur, pwr
+
+            except Exception as e:
+                logger.warning("Fehler beim Lesen INA219 Kanal %s, Versuch %s: %s", channel, attempt, e, exc_info=True)
+                time.sleep(self.retry_delay)
+
+        logger.error("INA219 Kanal %s konnte nach %s Versuchen nicht gelesen werden", channel, self.retries)
+        return None, None, None
+
+    @staticmethod
+    def _read_values(sensor) -> Tuple[float, float, float]:
+        # Schnellpfad des i2c-dev-Treibers: eine kombinierte Transaktion statt drei Lesezugriffen
+        read_all = getattr(sensor, "read_all", None)
+        if read_all is not None:
+            return read_all()
+        return sensor.bus_voltage, sensor.current, sensor.power
+
+    def benchmark(self, channel: int, samples: int = 100) -> Dict[str, float]:
+        """
+        Misst die tatsächliche Leserate eines Kanals mit dessen ADC-Profil.
+
+        Returns:
+            Dict mit 'expected_rate' (Hz, Datenblatt), 'measured_rate' (Hz) und
+            'mean_latency' (s pro read()).
+        """
+        profile = self.profile(channel)
+        self.read(channel)  # Initialisierung nicht mitmessen
+        start = time.perf_counter()
+        for _ in range(samples):
+            self.read(channel)
+        elapsed = time.perf_counter() - start
+        result = {
+            "expected_rate": profile.expected_rate,
+            "measured_rate": samples / elapsed if elapsed > 0 else 0.0,
+            "mean_latency": elapsed / samples,
+        }
+        logger.info(
+            "INA219 Kanal %s ADC %s: %.1f Hz gemessen (Datenblatt %.1f Hz)",
+            channel, profile, result['measured_rate'], result['expected_rate']
+        )
+        return result
@@ -1,22 +1,87 @@
-"""
-Hardware-Modul: Abstraktion für Sensoren, Relais, LED-Strip und DAQ.
-"""
-from .hardware_manager import HardwareManager
-from .ina219 import INA219SensorManager
-from .tca import init_i2c, TCA9548A
-from .relays import RelayController
-from .led_strip import LEDStripController
-from .redlab import RedLabDAQ
-from .sensors import SensorManager, SensorData
-
-__all__ = [
-    "HardwareManager",
-    "INA219SensorManager",
-    "init_i2c",
-    "TCA9548A",
-    "RelayController",
-    "LEDStripController",
-    "RedLabDAQ",
-    "SensorManager",
-    "SensorData",
-]
+"""
+Hardware-Modul: Abstraktion für Sensoren, Relais, LED-Strip und DAQ.
+"""
+from .hardware_manager import HardwareManager
+from .ina219 import INA219SensorManager, ADCProfile
+from .tca import init_i2c, TCA9548A
+from .i2c_dev import I2CDevBus, I2CMessage, Transaction
+from .i2c_direct import DirectTCA9548A, DirectINA219, init_i2c_dev
+from .i2c_sim import SimulatedI2CBus, SimulatedINA219
+from .relays import RelayController
+from .relay_sequencer import RelaySequencer, RelayProfile, RelayEvent
+from .led_strip import LEDStripController
+from .actuator import OutputActuator
+from .redlab import RedLabDAQ
+from .response_time import ResponseTimeMonitor, StepResponse, analyze_step
+from .sensors import SensorManager, SensorData
+from .async_engine import AsyncAcquisitionEngine, Reading
+from .replay import ReplayRunner, ReplayHardwareManager
+from .whatif import WhatIfAnalysis, Thresholds
+from .simulation import SimulatedHardwareManager, SimulatedRedLab, SimulatedRelays, SimulatedBench, VirtualClock
+from .soak import SoakRunner, SoakMonitor, SoakReport
+from .rules import RuleEngine, CompiledRules, classify
+from .scheduler import FixedRateScheduler, SampleClock
+from .realtime import RealtimeController
+from .acquisition import AcquisitionLoop
+from .watchdog import DeviceWatchdog, DeadlineExceeded, DeviceBusy
+from .statistics import StatisticsEngine, ChannelStatistics, RunningStat
+from .qualification import QualificationRunner, QualificationReport, SlotQualification, CheckResult
+
+__all__ = [
+    "HardwareManager",
+    "INA219SensorManager",
+    "ADCProfile",
+    "init_i2c",
+    "TCA9548A",
+    "I2CDevBus",
+    "I2CMessage",
+    "Transaction",
+    "DirectTCA9548A",
+    "DirectINA219",
+    "init_i2c_dev",
+    "SimulatedI2CBus",
+    "SimulatedINA219",
+    "RelayController",
+    "RelaySequencer",
+    "RelayProfile",
+    "RelayEvent",
+    "LEDStripController",
+    "OutputActuator",
+    "RedLabDAQ",
+    "ResponseTimeMonitor",
+    "StepResponse",
+    "analyze_step",
+    "SensorManager",
+    "SensorData",
+    "AsyncAcquisitionEngine",
+    "Reading",
+    "ReplayRunner",
+    "ReplayHardwareManager",
+    "WhatIfAnalysis",
+    "Thresholds",
+    "SimulatedHardwareManager",
+    "SimulatedRedLab",
+    "SimulatedRelays",
+    "SimulatedBench",
+    "VirtualClock",
+    "SoakRunner",
+    "SoakMonitor",
+    "SoakReport",
+    "RuleEngine",
+    "CompiledRules",
+    "classify",
+    "FixedRateScheduler",
+    "RealtimeController",
+    "SampleClock",
+    "AcquisitionLoop",
+    "DeviceWatchdog",
+    "DeadlineExceeded",
+    "DeviceBusy",
+    "StatisticsEngine",
+    "ChannelStatistics",
+    "RunningStat",
+    "QualificationRunner",
+    "QualificationReport",
+    "SlotQualification",
+    "CheckResult",
+]
@@ -0,0 +1,294 @@
+"""
+Schnellqualifizierung der Steckplätze vor einem Langzeitlauf.
+
+Für alle angegebenen Kanäle gemeinsam läuft innerhalb weniger Sekunden ein fester
+Ablauf: Präsenzstrom und Versorgungsspannung (INA219-Werte der laufenden Erfassung), danach Relais OFF und ON mit
+je einem hochratigen RedLab-Burst gegen redlab_neg_threshold bzw.
+redlab_pos_threshold. Ergebnis ist ein GO/NO-GO je Steckplatz, sodass eine Sitzung
+nur auf Sensoren gestartet wird, die beide Signalpfade bestehen. Steckplätze ohne
+Relais-Pin (relais_pins kürzer als sensor_channels) sind nicht prüfbar und werden
+als solche gemeldet, nicht als NO-GO.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from config.constants import ConfigSchema
+from hardware.acquisition import AcquisitionLoop
+from hardware.redlab import RedLabDAQ
+from hardware.relays import RelayController
+from hardware.rules import compile_band
+from hardware.sensors import SensorManager
+
+logger = logging.getLogger(__name__)
+
+CHECK_PRESENCE = "presence"
+CHECK_SUPPLY = "supply"
+CHECK_SIGNAL_OFF = "signal_off"
+CHECK_SIGNAL_ON = "signal_on"
+
+VERDICT_GO = "GO"
+VERDICT_NO_GO = "NO-GO"
+VERDICT_UNTESTABLE = "nicht prüfbar"
+
+# Anzeigenamen der Prüfschritte (Reihenfolge wie im Ablauf)
+CHECK_LABELS = {
+    CHECK_PRESENCE: "Präsenzstrom",
+    CHECK_SUPPLY: "Versorgung",
+    CHECK_SIGNAL_OFF: "Signal Relais OFF",
+    CHECK_SIGNAL_ON: "Signal Relais ON",
+}
+
+
+@dataclass
+class CheckResult:
+    """Ergebnis eines Prüfschritts für einen Steckplatz."""
+    name: str                        # CHECK_*
+    passed: bool
+    value: Optional[float]           # Median der gültigen Messwerte
+    band: Tuple[float, float]        # geprüftes Toleranzband
+    ratio: float                     # Anteil der Samples im Band
+    samples: int                     # Anzahl gültiger Messwerte
+    detail: str = ""
+
+    @property
+    def label(self) -> str:
+        return CHECK_LABELS.get(self.name, self.name)
+
+    def describe(self) -> str:
+        if self.detail:
+            return f"{self.label}: {self.detail}"
+        value = "--" if self.value is None else f"{self.value:.3f}"
+        return f"{self.label}: {value} ({self.ratio:.0%} in {self.band[0]}..{self.band[1]})"
+
+
+@dataclass
+class SlotQualification:
+    """GO/NO-GO eines Steckplatzes mit den Einzelergebnissen der Prüfschritte."""
+    channel: int
+    checks: List[CheckResult] = field(default_factory=list)
+    untestable: str = ""             # Grund, falls der Steckplatz nicht prüfbar ist (Konfiguration)
+
+    @property
+    def passed(self) -> bool:
+        return not self.untestable and bool(self.checks) and all(check.passed for check in self.checks)
+
+    @property
+    def verdict(self) -> str:
+        if self.untestable:
+            return VERDICT_UNTESTABLE
+        return VERDICT_GO if self.passed else VERDICT_NO_GO
+
+    def failed(self) -> List[CheckResult]:
+        return [check for check in self.checks if not check.passed]
+
+    @property
+    def reason(self) -> str:
+        """Grund der Nicht-Prüfbarkeit bzw. erster fehlgeschlagener Prüfschritt (leer bei GO)."""
+        if self.untestable:
+            return self.untestable
+        failed = self.failed()
+        return failed[0].describe() if failed else ""
+
+
+@dataclass
+class QualificationReport:
+    """Ergebnis eines Qualifizierungslaufs über mehrere Steckplätze."""
+    started: datetime
+    duration: float
+    slots: Dict[int, SlotQualification]
+
+    def go(self) -> List[int]:
+        return sorted(ch for ch, slot in self.slots.items() if slot.passed)
+
+    def no_go(self) -> List[int]:
+        return sorted(ch for ch, slot in self.slots.items() if not slot.passed and not slot.untestable)
+
+    def untestable(self) -> List[int]:
+        return sorted(ch for ch, slot in self.slots.items() if slot.untestable)
+
+
+def _median(values: Sequence[float]) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    return ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+def evaluate_band(name: str, values: Sequence[Optional[float]], band: Tuple[float, float], pass_ratio: float, strict: bool = False) -> CheckResult:
+    """
+    Bewertet eine Messreihe gegen ein Toleranzband (ohne Hysterese). Fehlgeschlagene
+    Lesezugriffe (None) zählen als Samples außerhalb des Bands.
+
+    Args:
+        name: Prüfschritt (CHECK_*).
+        values: Messwerte.
+        band: (min, max) des Toleranzbands.
+        pass_ratio: Mindestanteil der Samples im Band.
+        strict: Bandgrenzen exklusiv prüfen (RedLab-Signal).
+    """
+    band = (float(band[0]), float(band[1]))
+    valid = [v for v in values if v is not None]
+    if not valid:
+        return CheckResult(name, False, None, band, 0.0, 0, "keine Messwerte")
+    check = compile_band(band, 0.0, strict)
+    inside = sum(1 for v in valid if check(v, False))
+    ratio = inside / len(values)
+    return CheckResult(name, ratio >= pass_ratio, _median(valid), band, ratio, len(valid))
+
+
+class QualificationRunner:
+    """
+    Führt die Schnellqualifizierung aus (blockierend, z.B. in einem Worker-Thread).
+
+    Die Relais der geprüften Kanäle werden direkt geschaltet und am Ende wieder
+    ausgeschaltet; Kanäle mit laufender Sitzung dürfen daher nicht übergeben werden.
+    Kanäle ohne Relais-Pin werden nicht geprüft, sondern als nicht prüfbar gemeldet.
+    Der INA219 wird nicht selbst gelesen: Strom und Busspannung stammen aus den
+    nächsten Zyklen der laufenden Erfassung, die den Bus allein nutzt. Die Schwellen
+    werden bei jedem Lauf aus der aktuellen Konfiguration gelesen.
+
+    Args:
+        sensor_manager: SensorManager der Erfassung (Messwerte je Kanal).
+        acquisition: Laufende AcquisitionLoop (Zyklus-Listener).
+        redlab: RedLabDAQ (Burst, Rückfall auf Einzelmessungen).
+        relays: RelayController (set_relay, pins).
+        config: ConfigManager oder Objekt mit `.config` (ConfigSchema).
+        sleep: Wartefunktion für die Einschwingzeit.
+    """
+    def __init__(self, sensor_manager: SensorManager, acquisition: AcquisitionLoop, redlab: RedLabDAQ, relays: RelayController, config, sleep: Callable[[float], None] = time.sleep):
+        self.sensor_manager = sensor_manager
+        self.acquisition = acquisition
+        self.redlab = redlab
+        self.relays = relays
+        self.config = config
+        self.sleep = sleep
+        self.latest: Optional[QualificationReport] = None
+
+    @staticmethod
+    def _settings(cfg: Dict[str, Union[bool, int, float]]) -> Dict[str, float]:
+        return {
+            "settle": float(cfg.get("settle", 0.2)),
+            "ina_samples": max(1, int(cfg.get("ina_samples", 4))),
+            "rate": float(cfg.get("rate", 10000.0)),
+            "duration": float(cfg.get("duration", 0.1)),
+            "fallback_reads": max(1, int(cfg.get("fallback_reads", 20))),
+            "pass_ratio": float(cfg.get("pass_ratio", 0.98)),
+        }
+
+    def _has_relay(self, channel: int) -> bool:
+        return 0 <= channel < len(self.relays.pins)
+
+    def _switch(self, channels: Sequence[int], state: bool) -> None:
+        for ch in channels:
+            self.relays.set_relay(ch, state)
+
+    def _sample_ina(self, channels: Sequence[int], count: int) -> Dict[int, Tuple[List[Optional[float]], List[Optional[float]]]]:
+        # Werte der nächsten `count` Erfassungszyklen übernehmen (läuft im Erfassungsthread)
+        values: Dict[int, Tuple[List[Optional[float]], List[Optional[float]]]] = {ch: ([], []) for ch in channels}
+        cycles = [0]
+        done = threading.Event()
+
+        def collect(scheduled: float) -> None:
+            sensors = self.sensor_manager.sensors
+            for ch in channels:
+                sensor = sensors[ch]
+                values[ch][0].append(None if sensor.stale else sensor.current)
+                values[ch][1].append(None if sensor.stale else sensor.bus_voltage)
+            cycles[0] += 1
+            if cycles[0] >= count:
+                done.set()
+
+        self.acquisition.add_listener(collect)
+        try:
+            timeout = 2.0 * count * self.acquisition.scheduler.period + 1.0
+            if not done.wait(timeout):
+                logger.warning("Qualifizierung: nur %d von %d Erfassungszyklen in %.1f s", cycles[0], count, timeout)
+        finally:
+            self.acquisition.remove_listener(collect)
+        return {ch: (list(currents), list(voltages)) for ch, (currents, voltages) in values.items()}
+
+    def _sample_signal(self, channels: Sequence[int], settings: Dict[str, float]) -> Dict[int, List[Optional[float]]]:
+        low, high = min(channels), max(channels)
+        samples = max(1, int(settings["rate"] * settings["duration"]))
+        result = self.redlab.burst(low, high, settings["rate"], samples)
+        if result is not None:
+            _start, actual_rate, data = result
+            logger.debug("Qualifizierung: Burst Kanäle %s-%s, %s Samples @ %.0f Hz", low, high, samples, actual_rate)
+            return {ch: list(data[ch - low]) for ch in channels}
+        logger.info("Qualifizierung: Burst nicht verfügbar, Rückfall auf %d Einzelmessungen je Kanal", settings["fallback_reads"])
+        values: Dict[int, List[Optional[float]]] = {ch: [] for ch in channels}
+        for _ in range(int(settings["fallback_reads"])):
+            for ch in channels:
+                values[ch].append(self.redlab.read(ch))
+        return values
+
+    def run(self, channels: Sequence[int]) -> QualificationReport:
+        """
+        Qualifiziert die angegebenen Kanäle parallel.
+
+        Ablauf: Relais OFF, Einschwingen, INA219-Werte der nächsten Erfassungszyklen
+        (Präsenzstrom, Versorgung), RedLab-Burst gegen die Negativschwelle; Relais ON,
+        Einschwingen, RedLab-Burst gegen die Positivschwelle; Relais wieder OFF.
+
+        Präsenzstrom und Versorgung werden bewusst bei Relais OFF geprüft: das ist der
+        Ruhezustand eines freien Steckplatzes, in dem auch Steck-Erkennung und
+        Auto-Start laufen. Das Präsenzband gilt in der Bewertung unabhängig vom
+        Relaiszustand, der OFF-Wert ist daher für die Sitzung aussagekräftig.
+
+        Args:
+            channels: Sensorkanäle ohne laufende Sitzung.
+
+        Returns:
+            QualificationReport mit GO/NO-GO je Kanal (auch in `latest`).
+        """
+        requested = sorted(set(channels))
+        cfg: ConfigSchema = self.config.config
+        settings = self._settings(cfg.qualification)
+        pass_ratio = settings["pass_ratio"]
+        started = datetime.now()
+        t0 = time.monotonic()
+        slots = {ch: SlotQualification(ch) for ch in requested}
+        channels = [ch for ch in requested if self._has_relay(ch)]
+        for ch in requested:
+            if not self._has_relay(ch):
+                slots[ch].untestable = "kein Relais-Pin (relais_pins)"
+                logger.warning("Qualifizierung Kanal %d: nicht prüfbar, kein Relais-Pin konfiguriert", ch + 1)
+        if not channels:
+            return QualificationReport(started, time.monotonic() - t0, slots)
+
+        logger.info("Qualifizierung gestartet: Kanäle %s", ", ".join(str(ch + 1) for ch in channels))
+        try:
+            self._switch(channels, False)
+            self.sleep(settings["settle"])
+            ina_values = self._sample_ina(channels, int(settings["ina_samples"]))
+            signal_off = self._sample_signal(channels, settings)
+
+            self._switch(channels, True)
+            self.sleep(settings["settle"])
+            signal_on = self._sample_signal(channels, settings)
+        finally:
+            self._switch(channels, False)
+
+        for ch in channels:
+            currents, voltages = ina_values[ch]
+            checks = slots[ch].checks
+            checks.append(evaluate_band(CHECK_PRESENCE, currents, cfg.presence_current_threshold, pass_ratio))
+            checks.append(evaluate_band(CHECK_SUPPLY, voltages, cfg.supply_voltage_threshold, pass_ratio))
+            checks.append(evaluate_band(CHECK_SIGNAL_OFF, signal_off[ch], cfg.redlab_neg_threshold, pass_ratio, strict=True))
+            checks.append(evaluate_band(CHECK_SIGNAL_ON, signal_on[ch], cfg.redlab_pos_threshold, pass_ratio, strict=True))
+
+        report = QualificationReport(started, time.monotonic() - t0, slots)
+        for ch in channels:
+            slot = slots[ch]
+            if slot.passed:
+                logger.info("Qualifizierung Kanal %d: GO", ch + 1)
+            else:
+                logger.warning("Qualifizierung Kanal %d: NO-GO (%s)", ch + 1, "; ".join(check.describe() for check in slot.failed()))
+        logger.info("Qualifizierung beendet in %.2f s: %d GO, %d NO-GO, %d nicht prüfbar", report.duration, len(report.go()), len(report.no_go()), len(report.untestable()))
+        self.latest = report
+        return report
@@ -0,0 +1,232 @@
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeController:
+    """
+    Echtzeitbetrieb des Erfassungspfads (Erfassungsthread, Event-Loop der
+    AsyncAcquisitionEngine, Watchdog-Worker):
+
+    - CPU-Affinität: der Erfassungspfad läuft auf `cpus`; mit `isolate` werden alle
+      übrigen Threads des Prozesses (Tk, LED-Ausgabe, Logging, Live-Server) auf die
+      restlichen CPUs gelegt. Später erzeugte Threads erben die Affinität ihres
+      Erzeugers.
+    - Scheduling: optional SCHED_FIFO mit `priority`; ohne Berechtigung (CAP_SYS_NICE)
+      Rückfall auf `nice`, sonst Normalbetrieb mit Warnung.
+    - Garbage Collection: nach der Initialisierung `gc.freeze()` (langlebige Objekte
+      werden nicht mehr durchsucht) und automatische GC aus; gesammelt wird zwischen
+      den Zyklen, wenn bis zum nächsten Termin mindestens `gc_slack` Zeit bleibt.
+    - GIL: ein rechnender Thread gibt den GIL erst nach dem Umschaltintervall ab
+      (Standard 5 ms); `switch_interval` verkürzt die Wartezeit des geweckten
+      Erfassungsthreads.
+    - Jitter-Bericht des FixedRateScheduler alle `report_interval` Sekunden im Log.
+
+    Alles ist Linux-spezifisch; nicht verfügbare Schritte werden übersprungen.
+
+    Args:
+        cpus: CPUs für den Erfassungspfad (leer = nicht pinnen).
+        isolate: Übrige Threads von diesen CPUs fernhalten.
+        sched_fifo: SCHED_FIFO anfordern.
+        priority: FIFO-Priorität (1..99).
+        nice: Nice-Wert als Rückfall ohne SCHED_FIFO.
+        gc_freeze: GC einfrieren und nur zwischen den Zyklen sammeln.
+        gc_slack: Mindest-Restzeit bis zum nächsten Termin für eine Sammlung (s).
+        spin: Aktives Warten vor jedem Termin (s), für den FixedRateScheduler.
+        switch_interval: GIL-Umschaltintervall (s) während der Erfassung (0 = unverändert).
+        report_interval: Sekunden zwischen Jitter-Berichten (0 = aus).
+        clock: Monotone Zeitquelle.
+    """
+    def __init__(
+        self,
+        cpus: Iterable[int] = (),
+        isolate: bool = True,
+        sched_fifo: bool = False,
+        priority: int = 50,
+        nice: int = -10,
+        gc_freeze: bool = True,
+        gc_slack: float = 0.002,
+        spin: float = 0.0005,
+        switch_interval: float = 0.001,
+        report_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.cpus: Set[int] = set(cpus)
+        self.isolate = isolate
+        self.sched_fifo = sched_fifo
+        self.priority = priority
+        self.nice = nice
+        self.gc_freeze = gc_freeze
+        self.gc_slack = gc_slack
+        self.spin = spin
+        self.switch_interval = switch_interval
+        self._switch_interval = sys.getswitchinterval()
+        self.report_interval = report_interval
+        self.clock = clock
+        self.scheduler = None
+        self._threads: List[Callable[[], Optional[int]]] = []
+        self._gc_enabled = gc.isenabled()
+        self._next_report = 0.0
+        self.policy = "normal"
+        self.gc_collections = [0, 0, 0]
+        self.gc_time = 0.0
+        self.gc_max = 0.0
+        self.gc_forced = 0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RealtimeController":
+        return cls(
+            cpus=[int(c) for c in str(config.get("cpus", "")).split(",") if c.strip()],
+            isolate=bool(config.get("isolate", True)),
+            sched_fifo=bool(config.get("sched_fifo", False)),
+            priority=int(config.get("priority", 50)),
+            nice=int(config.get("nice", -10)),
+            gc_freeze=bool(config.get("gc_freeze", True)),
+            gc_slack=float(config.get("gc_slack", 0.002)),
+            spin=float(config.get("spin", 0.0005)),
+            switch_interval=float(config.get("switch_interval", 0.001)),
+            report_interval=float(config.get("report_interval", 60.0))
+        )
+
+    def add_thread(self, native_id: Callable[[], Optional[int]]) -> None:
+        """
+        Nimmt einen weiteren Thread in den Erfassungspfad auf. Übergeben wird eine
+        Funktion, die die aktuelle Thread-ID liefert (Worker können ersetzt werden).
+        """
+        self._threads.append(native_id)
+
+    # ------------------------------------------------------------- Threads
+
+    def _tids(self) -> Set[int]:
+        tids = {threading.get_native_id()}
+        for native_id in self._threads:
+            tid = native_id()
+            if tid is not None:
+                tids.add(tid)
+        return tids
+
+    def _pin(self, tids: Set[int]) -> None:
+        if not self.cpus or not hasattr(os, "sched_setaffinity"):
+            return
+        available = os.sched_getaffinity(0)
+        cpus = self.cpus & available
+        if not cpus:
+            logger.warning("Echtzeit: CPUs %s nicht verfügbar (vorhanden %s), kein Pinning", sorted(self.cpus), sorted(available))
+            return
+        others = available - cpus
+        if self.isolate and others:
+            for thread in threading.enumerate():
+                tid = thread.native_id
+                if tid is not None and tid not in tids:
+                    try:
+                        os.sched_setaffinity(tid, others)
+                    except OSError:
+                        pass
+        for tid in tids:
+            try:
+                os.sched_setaffinity(tid, cpus)
+            except OSError as e:
+                logger.warning("Echtzeit: Affinität für Thread %s nicht setzbar: %s", tid, e)
+        logger.info("Echtzeit: Erfassungspfad auf CPU %s, übrige Threads auf %s", sorted(cpus), sorted(others) if self.isolate else "alle")
+
+    def _schedule(self, tids: Set[int]) -> None:
+        if self.sched_fifo and hasattr(os, "SCHED_FIFO"):
+            try:
+                for tid in tids:
+                    os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(self.priority))
+                self.policy = f"SCHED_FIFO/{self.priority}"
+                logger.info("Echtzeit: %s für %d Threads", self.policy, len(tids))
+                return
+            except (PermissionError, OSError) as e:
+                logger.warning("Echtzeit: SCHED_FIFO nicht erlaubt (%s), Rückfall auf nice %d", e, self.nice)
+        if self.nice:
+            try:
+                for tid in tids:
+                    os.setpriority(os.PRIO_PROCESS, tid, self.nice)
+                self.policy = f"nice {self.nice}"
+                logger.info("Echtzeit: %s für %d Threads", self.policy, len(tids))
+            except (AttributeError, PermissionError, OSError) as e:
+                logger.warning("Echtzeit: Priorität nicht erhöhbar (%s), Normalbetrieb", e)
+
+    # --------------------------------------------------------------- Ablauf
+
+    def enter(self, scheduler) -> None:
+        """Im Erfassungsthread vor dem ersten Zyklus aufrufen."""
+        self.scheduler = scheduler
+        tids = self._tids()
+        self._pin(tids)
+        self._schedule(tids)
+        if self.switch_interval:
+            sys.setswitchinterval(self.switch_interval)
+        if self.gc_freeze:
+            gc.collect()
+            gc.freeze()
+            gc.disable()
+            logger.info("Echtzeit: %d Objekte eingefroren, GC nur zwischen den Zyklen", gc.get_freeze_count())
+        self._next_report = self.clock() + self.report_interval
+
+    def leave(self) -> None:
+        """Im Erfassungsthread nach dem letzten Zyklus aufrufen."""
+        if self.switch_interval:
+            sys.setswitchinterval(self._switch_interval)
+        if self.gc_freeze:
+            gc.unfreeze()
+            if self._gc_enabled:
+                gc.enable()
+        self.report()
+
+    def between_cycles(self, next_deadline: float) -> None:
+        """
+        Idle-Hook des Schedulers: sammelt die fällige GC-Generation, wenn genug Zeit
+        bis zum nächsten Termin bleibt. Wird die Sammlung zu lange aufgeschoben
+        (zehnfache Schwelle), läuft sie trotzdem.
+        """
+        now = self.clock()
+        if self.gc_freeze:
+            count0, count1, count2 = gc.get_count()
+            threshold0, threshold1, threshold2 = gc.get_threshold()
+            due = count0 >= threshold0
+            forced = count0 >= 10 * threshold0
+            if due and (forced or next_deadline - now >= self.gc_slack):
+                generation = 2 if count2 >= threshold2 else 1 if count1 >= threshold1 else 0
+                start = time.perf_counter()
+                gc.collect(generation)
+                duration = time.perf_counter() - start
+                self.gc_collections[generation] += 1
+                self.gc_time += duration
+                self.gc_max = max(self.gc_max, duration)
+                if forced and next_deadline - now < self.gc_slack:
+                    self.gc_forced += 1
+        if self.report_interval and now >= self._next_report:
+            self._next_report = now + self.report_interval
+            self.report()
+
+    def report(self) -> None:
+        if self.scheduler is None:
+            return
+        jitter = self.scheduler.jitter()
+        if not jitter["count"]:
+            return
+        logger.info(
+            "Jitter (%s, %d Zyklen): p50 %.0f µs, p99 %.0f µs, p99.9 %.0f µs, max %.0f µs, "
+            "Periodenstreuung %.0f µs; GC %s in %.1f ms (max %.2f ms, %d erzwungen)",
+            self.policy, jitter["count"], jitter["p50"] * 1e6, jitter["p99"] * 1e6, jitter["p999"] * 1e6,
+            jitter["max"] * 1e6, jitter["period_std"] * 1e6, "/".join(map(str, self.gc_collections)),
+            self.gc_time * 1e3, self.gc_max * 1e3, self.gc_forced
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "cpus": sorted(self.cpus),
+            "gc_collections": list(self.gc_collections),
+            "gc_time": self.gc_time,
+            "gc_max": self.gc_max,
+            "gc_forced": self.gc_forced,
+        }
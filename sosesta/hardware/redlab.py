@@ -1,107 +1,268 @@
-import logging
-import time
-from typing import Optional
-from uldaq import (
-    get_daq_device_inventory,
-    DaqDevice,
-    InterfaceType,
-    AiInputMode,
-    Range,
-    AInFlag
-)
-
-logger = logging.getLogger(__name__)
-
-class RedLabDAQ:
-    """
-    Verwalter für RedLab DAQ-Gerät mittels UL-DAQ Bibliothek.
-    Bietet Connect/Read/Disconnect mit Fehlerbehandlung und optionalem Reconnect.
-    """
-    def __init__(self, reconnect_retries: int = 3, reconnect_delay: float = 0.5):
-        self.daq_device: Optional[DaqDevice] = None
-        self.ai_device = None
-        self.reconnect_retries = reconnect_retries
-        self.reconnect_delay = reconnect_delay
-
-    def connect(self) -> None:
-        """
-        Stellt Verbindung zum ersten verfügbaren DAQ-Gerät her.
-
-        Raises:
-            RuntimeError: Wenn kein Gerät gefunden oder Verbindung fehlschlägt.
-        """
-        devices = get_daq_device_inventory(InterfaceType.USB)
-        logger.debug(f"Gefundene DAQ-Geräte: {devices}")
-
-        if not devices:
-            logger.error("Kein RedLab DAQ-Gerät gefunden")
-            raise RuntimeError("Kein RedLab DAQ-Gerät gefunden")
-
-        for attempt in range(1, self.reconnect_retries + 1):
-            try:
-                self._try_connect_once(devices[0])
-                logger.info(f"RedLab DAQ erfolgreich verbunden (Versuch {attempt})")
-                return
-            except Exception as e:
-                logger.warning(f"Verbindungsversuch {attempt} fehlgeschlagen: {e}", exc_info=True)
-                time.sleep(self.reconnect_delay)
-
-        logger.error("RedLab DAQ konnte nicht verbunden werden")
-        raise RuntimeError("RedLab DAQ-Verbindung fehlgeschlagen")
-
-    def _try_connect_once(self, descriptor):
-        self.daq_device = DaqDevice(descriptor)
-        self.ai_device = self.daq_device.get_ai_device()
-        self.daq_device.connect()
-
-    def read(self, channel: int) -> Optional[float]:
-        """
-        Liest den analogen Wert (V) von einem spezifischen Kanal.
-        Versucht bei fehlender Verbindung, einmal neu zu verbinden.
-
-        Args:
-            channel: Kanalnummer (0-basierend).
-
-        Returns:
-            Gemessene Spannung in Volt oder None bei Fehler.
-        """
-        if self.ai_device is None:
-            logger.warning("AI-Gerät nicht verbunden – versuche Reconnect")
-            try:
-                self.connect()
-            except RuntimeError:
-                return None
-
-        try:
-            value = self.ai_device.a_in(
-                channel,
-                AiInputMode.SINGLE_ENDED,
-                Range.BIP10VOLTS,
-                AInFlag.DEFAULT
-            )
-            logger.debug(f"RedLab Kanal {channel}: {value:.3f} V")
-            return value
-        except Exception as e:
-            logger.error(f"Fehler beim Lesen von RedLab-Kanal {channel}: {e}", exc_info=True)
-            return None
-
-    def is_connected(self) -> bool:
-        return self.daq_device is not None and self.ai_device is not None
-
-    def disconnect(self) -> None:
-        """
-        Trennt die Verbindung zum DAQ-Gerät.
-        """
-        if self.ai_device:
-            try:
-                self.ai_device.disconnect()
-                logger.info("AI-Device getrennt")
-            except Exception as e:
-                logger.warning(f"Fehler beim Trennen des AI-Devices: {e}", exc_info=True)
-
-        if self.daq_device:
-            try:
-                self.daq_device.disconnect()
-                logger.info("DAQ-Gerät getrennt")
-            except Exception as e:
-                logger.warning(f"Fehler beim Trennen des DAQ-Geräts: {e}", exc_info=True)
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from uldaq import (
+    get_daq_device_inventory,
+    create_float_buffer,
+    DaqDevice,
+    InterfaceType,
+    AiInputMode,
+    Range,
+    AInFlag,
+    AInScanFlag,
+    ScanOption,
+    WaitType
+)
+
+logger = logging.getLogger(__name__)
+
+class RedLabDAQ:
+    """
+    Verwalter für RedLab DAQ-Gerät mittels UL-DAQ Bibliothek.
+    Bietet Connect/Read/Disconnect mit Fehlerbehandlung und optionalem Reconnect.
+    Alle Zugriffe auf das AI-Device sind über einen Lock serialisiert, damit
+    Burst-Erfassungen (a_in_scan) und Einzelmessungen (a_in) nicht kollidieren.
+    Während eines Bursts wird der Lock nur zum Starten und Abfragen des Scans
+    gehalten: Einzelmessungen auf gescannten Kanälen liefern den jüngsten Wert aus
+    dem Scanpuffer, übrige Kanäle warten das Burst-Ende ab.
+    """
+    def __init__(self, reconnect_retries: int = 3, reconnect_delay: float = 0.5):
+        self.daq_device: Optional[DaqDevice] = None
+        self.ai_device = None
+        self.reconnect_retries = reconnect_retries
+        self.reconnect_delay = reconnect_delay
+        self.lock = threading.RLock()
+        self._scan_lock = threading.Lock()   # ein Burst zur Zeit; a_in außerhalb des Scanbereichs wartet
+        self._scan: Optional[Tuple[object, int, int]] = None   # (Puffer, erster Kanal, Kanalzahl) des laufenden Bursts
+
+    def connect(self) -> None:
+        """
+        Stellt Verbindung zum ersten verfügbaren DAQ-Gerät her.
+
+        Raises:
+            RuntimeError: Wenn kein Gerät gefunden oder Verbindung fehlschlägt.
+        """
+        devices = get_daq_device_inventory(InterfaceType.USB)
+        logger.debug("Gefundene DAQ-Geräte: %s", devices)
+
+        if not devices:
+            logger.error("Kein RedLab DAQ-Gerät gefunden")
+            raise RuntimeError("Kein RedLab DAQ-Gerät gefunden")
+
+        for attempt in range(1, self.reconnect_retries + 1):
+            try:
+                self._try_connect_once(devices[0])
+                logger.info("RedLab DAQ erfolgreich verbunden (Versuch %s)", attempt)
+                return
+            except Exception as e:
+                logger.warning("Verbindungsversuch %s fehlgeschlagen: %s", attempt, e, exc_info=True)
+                time.sleep(self.reconnect_delay)
+
+        logger.error("RedLab DAQ konnte nicht verbunden werden")
+        raise RuntimeError("RedLab DAQ-Verbindung fehlgeschlagen")
+
+    def _try_connect_once(self, descriptor):
+        # Vorheriges Geräteobjekt freigeben, sonst bleibt bei jedem Reconnect ein UL-Handle liegen
+        self._release()
+        device = DaqDevice(descriptor)
+        try:
+            ai_device = device.get_ai_device()
+            device.connect()
+        except Exception:
+            self._release_device(device)
+            raise
+        self.daq_device = device
+        self.ai_device = ai_device
+
+    @staticmethod
+    def _release_device(device: DaqDevice) -> None:
+        try:
+            if device.is_connected():
+                device.disconnect()
+            device.release()
+        except Exception as e:
+            logger.debug("Freigeben des DAQ-Geräteobjekts fehlgeschlagen: %s", e)
+
+    def _release(self) -> None:
+        if self.daq_device is not None:
+            self._release_device(self.daq_device)
+        self.daq_device = None
+        self.ai_device = None
+
+    def read(self, channel: int) -> Optional[float]:
+        """
+        Liest den analogen Wert (V) von einem spezifischen Kanal.
+        Versucht bei fehlender Verbindung, einmal neu zu verbinden.
+
+        Args:
+            channel: Kanalnummer (0-basierend).
+
+        Returns:
+            Gemessene Spannung in Volt oder None bei Fehler.
+        """
+        if self.ai_device is None:
+            logger.warning("AI-Gerät nicht verbunden – versuche Reconnect")
+            try:
+                self.connect()
+            except RuntimeError:
+                return None
+
+        try:
+            with self.lock:
+                value = self._scan_value(channel)
+            if value is None:
+                with self._scan_lock, self.lock:
+                    value = self.ai_device.a_in(
+                        channel,
+                        AiInputMode.SINGLE_ENDED,
+                        Range.BIP10VOLTS,
+                        AInFlag.DEFAULT
+                    )
+            logger.debug("RedLab Kanal %s: %.3f V", channel, value)
+            return value
+        except Exception as e:
+            logger.error("Fehler beim Lesen von RedLab-Kanal %s: %s", channel, e, exc_info=True)
+            return None
+
+    def _scan_value(self, channel: int) -> Optional[float]:
+        """Jüngster Wert eines gescannten Kanals aus dem laufenden Burst (None = kein Burst bzw. noch kein Wert)."""
+        scan = self._scan
+        if scan is None:
+            return None
+        buffer, low_channel, num_channels = scan
+        if not low_channel <= channel < low_channel + num_channels:
+            return None
+        _status, transfer = self.ai_device.get_scan_status()
+        if transfer.current_index < 0:
+            return None
+        return buffer[transfer.current_index + channel - low_channel]
+
+    def burst(
+        self,
+        low_channel: int,
+        high_channel: int,
+        rate: float,
+        samples: int,
+        on_started: Optional[Callable[[float], None]] = None,
+    ) -> Optional[Tuple[float, float, List[List[float]]]]:
+        """
+        Hardware-getaktete Burst-Erfassung (a_in_scan) über einen Kanalbereich.
+        Einzelmessungen auf den gescannten Kanälen werden währenddessen aus dem
+        Scanpuffer bedient; weitere Bursts warten.
+
+        Args:
+            low_channel: Erster Kanal des Scanbereichs.
+            high_channel: Letzter Kanal des Scanbereichs.
+            rate: Gewünschte Abtastrate pro Kanal (Hz).
+            samples: Anzahl Samples pro Kanal.
+            on_started: Wird mit dem Scanstart (time.monotonic) aufgerufen, sobald der
+                        Scan läuft (z.B. um erst danach ein Relais zu schalten).
+
+        Returns:
+            Tuple[start, actual_rate, data] mit start = time.monotonic() beim Scanstart,
+            der tatsächlichen Rate und einer Sample-Liste pro Kanal; None bei Fehler.
+        """
+        if self.ai_device is None:
+            logger.warning("AI-Gerät nicht verbunden – Burst abgebrochen")
+            return None
+
+        num_channels = high_channel - low_channel + 1
+        buffer = create_float_buffer(num_channels, samples)
+        with self._scan_lock:
+            with self.lock:
+                try:
+                    start = time.monotonic()
+                    actual_rate = self.ai_device.a_in_scan(
+                        low_channel,
+                        high_channel,
+                        AiInputMode.SINGLE_ENDED,
+                        Range.BIP10VOLTS,
+                        samples,
+                        rate,
+                        ScanOption.DEFAULTIO,
+                        AInScanFlag.DEFAULT,
+                        buffer
+                    )
+                    self._scan = (buffer, low_channel, num_channels)
+                except Exception as e:
+                    logger.error("Fehler beim Start des RedLab-Bursts Kanäle %s-%s: %s", low_channel, high_channel, e, exc_info=True)
+                    self._stop_scan()
+                    return None
+            if on_started:
+                try:
+                    on_started(start)
+                except Exception as e:
+                    logger.error("Fehler im Burst-Start-Callback: %s", e, exc_info=True)
+            try:
+                self.ai_device.scan_wait(WaitType.WAIT_UNTIL_DONE, samples / rate + 1.0)
+            except Exception as e:
+                logger.error("Fehler beim RedLab-Burst Kanäle %s-%s: %s", low_channel, high_channel, e, exc_info=True)
+                with self.lock:
+                    self._stop_scan()
+                return None
+            finally:
+                with self.lock:
+                    self._scan = None
+
+        data = [list(buffer[offset::num_channels]) for offset in range(num_channels)]
+        logger.debug("RedLab-Burst Kanäle %s-%s: %s Samples @ %.0f Hz", low_channel, high_channel, samples, actual_rate)
+        return start, actual_rate, data
+
+    def _stop_scan(self) -> None:
+        self._scan = None
+        try:
+            self.ai_device.scan_stop()
+        except Exception:
+            pass
+
+    def reset(self, timeout: float = 5.0) -> None:
+        """
+        Trennt das Gerät und verbindet neu (Watchdog-Eskalation). Der Reset läuft unter
+        den bestehenden Locks, damit kein Burst und keine Einzelmessung gleichzeitig auf
+        das Gerät zugreift.
+
+        Args:
+            timeout: Maximale Wartezeit (s) auf die Locks (acquisition.reset_timeout
+                     des Watchdogs).
+
+        Raises:
+            RuntimeError: Ein hängender Aufruf hält die Locks noch; der Reset wird bei
+                          der nächsten Eskalation wiederholt.
+        """
+        if not self._scan_lock.acquire(timeout=timeout):
+            raise RuntimeError("RedLab-Burst läuft noch – Reset nicht möglich")
+        try:
+            if not self.lock.acquire(timeout=timeout):
+                raise RuntimeError("RedLab-Zugriff hängt noch – Reset nicht möglich")
+            try:
+                logger.warning("RedLab DAQ wird zurückgesetzt")
+                self._scan = None
+                self.disconnect()
+                self._release()
+                self.connect()
+            finally:
+                self.lock.release()
+        finally:
+            self._scan_lock.release()
+
+    def is_connected(self) -> bool:
+        return self.daq_device is not None and self.ai_device is not None
+
+    def disconnect(self) -> None:
+        """
+        Trennt die Verbindung zum DAQ-Gerät.
+        """
+        if self.ai_device:
+            try:
+                self.ai_device.disconnect()
+                logger.info("AI-Device getrennt")
+            except Exception as e:
+                logger.warning("Fehler beim Trennen des AI-Devices: %s", e, exc_info=True)
+
+        if self.daq_device:
+            try:
+                self.daq_device.disconnect()
+                logger.info("DAQ-Gerät getrennt")
+            except Exception as e:
+                logger.warning("Fehler beim Trennen des DAQ-Geräts: %s", e, exc_info=True)
@@ -0,0 +1,301 @@
+import heapq
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+from hardware.relays import RelayController
+
+logger = logging.getLogger(__name__)
+
+# Unterhalb dieser Restzeit (s) wird nicht mehr geschlafen, sondern aktiv gewartet
+_SPIN_THRESHOLD = 0.002
+
+# Haltezeiten (on_time, off_time) eines zyklischen Termins; None = einmalige Umschaltung
+Holds = Optional[Tuple[float, float]]
+
+# (index, state, due) -> Event, das gesetzt wird, sobald die Umschaltung erfolgen darf (None = sofort)
+Pretrigger = Callable[[int, bool, float], Optional[threading.Event]]
+
+PROFILES = ("staggered_on", "staggered_off", "cycle")
+
+
+@dataclass(frozen=True)
+class RelayEvent:
+    """Eine ausgeführte Relais-Umschaltung mit präzisem Zeitstempel."""
+    index: int
+    state: bool
+    timestamp: float    # time.monotonic() direkt nach dem Schalten
+    wall_time: float    # time.time() zum selben Zeitpunkt
+    scheduled: float    # geplanter Zeitpunkt (time.monotonic)
+
+    @property
+    def latency(self) -> float:
+        """Verspätung der Umschaltung gegenüber dem Plan in Sekunden."""
+        return self.timestamp - self.scheduled
+
+
+@dataclass
+class RelayProfile:
+    """
+    Ablaufprofil für den RelaySequencer.
+
+    Args:
+        name: 'staggered_on', 'staggered_off' oder 'cycle'.
+        stagger: Zeitversatz (s) zwischen den Kanälen beim Ein-/Ausschalten.
+        on_time: Einschaltdauer (s) je Zyklus (nur 'cycle').
+        off_time: Ausschaltdauer (s) je Zyklus (nur 'cycle').
+        phase_step: Zusätzliche Phasenverschiebung (s) pro Kanal (nur 'cycle').
+    """
+    name: str = "staggered_on"
+    stagger: float = 0.05
+    on_time: float = 30.0
+    off_time: float = 30.0
+    phase_step: float = 0.0
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Union[str, float]]) -> "RelayProfile":
+        profile = cls(
+            name=str(cfg.get("profile", cls.name)),
+            stagger=float(cfg.get("stagger", cls.stagger)),
+            on_time=float(cfg.get("on_time", cls.on_time)),
+            off_time=float(cfg.get("off_time", cls.off_time)),
+            phase_step=float(cfg.get("phase_step", cls.phase_step)),
+        )
+        if profile.name not in PROFILES:
+            logger.warning("Unbekanntes Relaisprofil '%s', verwende staggered_on", profile.name)
+            profile.name = "staggered_on"
+        if profile.name == "cycle" and (profile.on_time <= 0 or profile.off_time <= 0):
+            logger.warning("Relaisprofil 'cycle' benötigt on_time und off_time > 0, verwende staggered_on")
+            profile.name = "staggered_on"
+        return profile
+
+
+class RelaySequencer:
+    """
+    Zeitgesteuerter Relais-Ablauf in einem eigenen Thread.
+
+    Schaltvorgänge werden als Termine (time.monotonic) in einer Prioritätswarteschlange
+    geplant und vom Sequencer-Thread termingenau ausgeführt. Aufrufer (z.B. Tk-Handler)
+    übergeben nur Kommandos und blockieren nie. Neben dem gemeinsamen Ablauf aller
+    Kanäle kann jedes Relais einzeln gestartet und gestoppt werden (Kanalsitzungen),
+    ohne die geplanten Umschaltungen der übrigen Kanäle zu verändern. Jede Umschaltung wird als RelayEvent an
+    registrierte Listener gemeldet; der aktuelle Zustand steht über
+    RelayController.get_state/snapshot der Erfassung zur Verfügung. Ein optionaler
+    Pretrigger wird vor jeder Umschaltung aufgerufen (z.B. um eine Messung zu starten);
+    geschaltet wird erst, wenn er bereit meldet.
+
+    Args:
+        relays: RelayController, der die GPIO-Pins schaltet.
+        config: Dict aus ConfigSchema.relay_sequencer.
+        history: Anzahl der zuletzt ausgeführten Events, die in `events` gehalten werden.
+    """
+    def __init__(self, relays: RelayController, config: Optional[Dict[str, Union[str, float]]] = None, history: int = 256):
+        self.relays = relays
+        self.profile = RelayProfile.from_config(config or {})
+        self.events: Deque[RelayEvent] = deque(maxlen=history)
+        self._listeners: List[Callable[[RelayEvent], None]] = []
+        self._commands: "queue.Queue[Tuple[str, Optional[RelayProfile], Optional[int]]]" = queue.Queue()
+        self._schedule: List[Tuple[float, int, bool, Holds]] = []
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pretrigger: Optional[Pretrigger] = None
+        self._pretrigger_lead = 0.0
+        self._pretrigger_timeout = 0.0
+        self._armed: Optional[Tuple[float, int, bool, Holds]] = None
+
+    # --- öffentliche, nicht blockierende API ---------------------------------
+
+    def start_thread(self) -> None:
+        """Startet den Sequencer-Thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="RelaySequencer", daemon=True)
+        self._thread.start()
+        logger.info("RelaySequencer-Thread gestartet")
+
+    def start(self, profile: Optional[RelayProfile] = None) -> None:
+        """Ersetzt den laufenden Ablauf durch das gegebene (oder konfigurierte) Profil."""
+        self._commands.put(("start", profile or self.profile, None))
+
+    def stop(self) -> None:
+        """Verwirft alle geplanten Umschaltungen; die Relais bleiben im aktuellen Zustand."""
+        self._commands.put(("stop", None, None))
+
+    def start_channel(self, index: int, profile: Optional[RelayProfile] = None) -> None:
+        """
+        Startet den Ablauf für ein einzelnes Relais ab sofort: bei 'cycle' zyklisch,
+        sonst einschalten. Die übrigen Kanäle bleiben unverändert.
+        """
+        self._commands.put(("start_channel", profile or self.profile, index))
+
+    def stop_channel(self, index: int) -> None:
+        """Verwirft die geplanten Umschaltungen eines Relais und schaltet es aus."""
+        self._commands.put(("stop_channel", None, index))
+
+    def all_off(self) -> None:
+        """Schaltet alle Relais gestaffelt aus und beendet den laufenden Ablauf."""
+        self._commands.put(("start", RelayProfile(name="staggered_off", stagger=self.profile.stagger), None))
+
+    def toggle_all(self) -> None:
+        """Invertiert alle Relais gestaffelt (Ersatz für den blockierenden RelayController.toggle_all)."""
+        self._commands.put(("toggle", None, None))
+
+    def add_listener(self, callback: Callable[[RelayEvent], None]) -> None:
+        """
+        Registriert einen Callback, der nach jeder Umschaltung im Sequencer-Thread
+        aufgerufen wird. Callbacks müssen kurz sein und dürfen nicht blockieren.
+        """
+        self._listeners.append(callback)
+
+    def set_pretrigger(self, callback: Optional[Pretrigger], lead: float = 0.0, timeout: float = 0.1) -> None:
+        """
+        Registriert einen Callback, der `lead` s vor jeder geplanten Umschaltung im
+        Sequencer-Thread aufgerufen wird. Liefert er ein Event, wird erst geschaltet,
+        wenn es gesetzt ist (höchstens `timeout` s nach dem Aufruf, danach trotzdem).
+        Die Verzögerung erscheint als RelayEvent.latency.
+        """
+        self._pretrigger_lead = max(0.0, lead)
+        self._pretrigger_timeout = max(0.0, timeout)
+        self._pretrigger = callback
+
+    def is_active(self) -> bool:
+        """True, solange noch Umschaltungen geplant sind."""
+        return bool(self._schedule)
+
+    def shutdown(self, timeout: float = 1.0) -> None:
+        """Beendet den Sequencer-Thread."""
+        self._running.clear()
+        self._commands.put(("quit", None, None))
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("RelaySequencer-Thread beendet")
+
+    # --- Planung --------------------------------------------------------------
+
+    def _plan(self, profile: RelayProfile, now: float) -> None:
+        self._schedule = []
+        count = len(self.relays.pins)
+        for idx in range(count):
+            offset = idx * profile.stagger
+            if profile.name == "staggered_off":
+                heapq.heappush(self._schedule, (now + offset, idx, False, None))
+            elif profile.name == "cycle":
+                period = profile.on_time + profile.off_time
+                phase = (idx * profile.phase_step) % period if period > 0 else 0.0
+                heapq.heappush(self._schedule, (now + offset + phase, idx, True, (profile.on_time, profile.off_time)))
+            else:
+                heapq.heappush(self._schedule, (now + offset, idx, True, None))
+        logger.info("Relaisprofil '%s' geplant (%s Kanäle)", profile.name, count)
+
+    def _has_relay(self, idx: int) -> bool:
+        return 0 <= idx < len(self.relays.pins)
+
+    def _plan_channel(self, profile: RelayProfile, idx: int, now: float) -> None:
+        if not self._has_relay(idx):
+            # Sonst würde ein zyklischer Termin ohne GPIO-Pin endlos neu geplant
+            logger.warning("Relais %d: kein GPIO-Pin konfiguriert (relais_pins), Ablauf nicht gestartet", idx + 1)
+            return
+        self._drop_channel(idx)
+        if profile.name == "cycle":
+            # Haltezeiten am Termin: jeder Kanal behält sein eigenes Profil
+            heapq.heappush(self._schedule, (now, idx, True, (profile.on_time, profile.off_time)))
+        else:
+            heapq.heappush(self._schedule, (now, idx, True, None))
+        logger.info("Relais %d: Ablauf '%s' gestartet", idx + 1, profile.name)
+
+    def _drop_channel(self, idx: int) -> None:
+        self._schedule = [entry for entry in self._schedule if entry[1] != idx]
+        heapq.heapify(self._schedule)
+
+    def _plan_toggle(self, now: float) -> None:
+        self._schedule = []
+        for idx, state in enumerate(self.relays.snapshot()):
+            heapq.heappush(self._schedule, (now + idx * self.profile.stagger, idx, not state, None))
+
+    def _handle_command(self, command: str, profile: Optional[RelayProfile], index: Optional[int]) -> None:
+        now = time.monotonic()
+        if command == "start":
+            self._plan(profile, now)
+        elif command == "start_channel":
+            self._plan_channel(profile, index, now)
+        elif command == "stop_channel":
+            self._drop_channel(index)
+            if self._has_relay(index):
+                heapq.heappush(self._schedule, (now, index, False, None))
+        elif command == "toggle":
+            self._plan_toggle(now)
+        elif command == "stop":
+            self._schedule = []
+            logger.info("Relais-Ablauf gestoppt")
+
+    # --- Thread ---------------------------------------------------------------
+
+    def _next_time(self) -> float:
+        due = self._schedule[0][0]
+        if self._pretrigger is not None and self._armed is not self._schedule[0]:
+            return due - self._pretrigger_lead
+        return due
+
+    def _run(self) -> None:
+        while self._running.is_set():
+            timeout = None
+            if self._schedule:
+                timeout = self._next_time() - time.monotonic()
+            if timeout is None or timeout > _SPIN_THRESHOLD:
+                try:
+                    wait = None if timeout is None else timeout - _SPIN_THRESHOLD
+                    command, profile, index = self._commands.get(timeout=wait)
+                    if command == "quit":
+                        break
+                    self._handle_command(command, profile, index)
+                    continue
+                except queue.Empty:
+                    pass
+            self._execute_due()
+
+    def _execute_due(self) -> None:
+        if not self._schedule:
+            return
+        entry = self._schedule[0]
+        due, idx, state, holds = entry
+        pretrigger = self._pretrigger
+        if pretrigger is not None and self._armed is not entry:
+            self._armed = entry
+            try:
+                ready = pretrigger(idx, state, due)
+            except Exception as e:
+                logger.error("Fehler im RelaySequencer-Pretrigger: %s", e, exc_info=True)
+                ready = None
+            if ready is not None and not ready.wait(self._pretrigger_timeout):
+                logger.warning("Relais %d: Pretrigger nicht bereit nach %.0f ms, schalte trotzdem", idx + 1, self._pretrigger_timeout * 1000)
+            return   # zurück in die Schleife: Kommandos prüfen, dann termingenau schalten
+        while time.monotonic() < due:
+            pass
+        heapq.heappop(self._schedule)
+
+        timestamp = self.relays.set_relay(idx, state)
+        if holds is not None:
+            # Nächste Flanke relativ zum Plan (nicht zur Ist-Zeit) -> driftfrei
+            hold = holds[0] if state else holds[1]
+            heapq.heappush(self._schedule, (due + hold, idx, not state, holds))
+        if timestamp is None:
+            return
+
+        event = RelayEvent(
+            index=idx,
+            state=state,
+            timestamp=timestamp,
+            wall_time=time.time() - (time.monotonic() - timestamp),
+            scheduled=due,
+        )
+        self.events.append(event)
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error("Fehler in RelaySequencer-Listener: %s", e, exc_info=True)
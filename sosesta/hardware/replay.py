@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Replay-Backend: spielt archivierte Läufe als simulierte Hardware durch die
+Auswertungspipeline (SensorManager/RuleEngine, optional ArchiveWriter oder GUI).
+
+Aufruf (im Paketverzeichnis):
+    python -m hardware.replay archive/ --speed 0
+    python -m hardware.replay archive/2025-07-29_140935.run.csv --speed 10 --archive-out /tmp/replay
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from deepmerge import always_merger
+
+from config.config_manager import ConfigManager, DEFAULT_CONFIG
+from config.constants import ConfigSchema
+from hardware.sensors import SensorManager
+from hardware.acquisition import AcquisitionLoop
+from hardware.watchdog import DeadlineExceeded
+from hardware.statistics import StatisticsEngine
+from storage.archive_reader import ArchivedChannel, ArchivedSample, find_runs, read_channels
+from storage.archive_writer import ArchiveWriter
+
+logger = logging.getLogger(__name__)
+
+
+class ReplaySource:
+    """
+    Taktweiser Zugriff auf archivierte Kanalsitzungen. Die Samples aller Sitzungen
+    werden nach Zeitstempel zu Takten zusammengefasst (ein Takt endet, sobald ein Kanal
+    erneut vorkommt oder eine halbe Abtastperiode vergangen ist), sodass gleichzeitig
+    gemessene Kanäle auch gemeinsam abgespielt werden; Kanäle ohne Sitzung im jeweiligen Zeitraum liefern None. Beginnt auf einem
+    Kanal eine andere Sitzung (anderer Prüfling), steht er für diesen Takt in `boundaries`.
+    """
+    def __init__(self, sessions: List[ArchivedChannel]):
+        self.sessions = [s for s in sessions if s.channel >= 0]
+        self.channels: List[int] = sorted({s.channel for s in self.sessions})
+        timeline = sorted(
+            ((sample.timestamp, archived.channel, sample, archived) for archived in self.sessions for sample in archived.samples),
+            key=lambda entry: (entry[0], entry[1])
+        )
+        window = self._period() / 2
+        self.ticks: List[Dict[int, Tuple[ArchivedSample, ArchivedChannel]]] = []
+        tick: Dict[int, Tuple[ArchivedSample, ArchivedChannel]] = {}
+        tick_start = None
+        for ts, channel, sample, archived in timeline:
+            if channel in tick or (tick_start is not None and (ts - tick_start).total_seconds() >= window):
+                self.ticks.append(tick)
+                tick = {}
+            if not tick:
+                tick_start = ts
+            tick[channel] = (sample, archived)
+        if tick:
+            self.ticks.append(tick)
+        self.length = len(self.ticks)
+        self.index = -1
+        self.boundaries: List[int] = []
+        self._current: Dict[int, ArchivedChannel] = {}
+
+    def _period(self, limit: int = 1000) -> float:
+        """Median des Sample-Abstands innerhalb der Sitzungen (Abtastperiode der Aufnahme)."""
+        deltas = []
+        for archived in self.sessions:
+            samples = archived.samples[:limit + 1]
+            deltas.extend((b.timestamp - a.timestamp).total_seconds() for a, b in zip(samples, samples[1:]))
+        deltas = sorted(d for d in deltas if d > 0)
+        return deltas[len(deltas) // 2] if deltas else 1.0
+
+    def advance(self) -> bool:
+        """Springt zum nächsten Takt; False am Ende des Laufs."""
+        if self.index + 1 >= self.length:
+            return False
+        self.index += 1
+        self.boundaries = []
+        for channel, (_, archived) in self.ticks[self.index].items():
+            if self._current.get(channel) is not archived:
+                self._current[channel] = archived
+                self.boundaries.append(channel)
+        return True
+
+    def rewind(self) -> None:
+        self.index = -1
+        self.boundaries = []
+        self._current = {}
+
+    def sample(self, channel: int) -> Optional[ArchivedSample]:
+        if not 0 <= self.index < self.length:
+            return None
+        entry = self.ticks[self.index].get(channel)
+        return entry[0] if entry else None
+
+    def session(self, channel: int) -> Optional[ArchivedChannel]:
+        """Aktuelle (bzw. zuletzt abgespielte) Sitzung eines Kanals."""
+        return self._current.get(channel)
+
+    def timestamp(self) -> Optional[datetime]:
+        if not 0 <= self.index < self.length:
+            return None
+        return min(sample.timestamp for sample, _ in self.ticks[self.index].values())
+
+    def serial_numbers(self) -> Dict[int, str]:
+        return {ch: archived.serial_number for ch, archived in self._current.items()}
+
+
+class ReplayINA219:
+    """Ersetzt INA219SensorManager: liefert Bus-Spannung und Strom aus dem Archiv."""
+    def __init__(self, source: ReplaySource):
+        self.source = source
+
+    def read(self, channel: int) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        sample = self.source.sample(channel)
+        if sample is None:
+            return None, None, None
+        return sample.bus_voltage, sample.current, sample.bus_voltage * sample.current
+
+
+class ReplayRedLab:
+    """
+    Ersetzt RedLabDAQ: liefert das archivierte RedLab-Signal. Als veraltet archivierte
+    Samples werden als verfehlte Deadline wiedergegeben.
+    """
+    def __init__(self, source: ReplaySource):
+        self.source = source
+
+    def read(self, channel: int) -> Optional[float]:
+        sample = self.source.sample(channel)
+        if sample is None:
+            return None
+        if sample.stale:
+            raise DeadlineExceeded(f"Replay: Sample Kanal {channel} veraltet")
+        return sample.redlab_signal
+
+
+class ReplayRelays:
+    """Ersetzt RelayController: archivierter Relaiszustand, Schaltbefehle werden ignoriert."""
+    def __init__(self, source: ReplaySource, count: int = 8):
+        self.source = source
+        self.pins = list(range(count))
+
+    def get_state(self, index: int) -> bool:
+        sample = self.source.sample(index)
+        return bool(sample and sample.relay_on)
+
+    def snapshot(self) -> Tuple[bool, ...]:
+        return tuple(self.get_state(i) for i in range(len(self.pins)))
+
+
+class ReplayOutputs:
+    """Ersetzt OutputActuator und RelaySequencer (Ausgaben werden verworfen)."""
+    def set_color(self, index: int, status: str) -> None:
+        pass
+
+    def update(self) -> None:
+        pass
+
+    def start(self, profile=None) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def start_channel(self, index: int, profile=None) -> None:
+        pass
+
+    def stop_channel(self, index: int) -> None:
+        pass
+
+    def toggle_all(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class _ConfigHolder:
+    """Minimaler ConfigManager-Ersatz für SensorManager/GUI im Replay."""
+    def __init__(self, config: ConfigSchema):
+        self.config = config
+
+    def add_listener(self, callback) -> None:
+        pass
+
+    def update(self, changes):
+        self.config = ConfigSchema(**{**self.config.dict(), **changes})
+        return self.config
+
+
+class _ReplayDashboard:
+    """Dashboard-Ersatz für den SensorManager ohne GUI."""
+    def __init__(self, config: ConfigSchema, serial_numbers: Dict[int, str]):
+        self.config = _ConfigHolder(config)
+        self.serial_numbers = serial_numbers
+
+
+def snapshot_config(snapshot: Dict) -> ConfigSchema:
+    """Baut ein ConfigSchema aus einem archivierten ConfigSnapshot (fehlende Felder = Default)."""
+    merged = always_merger.merge(DEFAULT_CONFIG.dict(), dict(snapshot))
+    return ConfigSchema(**merged)
+
+
+def load_sessions(files: List[str]) -> List[ArchivedChannel]:
+    """
+    Liest die Kanalsitzungen eines Laufs in Startreihenfolge. Sitzungen, die bei einem
+    Dateiwechsel in der nächsten Laufdatei fortgesetzt wurden, werden wieder
+    zusammengesetzt; jede übrige Sitzung (eigener Prüfling) bleibt getrennt.
+    """
+    sessions: List[ArchivedChannel] = []
+    merged: Dict[Tuple[int, datetime, str], ArchivedChannel] = {}
+    for path in files:
+        for archived in read_channels(path):
+            if archived.channel < 0:
+                continue
+            key = (archived.channel, archived.start, archived.serial_number)
+            part = merged.get(key) if archived.start is not None else None
+            if part is None:
+                if archived.start is not None:
+                    merged[key] = archived
+                sessions.append(archived)
+                continue
+            part.samples.extend(archived.samples)
+            part.responses.extend(archived.responses)
+            part.end = archived.end
+            part.summary = archived.summary or part.summary
+    return sorted(sessions, key=lambda a: (a.start or datetime.min, a.channel))
+
+
+def load_source(files: List[str]) -> ReplaySource:
+    """Liest die Dateien eines Laufs als zeitlich ausgerichtete Quelle aller Sitzungen."""
+    return ReplaySource(load_sessions(files))
+
+
+class ReplayHardwareManager:
+    """
+    Ersatz für HardwareManager im GUI-Betrieb: jeder Aufruf von `update_sensors`
+    spielt den nächsten archivierten Takt ab (am Ende beginnt der Lauf von vorn).
+    Beginnt auf einem Kanal eine neue Sitzung, werden Regel- und Statistikzustand
+    des Kanals verworfen und die Seriennummer übernommen.
+    """
+    def __init__(self, files: List[str], config, app):
+        self.config = config
+        self.app = app
+        self.source = load_source(files)
+        self.relays = ReplayRelays(self.source)
+        self.relay_sequencer = ReplayOutputs()
+        self.actuator = ReplayOutputs()
+        self.response_monitor = None
+        self.uploader = None
+        self.qualification = None
+        self.sensor_manager = SensorManager(
+            channels=self.source.channels,
+            ina_manager=ReplayINA219(self.source),
+            redlab_manager=ReplayRedLab(self.source),
+            relay_controller=self.relays,
+            led_controller=self.actuator,
+            dashboard=app
+        )
+        self.config.add_listener(self.sensor_manager.rules.reload)
+        self.statistics = StatisticsEngine(self.sensor_manager.channels, config.config)
+        self.config.add_listener(self.statistics.reload)
+        logger.info("Replay-Hardware: %s Kanäle, %s Takte", len(self.source.channels), self.source.length)
+        self.update_sensors()
+        self.acquisition = AcquisitionLoop(self.update_sensors, period=config.config.update_interval / 1000.0)
+        self.acquisition.add_listener(lambda scheduled: self.statistics.update(self.sensor_manager.sensors))
+        self.acquisition.start()
+
+    def update_sensors(self, initial: bool = False) -> None:
+        if not self.source.advance():
+            self.source.rewind()
+            self.source.advance()
+        if self.source.boundaries:
+            for ch in self.source.boundaries:
+                self.sensor_manager.rules.reset_channel(ch)
+                self.app.serial_numbers[ch] = self.source.session(ch).serial_number
+            self.statistics.reset(self.source.boundaries)
+        self.sensor_manager.update_all()
+        self.sensor_data = self.sensor_manager.get_all_data()
+
+    def cleanup(self) -> None:
+        self.acquisition.stop()
+
+
+@dataclass
+class ReplayReport:
+    """Ergebnis des Replays einer Kanalsitzung inkl. Durchsatz und Abweichungen zur archivierten Bewertung."""
+    run: str
+    channel: int = -1
+    serial_number: str = ""
+    ticks: int = 0
+    samples: int = 0
+    elapsed: float = 0.0
+    verdict_mismatches: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class ReplayRunner:
+    """
+    Spielt eine archivierte Kanalsitzung durch SensorManager und RuleEngine. Jede
+    Sitzung läuft mit frischem Regelzustand, eigener Seriennummer und – ohne
+    vorgegebene Konfiguration – mit ihrem eigenen ConfigSnapshot.
+
+    Args:
+        run: Laufzeitstempel (für den Bericht).
+        session: Kanalsitzung (siehe load_sessions).
+        config: ConfigSchema für die Bewertung; None = ConfigSnapshot der Sitzung.
+        speed: Wiedergabegeschwindigkeit (1 = Echtzeit, N = N-fach, 0 = maximal).
+        archive: Optionaler ArchiveWriter, in den die Sitzung neu geschrieben wird.
+        on_tick: Optionaler Callback nach jedem Takt (z.B. GUI-Aktualisierung).
+    """
+    def __init__(
+        self,
+        run: str,
+        session: ArchivedChannel,
+        config: Optional[ConfigSchema] = None,
+        speed: float = 0.0,
+        archive: Optional[ArchiveWriter] = None,
+        on_tick: Optional[Callable[[SensorManager], None]] = None,
+    ):
+        self.run_id = run
+        self.session = session
+        self.source = ReplaySource([session])
+        if config is None:
+            config = snapshot_config(session.config_snapshot or {})
+        self.config = config
+        self.speed = speed
+        self.on_tick = on_tick
+        self.serial_numbers = {session.channel: session.serial_number}
+        self.sensor_manager = SensorManager(
+            channels=[session.channel],
+            ina_manager=ReplayINA219(self.source),
+            redlab_manager=ReplayRedLab(self.source),
+            relay_controller=ReplayRelays(self.source),
+            led_controller=ReplayOutputs(),
+            dashboard=_ReplayDashboard(config, self.serial_numbers)
+        )
+        self.archive = archive
+
+    def run(self) -> ReplayReport:
+        session = self.session
+        report = ReplayReport(run=self.run_id, channel=session.channel, serial_number=session.serial_number)
+        if self.archive:
+            start_time = session.start or (session.samples[0].timestamp if session.samples else datetime.now())
+            self.archive.open_channel(session.channel, start_time, session.serial_number, self.config.dict())
+        first_ts = None
+        start = time.perf_counter()
+        try:
+            while self.source.advance():
+                ts = self.source.timestamp()
+                if self.speed > 0 and ts is not None:
+                    first_ts = first_ts or ts
+                    due = start + (ts - first_ts).total_seconds() / self.speed
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                self.sensor_manager.update_all()
+                self._compare(report)
+                if self.archive:
+                    # Archivierte statt Wiedergabe-Zeitstempel übernehmen
+                    for sensor in self.sensor_manager.sensors.values():
+                        archived = self.source.sample(sensor.channel)
+                        if archived is not None:
+                            sensor.timestamp = archived.timestamp.timestamp()
+                    self.archive.write_samples(self.sensor_manager.sensors)
+                if self.on_tick:
+                    self.on_tick(self.sensor_manager)
+                report.ticks += 1
+                report.samples += len(self.sensor_manager.sensors)
+        finally:
+            if self.archive:
+                self.archive.close_channel(session.channel)
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            "Replay %s Kanal %s (SN %s): %s Takte, %s Samples in %.3f s (%.0f Samples/s)",
+            self.run_id, session.channel + 1, session.serial_number, report.ticks, report.samples,
+            report.elapsed, report.samples_per_second
+        )
+        return report
+
+    def _compare(self, report: ReplayReport) -> None:
+        for ch, sensor in self.sensor_manager.sensors.items():
+            archived = self.source.sample(ch)
+            if archived is not None and archived.signal_ok != sensor.signal_ok:
+                report.verdict_mismatches[ch] = report.verdict_mismatches.get(ch, 0) + 1
+
+
+def replay_run(
+    run: str,
+    files: List[str],
+    config: Optional[ConfigSchema] = None,
+    speed: float = 0.0,
+    archive_out: Optional[str] = None,
+) -> List[ReplayReport]:
+    """
+    Spielt alle Kanalsitzungen eines Laufs nacheinander ab.
+
+    Returns:
+        Ein ReplayReport je Sitzung in Startreihenfolge.
+    """
+    sessions = load_sessions(files)
+    archive = ArchiveWriter(archive_out, sorted({s.channel for s in sessions})) if archive_out else None
+    try:
+        return [ReplayRunner(run, session, config=config, speed=speed, archive=archive).run() for session in sessions]
+    finally:
+        if archive:
+            archive.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivierte Läufe durch die Auswertung abspielen")
+    parser.add_argument("path", help="Archivverzeichnis, Laufdatei oder einzelne Kanal-CSV")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = Echtzeit, N = N-fach, 0 = maximal")
+    parser.add_argument("--snapshot-config", action="store_true",
+                        help="Mit dem ConfigSnapshot des Laufs statt der aktuellen Konfiguration bewerten")
+    parser.add_argument("--archive-out", help="Replay zusätzlich als Archiv in dieses Verzeichnis schreiben")
+    parser.add_argument("--repeat", type=int, default=1, help="Jeden Lauf N-mal abspielen (Lasttest)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    config = None if args.snapshot_config else ConfigManager().config
+    total_samples = 0
+    total_elapsed = 0.0
+    for run, files in find_runs(args.path).items():
+        for _ in range(args.repeat):
+            for report in replay_run(run, files, config=config, speed=args.speed, archive_out=args.archive_out):
+                total_samples += report.samples
+                total_elapsed += report.elapsed
+                mismatches = sum(report.verdict_mismatches.values())
+                print(
+                    f"{run} Kanal {report.channel + 1} ({report.serial_number}): {report.ticks} Takte, "
+                    f"{report.samples} Samples, {report.samples_per_second:.0f} Samples/s, "
+                    f"{mismatches} abweichende Bewertungen"
+                )
+    if total_elapsed > 0:
+        print(f"Gesamt: {total_samples} Samples in {total_elapsed:.3f} s ({total_samples / total_elapsed:.0f} Samples/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from hardware.redlab import RedLabDAQ
+from hardware.relay_sequencer import RelayEvent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StepResponse:
+    """
+    Sprungantwort eines Sensors auf eine Relais-Umschaltung.
+    Alle Zeiten in Sekunden relativ zur Relaisflanke, None wenn nicht bestimmbar.
+    """
+    channel: int
+    relay_on: bool                       # Zielzustand des Relais (True = steigende Flanke)
+    wall_time: float                     # time.time() der Relaisflanke
+    initial: float                       # Signal vor der Flanke (V)
+    final: float                         # eingeschwungenes Signal (V)
+    transition_time: Optional[float]     # 10-90 % Anstiegs- bzw. Abfallzeit
+    settling_time: Optional[float]       # Zeit bis zum dauerhaften Verbleib im Toleranzband
+    overshoot: float                     # Überschwingen in % der Sprunghöhe
+    trigger_delay: float                 # Vorlauf Scanstart -> Flanke (Pretrigger-Anteil der Aufnahme)
+    rate: float                          # tatsächliche Abtastrate (Hz)
+
+    @property
+    def edge(self) -> str:
+        return "rise" if self.relay_on else "fall"
+
+
+def _crossing(y: Sequence[float], level: float, start: int = 0) -> Optional[float]:
+    """Erster (linear interpolierter) Sample-Index ab `start`, an dem y den Pegel erreicht."""
+    if start < len(y) and y[start] >= level:
+        return float(start)
+    for i in range(start + 1, len(y)):
+        if y[i] >= level:
+            prev = y[i - 1]
+            return i - 1 + (level - prev) / (y[i] - prev)
+    return None
+
+
+def analyze_step(
+    samples: Sequence[float],
+    rate: float,
+    initial: float,
+    edge_index: float = 0.0,
+    settle_band: float = 0.02,
+    min_step: float = 0.1,
+    tail_fraction: float = 0.1,
+) -> Dict[str, Optional[float]]:
+    """
+    Bestimmt Kennwerte einer Sprungantwort aus einer Burst-Aufnahme.
+
+    Args:
+        samples: Abgetastetes Signal (V), beginnend mit dem Scanstart.
+        rate: Abtastrate (Hz).
+        initial: Signalpegel vor der Flanke (V).
+        edge_index: Position der Flanke in Samples relativ zum Scanstart. Liegt die
+                    Flanke außerhalb der Aufnahme (negativ oder nach dem letzten
+                    Sample), ist der Übergang nicht aufgezeichnet und es werden keine
+                    Kennwerte bestimmt.
+        settle_band: Toleranzband relativ zur Sprunghöhe für die Einschwingzeit.
+        min_step: Minimale Sprunghöhe (V), unterhalb derer keine Zeiten bestimmt werden.
+        tail_fraction: Anteil am Ende der Aufnahme, der als Endwert gemittelt wird.
+
+    Returns:
+        Dict mit 'final', 'transition_time', 'settling_time' und 'overshoot'.
+    """
+    result: Dict[str, Optional[float]] = {
+        "final": initial, "transition_time": None, "settling_time": None, "overshoot": 0.0,
+    }
+    if not 0 <= edge_index < len(samples) or rate <= 0:
+        # Kein Slicing mit negativem Index (würde vom Ende der Aufnahme zählen)
+        logger.debug("Flanke bei Sample %.1f außerhalb der Aufnahme (%d Samples)", edge_index, len(samples))
+        return result
+    start = int(edge_index)
+    window = list(samples[start:])
+
+    tail = max(1, int(len(window) * tail_fraction))
+    final = sum(window[-tail:]) / tail
+    result["final"] = final
+    step = final - initial
+    if abs(step) < min_step:
+        return result
+
+    # Normiert auf 0 (Ausgangspegel) .. 1 (Endwert), unabhängig von der Sprungrichtung
+    y = [(s - initial) / step for s in window]
+    offset = start - edge_index
+
+    t10 = _crossing(y, 0.1)
+    t90 = _crossing(y, 0.9, int(t10) if t10 is not None else 0)
+    if t10 is not None and t90 is not None:
+        result["transition_time"] = (t90 - t10) / rate
+
+    result["overshoot"] = max(0.0, max(y) - 1.0) * 100.0
+
+    last_outside = None
+    for i in range(len(y) - 1, -1, -1):
+        if abs(y[i] - 1.0) > settle_band:
+            last_outside = i
+            break
+    settled_index = 0 if last_outside is None else last_outside + 1
+    if settled_index < len(y):
+        result["settling_time"] = (settled_index + offset) / rate
+    return result
+
+
+class _ScanWindow:
+    """Ein angeforderter Burst; `ready` wird gesetzt, sobald der Scan läuft (oder gescheitert ist)."""
+    __slots__ = ("ready", "start")
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.start: Optional[float] = None
+
+
+class ResponseTimeMonitor:
+    """
+    Misst die Sprungantwort der Sensoren bei jeder Relais-Umschaltung.
+
+    Der Monitor wird als Pretrigger und Listener am RelaySequencer registriert. Vor
+    einer geplanten Flanke startet `arm` in einem Worker-Thread einen hochratigen
+    RedLab-Burst über alle Sensorkanäle; der Sequencer schaltet erst, wenn der Scan
+    läuft, sodass die Aufnahme den Pegel vor der Flanke und den vollständigen
+    Übergang enthält. Weitere Flanken, die in das erste zwei Drittel dieses
+    Bursts fallen (gestaffeltes Schalten), werden aus derselben Aufnahme
+    ausgewertet. Flanken vor dem Scanstart werden verworfen. Ergebnisse gehen an
+    registrierte Listener (z.B. ArchiveWriter.write_response) und stehen in
+    `latest` zur Verfügung.
+
+    Args:
+        redlab: RedLabDAQ mit Burst-Unterstützung.
+        channels: Sensorkanäle (RedLab-Kanalnummern).
+        config: Dict aus ConfigSchema.response.
+        initial_levels: Callable, das den letzten bekannten Signalpegel eines Kanals
+                        liefert (Rückfall, falls die Aufnahme keinen Vorlauf enthält).
+    """
+    def __init__(
+        self,
+        redlab: RedLabDAQ,
+        channels: List[int],
+        config: Dict[str, Union[bool, int, float]],
+        initial_levels: Callable[[int], float],
+    ):
+        self.redlab = redlab
+        self.low = min(channels)
+        self.high = max(channels)
+        self.rate = float(config.get("rate", 10000.0))
+        self.duration = float(config.get("duration", 0.2))
+        self.settle_band = float(config.get("settle_band", 0.02))
+        self.min_step = float(config.get("min_step", 0.1))
+        self.lead = float(config.get("pretrigger", 0.02))
+        self.arm_timeout = float(config.get("arm_timeout", 0.1))
+        self.initial_levels = initial_levels
+        self.latest: Dict[int, StepResponse] = {}
+        self._listeners: List[Callable[[StepResponse], None]] = []
+        self._events: "queue.Queue[Tuple[RelayEvent, float]]" = queue.Queue()
+        self._requests: "queue.Queue[Optional[_ScanWindow]]" = queue.Queue()
+        self._window: Optional[_ScanWindow] = None
+        self._window_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="ResponseTimeMonitor", daemon=True)
+        self._thread.start()
+        logger.info("ResponseTimeMonitor gestartet (%.0f Hz, %.0f ms, Vorlauf %.0f ms)", self.rate, self.duration * 1000, self.lead * 1000)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._requests.put(None)
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def add_listener(self, callback: Callable[[StepResponse], None]) -> None:
+        self._listeners.append(callback)
+
+    def arm(self, index: int, state: bool, due: float) -> Optional[threading.Event]:
+        """
+        Pretrigger für RelaySequencer.set_pretrigger: fordert (falls die Flanke nicht
+        in den laufenden bzw. angeforderten Burst fällt) einen Burst an.
+
+        Returns:
+            Event, das gesetzt wird, sobald der Scan läuft; None für fremde Kanäle.
+        """
+        if not self.low <= index <= self.high:
+            return None
+        with self._window_lock:
+            window = self._window
+            if window is None or (window.start is not None and due > window.start + self.duration * 2 / 3):
+                window = self._window = _ScanWindow()
+                self._requests.put(window)
+            return window.ready
+
+    def on_relay_event(self, event: RelayEvent) -> None:
+        """Listener für RelaySequencer: nimmt die Flanke nur entgegen (nicht blockierend)."""
+        if self.low <= event.index <= self.high and self._window is not None:
+            self._events.put((event, self.initial_levels(event.index)))
+
+    def _drain(self) -> List[Tuple[RelayEvent, float]]:
+        items = []
+        while True:
+            try:
+                items.append(self._events.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self) -> None:
+        samples = max(2, int(self.rate * self.duration))
+        while True:
+            window = self._requests.get()
+            if window is None:
+                return
+
+            def started(start: float, window: _ScanWindow = window) -> None:
+                window.start = start
+                window.ready.set()
+
+            burst = self.redlab.burst(self.low, self.high, self.rate, samples, on_started=started)
+            # Auch bei Fehlern freigeben, damit der Sequencer nicht bis zum Timeout wartet
+            window.ready.set()
+            with self._window_lock:
+                if self._window is window:
+                    self._window = None
+            # Alle Flanken dieses Fensters wurden vor dem Burst-Ende geschaltet und gemeldet
+            pending = self._drain()
+            if burst is not None:
+                self._evaluate(burst, pending)
+
+    def _evaluate(self, burst, pending) -> None:
+        start, actual_rate, data = burst
+        window_end = start + len(data[0]) / actual_rate
+        for event, initial in pending:
+            if event.timestamp < start:
+                logger.warning("Sprungantwort Kanal %s verworfen: Flanke %.1f ms vor dem Scanstart", event.index, (start - event.timestamp) * 1000)
+                continue
+            if event.timestamp > start + (window_end - start) * 2 / 3:
+                logger.warning("Sprungantwort Kanal %s verworfen: Flanke erst %.1f ms nach dem Scanstart", event.index, (event.timestamp - start) * 1000)
+                continue
+            edge_index = (event.timestamp - start) * actual_rate
+            trace = data[event.index - self.low]
+            if not 0 <= edge_index < len(trace):
+                logger.warning("Sprungantwort Kanal %s verworfen: Flanke bei Sample %.1f außerhalb des Bursts (%d Samples)", event.index, edge_index, len(trace))
+                continue
+            # Pegel vor der Flanke aus dem Vorlauf der Aufnahme statt aus der Erfassung
+            # (das erste Sample liegt immer vor der Flanke)
+            before = trace[:max(1, int(edge_index))]
+            if before:
+                initial = sum(before) / len(before)
+            values = analyze_step(
+                trace,
+                actual_rate,
+                initial,
+                edge_index=edge_index,
+                settle_band=self.settle_band,
+                min_step=self.min_step,
+            )
+            response = StepResponse(
+                channel=event.index,
+                relay_on=event.state,
+                wall_time=event.wall_time,
+                initial=initial,
+                final=values["final"],
+                transition_time=values["transition_time"],
+                settling_time=values["settling_time"],
+                overshoot=values["overshoot"],
+                trigger_delay=event.timestamp - start,
+                rate=actual_rate,
+            )
+            self.latest[event.index] = response
+            logger.debug("Sprungantwort Kanal %s: %s", event.index, response)
+            for callback in self._listeners:
+                try:
+                    callback(response)
+                except Exception as e:
+                    logger.error("Fehler in ResponseTimeMonitor-Listener: %s", e, exc_info=True)
@@ -0,0 +1,192 @@
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from config.constants import ConfigSchema
+
+logger = logging.getLogger(__name__)
+
+# Statusschlüssel je Kanal (Reihenfolge der Prüfung wie in der Anzeige)
+STATUS_ABSENT = "absent"
+STATUS_SUPPLY = "supply_error"
+STATUS_OK = "ok"
+STATUS_WARNING = "warning"
+STATUS_ERROR = "error"
+STATUS_STALE = "stale"          # Messung hat Deadline verfehlt, Werte veraltet
+
+# Zuordnung Status -> Farbpreset des LED-Streifens
+LED_STATUS = {
+    STATUS_ABSENT: "unknown",
+    STATUS_SUPPLY: "unknown",
+    STATUS_OK: "ok",
+    STATUS_WARNING: "warning",
+    STATUS_ERROR: "error",
+    STATUS_STALE: "unknown",
+}
+
+# (value, war_ok) -> ok
+Predicate = Callable[[float, bool], bool]
+
+
+def compile_band(band: Tuple[float, float], hysteresis: float, strict: bool = False) -> Predicate:
+    """
+    Erzeugt ein Prädikat für ein Toleranzband mit Hysterese.
+
+    Ein bisher gültiger Wert bleibt gültig, solange er im um `hysteresis` (Anteil der
+    Bandbreite) erweiterten Band liegt; ein ungültiger Wert wird erst wieder gültig,
+    wenn er im eigentlichen Band liegt.
+
+    Args:
+        band: (min, max) des Toleranzbands.
+        hysteresis: Hysterese relativ zur Bandbreite (0 = keine).
+        strict: Bandgrenzen exklusiv prüfen (wie bisher beim RedLab-Signal).
+    """
+    low, high = band
+    margin = (high - low) * hysteresis
+    outer_low, outer_high = low - margin, high + margin
+    if strict:
+        def check(value: float, was_ok: bool) -> bool:
+            if was_ok:
+                return outer_low < value < outer_high
+            return low < value < high
+    else:
+        def check(value: float, was_ok: bool) -> bool:
+            if was_ok:
+                return outer_low <= value <= outer_high
+            return low <= value <= high
+    return check
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """Unveränderlicher, vorkompilierter Regelsatz; wird als Ganzes ausgetauscht."""
+    signal_pos: Predicate
+    signal_neg: Predicate
+    presence: Predicate
+    supply: Predicate
+    absent_current: float
+    debounce: int
+    version: int
+
+    @classmethod
+    def from_config(cls, config: ConfigSchema, version: int = 0) -> "CompiledRules":
+        rules_cfg = config.rules
+        hysteresis = float(rules_cfg.get("hysteresis", 0.0))
+        return cls(
+            signal_pos=compile_band(config.redlab_pos_threshold, hysteresis, strict=True),
+            signal_neg=compile_band(config.redlab_neg_threshold, hysteresis, strict=True),
+            presence=compile_band(config.presence_current_threshold, hysteresis),
+            supply=compile_band(config.supply_voltage_threshold, hysteresis),
+            absent_current=float(rules_cfg.get("absent_current", 0.2)),
+            debounce=max(1, int(rules_cfg.get("debounce", 1))),
+            version=version,
+        )
+
+
+class _Debounced:
+    """Entprellter Boolescher Zustand: Wechsel erst nach N gleichlautenden Samples."""
+    __slots__ = ("state", "streak")
+
+    def __init__(self):
+        self.state: Optional[bool] = None
+        self.streak = 0
+
+    def feed(self, raw: bool, debounce: int) -> bool:
+        if self.state is None:
+            self.state = raw
+        elif raw == self.state:
+            self.streak = 0
+        else:
+            self.streak += 1
+            if self.streak >= debounce:
+                self.state = raw
+                self.streak = 0
+        return self.state
+
+    def reset(self) -> None:
+        self.state = None
+        self.streak = 0
+
+
+class RuleEngine:
+    """
+    Bewertet SensorData-Messwerte anhand vorkompilierter Schwellen mit Hysterese und
+    Entprellung (N aufeinanderfolgende Samples).
+
+    Der Regelsatz wird bei Konfigurationsänderungen per `reload` neu kompiliert und
+    durch eine einzige Referenzzuweisung atomar ersetzt; die Auswertung pro Sample
+    liest ihn genau einmal und verursacht keine Konfigurationszugriffe.
+
+    Args:
+        config: Aktuelles ConfigSchema.
+    """
+    def __init__(self, config: ConfigSchema):
+        self._version = 0
+        self.rules = CompiledRules.from_config(config, self._version)
+        self._states: Dict[Tuple[int, str], _Debounced] = {}
+
+    def reload(self, config: ConfigSchema) -> None:
+        """Kompiliert die Schwellen neu und tauscht den Regelsatz atomar aus."""
+        self._version += 1
+        self.rules = CompiledRules.from_config(config, self._version)
+        logger.info("Regelsatz v%s aktiviert (Entprellung %s Samples)", self._version, self.rules.debounce)
+
+    def reset_channel(self, channel: int) -> None:
+        """Verwirft den Entprell-Zustand eines Kanals (z.B. nach Sensortausch)."""
+        for key, state in self._states.items():
+            if key[0] == channel:
+                state.reset()
+
+    def _state(self, channel: int, name: str) -> _Debounced:
+        key = (channel, name)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _Debounced()
+        return state
+
+    def evaluate(self, sensor, relay_on: bool) -> str:
+        """
+        Setzt signal_ok, present, attached und supply_ok, zählt Fehler und bestimmt den Status.
+
+        `present` ist das Präsenzstrom-Band (Bewertung), `attached` das davon
+        unabhängige Steck-Signal: Strom über `absent_current`, d.h. der INA219 antwortet
+        und der Sensor zieht Strom.
+
+        Returns:
+            Statusschlüssel (STATUS_*), zusätzlich in sensor.status abgelegt.
+        """
+        rules = self.rules
+        ch = sensor.channel
+        debounce = rules.debounce
+
+        signal = self._state(ch, "signal")
+        check = rules.signal_pos if relay_on else rules.signal_neg
+        sensor.signal_ok = signal.feed(check(sensor.redlab_signal, bool(signal.state)), debounce)
+        if not sensor.signal_ok:
+            sensor.signal_error_counter += 1
+
+        presence = self._state(ch, "presence")
+        sensor.present = presence.feed(rules.presence(sensor.current, bool(presence.state)), debounce)
+
+        attached = self._state(ch, "attached")
+        sensor.attached = attached.feed(abs(sensor.current) >= rules.absent_current, debounce)
+
+        supply = self._state(ch, "supply")
+        sensor.supply_ok = supply.feed(rules.supply(sensor.bus_voltage, bool(supply.state)), debounce)
+        if not sensor.supply_ok:
+            sensor.supply_error_counter += 1
+
+        sensor.status = classify(sensor)
+        return sensor.status
+
+
+def classify(sensor) -> str:
+    """Gemeinsame Statuslogik für LED-Streifen und GUI."""
+    if not sensor.present:
+        return STATUS_ABSENT
+    if not sensor.supply_ok:
+        return STATUS_SUPPLY
+    if sensor.signal_ok:
+        return STATUS_OK
+    if sensor.redlab_signal != 0:
+        return STATUS_WARNING
+    return STATUS_ERROR
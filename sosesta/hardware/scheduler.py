@@ -0,0 +1,170 @@
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class SampleClock:
+    """
+    Zeitbasis für Messzeitstempel: monotone Zeit, einmalig auf die Systemzeit verankert.
+    Zeitstempel springen daher nicht bei NTP-Korrekturen und haben die Auflösung
+    von time.monotonic().
+
+    Args:
+        monotonic: Monotone Zeitquelle (austauschbar für Tests/Simulation).
+        wall: Systemzeitquelle für den Anker.
+    """
+    def __init__(self, monotonic: Callable[[], float] = time.monotonic, wall: Callable[[], float] = time.time):
+        self.monotonic = monotonic
+        self._mono0 = monotonic()
+        self._wall0 = wall()
+
+    def now(self) -> float:
+        """Aktuelle Zeit als Unix-Zeitstempel (s)."""
+        return self._wall0 + (self.monotonic() - self._mono0)
+
+    def to_wall(self, mono: float) -> float:
+        """Rechnet einen monotonen Zeitpunkt in einen Unix-Zeitstempel um."""
+        return self._wall0 + (mono - self._mono0)
+
+
+class FixedRateScheduler:
+    """
+    Deadline-basierter Taktgeber mit fester Rate.
+
+    Der k-te Zyklus ist für t0 + k * period geplant, unabhängig von der Dauer der
+    vorherigen Zyklen; die Periode driftet daher nicht um die Arbeitszeit. Dauert ein
+    Zyklus länger als bis zum nächsten Termin, werden die verpassten Termine
+    übersprungen, als Overrun gezählt und protokolliert.
+
+    Verspätung und Ist-Periode der letzten `jitter_window` Zyklen liegen in
+    vorab angelegten Ringpuffern; `jitter()` wertet sie aus.
+
+    Args:
+        period: Periodendauer in Sekunden.
+        clock: Monotone Zeitquelle.
+        wait: Wartefunktion (timeout) -> True bei Stop-Anforderung; Standard ist ein
+              threading.Event, damit `stop()` sofort wirkt.
+        spin: Die letzten `spin` Sekunden vor dem Termin aktiv warten statt schlafen
+              (weniger Aufweck-Latenz, kostet CPU; 0 = aus).
+        idle: Optionaler Hook idle(next_deadline), nach jedem Zyklus im Erfassungsthread
+              aufgerufen (z.B. Garbage Collection zwischen den Zyklen).
+        jitter_window: Anzahl der Zyklen in der Jitter-Statistik.
+    """
+    def __init__(
+        self,
+        period: float,
+        clock: Callable[[], float] = time.monotonic,
+        wait: Optional[Callable[[float], bool]] = None,
+        spin: float = 0.0,
+        idle: Optional[Callable[[float], None]] = None,
+        jitter_window: int = 4096
+    ):
+        self.period = period
+        self.clock = clock
+        self._stop = threading.Event()
+        self._wait = wait or self._stop.wait
+        self.spin = spin
+        self.idle = idle
+        self.cycles = 0
+        self.overruns = 0
+        self.last_lateness = 0.0   # Ist-Start minus geplanter Start (s)
+        self.max_lateness = 0.0
+        self.last_duration = 0.0   # Dauer des letzten Zyklus (s)
+        self._lateness = array("d", [0.0]) * jitter_window
+        self._intervals = array("d", [0.0]) * jitter_window
+        self._jitter_count = 0
+        self._interval_count = 0
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self, callback: Callable[[float], None]) -> None:
+        """
+        Ruft callback(scheduled) mit fester Rate auf, bis `stop()` aufgerufen wird.
+        `scheduled` ist der geplante monotone Startzeitpunkt des Zyklus.
+        """
+        self._stop.clear()
+        t0 = self.clock()
+        k = 0
+        last_start = None
+        window = len(self._lateness)
+        while not self._stop.is_set():
+            scheduled = t0 + k * self.period
+            delay = scheduled - self.clock() - self.spin
+            if delay > 0 and self._wait(delay):
+                break
+            if self._stop.is_set():
+                break
+            if self.spin > 0:
+                while self.clock() < scheduled:
+                    pass
+
+            start = self.clock()
+            self.last_lateness = start - scheduled
+            self.max_lateness = max(self.max_lateness, self.last_lateness)
+            self._lateness[self._jitter_count % window] = self.last_lateness
+            self._jitter_count += 1
+            if last_start is not None:
+                self._intervals[self._interval_count % window] = start - last_start
+                self._interval_count += 1
+            last_start = start
+            try:
+                callback(scheduled)
+            except Exception as e:
+                logger.error("Fehler im Erfassungszyklus: %s", e, exc_info=True)
+            end = self.clock()
+            self.last_duration = end - start
+            self.cycles += 1
+
+            # Nächster Termin, verpasste Termine überspringen
+            next_k = k + 1
+            if end > t0 + next_k * self.period:
+                skipped = math.floor((end - t0) / self.period) - k
+                next_k = k + 1 + skipped
+                self.overruns += skipped
+                last_start = None
+                logger.warning(
+                    "Overrun: Zyklus dauerte %.1f ms (Periode %.0f ms), %s Termin(e) übersprungen, gesamt %s",
+                    self.last_duration * 1000, self.period * 1000, skipped, self.overruns
+                )
+            k = next_k
+            if self.idle is not None:
+                try:
+                    self.idle(t0 + k * self.period)
+                except Exception as e:
+                    logger.error("Fehler im Idle-Hook: %s", e, exc_info=True)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {
+            "cycles": self.cycles,
+            "overruns": self.overruns,
+            "last_lateness": self.last_lateness,
+            "max_lateness": self.max_lateness,
+            "last_duration": self.last_duration,
+        }
+
+    def jitter(self) -> Dict[str, Union[int, float]]:
+        """
+        Jitter der letzten Zyklen.
+
+        Returns:
+            count, Perzentile p50/p99/p999 und max der Startverspätung sowie
+            Standardabweichung der Ist-Periode (period_std), alles in Sekunden.
+        """
+        count = min(self._jitter_count, len(self._lateness))
+        lateness = sorted(self._lateness[:count])
+        intervals = self._intervals[:min(self._interval_count, len(self._intervals))]
+        result: Dict[str, Union[int, float]] = {"count": count, "p50": 0.0, "p99": 0.0, "p999": 0.0, "max": 0.0, "period_std": 0.0}
+        if lateness:
+            for key, q in (("p50", 0.5), ("p99", 0.99), ("p999", 0.999)):
+                result[key] = lateness[min(count - 1, int(q * count))]
+            result["max"] = lateness[-1]
+        if len(intervals) > 1:
+            mean = sum(intervals) / len(intervals)
+            result["period_std"] = math.sqrt(sum((x - mean) ** 2 for x in intervals) / (len(intervals) - 1))
+        return result
@@ -1,116 +1,212 @@
-import logging
-from dataclasses import dataclass, field
-from typing import List, Dict
-from hardware.ina219 import INA219SensorManager
-from hardware.redlab import RedLabDAQ
-from hardware.relays import RelayController
-from hardware.led_strip import LEDStripController
-
-logger = logging.getLogger(__name__)
-
-@dataclass
-class SensorData:
-    channel: int
-    # INA219 Messwerte
-    bus_voltage: float = 0.0  # Versorgungsspannung in V
-    current: float = 0.0      # Stromaufnahme in mA
-    power: float = 0.0        # Leistung in mW
-    # Redlab-Sensorstatus
-    redlab_signal: float = 0.0  # Redlab-Signal in V
-
-    # Statusinformationen
-    present: bool = False     # Sensor-Präsenz
-    supply_ok: bool = False   # Versorgung ok
-    supply_error_counter: int = 0  # Zähler für Versorgungsspannungsfehler
-    signal_ok: bool = False   # Redlab-Signal ok
-    signal_error_counter: int = 0  # Zähler für Redlab-Signalfehler
-
-    # Zusätzliche Informationen
-    serial_number: str = field(default="")  # Seriennummer aus Dashboardeingabefeld
-
-class SensorManager:
-    def __init__(self, channels: List[int], ina_manager: INA219SensorManager, redlab_manager: RedLabDAQ, relay_controller: RelayController, led_controller: LEDStripController, dashboard):
-        self.channels = channels
-        self.ina_manager = ina_manager
-        self.redlab_manager = redlab_manager
-        self.relay_controller = relay_controller
-        self.led_controller = led_controller
-        self.dashboard = dashboard
-        self.config = dashboard.config.config  # für Zugriff auf Thresholds
-        self.sensors: Dict[int, SensorData] = {ch: SensorData(channel=ch) for ch in channels}
-
-    def update_sensor(self, channel: int) -> None:
-        """
-        Liest Messwerte von INA219 und RedLab, prüft Status, zählt Fehler und aktualisiert LED.
-        """
-        sensor = self.sensors[channel]
-        try:
-            relay_state = self.relay_controller.get_state(channel)
-
-            # INA219 Messwerte lesen
-            bus_v, current, power = self.ina_manager.read(channel)
-            sensor.bus_voltage = bus_v if bus_v is not None else 0.0
-            sensor.current = current if current is not None else 0.0
-            sensor.power = power if power is not None else 0.0
-
-            # RedLab-Signal lesen
-            redlab_signal = self.redlab_manager.read(channel)
-            sensor.redlab_signal = redlab_signal if redlab_signal is not None else 0.0
-
-            # Thresholds entpacken
-            pos_min, pos_max = getattr(self.config, "redlab_pos_threshold", (2.0, 4.0))
-            neg_min, neg_max = getattr(self.config, "redlab_neg_threshold", (-4.0, -2.0))
-            pres_min, pres_max = getattr(self.config, "getpresence_current_threshold", (1.3, 1.6))
-            v_min, v_max = getattr(self.config, "getsupply_voltage_threshold", (4.2, 5.5))
-
-            # Signalprüfung abhängig vom Relaiszustand
-            if relay_state:
-                sensor.signal_ok = pos_min < sensor.redlab_signal < pos_max
-            else:
-                sensor.signal_ok = neg_min < sensor.redlab_signal < neg_max
-
-            if not sensor.signal_ok:
-                sensor.signal_error_counter += 1
-
-            # Präsenzprüfung über Stromaufnahme im Leerlaufbereich
-            sensor.present = pres_min <= sensor.current <= pres_max
-
-            # Versorgungsspannung prüfen
-            sensor.supply_ok = v_min <= sensor.bus_voltage <= v_max
-            if not sensor.supply_ok:
-                sensor.supply_error_counter += 1
-
-            # Seriennummer übernehmen
-            sensor.serial_number = self.dashboard.serial_numbers.get(channel, "")
-
-            # LED-Status setzen
-            if not sensor.present or not sensor.supply_ok:
-                status = "unknown"
-            elif sensor.signal_ok:
-                status = "ok"
-            elif sensor.redlab_signal != 0:
-                status = "warning"
-            else:
-                status = "error"
-
-            self.led_controller.set_color(channel, status)
-
-            logger.debug(f"Sensor {channel} aktualisiert: {sensor}")
-        except Exception:
-            logger.error(f"Fehler beim Aktualisieren von Sensor {channel}", exc_info=True)
-
-    def update_all(self) -> None:
-        """
-        Bulk-Update: alle Sensoren nacheinander aktualisieren.
-        """
-        logger.info("Starte Bulk-Update aller Sensoren")
-        for ch in self.channels:
-            self.update_sensor(ch)
-        self.led_controller.update()
-        logger.info("Bulk-Update abgeschlossen")
-
-    def get_all_data(self) -> List[SensorData]:
-        """
-        Gibt die aktuelle Liste aller SensorData-Objekte zurück.
-        """
-        return list(self.sensors.values())
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict, Optional
+from hardware.ina219 import INA219SensorManager
+from hardware.redlab import RedLabDAQ
+from hardware.relays import RelayController
+from hardware.actuator import OutputActuator
+from hardware.rules import RuleEngine, LED_STATUS, STATUS_ABSENT, STATUS_STALE
+from hardware.async_engine import AsyncAcquisitionEngine, Reading
+from hardware.scheduler import SampleClock
+from hardware.watchdog import DeadlineExceeded, DeviceWatchdog
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class SensorData:
+    channel: int
+    # INA219 Messwerte
+    bus_voltage: float = 0.0  # Versorgungsspannung in V
+    current: float = 0.0      # Stromaufnahme in mA
+    power: float = 0.0        # Leistung in mW
+    # Redlab-Sensorstatus
+    redlab_signal: float = 0.0  # Redlab-Signal in V
+    relay_on: bool = False      # Relaiszustand zum Zeitpunkt der Messung
+    timestamp: float = 0.0      # Messzeitpunkt (Unix-Zeit) dieses Kanals
+    stale: bool = False         # Messwerte veraltet (Geräteaufruf hat Deadline verfehlt)
+
+    # Statusinformationen
+    present: bool = False     # Sensor-Präsenz (Strom im Präsenzband)
+    attached: bool = False    # Sensor gesteckt (INA219 liefert Strom über absent_current)
+    supply_ok: bool = False   # Versorgung ok
+    supply_error_counter: int = 0  # Zähler für Versorgungsspannungsfehler
+    signal_ok: bool = False   # Redlab-Signal ok
+    signal_error_counter: int = 0  # Zähler für Redlab-Signalfehler
+    status: str = STATUS_ABSENT    # Gesamtstatus (siehe hardware.rules)
+
+    # Zusätzliche Informationen
+    serial_number: str = field(default="")  # Seriennummer aus Dashboardeingabefeld
+
+class SensorManager:
+    """
+    Erfasst und bewertet alle Sensorkanäle. Mit `engine` werden die Geräte eines
+    Zyklus über die AsyncAcquisitionEngine nebenläufig gelesen, sonst sequenziell.
+    Im sequenziellen Betrieb laufen die Geräteaufrufe über die optionalen
+    `watchdogs` ("ina219", "redlab") mit Deadline.
+
+    Sensortausch: Eine Flanke des (entprellten) Steck-Signals `attached` – Lesefehler
+    oder Strom nahe 0, nicht das Präsenzstrom-Band – setzt nur den betroffenen
+    Kanal zurück – INA219 wird beim nächsten Lesen neu angelegt und kalibriert,
+    Entprell-Zustand und Fehlerzähler beginnen neu – und meldet die Flanke an die
+    Presence-Listener. Leere Steckplätze werden alle `sessions.rearm_interval` s neu
+    kalibriert, damit ein aus- und wieder eingeschalteter INA219 (Kalibrierung
+    verloren, Strom 0) wieder erkannt wird.
+    """
+    def __init__(self, channels: List[int], ina_manager: INA219SensorManager, redlab_manager: RedLabDAQ, relay_controller: RelayController, led_controller: OutputActuator, dashboard, engine: Optional[AsyncAcquisitionEngine] = None, clock: Optional[SampleClock] = None, watchdogs: Optional[Dict[str, DeviceWatchdog]] = None):
+        self.channels = channels
+        self.engine = engine
+        self.watchdogs = watchdogs or {}
+        self.clock = clock or (engine.clock if engine else SampleClock())
+        self.ina_manager = ina_manager
+        self.redlab_manager = redlab_manager
+        self.relay_controller = relay_controller
+        self.led_controller = led_controller
+        self.dashboard = dashboard
+        self.rules = RuleEngine(dashboard.config.config)
+        self.sensors: Dict[int, SensorData] = {ch: SensorData(channel=ch) for ch in channels}
+        self._readings: Dict[int, Reading] = {ch: Reading(channel=ch) for ch in channels}
+        self.rearm_interval = float(dashboard.config.config.sessions.get("rearm_interval", 2.0))
+        self._attached: Dict[int, Optional[bool]] = {}
+        self._rearm_at: Dict[int, float] = {}
+        self._presence_listeners: List[Callable[[int, bool], None]] = []
+
+    def add_presence_listener(self, callback: Callable[[int, bool], None]) -> None:
+        """Registriert einen Callback (Kanal, present) für Steck- und Zieh-Flanken; läuft im Erfassungsthread."""
+        self._presence_listeners.append(callback)
+
+    def _call(self, device: str, fn, *args):
+        watchdog = self.watchdogs.get(device)
+        return watchdog.call(fn, *args) if watchdog else fn(*args)
+
+    def update_sensor(self, channel: int) -> None:
+        """
+        Liest Messwerte von INA219 und RedLab, prüft Status, zählt Fehler und aktualisiert LED.
+        """
+        try:
+            reading = self._readings.get(channel)
+            if reading is None:
+                reading = self._readings[channel] = Reading(channel=channel)
+            reading.reset(self.relay_controller.get_state(channel))
+
+            # INA219 Messwerte lesen
+            try:
+                reading.bus_voltage, reading.current, reading.power = self._call("ina219", self.ina_manager.read, channel)
+            except DeadlineExceeded:
+                reading.stale = True
+
+            # RedLab-Signal lesen
+            try:
+                reading.redlab_signal = self._call("redlab", self.redlab_manager.read, channel)
+            except DeadlineExceeded:
+                reading.stale = True
+            reading.timestamp = self.clock.now()
+
+            self.apply_reading(reading)
+        except Exception:
+            logger.error("Fehler beim Aktualisieren von Sensor %s", channel, exc_info=True)
+
+    def apply_reading(self, reading: Reading) -> None:
+        """
+        Übernimmt die Rohmesswerte eines Kanals, bewertet sie und setzt die LED.
+        Veraltete Messungen (reading.stale) werden nicht bewertet: gelesene Werte
+        werden übernommen, die übrigen behalten ihren letzten Stand.
+        """
+        channel = reading.channel
+        sensor = self.sensors[channel]
+        try:
+            sensor.relay_on = reading.relay_on
+            sensor.timestamp = reading.timestamp
+            sensor.stale = reading.stale
+            if reading.stale:
+                self._apply_stale(sensor, reading)
+                return
+            sensor.bus_voltage = reading.bus_voltage if reading.bus_voltage is not None else 0.0
+            sensor.current = reading.current if reading.current is not None else 0.0
+            sensor.power = reading.power if reading.power is not None else 0.0
+            sensor.redlab_signal = reading.redlab_signal if reading.redlab_signal is not None else 0.0
+
+            # Signal (abhängig vom Relaiszustand), Präsenz und Versorgung bewerten
+            status = self.rules.evaluate(sensor, reading.relay_on)
+            self._check_presence(sensor, reading.timestamp)
+
+            # Seriennummer übernehmen
+            sensor.serial_number = self.dashboard.serial_numbers.get(channel, "")
+
+            # LED-Status setzen
+            self.led_controller.set_color(channel, LED_STATUS[status])
+
+            logger.debug("Sensor %s aktualisiert: %s", channel, sensor)
+        except Exception:
+            logger.error("Fehler beim Aktualisieren von Sensor %s", channel, exc_info=True)
+
+    def _check_presence(self, sensor: SensorData, timestamp: float) -> None:
+        channel = sensor.channel
+        # Ein Strom außerhalb des Präsenzbands ist ein Fehlerbild des gesteckten
+        # Sensors und wird weiter gezählt; getauscht wird nur bei echter Abwesenheit
+        previous = self._attached.get(channel)
+        self._attached[channel] = sensor.attached
+        if previous is None:
+            self._rearm_at[channel] = timestamp + self.rearm_interval
+        elif sensor.attached != previous:
+            self._on_swap(sensor, timestamp)
+        elif not sensor.attached and timestamp >= self._rearm_at.get(channel, 0.0):
+            self._reinit(channel)
+            self._rearm_at[channel] = timestamp + self.rearm_interval
+
+    def _reinit(self, channel: int) -> None:
+        # Replay-/Ersatzgeräte haben keine Neuinitialisierung
+        reinit = getattr(self.ina_manager, "reinit", None)
+        if reinit is not None:
+            reinit(channel)
+
+    def _on_swap(self, sensor: SensorData, timestamp: float) -> None:
+        """Steck-/Zieh-Flanke: nur diesen Kanal neu initialisieren und zurücksetzen."""
+        channel = sensor.channel
+        self._reinit(channel)
+        self.rules.reset_channel(channel)
+        sensor.supply_error_counter = 0
+        sensor.signal_error_counter = 0
+        self._rearm_at[channel] = timestamp + self.rearm_interval
+        logger.info("Kanal %s: Sensor %s, Kanal wird neu initialisiert", channel, "gesteckt" if sensor.attached else "entfernt")
+        for callback in list(self._presence_listeners):
+            try:
+                callback(channel, sensor.attached)
+            except Exception:
+                logger.error("Fehler in Presence-Listener Kanal %s", channel, exc_info=True)
+
+    def _apply_stale(self, sensor: SensorData, reading: Reading) -> None:
+        for name in ("bus_voltage", "current", "power", "redlab_signal"):
+            value = getattr(reading, name)
+            if value is not None:
+                setattr(sensor, name, value)
+        sensor.status = STATUS_STALE
+        sensor.serial_number = self.dashboard.serial_numbers.get(sensor.channel, "")
+        self.led_controller.set_color(sensor.channel, LED_STATUS[STATUS_STALE])
+        logger.debug("Sensor %s: Messwerte veraltet", sensor.channel)
+
+    def update_all(self) -> None:
+        """
+        Bulk-Update: alle Sensoren aktualisieren – mit Engine nebenläufig über die
+        Busse, sonst nacheinander.
+        Die LED-Ausgabe wird nur angestoßen; strip.show() läuft im OutputActuator-Thread.
+        """
+        logger.debug("Starte Bulk-Update aller Sensoren")
+        if self.engine is not None:
+            try:
+                readings = self.engine.acquire(self.channels)
+            except Exception:
+                logger.error("Asynchrone Erfassung fehlgeschlagen", exc_info=True)
+                readings = {}
+            for reading in readings.values():
+                self.apply_reading(reading)
+        else:
+            for ch in self.channels:
+                self.update_sensor(ch)
+        self.led_controller.update()
+        logger.debug("Bulk-Update abgeschlossen")
+
+    def get_all_data(self) -> List[SensorData]:
+        """
+        Gibt die aktuelle Liste aller SensorData-Objekte zurück.
+        """
+        return list(self.sensors.values())
@@ -0,0 +1,428 @@
+"""
+Simulierte Prüfstandshardware: INA219 über den simulierten I2C-Bus (echter
+INA219SensorManager mit DirectINA219), RedLab mit simuliertem AI-Gerät (echter
+RedLabDAQ-Lese- und Reconnect-Pfad), zyklende Relais und ein Sensormodell mit
+Rauschen, Drift und zufällig eingestreuten Fehlern.
+
+Zeitbasis ist wahlweise die echte Zeit (GUI-Betrieb ohne Hardware) oder eine
+VirtualClock, die nur beim Warten des Schedulers vorrückt (Soak-Test im Zeitraffer).
+"""
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from config.constants import ConfigSchema
+from hardware.acquisition import AcquisitionLoop
+from hardware.async_engine import AsyncAcquisitionEngine
+from hardware.i2c_direct import DirectINA219, DirectTCA9548A
+from hardware.i2c_sim import SimulatedI2CBus
+from hardware.ina219 import INA219SensorManager
+from hardware.qualification import QualificationRunner
+from hardware.redlab import RedLabDAQ
+from hardware.replay import ReplayOutputs
+from hardware.realtime import RealtimeController
+from hardware.scheduler import FixedRateScheduler, SampleClock
+from hardware.sensors import SensorManager
+from hardware.statistics import StatisticsEngine
+from hardware.watchdog import DeviceWatchdog
+
+logger = logging.getLogger(__name__)
+
+# Fehlerwahrscheinlichkeiten pro Kanal und Zyklus
+DEFAULT_FAULTS = {
+    "i2c_nack": 0.0005,          # I2C-Transaktion scheitert (Retry-Pfad)
+    "redlab_error": 0.0005,      # a_in wirft (Fehlerlog mit Traceback)
+    "redlab_disconnect": 0.00005,  # Gerät weg, nächster Lesezugriff verbindet neu
+    "supply_dip": 0.0005,        # Versorgung bricht für einige Zyklen ein
+    "signal_glitch": 0.001,      # einzelner Ausreißer im RedLab-Signal
+}
+
+
+class VirtualClock:
+    """
+    Virtuelle monotone Zeit: vergeht nur über `wait`/`advance`. Als Uhr und
+    Wartefunktion des FixedRateScheduler läuft die Erfassung damit so schnell,
+    wie die Zyklen rechnen; `wait` meldet Stop, sobald `end` erreicht ist.
+
+    Args:
+        end: Virtueller Endzeitpunkt in s (None = unbegrenzt).
+    """
+    def __init__(self, end: Optional[float] = None):
+        self.end = end
+        self._now = 0.0
+        self._stop = threading.Event()
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        self._now += seconds
+
+    def wait(self, timeout: float) -> bool:
+        if self._stop.is_set():
+            return True
+        self.advance(timeout)
+        return self.end is not None and self._now >= self.end
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class SimulatedRelays:
+    """
+    Relais im 'cycle'-Profil, analytisch aus der Zeit berechnet. Dient zugleich als
+    RelayController (get_state/snapshot/set_relay) und als RelaySequencer (Start/Stop
+    je Kanal). Ein per set_relay erzwungener Zustand gilt bis zum nächsten Start/Stop
+    des Kanals.
+    """
+    def __init__(self, monotonic: Callable[[], float], count: int = 8, on_time: float = 30.0, off_time: float = 30.0):
+        self.pins = list(range(count))
+        self.monotonic = monotonic
+        self.on_time = on_time
+        self.off_time = off_time
+        self._started: Dict[int, float] = {}
+        self._forced: Dict[int, bool] = {}
+
+    def get_state(self, index: int) -> bool:
+        forced = self._forced.get(index)
+        if forced is not None:
+            return forced
+        started = self._started.get(index)
+        if started is None:
+            return False
+        return (self.monotonic() - started) % (self.on_time + self.off_time) < self.on_time
+
+    def snapshot(self):
+        return tuple(self.get_state(i) for i in self.pins)
+
+    def set_relay(self, index: int, state: bool) -> Optional[float]:
+        if index < 0 or index >= len(self.pins):
+            return None
+        self._forced[index] = bool(state)
+        return self.monotonic()
+
+    def start_channel(self, index: int, profile=None) -> None:
+        self._forced.pop(index, None)
+        self._started[index] = self.monotonic()
+
+    def stop_channel(self, index: int) -> None:
+        self._forced.pop(index, None)
+        self._started.pop(index, None)
+
+    def start(self, profile=None) -> None:
+        for index in self.pins:
+            self.start_channel(index)
+
+    def stop(self) -> None:
+        pass
+
+    def all_off(self) -> None:
+        self._forced.clear()
+        self._started.clear()
+
+    def toggle_all(self) -> None:
+        pass
+
+    def start_thread(self) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+    def cleanup(self) -> None:
+        pass
+
+
+@dataclass
+class SimulatedSlot:
+    """Ein bestückter (oder leerer) Steckplatz des simulierten Prüfstands."""
+    present: bool = True
+    supply: float = 5.0          # Versorgungsspannung in V
+    current: float = 1.45        # Stromaufnahme in mA bei bestücktem Sensor
+    signal_on: float = 3.5       # RedLab-Signal bei Relais ON in V
+    signal_off: float = -3.5     # RedLab-Signal bei Relais OFF in V
+    drift_per_hour: float = 0.0  # Drift des ON-Signals in V/h
+    noise: float = 0.05          # Rauschen (Standardabweichung) in V
+    inserted_at: float = 0.0
+    dip_cycles: int = 0
+    events: Dict[str, int] = field(default_factory=dict)
+
+
+class SimulatedBench:
+    """
+    Sensormodell aller Steckplätze. `step` wird einmal pro Erfassungszyklus vor dem
+    Lesen aufgerufen, würfelt die Fehler des Zyklus und schreibt Busspannung und
+    Strom in die simulierten INA219-Register.
+
+    Args:
+        bus: SimulatedI2CBus mit einem INA219 je Kanal.
+        relays: SimulatedRelays (Relaiszustand bestimmt das RedLab-Signal).
+        monotonic: Zeitquelle.
+        faults: Fehlerwahrscheinlichkeiten (siehe DEFAULT_FAULTS).
+        seed: Startwert des Zufallsgenerators (reproduzierbare Läufe).
+    """
+    def __init__(self, bus: SimulatedI2CBus, relays: SimulatedRelays, monotonic: Callable[[], float], faults: Optional[Dict[str, float]] = None, seed: int = 0):
+        self.bus = bus
+        self.relays = relays
+        self.monotonic = monotonic
+        self.faults = {**DEFAULT_FAULTS, **(faults or {})}
+        self.random = random.Random(seed)
+        self.slots: Dict[int, SimulatedSlot] = {}
+        self.redlab_disconnect = False
+        for ch in bus.devices:
+            self.insert(ch)
+
+    def insert(self, channel: int) -> None:
+        """
+        Bestückt einen Steckplatz mit einem neuen Sensor (eigene Drift). Beim Tausch
+        wird der INA219 des Steckplatzes aus- und wieder eingeschaltet.
+        """
+        if channel in self.slots:
+            self.bus.devices[channel].power_cycle()
+        self.slots[channel] = SimulatedSlot(
+            drift_per_hour=self.random.gauss(0.0, 0.002),
+            inserted_at=self.monotonic()
+        )
+
+    def remove(self, channel: int) -> None:
+        self.slots[channel].present = False
+
+    def _count(self, slot: SimulatedSlot, event: str) -> bool:
+        if self.random.random() < self.faults[event]:
+            slot.events[event] = slot.events.get(event, 0) + 1
+            return True
+        return False
+
+    def step(self) -> None:
+        for ch, slot in self.slots.items():
+            if slot.present and self._count(slot, "supply_dip"):
+                slot.dip_cycles = self.random.randint(1, 5)
+            supply = slot.supply - (1.2 if slot.dip_cycles else 0.0)
+            slot.dip_cycles = max(0, slot.dip_cycles - 1)
+            current = slot.current if slot.present else 0.02
+            self.bus.devices[ch].set_measurement(supply + self.random.gauss(0.0, 0.005), current + self.random.gauss(0.0, 0.01))
+            if self._count(slot, "i2c_nack"):
+                self.bus.fail_next += 1
+            if self._count(slot, "redlab_disconnect"):
+                self.redlab_disconnect = True
+
+    def signal(self, channel: int) -> float:
+        slot = self.slots[channel]
+        if not slot.present:
+            return self.random.gauss(0.0, 0.01)
+        if self.relays.get_state(channel):
+            hours = (self.monotonic() - slot.inserted_at) / 3600.0
+            value = slot.signal_on - slot.drift_per_hour * hours
+        else:
+            value = slot.signal_off
+        if self._count(slot, "signal_glitch"):
+            value = 0.0
+        return value + self.random.gauss(0.0, slot.noise)
+
+    def redlab_fault(self, channel: int) -> bool:
+        return self._count(self.slots[channel], "redlab_error")
+
+
+class _SimulatedDaqDevice:
+    def __init__(self, bench: SimulatedBench):
+        self.ai = _SimulatedAiDevice(bench)
+        self.connected = False
+
+    def get_ai_device(self):
+        return self.ai
+
+    def connect(self) -> None:
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def disconnect(self) -> None:
+        self.connected = False
+
+    def release(self) -> None:
+        pass
+
+
+class _SimulatedAiDevice:
+    def __init__(self, bench: SimulatedBench):
+        self.bench = bench
+
+    def a_in(self, channel, mode, range_, flags) -> float:
+        if self.bench.redlab_fault(channel):
+            raise OSError("Simulierter USB-Übertragungsfehler")
+        return self.bench.signal(channel)
+
+    def disconnect(self) -> None:
+        pass
+
+
+class SimulatedRedLab(RedLabDAQ):
+    """
+    RedLabDAQ mit simuliertem Gerät: Lesen, Fehlerbehandlung, Reconnect und Reset
+    laufen durch den echten Code, nur Geräteerkennung und a_in sind simuliert.
+    """
+    def __init__(self, bench: SimulatedBench, reconnect_retries: int = 3, reconnect_delay: float = 0.0):
+        super().__init__(reconnect_retries, reconnect_delay)
+        self.bench = bench
+        self.connects = 0
+
+    def connect(self) -> None:
+        self._release()
+        device = _SimulatedDaqDevice(self.bench)
+        device.connect()
+        self.daq_device = device
+        self.ai_device = device.get_ai_device()
+        self.connects += 1
+
+    def read(self, channel: int) -> Optional[float]:
+        if self.bench.redlab_disconnect:
+            self.bench.redlab_disconnect = False
+            self.disconnect()
+            self._release()
+        return super().read(channel)
+
+    def burst(self, low_channel, high_channel, rate, samples, on_started=None):
+        # Eingeschwungenes Signal ohne Sprungverlauf (für die Sprungantwort nicht geeignet)
+        if self.ai_device is None:
+            return None
+        start = time.monotonic()
+        if on_started:
+            on_started(start)
+        data = [[self.bench.signal(ch) for _ in range(samples)] for ch in range(low_channel, high_channel + 1)]
+        return start, float(rate), data
+
+
+class SimulatedConfig:
+    """Minimaler ConfigManager-Ersatz (config, add_listener, update) ohne Datei."""
+    def __init__(self, config: ConfigSchema):
+        self.config = config
+        self._listeners: List[Callable[[ConfigSchema], None]] = []
+
+    def add_listener(self, callback: Callable[[ConfigSchema], None]) -> None:
+        self._listeners.append(callback)
+
+    def update(self, changes) -> ConfigSchema:
+        self.config = ConfigSchema(**{**self.config.dict(), **changes})
+        for callback in self._listeners:
+            callback(self.config)
+        return self.config
+
+
+class SimulatedDashboard:
+    """Dashboard-Ersatz (config, serial_numbers) für den SensorManager ohne GUI."""
+    def __init__(self, config: ConfigSchema):
+        self.config = SimulatedConfig(config)
+        self.serial_numbers: Dict[int, str] = {ch: "" for ch in config.sensor_channels}
+
+
+class SimulatedHardwareManager:
+    """
+    Ersatz für HardwareManager mit simulierter Hardware und derselben Schnittstelle
+    (sensor_manager, statistics, relay_sequencer, acquisition, cleanup, ...).
+
+    Args:
+        config: ConfigManager (GUI) oder Objekt mit `.config` und `add_listener`.
+        app: Dashboard mit `serial_numbers`.
+        clock: VirtualClock für den Zeitraffer; None = echte Zeit.
+        faults: Fehlerwahrscheinlichkeiten (siehe DEFAULT_FAULTS).
+        seed: Startwert des Zufallsgenerators.
+        period: Erfassungsperiode in s (None = update_interval der Konfiguration).
+        start: Erfassung sofort starten.
+    """
+    def __init__(self, config, app, clock: Optional[VirtualClock] = None, faults: Optional[Dict[str, float]] = None, seed: int = 0, period: Optional[float] = None, start: bool = True):
+        self.config = config
+        self.app = app
+        cfg = config.config
+        channels = cfg.sensor_channels
+        monotonic = clock.monotonic if clock else time.monotonic
+        self.clock = SampleClock(monotonic=monotonic)
+
+        seq_cfg = cfg.relay_sequencer
+        self.relays = SimulatedRelays(monotonic, max(channels) + 1, float(seq_cfg["on_time"]), float(seq_cfg["off_time"]))
+        self.relay_sequencer = self.relays
+        self.actuator = ReplayOutputs()
+        self.response_monitor = None
+        self.live_server = None
+        self.uploader = None
+
+        self.i2c_bus = SimulatedI2CBus(channels)
+        self.bench = SimulatedBench(self.i2c_bus, self.relays, monotonic, faults, seed)
+        self.tca = DirectTCA9548A(self.i2c_bus)
+        ina_cfg = cfg.ina219
+        self.ina219 = INA219SensorManager(
+            multiplexer=self.tca,
+            calibration=ina_cfg["calibration"],
+            retries=ina_cfg["retries"],
+            retry_delay=0.0,
+            adc_profile="9bit:continuous",
+            sensor_factory=DirectINA219
+        )
+        self.redlab = SimulatedRedLab(self.bench)
+        self.redlab.connect()
+
+        acq_cfg = cfg.acquisition
+        self.watchdogs = {
+            "ina219": DeviceWatchdog("INA219", float(acq_cfg["ina219_deadline"]), int(acq_cfg["escalate_after"]), self.ina219.reset, float(acq_cfg["reset_timeout"])),
+            "redlab": DeviceWatchdog("RedLab", float(acq_cfg["redlab_deadline"]), int(acq_cfg["escalate_after"]), partial(self.redlab.reset, float(acq_cfg["reset_timeout"])), float(acq_cfg["reset_timeout"])),
+        }
+        self.engine = None
+        if acq_cfg["engine"] == "async":
+            self.engine = AsyncAcquisitionEngine(
+                ina=self.ina219,
+                redlab=self.redlab,
+                relays=self.relays,
+                ina_watchdog=self.watchdogs["ina219"],
+                redlab_watchdog=self.watchdogs["redlab"],
+                clock=self.clock
+            )
+        self.sensor_manager = SensorManager(
+            channels=channels,
+            ina_manager=self.ina219,
+            redlab_manager=self.redlab,
+            relay_controller=self.relays,
+            led_controller=self.actuator,
+            dashboard=app,
+            engine=self.engine,
+            clock=self.clock,
+            watchdogs=self.watchdogs
+        )
+        self.config.add_listener(self.sensor_manager.rules.reload)
+        self.statistics = StatisticsEngine(channels, cfg)
+        self.config.add_listener(self.statistics.reload)
+
+        period = period or cfg.update_interval / 1000.0
+        # Echtzeitbetrieb nur in echter Zeit; unter der virtuellen Uhr wäre er wirkungslos
+        self.realtime = None
+        if clock is None and cfg.realtime.get("enabled", False):
+            self.realtime = RealtimeController.from_config(cfg.realtime)
+            if self.engine:
+                self.realtime.add_thread(lambda: self.engine.native_id)
+            for watchdog in self.watchdogs.values():
+                self.realtime.add_thread(lambda watchdog=watchdog: watchdog.native_id)
+        if clock:
+            scheduler = FixedRateScheduler(period, clock=clock.monotonic, wait=clock.wait)
+        else:
+            scheduler = FixedRateScheduler(period, spin=self.realtime.spin if self.realtime else 0.0)
+        self.acquisition = AcquisitionLoop(self.update_sensors, period=period, scheduler=scheduler, realtime=self.realtime)
+        self.acquisition.add_listener(lambda scheduled: self.statistics.update(self.sensor_manager.sensors))
+        self.qualification = QualificationRunner(self.sensor_manager, self.acquisition, self.redlab, self.relays, config, sleep=clock.advance if clock else time.sleep)
+        logger.info("Simulierte Hardware: %d Kanäle, Periode %.0f ms, %s Zeit", len(channels), period * 1000, "virtuelle" if clock else "echte")
+        if start:
+            self.acquisition.start()
+
+    def update_sensors(self, initial: bool = False) -> None:
+        self.bench.step()
+        self.sensor_manager.update_all()
+        self.sensor_data = self.sensor_manager.get_all_data()
+
+    def cleanup(self) -> None:
+        self.acquisition.stop()
+        if self.engine:
+            self.engine.shutdown()
+        for watchdog in self.watchdogs.values():
+            watchdog.shutdown()
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Beschleunigter Dauertest (Soak-Test): betreibt die komplette Erfassungspipeline
+(SensorManager/RuleEngine, Watchdogs, AsyncAcquisitionEngine, Statistik, Archiv,
+Live-Server, Logging) auf simulierter Hardware in virtueller Zeit und prüft, ob
+Speicher, Dateihandles, Threads und Zykluslatenz über hunderte Betriebsstunden
+stabil bleiben.
+
+Die Kanäle laufen in Sitzungen wie am Prüfstand: Sensor stecken, Sitzung mit
+eigener Archivdatei starten, nach Ablauf Zusammenfassung schreiben, Datei
+schließen, Sensor tauschen. Eingestreut werden I2C-NACKs, RedLab-Lesefehler und
+-Verbindungsabbrüche, Versorgungseinbrüche und Signalausreißer.
+
+Aufruf (im Paketverzeichnis):
+    python -m hardware.soak --hours 300
+    python -m hardware.soak --hours 1000 --period 10 --session-hours 48 --keep /tmp/soak
+
+Nach einer Einlaufphase wird je Messgröße eine Ausgleichsgerade über die
+Checkpoints gelegt; übersteigt der daraus berechnete Zuwachs über die Laufzeit die
+Toleranz, schlägt der Test fehl (Exit-Code 1). Zusätzlich werden die Codestellen
+mit dem größten Speicherzuwachs (tracemalloc) ausgegeben.
+"""
+import argparse
+import gc
+import http.client
+import logging
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config.config_manager import ConfigManager
+from config.constants import ConfigSchema
+from config.logging_config import setup_logging, shutdown_logging
+from hardware.simulation import DEFAULT_FAULTS, SimulatedDashboard, SimulatedHardwareManager, VirtualClock
+from remote.live_server import LiveServer
+from storage.archive_writer import ArchiveWriter
+
+logger = logging.getLogger(__name__)
+
+# Erlaubter Zuwachs über die Laufzeit (nach der Einlaufphase); p50/p99 relativ
+DEFAULT_LIMITS = {
+    "rss": 4 * 1024 * 1024,
+    "traced": 1024 * 1024,
+    "fds": 2,
+    "threads": 1,
+    "p50": 0.5,
+    "p99": 0.5,
+}
+RELATIVE = ("p50", "p99")
+
+
+@dataclass
+class SoakSample:
+    """Ein Checkpoint des Dauertests."""
+    hours: float        # virtuelle Laufzeit
+    cycles: int
+    rss: int            # Resident Set Size in Byte
+    traced: int         # von tracemalloc verfolgter Python-Speicher in Byte
+    fds: int            # offene Dateideskriptoren (-1 = unbekannt)
+    threads: int
+    p50: float          # Zykluslatenz seit dem letzten Checkpoint in s
+    p99: float
+
+
+@dataclass
+class TrendResult:
+    """Trend einer Messgröße über die Checkpoints nach der Einlaufphase."""
+    name: str
+    start: float
+    end: float
+    growth: float       # absolut bzw. relativ zum Startwert (p50/p99)
+    limit: float
+
+    @property
+    def failed(self) -> bool:
+        return self.growth > self.limit
+
+
+@dataclass
+class SoakReport:
+    hours: float
+    cycles: int
+    elapsed: float
+    sessions: int
+    samples: List[SoakSample]
+    trends: List[TrendResult]
+    top_growth: List[str]
+    faults: Dict[str, int] = field(default_factory=dict)
+    redlab_connects: int = 0
+    overruns: int = 0
+    swaps: int = 0               # erkannte Präsenzflanken (Sensor gesteckt/gezogen)
+
+    @property
+    def passed(self) -> bool:
+        return not any(t.failed for t in self.trends)
+
+
+def _rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        # Nur Spitzenwert verfügbar, zeigt Wachstum aber ebenfalls
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _fit(xs: List[float], ys: List[float]) -> Tuple[float, float]:
+    """Ausgleichsgerade (Achsenabschnitt, Steigung) nach kleinsten Quadraten."""
+    n = len(xs)
+    mx = sum(xs) / n
+    my = sum(ys) / n
+    var = sum((x - mx) ** 2 for x in xs)
+    if var == 0:
+        return my, 0.0
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var
+    return my - slope * mx, slope
+
+
+class SoakMonitor:
+    """
+    Erfasst Zykluslatenzen und nimmt Checkpoints (RSS, tracemalloc, Dateideskriptoren,
+    Threads, Latenzperzentile) auf; bewertet am Ende die Trends.
+
+    Args:
+        trace: Python-Allokationen mit tracemalloc verfolgen (kostet etwa Faktor 3 an Laufzeit).
+        frames: Tiefe der tracemalloc-Tracebacks für die Zuwachsanalyse.
+    """
+    def __init__(self, trace: bool = True, frames: int = 1):
+        self.trace = trace
+        self.frames = frames
+        self.samples: List[SoakSample] = []
+        self._latencies: List[float] = []
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    def start(self) -> None:
+        if self.trace:
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        if self.trace:
+            tracemalloc.stop()
+
+    def record_cycle(self, duration: float) -> None:
+        self._latencies.append(duration)
+
+    def checkpoint(self, hours: float, cycles: int) -> SoakSample:
+        gc.collect()
+        latencies = sorted(self._latencies)
+        self._latencies = []
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else -1
+        sample = SoakSample(
+            hours=hours,
+            cycles=cycles,
+            rss=_rss(),
+            traced=traced,
+            fds=_open_fds(),
+            threads=threading.active_count(),
+            p50=_percentile(latencies, 0.5),
+            p99=_percentile(latencies, 0.99),
+        )
+        self.samples.append(sample)
+        return sample
+
+    def mark_baseline(self) -> None:
+        """Referenz-Snapshot für `top_growth` (Ende der Einlaufphase)."""
+        self._baseline = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+    def top_growth(self, limit: int = 10) -> List[str]:
+        """Codestellen mit dem größten Speicherzuwachs seit `mark_baseline`."""
+        if self._baseline is None or not tracemalloc.is_tracing():
+            return []
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+        stats = tracemalloc.take_snapshot().filter_traces(filters).compare_to(self._baseline.filter_traces(filters), "lineno")
+        return [str(stat) for stat in stats[:limit] if stat.size_diff > 0]
+
+    def evaluate(self, limits: Dict[str, float], warmup: float = 0.2) -> List[TrendResult]:
+        skip = min(int(len(self.samples) * warmup), max(0, len(self.samples) - 2))
+        samples = self.samples[skip:]
+        if len(samples) < 2:
+            return []
+        xs = [s.hours for s in samples]
+        results = []
+        for name, limit in limits.items():
+            ys = [float(getattr(s, name)) for s in samples]
+            if min(ys) < 0:
+                continue
+            intercept, slope = _fit(xs, ys)
+            start = intercept + slope * xs[0]
+            end = intercept + slope * xs[-1]
+            growth = end - start
+            if name in RELATIVE:
+                growth = growth / start if start > 0 else 0.0
+            results.append(TrendResult(name, start, end, growth, limit))
+        return results
+
+
+class SoakRunner:
+    """
+    Führt einen Dauertest auf SimulatedHardwareManager in virtueller Zeit aus.
+
+    Args:
+        hours: Virtuelle Laufzeit in h.
+        period: Virtuelle Erfassungsperiode in s (größer = weniger Zyklen pro Stunde).
+        session_hours: Dauer einer Kanalsitzung in h.
+        swap_minutes: Steckplatz leer zwischen zwei Sitzungen in min.
+        checkpoints: Anzahl der Checkpoints über die Laufzeit.
+        config: ConfigSchema (None = Voreinstellungen).
+        faults: Fehlerwahrscheinlichkeiten (siehe hardware.simulation.DEFAULT_FAULTS).
+        seed: Startwert des Zufallsgenerators.
+        workdir: Arbeitsverzeichnis für Archiv und Logs (None = temporär, wird gelöscht).
+        keep_files: Abgeschlossene Laufdateien behalten statt löschen.
+        live: Live-Server mitlaufen lassen und an jedem Checkpoint abfragen.
+        limits: Toleranzen (siehe DEFAULT_LIMITS).
+        trace: Speicherzuwachs mit tracemalloc verfolgen.
+        progress: Checkpoints auf der Konsole ausgeben.
+    """
+    def __init__(
+        self,
+        hours: float,
+        period: float = 5.0,
+        session_hours: float = 24.0,
+        swap_minutes: float = 10.0,
+        checkpoints: int = 50,
+        config: Optional[ConfigSchema] = None,
+        faults: Optional[Dict[str, float]] = None,
+        seed: int = 0,
+        workdir: Optional[str] = None,
+        keep_files: bool = False,
+        live: bool = True,
+        limits: Optional[Dict[str, float]] = None,
+        trace: bool = True,
+        progress: bool = True,
+    ):
+        self.hours = hours
+        self.period = period
+        self.session_secs = session_hours * 3600.0
+        self.swap_secs = swap_minutes * 60.0
+        self.checkpoint_secs = hours * 3600.0 / max(1, checkpoints)
+        self.config = config or ConfigSchema()
+        self.faults = faults
+        self.seed = seed
+        self.keep_workdir = workdir is not None
+        self.workdir = workdir or tempfile.mkdtemp(prefix="sosesta-soak-")
+        self.keep_files = keep_files
+        self.live = live
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.progress = progress
+
+        self.monitor = SoakMonitor(trace=trace)
+        self.clock = VirtualClock(end=hours * 3600.0)
+        self.sessions: Dict[int, Tuple[float, str]] = {}
+        self.sessions_completed = 0
+        self.swaps = 0
+        self._empty_until: Dict[int, float] = {}
+        self._serial = 0
+        self._cycles = 0
+        self._cycle_start = 0.0
+        self._next_checkpoint = self.checkpoint_secs
+        self._baseline_at = hours * 3600.0 * 0.2
+        self._baseline_marked = False
+
+    # ------------------------------------------------------------- Sitzungen
+
+    def _start_session(self, channel: int, now: float) -> None:
+        self._serial += 1
+        sn = f"SIM{self._serial:06d}"
+        self.dashboard.serial_numbers[channel] = sn
+        self.hardware.relay_sequencer.start_channel(channel)
+        self.hardware.statistics.reset([channel])
+        start_time = datetime.fromtimestamp(self.hardware.clock.to_wall(now))
+        self.archive.open_channel(channel, start_time, sn, self.config.dict())
+        self.sessions[channel] = (now, sn)
+
+    def _stop_session(self, channel: int, now: float) -> None:
+        start, _ = self.sessions.pop(channel)
+        run_info = {
+            "start": datetime.fromtimestamp(self.hardware.clock.to_wall(start)).isoformat(),
+            "end": datetime.fromtimestamp(self.hardware.clock.to_wall(now)).isoformat(),
+            "duration_s": round(now - start, 1),
+        }
+        self.archive.write_summary(self.hardware.statistics.summary([channel]), run_info)
+        self.archive.close_channel(channel)
+        self.hardware.relay_sequencer.stop_channel(channel)
+        self.dashboard.serial_numbers[channel] = ""
+        self.sessions_completed += 1
+
+    def _remove_files(self, paths: List[str]) -> None:
+        # ArchiveWriter-Listener: abgeschlossene Laufdateien verwerfen
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _on_presence_changed(self, channel: int, present: bool) -> None:
+        self.swaps += 1
+
+    def _update_sessions(self, scheduled: float) -> None:
+        now = self.clock.monotonic()
+        bench = self.hardware.bench
+        channels = self.hardware.sensor_manager.channels
+        for index, channel in enumerate(channels):
+            session = self.sessions.get(channel)
+            if session is not None:
+                # Erste Sitzungen gestaffelt, damit nicht alle Kanäle gleichzeitig tauschen
+                length = self.session_secs if self.sessions_completed >= len(channels) else self.session_secs * (index + 1) / len(channels)
+                if now - session[0] >= length:
+                    self._stop_session(channel, now)
+                    bench.remove(channel)
+                    self._empty_until[channel] = now + self.swap_secs
+            elif now >= self._empty_until.get(channel, 0.0):
+                if not bench.slots[channel].present:
+                    bench.insert(channel)
+                self._start_session(channel, now)
+
+    # ------------------------------------------------------------- Messung
+
+    def _timed_update(self, initial: bool = False) -> None:
+        self._cycle_start = time.perf_counter()
+        self.hardware.update_sensors(initial)
+
+    def _end_cycle(self, scheduled: float) -> None:
+        self.monitor.record_cycle(time.perf_counter() - self._cycle_start)
+        self._cycles += 1
+        now = self.clock.monotonic()
+        if now < self._next_checkpoint and now < self.clock.end:
+            return
+        self._next_checkpoint += self.checkpoint_secs
+        if self.live_server:
+            self._probe_live_server()
+        sample = self.monitor.checkpoint(now / 3600.0, self._cycles)
+        if not self._baseline_marked and now >= self._baseline_at:
+            self.monitor.mark_baseline()
+            self._baseline_marked = True
+        if self.progress:
+            print(
+                f"{sample.hours:8.1f} h {sample.cycles:>9} Zyklen  RSS {sample.rss / 1e6:7.1f} MB  "
+                f"Python {max(sample.traced, 0) / 1e6:6.2f} MB  FDs {sample.fds:>4}  Threads {sample.threads:>3}  "
+                f"p50 {sample.p50 * 1e3:6.2f} ms  p99 {sample.p99 * 1e3:6.2f} ms",
+                flush=True
+            )
+
+    def _probe_live_server(self) -> None:
+        """Ruft /state ab und verbindet kurz einen SSE-Client (Client-Auf- und Abbau)."""
+        host, port = self.live_server.address[:2]
+        for path in ("/state", "/events"):
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            try:
+                conn.request("GET", path)
+                response = conn.getresponse()
+                if path == "/state":
+                    response.read()
+            except OSError as e:
+                logger.warning("Live-Server-Abfrage %s fehlgeschlagen: %s", path, e)
+            finally:
+                conn.close()
+
+    # ---------------------------------------------------------------- Ablauf
+
+    def _setup(self) -> None:
+        setup_logging({
+            "level": "INFO",
+            "file": os.path.join(self.workdir, "logs", "soak.log"),
+            "console": False,
+            "max_bytes": 1_000_000,
+            "backup_count": 2,
+        }, clock=self.clock.monotonic)
+        self.dashboard = SimulatedDashboard(self.config)
+        self.hardware = SimulatedHardwareManager(
+            self.dashboard.config, self.dashboard,
+            clock=self.clock, faults=self.faults, seed=self.seed, period=self.period, start=False
+        )
+        channels = self.hardware.sensor_manager.channels
+        self.archive = ArchiveWriter.from_config(os.path.join(self.workdir, "archive"), channels, self.config.archive)
+        if not self.keep_files:
+            self.archive.add_listener(self._remove_files)
+        self.live_server = None
+        if self.live:
+            self.live_server = LiveServer(host="127.0.0.1", port=0, bench_name="soak", keepalive=1.0)
+            self.live_server.start()
+
+        self.hardware.sensor_manager.add_presence_listener(self._on_presence_changed)
+
+        acquisition = self.hardware.acquisition
+        acquisition.update = self._timed_update
+        acquisition.add_listener(self._update_sessions)
+        acquisition.add_listener(lambda scheduled: self.archive.write_samples(self.hardware.sensor_manager.sensors))
+        if self.live_server:
+            acquisition.add_listener(lambda scheduled: self.live_server.publish(self.hardware.sensor_manager.sensors))
+        acquisition.add_listener(self._end_cycle)
+
+    def _teardown(self) -> None:
+        now = self.clock.monotonic()
+        for channel in list(self.sessions):
+            self._stop_session(channel, now)
+        self.hardware.cleanup()
+        if self.live_server:
+            self.live_server.stop()
+        self.archive.close()
+        shutdown_logging()
+
+    def run(self) -> SoakReport:
+        self.monitor.start()
+        self._setup()
+        started = time.perf_counter()
+        try:
+            self.hardware.acquisition.start()
+            while not self.hardware.acquisition.join(1.0):
+                pass
+        finally:
+            elapsed = time.perf_counter() - started
+            self._teardown()
+            top = self.monitor.top_growth()
+            self.monitor.stop()
+            if not self.keep_workdir:
+                shutil.rmtree(self.workdir, ignore_errors=True)
+
+        faults: Dict[str, int] = {}
+        for slot in self.hardware.bench.slots.values():
+            for name, count in slot.events.items():
+                faults[name] = faults.get(name, 0) + count
+        return SoakReport(
+            hours=self.clock.monotonic() / 3600.0,
+            cycles=self._cycles,
+            elapsed=elapsed,
+            sessions=self.sessions_completed,
+            samples=self.monitor.samples,
+            trends=self.monitor.evaluate(self.limits),
+            top_growth=top,
+            faults=faults,
+            redlab_connects=self.hardware.redlab.connects,
+            overruns=int(self.hardware.acquisition.scheduler.stats()["overruns"]),
+            swaps=self.swaps,
+        )
+
+
+def _format_value(name: str, value: float) -> str:
+    if name in ("rss", "traced"):
+        return f"{value / 1e6:.2f} MB"
+    if name in RELATIVE:
+        return f"{value * 1e3:.2f} ms"
+    return f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beschleunigter Dauertest auf simulierter Hardware")
+    parser.add_argument("--hours", type=float, default=200.0, help="Virtuelle Laufzeit in Stunden")
+    parser.add_argument("--period", type=float, default=5.0, help="Virtuelle Erfassungsperiode in s")
+    parser.add_argument("--session-hours", type=float, default=24.0, help="Dauer einer Kanalsitzung in h")
+    parser.add_argument("--swap-minutes", type=float, default=10.0, help="Pause zwischen zwei Sitzungen eines Kanals in min")
+    parser.add_argument("--checkpoints", type=int, default=50)
+    parser.add_argument("--fault-scale", type=float, default=1.0, help="Faktor auf alle Fehlerwahrscheinlichkeiten (0 = fehlerfrei)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", action="store_true", help="config.json statt der Voreinstellungen verwenden")
+    parser.add_argument("--keep", metavar="DIR", help="Archiv und Logs in DIR behalten (inkl. aller Sitzungsdateien)")
+    parser.add_argument("--no-live", action="store_true", help="Ohne Live-Server")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Ohne tracemalloc (etwa dreimal schneller, nur RSS)")
+    args = parser.parse_args()
+
+    runner = SoakRunner(
+        hours=args.hours,
+        period=args.period,
+        session_hours=args.session_hours,
+        swap_minutes=args.swap_minutes,
+        checkpoints=args.checkpoints,
+        config=ConfigManager().config if args.config else None,
+        faults={name: p * args.fault_scale for name, p in DEFAULT_FAULTS.items()},
+        seed=args.seed,
+        workdir=args.keep,
+        keep_files=bool(args.keep),
+        live=not args.no_live,
+        trace=not args.no_tracemalloc,
+    )
+    report = runner.run()
+
+    print(
+        f"\n{report.hours:.1f} h virtuell in {report.elapsed:.1f} s: {report.cycles} Zyklen, "
+        f"{report.sessions} Sitzungen, {report.swaps} Sensortausch-Flanken, "
+        f"{report.redlab_connects} RedLab-Verbindungen, {report.overruns} Overruns"
+    )
+    print("Eingestreute Fehler: " + ", ".join(f"{name} {count}" for name, count in sorted(report.faults.items())))
+    print(f"\n{'Größe':<10}{'Start':>14}{'Ende':>14}{'Zuwachs':>12}{'Toleranz':>12}")
+    for trend in report.trends:
+        growth = f"{trend.growth:+.0%}" if trend.name in RELATIVE else _format_value(trend.name, trend.growth)
+        limit = f"{trend.limit:.0%}" if trend.name in RELATIVE else _format_value(trend.name, trend.limit)
+        flag = "  FEHLER" if trend.failed else ""
+        print(f"{trend.name:<10}{_format_value(trend.name, trend.start):>14}{_format_value(trend.name, trend.end):>14}{growth:>12}{limit:>12}{flag}")
+    if report.top_growth:
+        print("\nGrößter Speicherzuwachs seit Ende der Einlaufphase:")
+        for line in report.top_growth:
+            print(f"  {line}")
+    print("\nBESTANDEN" if report.passed else "\nNICHT BESTANDEN")
+    sys.exit(0 if report.passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from config.constants import ConfigSchema
+
+logger = logging.getLogger(__name__)
+
+# Statistikgrößen je Kanal: Name -> (Anzeigetext, Einheit)
+QUANTITIES = {
+    "redlab_on": ("RedLab (ON)", "V"),
+    "redlab_off": ("RedLab (OFF)", "V"),
+    "current": ("Strom", "mA"),
+    "bus_voltage": ("Versorgung", "V"),
+}
+
+
+class RunningStat:
+    """
+    Laufende Statistik einer Messgröße in O(1) pro Sample: Mittelwert und Varianz
+    nach Welford, Minimum/Maximum und exponentiell gleitender Mittelwert (EWMA).
+
+    Args:
+        alpha: Glättungsfaktor des EWMA (kleiner = träger).
+    """
+    __slots__ = ("alpha", "count", "mean", "_m2", "min", "max", "ewma")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.ewma = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.ewma = value if self.count == 1 else self.ewma + self.alpha * (value - self.ewma)
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min,
+            "max": self.max,
+            "ewma": self.ewma,
+            "trend": self.ewma - self.mean,
+        }
+
+
+class WindowedRate:
+    """
+    Fehlerrate über Fenster fester Länge (Anzahl Samples) in O(1) pro Sample.
+
+    Args:
+        size: Fensterlänge in Samples.
+    """
+    __slots__ = ("size", "samples", "errors", "last_rate", "max_rate", "total", "total_errors")
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.samples = 0
+        self.errors = 0
+        self.last_rate: Optional[float] = None   # Rate des letzten abgeschlossenen Fensters
+        self.max_rate = 0.0
+        self.total = 0
+        self.total_errors = 0
+
+    def add(self, error: bool) -> None:
+        self.samples += 1
+        self.total += 1
+        if error:
+            self.errors += 1
+            self.total_errors += 1
+        if self.samples >= self.size:
+            self.last_rate = self.errors / self.samples
+            self.max_rate = max(self.max_rate, self.last_rate)
+            self.samples = 0
+            self.errors = 0
+
+    @property
+    def rate(self) -> float:
+        """Rate des letzten abgeschlossenen Fensters, vorher die des laufenden."""
+        if self.last_rate is not None:
+            return self.last_rate
+        return self.errors / self.samples if self.samples else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "window": self.size,
+            "rate": self.rate,
+            "max_rate": self.max_rate,
+            "total_rate": self.total_errors / self.total if self.total else 0.0,
+            "errors": self.total_errors,
+            "samples": self.total,
+        }
+
+
+class ChannelStatistics:
+    """Online-Statistik eines Kanals; nur gültige Samples (Sensor präsent, nicht veraltet) zählen."""
+    def __init__(self, channel: int, alpha: float, window: int):
+        self.channel = channel
+        self.stats: Dict[str, RunningStat] = {name: RunningStat(alpha) for name in QUANTITIES}
+        self.signal_errors = WindowedRate(window)
+        self.supply_errors = WindowedRate(window)
+        self.alarms: Dict[str, str] = {}   # Größe -> Alarmtext
+
+    def add(self, sensor) -> None:
+        stats = self.stats
+        stats["redlab_on" if sensor.relay_on else "redlab_off"].add(sensor.redlab_signal)
+        stats["current"].add(sensor.current)
+        stats["bus_voltage"].add(sensor.bus_voltage)
+        self.signal_errors.add(not sensor.signal_ok)
+        self.supply_errors.add(not sensor.supply_ok)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "channel": self.channel + 1,
+            "quantities": {name: stat.to_dict() for name, stat in self.stats.items()},
+            "signal_errors": self.signal_errors.to_dict(),
+            "supply_errors": self.supply_errors.to_dict(),
+            "drift_alarms": dict(self.alarms),
+        }
+
+
+class StatisticsEngine:
+    """
+    Führt pro Kanal laufende Statistiken über den Testlauf und erkennt Drift.
+
+    Drift-Alarm: nähert sich der EWMA einer Größe bis auf `drift_margin` (Anteil der
+    Bandbreite) einer Schwelle, wird ein Alarm gesetzt, bevor die harte Schwelle
+    verletzt ist. Er wird erst wieder gelöscht, wenn der Abstand das 1,5-fache
+    erreicht. Bewertet wird erst ab `min_samples` Samples der Größe.
+
+    Args:
+        channels: Kanäle.
+        config: Aktuelles ConfigSchema (Schwellen und ConfigSchema.statistics).
+    """
+    CLEAR_FACTOR = 1.5
+
+    def __init__(self, channels: Iterable[int], config: ConfigSchema):
+        self.channel_ids = list(channels)
+        self.reload(config)
+        self.reset()
+
+    def reload(self, config: ConfigSchema) -> None:
+        """Übernimmt Schwellen und Parameter; Fensterlänge und Alpha gelten ab `reset`."""
+        cfg = config.statistics
+        self.alpha = float(cfg.get("ewma_alpha", 0.01))
+        self.window = int(cfg.get("error_window", 120))
+        self.min_samples = int(cfg.get("min_samples", 120))
+        self.drift_margin = float(cfg.get("drift_margin", 0.1))
+        self.bands: Dict[str, Tuple[float, float]] = {
+            "redlab_on": config.redlab_pos_threshold,
+            "redlab_off": config.redlab_neg_threshold,
+            "current": config.presence_current_threshold,
+            "bus_voltage": config.supply_voltage_threshold,
+        }
+
+    def reset(self, channels: Optional[Iterable[int]] = None) -> None:
+        """Beginnt neue Statistiken (z.B. bei Teststart), wahlweise nur für einzelne Kanäle."""
+        fresh = {ch: ChannelStatistics(ch, self.alpha, self.window) for ch in (self.channel_ids if channels is None else channels)}
+        # Neues Dict statt Änderung an Ort und Stelle: der Erfassungsthread liest parallel
+        self.channels: Dict[int, ChannelStatistics] = fresh if channels is None else {**self.channels, **fresh}
+
+    def update(self, sensors: Dict[int, Any]) -> None:
+        """Übernimmt die Samples eines Erfassungszyklus."""
+        for ch, sensor in sensors.items():
+            if sensor.stale or not sensor.attached:
+                continue
+            stats = self.channels.get(ch)
+            if stats is None:
+                continue
+            stats.add(sensor)
+            self._check_drift(stats, "redlab_on" if sensor.relay_on else "redlab_off")
+            self._check_drift(stats, "current")
+            self._check_drift(stats, "bus_voltage")
+
+    def _check_drift(self, stats: ChannelStatistics, name: str) -> None:
+        stat = stats.stats[name]
+        if stat.count < self.min_samples:
+            return
+        low, high = self.bands[name]
+        width = high - low
+        if width <= 0:
+            return
+        margin = min(stat.ewma - low, high - stat.ewma) / width
+        active = name in stats.alarms
+        if not active and margin < self.drift_margin:
+            label, unit = QUANTITIES[name]
+            stats.alarms[name] = (
+                f"{label} driftet: EWMA {stat.ewma:.3f} {unit}, "
+                f"Abstand zur Schwelle {margin * 100:.0f} % der Bandbreite"
+            )
+            logger.warning("Kanal %d: %s", stats.channel + 1, stats.alarms[name])
+        elif active and margin >= self.drift_margin * self.CLEAR_FACTOR:
+            del stats.alarms[name]
+            logger.info("Kanal %d: Drift-Alarm %s aufgehoben", stats.channel + 1, name)
+
+    def alarms(self) -> Dict[int, List[str]]:
+        return {ch: list(s.alarms.values()) for ch, s in self.channels.items() if s.alarms}
+
+    def summary(self, channels: Optional[Iterable[int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Zusammenfassung aller (bzw. der gegebenen) Kanäle für den Laufbericht."""
+        selected = self.channels if channels is None else {ch: self.channels[ch] for ch in channels if ch in self.channels}
+        return {ch: stats.to_dict() for ch, stats in selected.items()}
@@ -0,0 +1,197 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Ein Hardwareaufruf hat seine Deadline überschritten; der Messwert ist veraltet."""
+
+
+class DeviceBusy(DeadlineExceeded):
+    """Ein vorheriger Aufruf hängt noch; neue Aufrufe schlagen sofort fehl."""
+
+
+class _Worker:
+    """Daemon-Thread, der Aufrufe eines Geräts nacheinander ausführt."""
+    def __init__(self, name: str):
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def retire(self) -> None:
+        """Beendet den Thread nach dem laufenden (ggf. hängenden) Aufruf."""
+        self._queue.put(None)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+
+class DeviceWatchdog:
+    """
+    Führt alle Aufrufe eines Geräts (bzw. Busses) in einem eigenen Worker-Thread mit
+    Deadline aus.
+
+    Hängt ein Aufruf, kostet er den Aufrufer höchstens `deadline`; solange er nicht
+    zurückkehrt, schlagen weitere Aufrufe sofort mit DeviceBusy fehl, statt sich
+    dahinter einzureihen. Nach `escalate_after` aufeinanderfolgenden Fehlschlägen wird
+    eskaliert: der hängende Worker wird aufgegeben (Python-Threads lassen sich nicht
+    abbrechen), ein neuer gestartet und darauf `reset` ausgeführt, das das Gerät
+    zurücksetzt bzw. neu initialisiert. Hängen bereits `max_hung` aufgegebene Worker,
+    wird kein weiterer Thread gestartet; die Eskalation wird zurückgestellt, bis einer
+    davon zurückkehrt. Ist der aktuelle Worker frei, läuft der Reset direkt darauf.
+
+    Args:
+        name: Gerätename (Thread-Name, Logging).
+        deadline: Maximale Dauer (s) eines einzelnen Aufrufs.
+        escalate_after: Fehlschläge in Folge bis zum Reset (0 = nie eskalieren).
+        reset: Rücksetzfunktion des Geräts; läuft im neuen Worker.
+        reset_timeout: Zeit (s), die ein Reset dauern darf, bevor Aufrufe während des
+                       Resets wieder als Fehlschlag zählen.
+        max_hung: Höchstzahl aufgegebener, noch blockierter Worker-Threads.
+    """
+    def __init__(
+        self,
+        name: str,
+        deadline: float,
+        escalate_after: int = 3,
+        reset: Optional[Callable[[], None]] = None,
+        reset_timeout: float = 5.0,
+        max_hung: int = 1
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.escalate_after = escalate_after
+        self.reset = reset
+        self.reset_timeout = reset_timeout
+        self.max_hung = max_hung
+        self._lock = threading.Lock()
+        self._worker = _Worker(name)
+        self._hung: List[_Worker] = []
+        self._pending: Optional[Future] = None
+        self._reset_started: Optional[float] = None   # gesetzt, solange ein Reset läuft
+        self.timeouts = 0
+        self.consecutive = 0
+        self.resets = 0
+        self.deferred = 0
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """
+        Reicht fn(*args) beim Worker ein.
+
+        Raises:
+            DeviceBusy: Wenn ein vorheriger Aufruf noch hängt.
+        """
+        with self._lock:
+            if self._pending is None or self._pending.done():
+                self._reset_started = None
+                self._pending = self._worker.submit(fn, *args)
+                return self._pending
+            resetting = self._reset_started is not None and time.monotonic() - self._reset_started < self.reset_timeout
+        if not resetting:
+            self.miss(f"{fn.__name__}{args}: vorheriger Aufruf hängt noch")
+        raise DeviceBusy(f"{self.name}: Gerät blockiert")
+
+    def call(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Führt fn(*args) synchron mit Deadline aus.
+
+        Raises:
+            DeadlineExceeded: Bei Überschreitung der Deadline oder blockiertem Gerät.
+        """
+        future = self.submit(fn, *args)
+        try:
+            result = future.result(timeout=self.deadline)
+        except FutureTimeout:
+            self.miss(f"{fn.__name__}{args}: Deadline {self.deadline * 1000:.0f} ms überschritten")
+            raise DeadlineExceeded(f"{self.name}: Deadline überschritten")
+        self.success()
+        return result
+
+    def success(self) -> None:
+        with self._lock:
+            self.consecutive = 0
+
+    def miss(self, reason: str) -> None:
+        """Zählt einen Fehlschlag und eskaliert bei Erreichen der Schwelle."""
+        with self._lock:
+            self.timeouts += 1
+            self.consecutive += 1
+            consecutive = self.consecutive
+            # Zählen und Entscheiden unter demselben Lock: genau ein Aufrufer eskaliert
+            outcome = self._escalate() if self.escalate_after and consecutive >= self.escalate_after else None
+        logger.warning("%s: %s (%s in Folge)", self.name, reason, consecutive)
+        if outcome is not None:
+            self._log_escalation(*outcome)
+
+    def escalate(self) -> None:
+        """Gibt den hängenden Worker auf und setzt das Gerät in einem neuen Worker zurück."""
+        with self._lock:
+            outcome = self._escalate()
+        self._log_escalation(*outcome)
+
+    def _escalate(self) -> Tuple[bool, int, int]:
+        # Aufrufer hält _lock; liefert (zurückgestellt, blockierte Worker, Resets)
+        self._hung = [worker for worker in self._hung if worker.alive]
+        busy = self._pending is not None and not self._pending.done()
+        deferred = busy and len(self._hung) >= self.max_hung
+        if deferred:
+            # Kein weiterer Thread, solange die aufgegebenen Worker noch blockieren
+            self.deferred += 1
+        else:
+            if busy:
+                self._worker.retire()
+                self._hung.append(self._worker)
+                self._worker = _Worker(self.name)
+            self._pending = self._worker.submit(self._reset) if self.reset else None
+            self._reset_started = time.monotonic() if self.reset else None
+            self.resets += 1
+        self.consecutive = 0
+        return deferred, len(self._hung), self.resets
+
+    def _log_escalation(self, deferred: bool, hung: int, resets: int) -> None:
+        if deferred:
+            logger.warning("%s: Reset zurückgestellt, %s aufgegebene Worker blockieren noch", self.name, hung)
+        else:
+            logger.error("%s: %s Fehlschläge in Folge – Gerät wird zurückgesetzt (Reset #%s)", self.name, self.escalate_after, resets)
+
+    def _reset(self) -> None:
+        try:
+            self.reset()
+            logger.info("%s: Reset abgeschlossen", self.name)
+        except Exception as e:
+            logger.error("%s: Reset fehlgeschlagen: %s", self.name, e, exc_info=True)
+
+    @property
+    def native_id(self) -> Optional[int]:
+        """Thread-ID des aktuellen Workers (ändert sich bei einer Eskalation)."""
+        return self._worker._thread.native_id
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return {"deadline": self.deadline, "timeouts": self.timeouts, "resets": self.resets, "deferred": self.deferred, "hung": sum(1 for worker in self._hung if worker.alive)}
+
+    def shutdown(self) -> None:
+        self._worker.retire()
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+What-if-Analyse: bewertet archivierte Läufe mit neuen Schwellen neu, ohne sie
+abzuspielen. Jede Kanalsitzung wird einmal in NumPy-Arrays geladen und gegen alle
+Kandidaten-Schwellensätze gleichzeitig ausgewertet (Kandidaten x Samples); die
+Dateien werden parallel in mehreren Prozessen bearbeitet.
+
+Die Bewertung entspricht der RuleEngine: Toleranzbänder mit Hysterese und
+Entprellung, RedLab-Signal je nach Relaiszustand gegen das positive bzw. negative
+Band (exklusive Grenzen), veraltete Samples werden nicht bewertet. Vergleichsbasis
+ist die Neubewertung jedes Laufs mit seinem eigenen ConfigSnapshot.
+
+Aufruf (im Paketverzeichnis):
+    python -m hardware.whatif archive/ --set supply_low=4.3
+    python -m hardware.whatif archive/ --sweep redlab_pos_low=1.5:2.5:0.1 --sweep hysteresis=0,0.02,0.05 --csv /tmp/whatif
+"""
+import argparse
+import csv
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config.config_manager import ConfigManager
+from config.constants import ConfigSchema
+from hardware.replay import snapshot_config
+from hardware.rules import STATUS_ABSENT, STATUS_ERROR, STATUS_OK, STATUS_SUPPLY
+from storage.archive_reader import (
+    MUX_FILE_PATTERN, RUN_FILE_PATTERN, find_runs, is_run_file, iter_rows, parse_row, read_run_rows, read_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Laufergebnis als Index in VERDICTS (schlechtester Befund zuerst geprüft)
+VERDICTS = (STATUS_OK, STATUS_ERROR, STATUS_SUPPLY, STATUS_ABSENT)
+VERDICT_OK, VERDICT_ERROR, VERDICT_SUPPLY, VERDICT_ABSENT = range(len(VERDICTS))
+
+# Skalare Parameter für --set/--sweep: Name -> (Feld, Index im Band oder None)
+PARAMETERS = {
+    "redlab_pos_low": ("redlab_pos", 0),
+    "redlab_pos_high": ("redlab_pos", 1),
+    "redlab_neg_low": ("redlab_neg", 0),
+    "redlab_neg_high": ("redlab_neg", 1),
+    "presence_low": ("presence", 0),
+    "presence_high": ("presence", 1),
+    "supply_low": ("supply", 0),
+    "supply_high": ("supply", 1),
+    "hysteresis": ("hysteresis", None),
+    "debounce": ("debounce", None),
+}
+
+# Obergrenze für Kandidaten x Samples pro Auswertungsblock (Speicherbedarf)
+BLOCK_ELEMENTS = 2_000_000
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    """Ein Schwellensatz der Statusbewertung (wie CompiledRules, aber als Werte)."""
+    redlab_pos: Tuple[float, float]
+    redlab_neg: Tuple[float, float]
+    presence: Tuple[float, float]
+    supply: Tuple[float, float]
+    hysteresis: float
+    debounce: int
+
+    @classmethod
+    def from_config(cls, config: ConfigSchema) -> "Thresholds":
+        return cls(
+            redlab_pos=tuple(config.redlab_pos_threshold),
+            redlab_neg=tuple(config.redlab_neg_threshold),
+            presence=tuple(config.presence_current_threshold),
+            supply=tuple(config.supply_voltage_threshold),
+            hysteresis=float(config.rules.get("hysteresis", 0.0)),
+            debounce=max(1, int(config.rules.get("debounce", 1))),
+        )
+
+    def with_value(self, name: str, value: float) -> "Thresholds":
+        """Kopie mit geändertem Parameter (Name aus PARAMETERS)."""
+        attr, index = PARAMETERS[name]
+        if index is None:
+            return replace(self, **{attr: max(1, int(value)) if attr == "debounce" else float(value)})
+        band = list(getattr(self, attr))
+        band[index] = float(value)
+        return replace(self, **{attr: tuple(band)})
+
+    def label(self) -> str:
+        return (
+            f"pos {self.redlab_pos[0]:g}..{self.redlab_pos[1]:g} neg {self.redlab_neg[0]:g}..{self.redlab_neg[1]:g} "
+            f"I {self.presence[0]:g}..{self.presence[1]:g} U {self.supply[0]:g}..{self.supply[1]:g} "
+            f"hyst {self.hysteresis:g} deb {self.debounce}"
+        )
+
+
+class ThresholdGrid:
+    """
+    Kandidaten-Schwellensätze als Spaltenarrays (ein Eintrag je Kandidat), damit
+    alle Kandidaten in einem Durchgang ausgewertet werden können.
+    """
+    def __init__(self, candidates: List[Thresholds]):
+        self.candidates = list(candidates)
+        self.pos = np.array([c.redlab_pos for c in candidates], dtype=float).reshape(-1, 2)
+        self.neg = np.array([c.redlab_neg for c in candidates], dtype=float).reshape(-1, 2)
+        self.presence = np.array([c.presence for c in candidates], dtype=float).reshape(-1, 2)
+        self.supply = np.array([c.supply for c in candidates], dtype=float).reshape(-1, 2)
+        self.hysteresis = np.array([c.hysteresis for c in candidates], dtype=float)
+        self.debounce = np.array([c.debounce for c in candidates], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def extended(self, candidate: Thresholds) -> "ThresholdGrid":
+        """Kopie mit einem zusätzlichen Kandidaten am Ende (z.B. ConfigSnapshot des Laufs)."""
+        return ThresholdGrid(self.candidates + [candidate])
+
+
+@dataclass
+class RunArrays:
+    """Messwerte einer Kanalsitzung als Arrays (nur nicht veraltete Samples)."""
+    path: str
+    run: str
+    serial_number: str
+    channel: int
+    snapshot: Thresholds
+    relay_on: np.ndarray
+    redlab_signal: np.ndarray
+    current: np.ndarray
+    bus_voltage: np.ndarray
+    signal_ok: np.ndarray       # archivierte Bewertung
+    stale: int = 0              # Anzahl ausgelassener veralteter Samples
+
+
+def _arrays(path: str, run: str, serial_number: str, snapshot: Dict, rows: List[List[str]]) -> RunArrays:
+    """
+    Wandelt die Datenzeilen einer Kanalsitzung spaltenweise in Arrays. Ungültige Zeilen
+    werden übersprungen, veraltete Samples (Spalte Stale) ausgelassen, da die
+    RuleEngine sie nicht bewertet.
+    """
+    try:
+        # Spaltenweise; ältere Archive haben keine Stale-Spalte
+        columns = list(zip(*rows)) if rows else [()] * 8
+        relay_on = np.array(columns[1]) == "ON"
+        redlab_signal = np.array(columns[2], dtype=float)
+        current = np.array(columns[3], dtype=float)
+        bus_voltage = np.array(columns[4], dtype=float)
+        signal_ok = np.array(columns[5]) == "OK"
+        channels = columns[7]
+        stale = np.array(columns[10]) == "STALE" if len(columns) > 10 else np.zeros(len(rows), dtype=bool)
+    except (ValueError, IndexError):
+        # Langsamer Pfad: zeilenweise parsen und ungültige Zeilen verwerfen
+        samples = []
+        for row in rows:
+            try:
+                samples.append(parse_row(row))
+            except (ValueError, IndexError):
+                logger.warning("Ungültige Archivzeile in %s: %s", os.path.basename(path), row)
+        relay_on = np.array([s.relay_on for s in samples], dtype=bool)
+        redlab_signal = np.array([s.redlab_signal for s in samples], dtype=float)
+        current = np.array([s.current for s in samples], dtype=float)
+        bus_voltage = np.array([s.bus_voltage for s in samples], dtype=float)
+        signal_ok = np.array([s.signal_ok for s in samples], dtype=bool)
+        channels = [str(s.channel + 1) for s in samples]
+        stale = np.array([s.stale for s in samples], dtype=bool)
+    fresh = ~stale
+    return RunArrays(
+        path=path,
+        run=run,
+        serial_number=serial_number,
+        channel=int(channels[0]) - 1 if len(channels) else -1,
+        snapshot=Thresholds.from_config(snapshot_config(snapshot)),
+        relay_on=relay_on[fresh],
+        redlab_signal=redlab_signal[fresh],
+        current=current[fresh],
+        bus_voltage=bus_voltage[fresh],
+        signal_ok=signal_ok[fresh],
+        stale=int(stale.sum()),
+    )
+
+
+def load_runs(path: str) -> List[RunArrays]:
+    """
+    Lädt die Kanalsitzungen einer Laufdatei bzw. die eine Sitzung einer Kanal-Datei
+    älterer Versionen. Sitzungen, die über einen Dateiwechsel laufen, werden je Datei
+    als eigenes Teilstück ausgewertet.
+    """
+    name = os.path.basename(path)
+    if is_run_file(path):
+        run = MUX_FILE_PATTERN.match(name).group(1)
+        return [
+            _arrays(path, run, session.serial_number, session.config_snapshot, rows)
+            for session, rows in read_run_rows(path)
+        ]
+    match = RUN_FILE_PATTERN.match(name)
+    return [_arrays(
+        path,
+        match.group(1) if match else "",
+        match.group(2) if match else "",
+        read_snapshot(path),
+        list(iter_rows(path)),
+    )]
+
+
+def _run_position(mask: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """Position innerhalb der laufenden True-Serie je Zeile (0 außerhalb einer Serie)."""
+    last_false = np.maximum.accumulate(np.where(mask, -1, idx), axis=1)
+    return np.where(mask, idx - last_false, 0)
+
+
+def debounced_band(value: np.ndarray, low: np.ndarray, high: np.ndarray, hysteresis: np.ndarray, debounce: np.ndarray, strict: bool) -> np.ndarray:
+    """
+    Entprellte Bandprüfung mit Hysterese für alle Kandidaten auf einmal, Ergebnis
+    wie _Debounced.feed(compile_band(...)(value, state), debounce) Sample für Sample.
+
+    Der entprellte Zustand wechselt nur an zwei Ereignissen: auf gültig nach
+    `debounce` Samples in Folge im Band, auf ungültig nach `debounce` Samples in
+    Folge außerhalb des erweiterten Bands. Der Zustand eines Samples ist damit das
+    letzte Ereignis davor (oder die Prüfung des ersten Samples), was sich mit
+    kumulativen Maxima ohne Schleife über die Zeit berechnen lässt.
+
+    Args:
+        value: Messwerte (T,).
+        low, high: Bandgrenzen (K, 1) oder (K, T).
+        hysteresis, debounce: je Kandidat (K,).
+        strict: Exklusive Grenzen.
+
+    Returns:
+        Bool-Array (K, T) mit dem entprellten Zustand.
+    """
+    margin = (high - low) * hysteresis[:, None]
+    outer_low, outer_high = low - margin, high + margin
+    if strict:
+        inner = (low < value) & (value < high)
+        outer = (outer_low < value) & (value < outer_high)
+    else:
+        inner = (low <= value) & (value <= high)
+        outer = (outer_low <= value) & (value <= outer_high)
+    inner = np.broadcast_to(inner, (len(debounce), value.shape[-1]))
+    outer = np.broadcast_to(outer, inner.shape)
+    idx = np.arange(value.shape[-1], dtype=np.int32)
+    n = debounce[:, None]
+    rise = _run_position(inner, idx) >= n
+    fall = _run_position(~outer, idx) >= n
+    last_event = np.maximum.accumulate(np.where(rise | fall, idx, -1), axis=1)
+    state = np.take_along_axis(rise, np.maximum(last_event, 0), axis=1)
+    return np.where(last_event >= 0, state, inner[:, :1])
+
+
+def _band_counts(value: np.ndarray, params: np.ndarray, relay_on: Optional[np.ndarray], strict: bool) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Wertet ein Band für alle Kandidaten aus, jede unterschiedliche Parameterzeile
+    aber nur einmal (ein Sweep über die Signalschwellen wiederholt z.B. Präsenz und
+    Versorgung unverändert).
+
+    Args:
+        value: Messwerte (T,).
+        params: (K, 4) low, high, hysteresis, debounce – oder (K, 6) mit
+                pos_low, pos_high, neg_low, neg_high, hysteresis, debounce, wenn
+                das Band vom Relaiszustand `relay_on` abhängt.
+
+    Returns:
+        Anzahl gültiger Samples (K,), ob je ein Sample gültig war (K,), Zustand des
+        letzten Kandidaten je Sample (T,) und die Anzahl ausgewerteter Zeilen.
+    """
+    unique, inverse = np.unique(params, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    t = len(value)
+    ok_count = np.zeros(len(unique), dtype=np.int64)
+    any_ok = np.zeros(len(unique), dtype=bool)
+    last_state = np.zeros(t, dtype=bool)
+    block = max(1, BLOCK_ELEMENTS // max(1, t))
+    for start in range(0, len(unique), block):
+        rows = unique[start:start + block]
+        if relay_on is None:
+            low, high = rows[:, 0:1], rows[:, 1:2]
+        else:
+            low = np.where(relay_on, rows[:, 0:1], rows[:, 2:3])
+            high = np.where(relay_on, rows[:, 1:2], rows[:, 3:4])
+        state = debounced_band(value, low, high, rows[:, -2], rows[:, -1].astype(np.int32), strict)
+        ok_count[start:start + len(rows)] = state.sum(axis=1)
+        any_ok[start:start + len(rows)] = state.any(axis=1)
+        last = inverse[-1] - start
+        if 0 <= last < len(rows):
+            last_state = state[last]
+    return ok_count[inverse], any_ok[inverse], last_state, len(unique)
+
+
+@dataclass
+class Evaluation:
+    """Neubewertung eines Laufs je Kandidat."""
+    verdict: np.ndarray          # Index in VERDICTS (K,)
+    signal_errors: np.ndarray    # (K,)
+    supply_errors: np.ndarray    # (K,)
+    signal_ok: np.ndarray        # Bewertung des letzten Kandidaten je Sample (T,)
+
+
+def evaluate(arrays: RunArrays, grid: ThresholdGrid) -> Evaluation:
+    """
+    Bewertet einen Lauf mit allen Kandidaten. Fehlerzähler zählen wie die RuleEngine
+    jedes bewertete Sample mit ungültigem Signal bzw. ungültiger Versorgung; das
+    Laufergebnis ist "absent", wenn der Sensor nie erkannt wurde, sonst
+    "supply_error" bzw. "error" bei mindestens einem Fehler, andernfalls "ok".
+    """
+    t = len(arrays.redlab_signal)
+    common = np.column_stack([grid.hysteresis, grid.debounce])
+    signal_ok, _, last_signal, _ = _band_counts(arrays.redlab_signal, np.hstack([grid.pos, grid.neg, common]), arrays.relay_on, strict=True)
+    _, present, _, _ = _band_counts(arrays.current, np.hstack([grid.presence, common]), None, strict=False)
+    supply_ok, _, _, _ = _band_counts(arrays.bus_voltage, np.hstack([grid.supply, common]), None, strict=False)
+    signal_errors = t - signal_ok
+    supply_errors = t - supply_ok
+    verdict = np.select(
+        [~present, supply_errors > 0, signal_errors > 0],
+        [VERDICT_ABSENT, VERDICT_SUPPLY, VERDICT_ERROR],
+        VERDICT_OK
+    ).astype(np.int8)
+    return Evaluation(verdict, signal_errors, supply_errors, last_signal)
+
+
+@dataclass
+class FileResult:
+    """Ergebnis einer Kanalsitzung: Vergleichsbasis (ConfigSnapshot) und alle Kandidaten."""
+    path: str
+    run: str
+    serial_number: str
+    channel: int
+    samples: int
+    stale: int
+    baseline_verdict: int
+    baseline_signal_errors: int
+    baseline_supply_errors: int
+    archive_mismatches: int      # Samples, deren Neubewertung mit dem Snapshot vom Archiv abweicht
+    verdict: np.ndarray
+    signal_errors: np.ndarray
+    supply_errors: np.ndarray
+
+
+def evaluate_file(path: str, grid: ThresholdGrid) -> List[FileResult]:
+    """Lädt eine Archivdatei und wertet jede Kanalsitzung mit allen Kandidaten und ihrem Snapshot aus."""
+    return [_evaluate_arrays(arrays, grid) for arrays in load_runs(path)]
+
+
+def _evaluate_arrays(arrays: RunArrays, grid: ThresholdGrid) -> FileResult:
+    result = evaluate(arrays, grid.extended(arrays.snapshot))
+    return FileResult(
+        path=arrays.path,
+        run=arrays.run,
+        serial_number=arrays.serial_number,
+        channel=arrays.channel,
+        samples=len(arrays.redlab_signal),
+        stale=arrays.stale,
+        baseline_verdict=int(result.verdict[-1]),
+        baseline_signal_errors=int(result.signal_errors[-1]),
+        baseline_supply_errors=int(result.supply_errors[-1]),
+        archive_mismatches=int((result.signal_ok != arrays.signal_ok).sum()),
+        verdict=result.verdict[:-1],
+        signal_errors=result.signal_errors[:-1],
+        supply_errors=result.supply_errors[:-1],
+    )
+
+
+@dataclass
+class CandidateSummary:
+    """Auswirkung eines Kandidaten über alle Läufe."""
+    index: int
+    thresholds: Thresholds
+    runs: int = 0
+    changed: int = 0             # Läufe mit anderem Ergebnis als die Vergleichsbasis
+    new_failures: int = 0        # bisher ok, jetzt nicht ok
+    new_passes: int = 0          # bisher nicht ok, jetzt ok
+    signal_delta: int = 0
+    supply_delta: int = 0
+    serial_numbers: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+
+class WhatIfAnalysis:
+    """
+    Wertet alle Kanalsitzungen eines Archivs mit einem Satz Kandidaten-Schwellen aus.
+
+    Args:
+        candidates: Kandidaten-Schwellensätze.
+        jobs: Anzahl Prozesse (1 = im aufrufenden Prozess).
+    """
+    def __init__(self, candidates: List[Thresholds], jobs: int = 1):
+        self.grid = ThresholdGrid(candidates)
+        self.jobs = max(1, jobs)
+
+    def run(self, paths: Iterable[str]) -> List[FileResult]:
+        paths = list(paths)
+        if self.jobs == 1 or len(paths) < 2:
+            return [r for path in paths for r in evaluate_file(path, self.grid)]
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            chunksize = max(1, len(paths) // (self.jobs * 4))
+            results = executor.map(evaluate_file, paths, itertools.repeat(self.grid), chunksize=chunksize)
+            return [r for file_results in results for r in file_results]
+
+    def summarize(self, results: List[FileResult]) -> List[CandidateSummary]:
+        summaries = [CandidateSummary(index=i, thresholds=c) for i, c in enumerate(self.grid.candidates)]
+        if not results:
+            return summaries
+        baseline = np.array([r.baseline_verdict for r in results])
+        verdicts = np.stack([r.verdict for r in results])                       # (Läufe, K)
+        signal_delta = np.stack([r.signal_errors for r in results]) - np.array([r.baseline_signal_errors for r in results])[:, None]
+        supply_delta = np.stack([r.supply_errors for r in results]) - np.array([r.baseline_supply_errors for r in results])[:, None]
+        changed = verdicts != baseline[:, None]
+        was_ok = (baseline == VERDICT_OK)[:, None]
+        now_ok = verdicts == VERDICT_OK
+        for summary in summaries:
+            i = summary.index
+            summary.runs = len(results)
+            summary.changed = int(changed[:, i].sum())
+            summary.new_failures = int((was_ok[:, 0] & ~now_ok[:, i]).sum())
+            summary.new_passes = int((~was_ok[:, 0] & now_ok[:, i]).sum())
+            summary.signal_delta = int(signal_delta[:, i].sum())
+            summary.supply_delta = int(supply_delta[:, i].sum())
+            for row, result in enumerate(results):
+                if not changed[row, i] and not signal_delta[row, i] and not supply_delta[row, i]:
+                    continue
+                sn = summary.serial_numbers.setdefault(result.serial_number, {"runs": 0, "changed": 0, "signal_delta": 0, "supply_delta": 0})
+                sn["runs"] += 1
+                sn["changed"] += int(changed[row, i])
+                sn["signal_delta"] += int(signal_delta[row, i])
+                sn["supply_delta"] += int(supply_delta[row, i])
+        return summaries
+
+
+def write_csv(prefix: str, results: List[FileResult], summaries: List[CandidateSummary]) -> List[str]:
+    """
+    Schreibt `<prefix>_runs.csv` (Lauf x Kandidat) und `<prefix>_sn.csv`
+    (Seriennummer x Kandidat, nur betroffene Seriennummern).
+
+    Returns:
+        Pfade der geschriebenen Dateien.
+    """
+    runs_path, sn_path = f"{prefix}_runs.csv", f"{prefix}_sn.csv"
+    with open(runs_path, "w", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Kandidat", "Lauf", "SN", "Kanal", "Samples", "Basis", "Neu", "SignalErrors Basis", "SignalErrors Neu", "SupplyErrors Basis", "SupplyErrors Neu"])
+        for r in results:
+            for i in range(len(r.verdict)):
+                writer.writerow([
+                    i, r.run, r.serial_number, r.channel + 1, r.samples,
+                    VERDICTS[r.baseline_verdict], VERDICTS[r.verdict[i]],
+                    r.baseline_signal_errors, int(r.signal_errors[i]),
+                    r.baseline_supply_errors, int(r.supply_errors[i]),
+                ])
+    with open(sn_path, "w", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Kandidat", "Schwellen", "SN", "Läufe", "Geändert", "Δ SignalErrors", "Δ SupplyErrors"])
+        for summary in summaries:
+            for sn, values in sorted(summary.serial_numbers.items()):
+                writer.writerow([summary.index, summary.thresholds.label(), sn, values["runs"], values["changed"], values["signal_delta"], values["supply_delta"]])
+    return [runs_path, sn_path]
+
+
+def _parse_values(spec: str) -> List[float]:
+    """'a,b,c' oder 'start:stop:step' (stop inklusive)."""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 10) for i in range(max(0, count))]
+    return [float(x) for x in spec.split(",") if x.strip()]
+
+
+def build_candidates(base: Thresholds, settings: List[str], sweeps: List[str]) -> List[Thresholds]:
+    """
+    Kandidaten aus einem Basissatz: `settings` ('name=wert') werden gesetzt, `sweeps`
+    ('name=werte') spannen das kartesische Produkt auf.
+    """
+    for setting in settings:
+        name, value = setting.split("=", 1)
+        base = base.with_value(name.strip(), float(value))
+    axes: List[Tuple[str, List[float]]] = []
+    for sweep in sweeps:
+        name, spec = sweep.split("=", 1)
+        if name.strip() not in PARAMETERS:
+            raise ValueError(f"Unbekannter Parameter: {name} (erlaubt: {', '.join(PARAMETERS)})")
+        axes.append((name.strip(), _parse_values(spec)))
+    candidates = []
+    for values in itertools.product(*(v for _, v in axes)):
+        candidate = base
+        for (name, _), value in zip(axes, values):
+            candidate = candidate.with_value(name, value)
+        candidates.append(candidate)
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivierte Läufe mit neuen Schwellen neu bewerten")
+    parser.add_argument("path", help="Archivverzeichnis, SN-Ordner oder einzelne Kanal-CSV")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=WERT", help=f"Parameter setzen ({', '.join(PARAMETERS)})")
+    parser.add_argument("--sweep", action="append", default=[], metavar="NAME=WERTE", help="Werte 'a,b,c' oder 'start:stop:step'; mehrere Sweeps ergeben das Produkt")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Anzahl paralleler Prozesse")
+    parser.add_argument("--top", type=int, default=20, help="Nur die N Kandidaten mit den meisten geänderten Ergebnissen ausgeben")
+    parser.add_argument("--by-sn", action="store_true", help="Betroffene Seriennummern je ausgegebenem Kandidaten auflisten")
+    parser.add_argument("--csv", metavar="PREFIX", help="Ergebnisse als <PREFIX>_runs.csv und <PREFIX>_sn.csv schreiben")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    base = Thresholds.from_config(ConfigManager().config)
+    try:
+        candidates = build_candidates(base, args.set, args.sweep)
+    except (KeyError, ValueError) as e:
+        parser.error(str(e))
+    paths = [path for files in find_runs(args.path).values() for path in files]
+    analysis = WhatIfAnalysis(candidates, jobs=args.jobs)
+    start = time.perf_counter()
+    results = analysis.run(paths)
+    summaries = analysis.summarize(results)
+    elapsed = time.perf_counter() - start
+
+    samples = sum(r.samples for r in results)
+    mismatches = sum(r.archive_mismatches for r in results)
+    print(
+        f"{len(results)} Läufe, {samples} Samples, {len(candidates)} Kandidaten in {elapsed:.2f} s "
+        f"({samples * len(candidates) / elapsed if elapsed > 0 else 0:.0f} Bewertungen/s)"
+    )
+    if mismatches:
+        print(f"Hinweis: {mismatches} Samples weichen schon mit dem ConfigSnapshot von der archivierten Bewertung ab")
+    print(f"{'#':>5}  {'Geändert':>8}{'neu Fehler':>11}{'neu OK':>8}{'Δ Signal':>10}{'Δ Supply':>10}  Schwellen")
+    for summary in sorted(summaries, key=lambda s: (-s.changed, -abs(s.signal_delta) - abs(s.supply_delta), s.index))[:args.top]:
+        print(
+            f"{summary.index:>5}  {summary.changed:>8}{summary.new_failures:>11}{summary.new_passes:>8}"
+            f"{summary.signal_delta:>10}{summary.supply_delta:>10}  {summary.thresholds.label()}"
+        )
+        if args.by_sn:
+            for sn, values in sorted(summary.serial_numbers.items()):
+                print(f"{'':>7}{sn or '-':<20} {values['changed']}/{values['runs']} Läufe geändert, Δ Signal {values['signal_delta']}, Δ Supply {values['supply_delta']}")
+    if args.csv:
+        for path in write_csv(args.csv, results, summaries):
+            print(f"Geschrieben: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Referenz-Collector: nimmt die Batches der Uploader (remote.uploader) mehrerer
+Prüfstände gleichzeitig entgegen und führt sie in einem gemeinsamen, abfragbaren
+Bestand zusammen (SQLite-Datenbank plus Rohdateien je Prüfstand).
+
+Upload-Protokoll (wiederaufnehmbar, angelehnt an tus):
+    HEAD  /upload/<bench>/<batch>   Upload-Offset: bereits empfangene Byte
+                                    (Upload-Complete: 1, wenn schon übernommen)
+    PATCH /upload/<bench>/<batch>   Chunk ab Upload-Offset; Upload-Length und
+                                    Upload-Digest (sha256=<hex>) des ganzen Batches.
+                                    204 = Chunk angenommen, 201 = Batch vollständig
+                                    und übernommen, 409 = falscher Offset,
+                                    422 = Batch beschädigt (endgültig),
+                                    503 = Datenbank vorübergehend nicht verfügbar
+
+Abfragen (JSON):
+    GET /benches                              Prüfstände mit Anzahl Batches/Sitzungen
+    GET /sessions?bench=&serial=              Sitzungen inkl. Zusammenfassung
+    GET /samples?bench=&serial=&start=&end=&limit=
+    GET /live?bench=                          Letzte Live-Zusammenfassung je Kanal
+
+Aufruf (im Paketverzeichnis):
+    python -m remote.collector --store ./collector --port 8780
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import tarfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from storage.archive_reader import is_run_file, read_channel_file, read_run_file
+
+logger = logging.getLogger(__name__)
+
+HEADER_OFFSET = "Upload-Offset"
+HEADER_LENGTH = "Upload-Length"
+HEADER_DIGEST = "Upload-Digest"
+HEADER_COMPLETE = "Upload-Complete"
+
+# Wartezeit (s), die bei vorübergehenden Speicherfehlern (503) empfohlen wird
+RETRY_AFTER = 5
+
+# Aufbau eines Batches (tar.gz)
+MANIFEST_NAME = "manifest.json"
+LIVE_NAME = "live.jsonl"
+FILES_DIR = "files"
+
+_NAME = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    bench TEXT, batch TEXT, size INTEGER, sha256 TEXT, received TEXT, files INTEGER, summaries INTEGER,
+    PRIMARY KEY (bench, batch)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    bench TEXT, file TEXT, serial_number TEXT, channel INTEGER, start TEXT, end TEXT,
+    samples INTEGER, summary TEXT,
+    PRIMARY KEY (bench, file)
+);
+CREATE TABLE IF NOT EXISTS samples (
+    bench TEXT, file TEXT, serial_number TEXT, channel INTEGER, timestamp TEXT, relay_on INTEGER,
+    redlab_signal REAL, current REAL, bus_voltage REAL, signal_ok INTEGER,
+    supply_errors INTEGER, signal_errors INTEGER, stale INTEGER
+);
+CREATE INDEX IF NOT EXISTS samples_sn ON samples (serial_number, timestamp);
+CREATE INDEX IF NOT EXISTS samples_file ON samples (bench, file);
+CREATE TABLE IF NOT EXISTS live (
+    bench TEXT, channel INTEGER, time TEXT, summary TEXT,
+    PRIMARY KEY (bench, channel)
+);
+"""
+
+
+class CollectorStore:
+    """
+    Gemeinsamer Bestand aller Prüfstände: SQLite (WAL) für Sitzungen, Samples und
+    Live-Zusammenfassungen, Rohdateien unter `<root>/benches/<bench>/`.
+    Schreibzugriffe sind über einen Lock serialisiert.
+    """
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "benches"), exist_ok=True)
+        os.makedirs(os.path.join(root, "incoming"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "collector.db"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def has_batch(self, bench: str, batch: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM batches WHERE bench=? AND batch=?", (bench, batch)).fetchone() is not None
+
+    # -------------------------------------------------------------- Übernahme
+
+    def ingest(self, bench: str, batch: str, path: str, size: int, digest: str) -> Dict[str, int]:
+        """
+        Entpackt einen vollständigen Batch und übernimmt Dateien, Samples und
+        Live-Zusammenfassungen.
+
+        Returns:
+            Dict mit Anzahl übernommener Dateien, Samples und Zusammenfassungen.
+
+        Raises:
+            ValueError: Batch beschädigt oder unzulässige Pfade im Archiv.
+        """
+        target = os.path.join(self.root, "benches", bench)
+        manifest: Dict[str, Any] = {}
+        live_lines: List[bytes] = []
+        files: List[str] = []
+        with tarfile.open(path, mode="r:gz") as tar:
+            for member in tar:
+                name = member.name
+                if not member.isfile() or name.startswith("/") or ".." in name.split("/"):
+                    raise ValueError(f"Unzulässiger Eintrag im Batch: {name!r}")
+                data = tar.extractfile(member).read()
+                if name == MANIFEST_NAME:
+                    manifest = json.loads(data)
+                elif name == LIVE_NAME:
+                    live_lines = data.splitlines()
+                elif name.startswith(FILES_DIR + "/"):
+                    rel = name[len(FILES_DIR) + 1:]
+                    dest = os.path.join(target, *rel.split("/"))
+                    os.makedirs(os.path.dirname(dest), exist_ok=True)
+                    with open(dest, "wb") as f:
+                        f.write(data)
+                    files.append(rel)
+        if manifest.get("batch") != batch:
+            raise ValueError("Manifest fehlt oder gehört zu einem anderen Batch")
+
+        samples = 0
+        with self._lock, self._db:
+            for rel in files:
+                samples += self._ingest_file(bench, rel, os.path.join(target, *rel.split("/")))
+            for line in live_lines:
+                entry = json.loads(line)
+                for ch, summary in entry.get("channels", {}).items():
+                    self._db.execute(
+                        "INSERT INTO live VALUES (?, ?, ?, ?) ON CONFLICT (bench, channel) DO UPDATE SET time=excluded.time, summary=excluded.summary WHERE excluded.time >= live.time",
+                        (bench, int(ch), entry["time"], json.dumps(summary))
+                    )
+            self._db.execute(
+                "INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bench, batch, size, digest, datetime.now().isoformat(), len(files), len(live_lines))
+            )
+        logger.info("Batch %s/%s übernommen: %d Dateien, %d Samples, %d Zusammenfassungen", bench, batch, len(files), samples, len(live_lines))
+        return {"files": len(files), "samples": samples, "summaries": len(live_lines)}
+
+    def _ingest_file(self, bench: str, rel: str, path: str) -> int:
+        name = os.path.basename(rel)
+        if name.endswith("_summary.json"):
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)
+            key = rel[:-len("_summary.json")] + ".csv"
+            self._db.execute(
+                "INSERT INTO sessions (bench, file, serial_number, start, end, summary) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (bench, file) DO UPDATE SET start=excluded.start, end=excluded.end, summary=excluded.summary",
+                (bench, key, summary.get("serial_number", ""), summary.get("start"), summary.get("end"), json.dumps(summary))
+            )
+            return 0
+        if not name.endswith(".csv") or name.endswith("_response.csv"):
+            return 0
+        if is_run_file(name):
+            return self._ingest_run_file(bench, rel, path)
+        channel = read_channel_file(path)
+        # Wiederholte Übernahme derselben Datei ersetzt deren Samples
+        self._db.execute("DELETE FROM samples WHERE bench=? AND file=?", (bench, rel))
+        rows = [
+            (bench, rel, s.serial_number or channel.serial_number, s.channel, s.timestamp.isoformat(), int(s.relay_on),
+             s.redlab_signal, s.current, s.bus_voltage, int(s.signal_ok), s.supply_error_counter, s.signal_error_counter, int(s.stale))
+            for s in channel.samples
+        ]
+        self._db.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        first = channel.samples[0].timestamp.isoformat() if channel.samples else None
+        last = channel.samples[-1].timestamp.isoformat() if channel.samples else None
+        self._db.execute(
+            "INSERT INTO sessions (bench, file, serial_number, channel, start, end, samples) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (bench, file) DO UPDATE SET channel=excluded.channel, samples=excluded.samples, "
+            "start=COALESCE(sessions.start, excluded.start), end=COALESCE(sessions.end, excluded.end)",
+            (bench, rel, channel.serial_number, channel.channel, first, last, len(rows))
+        )
+        return len(rows)
+
+    def _ingest_run_file(self, bench: str, rel: str, path: str) -> int:
+        """Laufdatei: Samples unter dem Dateinamen, je Kanalsitzung ein Eintrag `<datei>#<Kanal>@<Start>`."""
+        self._db.execute("DELETE FROM samples WHERE bench=? AND file=?", (bench, rel))
+        total = 0
+        for channel in read_run_file(path):
+            rows = [
+                (bench, rel, s.serial_number or channel.serial_number, s.channel, s.timestamp.isoformat(), int(s.relay_on),
+                 s.redlab_signal, s.current, s.bus_voltage, int(s.signal_ok), s.supply_error_counter, s.signal_error_counter, int(s.stale))
+                for s in channel.samples
+            ]
+            self._db.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            total += len(rows)
+            start = channel.start.isoformat() if channel.start else None
+            if channel.end:
+                end = channel.end.isoformat()
+            else:
+                end = channel.samples[-1].timestamp.isoformat() if channel.samples else None
+            self._db.execute(
+                "INSERT INTO sessions (bench, file, serial_number, channel, start, end, samples, summary) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (bench, file) DO UPDATE SET end=excluded.end, samples=excluded.samples, "
+                "summary=COALESCE(excluded.summary, sessions.summary)",
+                (bench, f"{rel}#{channel.channel + 1}@{start}", channel.serial_number, channel.channel, start, end, len(rows),
+                 json.dumps(channel.summary) if channel.summary else None)
+            )
+        return total
+
+    # --------------------------------------------------------------- Abfragen
+
+    def _query(self, sql: str, args: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, args)]
+
+    def benches(self) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT b.bench, COUNT(*) AS batches, MAX(b.received) AS last_upload, "
+            "(SELECT COUNT(*) FROM sessions s WHERE s.bench=b.bench) AS sessions FROM batches b GROUP BY b.bench", ()
+        )
+
+    def sessions(self, bench: Optional[str] = None, serial: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT * FROM sessions WHERE (? IS NULL OR bench=?) AND (? IS NULL OR serial_number=?) ORDER BY start",
+            (bench, bench, serial, serial)
+        )
+        for row in rows:
+            row["summary"] = json.loads(row["summary"]) if row["summary"] else None
+        return rows
+
+    def samples(self, bench: Optional[str] = None, serial: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None, limit: int = 10000) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT * FROM samples WHERE (? IS NULL OR bench=?) AND (? IS NULL OR serial_number=?) "
+            "AND (? IS NULL OR timestamp>=?) AND (? IS NULL OR timestamp<=?) ORDER BY timestamp LIMIT ?",
+            (bench, bench, serial, serial, start, start, end, end, limit)
+        )
+
+    def live(self, bench: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM live WHERE (? IS NULL OR bench=?) ORDER BY bench, channel", (bench, bench))
+        for row in rows:
+            row["summary"] = json.loads(row["summary"])
+        return rows
+
+
+class Collector:
+    """
+    HTTP-Server des Collectors; jede Verbindung läuft in einem eigenen Thread, Uploads
+    verschiedener Prüfstände sind unabhängig (eigene Teildatei und eigener Lock).
+
+    Args:
+        store_dir: Verzeichnis des Bestands.
+        host: Bind-Adresse.
+        port: TCP-Port.
+        max_batch: Maximale Größe eines Batches in Byte.
+    """
+    def __init__(self, store_dir: str, host: str = "0.0.0.0", port: int = 8780, max_batch: int = 1_000_000_000):
+        self.store = CollectorStore(store_dir)
+        self.incoming = os.path.join(store_dir, "incoming")
+        self.max_batch = max_batch
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="Collector", daemon=True)
+        self._thread.start()
+        logger.info("Collector gestartet auf %s:%s", *self.address[:2])
+
+    def serve_forever(self) -> None:
+        logger.info("Collector gestartet auf %s:%s", *self.address[:2])
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self.store.close()
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _partial(self, bench: str, batch: str) -> str:
+        return os.path.join(self.incoming, f"{bench}__{batch}.part")
+
+    def receive(self, bench: str, batch: str, offset: int, length: int, digest: str, chunk: bytes) -> int:
+        """
+        Hängt einen Chunk an die Teildatei an und übernimmt den Batch, sobald er
+        vollständig ist.
+
+        Returns:
+            Neuer Offset (== length, wenn übernommen).
+
+        Raises:
+            OffsetMismatch: Offset passt nicht zum empfangenen Stand.
+            ValueError: Größe/Prüfsumme falsch oder Batch beschädigt.
+        """
+        if length > self.max_batch:
+            raise ValueError(f"Batch zu groß ({length} Byte)")
+        with self._lock(f"{bench}/{batch}"):
+            if self.store.has_batch(bench, batch):
+                return length
+            path = self._partial(bench, batch)
+            current = os.path.getsize(path) if os.path.exists(path) else 0
+            if offset != current:
+                raise OffsetMismatch(current)
+            if current + len(chunk) > length:
+                raise ValueError("Chunk über Upload-Length hinaus")
+            with open(path, "ab") as f:
+                f.write(chunk)
+            current += len(chunk)
+            if current < length:
+                return current
+            try:
+                sha256 = hashlib.sha256()
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        sha256.update(block)
+                if digest and digest != f"sha256={sha256.hexdigest()}":
+                    raise ValueError("Prüfsumme stimmt nicht")
+                self.store.ingest(bench, batch, path, length, sha256.hexdigest())
+            finally:
+                os.remove(path)
+            return current
+
+    def offset(self, bench: str, batch: str) -> Optional[int]:
+        path = self._partial(bench, batch)
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    def _make_handler(self):
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug("Collector %s: " + format, self.address_string(), *args)
+
+            def _reply(self, status: int, headers: Optional[Dict[str, str]] = None, body: bytes = b"", content_type: str = "text/plain; charset=utf-8") -> None:
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _upload_target(self):
+                parts = [unquote(p) for p in urlsplit(self.path).path.strip("/").split("/")]
+                if len(parts) != 3 or parts[0] != "upload" or not _NAME.match(parts[1]) or not _NAME.match(parts[2]):
+                    return None
+                return parts[1], parts[2]
+
+            def do_HEAD(self):
+                target = self._upload_target()
+                if target is None:
+                    self._reply(404)
+                    return
+                try:
+                    complete = collector.store.has_batch(*target)
+                except sqlite3.Error as e:
+                    logger.warning("Batch %s/%s: Datenbank nicht verfügbar: %s", *target, e)
+                    self._reply(503, {"Retry-After": str(RETRY_AFTER)})
+                    return
+                if complete:
+                    self._reply(200, {HEADER_COMPLETE: "1"})
+                else:
+                    offset = collector.offset(*target)
+                    self._reply(404 if offset is None else 200, {HEADER_OFFSET: str(offset or 0)})
+
+            def do_PATCH(self):
+                target = self._upload_target()
+                try:
+                    size = int(self.headers.get("Content-Length", "0"))
+                    offset = int(self.headers[HEADER_OFFSET])
+                    length = int(self.headers[HEADER_LENGTH])
+                except (KeyError, TypeError, ValueError):
+                    self.close_connection = True
+                    self._reply(400, body=b"Upload-Offset/Upload-Length fehlen")
+                    return
+                chunk = self.rfile.read(size)
+                if target is None:
+                    self._reply(404)
+                    return
+                try:
+                    current = collector.receive(*target, offset, length, self.headers.get(HEADER_DIGEST, ""), chunk)
+                except OffsetMismatch as e:
+                    self._reply(409, {HEADER_OFFSET: str(e.current)})
+                    return
+                except (ValueError, tarfile.TarError) as e:
+                    logger.error("Batch %s/%s abgelehnt: %s", *target, e)
+                    self._reply(422, body=str(e).encode("utf-8"))
+                    return
+                except sqlite3.Error as e:
+                    # Vorübergehend (z.B. "database is locked"): Uploader behält den Batch und sendet erneut
+                    logger.warning("Batch %s/%s nicht übernommen, Datenbank nicht verfügbar: %s", *target, e)
+                    self._reply(503, {"Retry-After": str(RETRY_AFTER)}, body=str(e).encode("utf-8"))
+                    return
+                self._reply(201 if current >= length else 204, {HEADER_OFFSET: str(current)})
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                store = collector.store
+                if url.path == "/benches":
+                    result = store.benches()
+                elif url.path == "/sessions":
+                    result = store.sessions(query.get("bench"), query.get("serial"))
+                elif url.path == "/samples":
+                    result = store.samples(query.get("bench"), query.get("serial"), query.get("start"), query.get("end"), int(query.get("limit", 10000)))
+                elif url.path == "/live":
+                    result = store.live(query.get("bench"))
+                else:
+                    self._reply(404)
+                    return
+                self._reply(200, body=json.dumps(result).encode("utf-8"), content_type="application/json")
+
+        return Handler
+
+
+class OffsetMismatch(Exception):
+    """Chunk-Offset passt nicht zum bereits empfangenen Stand."""
+    def __init__(self, current: int):
+        super().__init__(f"Erwarteter Offset {current}")
+        self.current = current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zentraler Collector für Prüfstands-Uploads")
+    parser.add_argument("--store", default="./collector", help="Verzeichnis für Datenbank und Rohdateien")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8780)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    collector = Collector(args.store, args.host, args.port)
+    try:
+        collector.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+
+
+if __name__ == "__main__":
+    main()
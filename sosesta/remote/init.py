@@ -0,0 +1,8 @@
+"""
+Remote-Modul: Fernüberwachung des Prüfstands im LAN und Upload an einen zentralen Collector.
+"""
+from .live_server import LiveServer
+from .collector import Collector, CollectorStore
+from .uploader import ArchiveUploader
+
+__all__ = ["LiveServer", "Collector", "CollectorStore", "ArchiveUploader"]
\ No newline at end of file
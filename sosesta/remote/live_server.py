@@ -0,0 +1,257 @@
+"""
+Live-Server: stellt den aktuellen Prüfstandszustand per HTTP und Server-Sent Events
+(SSE) im LAN bereit, z.B. für den Leitstand-PC.
+
+Endpunkte:
+    GET /         Minimale Übersichtsseite (EventSource im Browser)
+    GET /state    Aktueller Zustand aller Kanäle als JSON
+    GET /events   SSE-Stream: zuerst `snapshot`, danach pro Erfassungszyklus `delta`
+                  (nur geänderte Felder) und `status` (nur geänderte Kanalstatus)
+"""
+import html
+import json
+import logging
+import queue
+import socket
+import threading
+from dataclasses import fields
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set
+
+from hardware.sensors import SensorData
+
+logger = logging.getLogger(__name__)
+
+# Übertragene SensorData-Felder (Reihenfolge wie in der Dataclass)
+FIELDS: List[str] = [f.name for f in fields(SensorData)]
+FLOAT_DIGITS = 4
+
+INDEX_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Prüfstand %(bench)s</title>
+<style>body{font-family:sans-serif}td,th{padding:4px 10px;border-bottom:1px solid #ccc}</style></head>
+<body><h2>Prüfstand %(bench)s</h2><table id="t"></table><p id="s">verbinde…</p>
+<script>
+const state = {};
+const cols = ["channel", "serial_number", "status", "relay_on", "redlab_signal", "current", "bus_voltage", "signal_error_counter", "supply_error_counter", "stale"];
+const esc = v => String(v).replace(/&/g, "&amp;").replace(/</g, "&lt;");
+function render() {
+  let html = "<tr>" + cols.map(c => "<th>" + c + "</th>").join("") + "</tr>";
+  for (const ch of Object.keys(state).sort((a, b) => a - b)) {
+    html += "<tr>" + cols.map(c => "<td>" + esc(state[ch][c]) + "</td>").join("") + "</tr>";
+  }
+  document.getElementById("t").innerHTML = html;
+}
+const es = new EventSource("/events");
+es.addEventListener("snapshot", e => { Object.assign(state, JSON.parse(e.data).channels); render(); });
+es.addEventListener("delta", e => {
+  const d = JSON.parse(e.data);
+  for (const ch in d.channels) Object.assign(state[ch] = state[ch] || {}, d.channels[ch]);
+  document.getElementById("s").textContent = "Zyklus " + d.seq;
+  render();
+});
+es.onerror = () => { document.getElementById("s").textContent = "Verbindung unterbrochen"; };
+</script></body></html>
+"""
+
+
+def _encode_event(event: str, payload: Dict[str, Any], seq: int) -> bytes:
+    data = json.dumps(payload, separators=(",", ":"))
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+def _values(sensor: SensorData) -> Dict[str, Any]:
+    values = {}
+    for name in FIELDS:
+        value = getattr(sensor, name)
+        values[name] = round(value, FLOAT_DIGITS) if isinstance(value, float) else value
+    return values
+
+
+class _Client:
+    """Ein verbundener SSE-Client mit begrenzter Frame-Queue."""
+    __slots__ = ("address", "frames", "dropped")
+
+    def __init__(self, address: str, max_frames: int):
+        self.address = address
+        self.frames: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_frames)
+        self.dropped = False
+
+
+class LiveServer:
+    """
+    Eingebetteter HTTP/SSE-Server für die Fernüberwachung.
+
+    `publish` wird im Erfassungsthread aufgerufen: es bildet die Änderungen gegenüber
+    dem letzten Zyklus, kodiert sie genau einmal zu einem gemeinsamen SSE-Frame und
+    legt diesen per put_nowait in die Queue jedes Clients. Clients, deren Queue voll
+    ist (zu langsam), werden getrennt statt die Erfassung zu bremsen; das Senden
+    übernimmt der Handler-Thread des jeweiligen Clients.
+
+    Args:
+        host: Bind-Adresse ("127.0.0.1" nur lokal, "0.0.0.0" im LAN).
+        port: TCP-Port.
+        bench_name: Name des Prüfstands in Frames und Übersichtsseite.
+        client_queue: Maximale Anzahl gepufferter Frames pro Client.
+        keepalive: Sekunden ohne Frame, nach denen ein SSE-Kommentar gesendet wird.
+    """
+    def __init__(self, host: str = "0.0.0.0", port: int = 8765, bench_name: str = "", client_queue: int = 32, keepalive: float = 15.0):
+        self.bench_name = bench_name or socket.gethostname()
+        self.client_queue = client_queue
+        self.keepalive = keepalive
+        self._clients: Set[_Client] = set()
+        self._lock = threading.Lock()
+        self._state: Dict[int, Dict[str, Any]] = {}
+        self._seq = 0
+        self.frames_sent = 0
+        self.clients_dropped = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="LiveServer", daemon=True)
+        self._thread.start()
+        logger.info("Live-Server gestartet auf %s:%s", *self.address[:2])
+
+    def stop(self) -> None:
+        with self._lock:
+            clients = list(self._clients)
+            self._clients.clear()
+        for client in clients:
+            self._close(client)
+        self._server.shutdown()
+        self._server.server_close()
+        logger.info("Live-Server beendet: %d Frames, %d langsame Clients getrennt", self.frames_sent, self.clients_dropped)
+
+    def publish(self, sensors: Dict[int, SensorData]) -> None:
+        """Verteilt die Änderungen eines Erfassungszyklus an alle Clients."""
+        changes: Dict[str, Dict[str, Any]] = {}
+        status: Dict[str, str] = {}
+        with self._lock:
+            for ch, sensor in sensors.items():
+                values = _values(sensor)
+                previous = self._state.get(ch)
+                if previous is None:
+                    delta = values
+                else:
+                    delta = {k: v for k, v in values.items() if previous[k] != v}
+                if not delta:
+                    continue
+                if "status" in delta:
+                    status[str(ch)] = delta["status"]
+                changes[str(ch)] = delta
+                self._state[ch] = values
+            if not changes:
+                return
+            self._seq += 1
+            frame = _encode_event("delta", {"bench": self.bench_name, "seq": self._seq, "channels": changes}, self._seq)
+            if status:
+                frame += _encode_event("status", {"bench": self.bench_name, "seq": self._seq, "channels": status}, self._seq)
+            clients = list(self._clients)
+
+        for client in clients:
+            try:
+                client.frames.put_nowait(frame)
+            except queue.Full:
+                self._drop(client)
+        self.frames_sent += 1
+
+    def _snapshot_locked(self) -> Dict[str, Any]:
+        return {
+            "bench": self.bench_name,
+            "seq": self._seq,
+            "channels": {str(ch): dict(values) for ch, values in self._state.items()},
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Vollständiger aktueller Zustand aller Kanäle."""
+        with self._lock:
+            return self._snapshot_locked()
+
+    def _register(self, address: str) -> _Client:
+        client = _Client(address, self.client_queue)
+        with self._lock:
+            # Snapshot und Registrierung unter demselben Lock: kein Delta geht verloren
+            client.frames.put_nowait(_encode_event("snapshot", self._snapshot_locked(), self._seq))
+            self._clients.add(client)
+            count = len(self._clients)
+        logger.info("Live-Client %s verbunden (%d aktiv)", address, count)
+        return client
+
+    def _unregister(self, client: _Client) -> None:
+        with self._lock:
+            self._clients.discard(client)
+
+    def _drop(self, client: _Client) -> None:
+        self._unregister(client)
+        if not client.dropped:
+            client.dropped = True
+            self.clients_dropped += 1
+            logger.warning("Live-Client %s zu langsam, Verbindung getrennt", client.address)
+            self._close(client)
+
+    @staticmethod
+    def _close(client: _Client) -> None:
+        # Handler-Thread aufwecken; bei voller Queue erkennt er `dropped` am Timeout
+        try:
+            client.frames.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug("Live-Server %s: " + format, self.address_string(), *args)
+
+            def _send(self, body: bytes, content_type: str) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/":
+                    self._send((INDEX_HTML % {"bench": html.escape(server.bench_name)}).encode("utf-8"), "text/html; charset=utf-8")
+                elif path == "/state":
+                    self._send(json.dumps(server.snapshot()).encode("utf-8"), "application/json")
+                elif path == "/events":
+                    self._stream()
+                else:
+                    self.send_error(404)
+
+            def _stream(self) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                client = server._register(self.address_string())
+                try:
+                    while not client.dropped:
+                        try:
+                            frame = client.frames.get(timeout=server.keepalive)
+                        except queue.Empty:
+                            frame = b": keepalive\n\n"
+                        if frame is None:
+                            break
+                        self.wfile.write(frame)
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError, OSError):
+                    pass
+                finally:
+                    server._unregister(client)
+                    self.close_connection = True
+                    logger.info("Live-Client %s getrennt", client.address)
+
+        return Handler
@@ -0,0 +1,513 @@
+"""
+Uploader: überträgt abgeschlossene Archivsitzungen und periodische Live-Zusammenfassungen
+in komprimierten Batches per HTTP an einen zentralen Collector (remote.collector).
+
+Ablauf:
+    1. Fertige Dateien (ArchiveWriter-Listener, beim Start zusätzlich ein Scan des
+       Archivs) und Zusammenfassungen sammeln sich im Speicher, bis `batch_bytes`
+       oder `batch_age` erreicht ist.
+    2. Der Batch wird als tar.gz in das Spool-Verzeichnis geschrieben (Warteschlange
+       auf der Platte, übersteht Offline-Phasen und Neustarts). Das Komprimieren ist
+       auf `cpu_share` gedrosselt und läuft mit niedriger Thread-Priorität.
+    3. Hochgeladen wird in Chunks (Upload-Offset), begrenzt auf `bandwidth`; nach einem
+       Abbruch fragt der Uploader den bereits empfangenen Stand ab und setzt dort fort.
+       Erst nach bestätigter Prüfsumme wird der Batch aus dem Spool gelöscht.
+"""
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import logging
+import os
+import socket
+import tarfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from remote.collector import (
+    HEADER_COMPLETE, HEADER_DIGEST, HEADER_LENGTH, HEADER_OFFSET, MANIFEST_NAME, LIVE_NAME, FILES_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+_STATE_FILE = "state.json"
+_PART_SUFFIX = ".part"
+_BATCH_SUFFIX = ".tar.gz"
+
+
+class _TokenBucket:
+    """Begrenzt den Durchsatz auf `rate` Byte/s (0 = unbegrenzt)."""
+    def __init__(self, rate: float, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], Any] = time.sleep):
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self._allowance = rate
+        self._last = clock()
+
+    def consume(self, amount: int) -> None:
+        if self.rate <= 0:
+            return
+        now = self.clock()
+        self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+        self._last = now
+        self._allowance -= amount
+        if self._allowance < 0:
+            self.sleep(-self._allowance / self.rate)
+
+
+class _HashingWriter:
+    """Dateiobjekt-Wrapper, der Größe und SHA-256 des Geschriebenen mitführt."""
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def flush(self) -> None:
+        self.raw.flush()
+
+
+class _ThrottledWriter:
+    """
+    Begrenzt die CPU-Zeit des darunterliegenden Writers (gzip) auf `share`: nach jedem
+    Schreibaufruf wird proportional zur verbrauchten Thread-CPU-Zeit pausiert.
+    """
+    def __init__(self, raw, share: float):
+        self.raw = raw
+        self.share = share
+
+    def write(self, data) -> int:
+        start = time.thread_time()
+        written = self.raw.write(data)
+        if 0 < self.share < 1:
+            time.sleep((time.thread_time() - start) * (1.0 / self.share - 1.0))
+        return written
+
+    def flush(self) -> None:
+        self.raw.flush()
+
+
+# Status, mit dem der Collector einen Batch endgültig ablehnt (Manifest/Prüfsumme)
+STATUS_REJECTED = 422
+
+
+class UploadError(Exception):
+    """Collector hat einen Chunk abgelehnt (nicht durch Wiederholen behebbar)."""
+
+
+class ArchiveUploader:
+    """
+    Hintergrund-Uploader mit Spool-Warteschlange auf der Platte.
+
+    Args:
+        url: Basis-URL des Collectors (http[s]://host:port).
+        archive_path: Archiv-Wurzelverzeichnis (Dateinamen im Batch sind relativ dazu).
+        spool_dir: Verzeichnis der Warteschlange.
+        bench_name: Name des Prüfstands (leer = Hostname).
+        spool_limit: Maximale Größe der Warteschlange in Byte.
+        batch_bytes: Rohgröße, ab der ein Batch geschlossen wird.
+        batch_age: Maximales Alter eines offenen Batches in s.
+        chunk_size: Byte pro Upload-Anfrage.
+        bandwidth: Maximale Upload-Rate in Byte/s (0 = unbegrenzt).
+        cpu_share: Maximaler CPU-Anteil beim Komprimieren.
+        compress_level: gzip-Kompressionsstufe.
+        retry_max: Maximale Wartezeit zwischen Verbindungsversuchen in s.
+        timeout: Socket-Timeout einer Anfrage in s.
+    """
+    def __init__(
+        self,
+        url: str,
+        archive_path: str,
+        spool_dir: str = "./spool",
+        bench_name: str = "",
+        spool_limit: int = 500_000_000,
+        batch_bytes: int = 4_000_000,
+        batch_age: float = 60.0,
+        chunk_size: int = 262144,
+        bandwidth: float = 200_000,
+        cpu_share: float = 0.25,
+        compress_level: int = 6,
+        retry_max: float = 300.0,
+        timeout: float = 30.0,
+    ):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Ungültige Collector-URL: {url!r}")
+        self.url = parts
+        self.archive_path = os.path.abspath(archive_path)
+        self.spool_dir = spool_dir
+        self.bench_name = bench_name or socket.gethostname()
+        self.spool_limit = spool_limit
+        self.batch_bytes = batch_bytes
+        self.batch_age = batch_age
+        self.chunk_size = chunk_size
+        self.cpu_share = cpu_share
+        self.compress_level = compress_level
+        self.retry_max = retry_max
+        self.timeout = timeout
+        self._bucket = _TokenBucket(bandwidth)
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._files: List[str] = []
+        self._summaries: List[Dict[str, Any]] = []
+        self._pending_bytes = 0
+        self._pending_since: Optional[float] = None
+        self._delay = 0.0
+        self.online = True
+        self.batches_uploaded = 0
+        self.bytes_uploaded = 0
+        self.batches_dropped = 0
+
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._remove_parts()
+        self._spooled = set(self._load_state().get("spooled", []))
+
+    # ----------------------------------------------------------------- Zustand
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.spool_dir, _STATE_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Uploader-Zustand nicht lesbar, beginne neu: %s", e)
+            return {}
+
+    def _save_state(self) -> None:
+        path = os.path.join(self.spool_dir, _STATE_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"bench": self.bench_name, "spooled": sorted(self._spooled)}, f)
+        os.replace(tmp, path)
+
+    def _relative(self, path: str) -> Optional[str]:
+        rel = os.path.relpath(os.path.abspath(path), self.archive_path)
+        if rel.startswith(os.pardir):
+            logger.warning("Datei %s liegt außerhalb des Archivs, wird nicht hochgeladen", path)
+            return None
+        return rel.replace(os.sep, "/")
+
+    # -------------------------------------------------------------- Eingänge
+
+    def submit_files(self, paths: List[str]) -> None:
+        """Nimmt fertige Archivdateien (abgeschlossene Laufdateien) auf (ArchiveWriter-Listener)."""
+        with self._lock:
+            for path in paths:
+                rel = self._relative(path)
+                if rel is None or rel in self._spooled or path in self._files:
+                    continue
+                self._files.append(path)
+                try:
+                    self._pending_bytes += os.path.getsize(path)
+                except OSError:
+                    pass
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
+        self._wake.set()
+
+    def submit_summary(self, summaries: Dict[int, Dict[str, Any]], timestamp: float) -> None:
+        """Nimmt eine Live-Zusammenfassung aller Kanäle auf (StatisticsEngine.summary)."""
+        entry = {"time": datetime.fromtimestamp(timestamp).isoformat(), "channels": {str(ch): s for ch, s in summaries.items()}}
+        with self._lock:
+            self._summaries.append(entry)
+            self._pending_bytes += 256 * len(summaries)
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+
+    def scan(self) -> int:
+        """
+        Reiht alle Archivdateien ein, die noch in keinem Batch waren (z.B. nach einem
+        Absturz vor dem Spoolen). Nur aufrufen, solange keine Sitzung offen ist.
+
+        Returns:
+            Anzahl neu eingereihter Dateien.
+        """
+        found = []
+        for root, _, names in os.walk(self.archive_path):
+            for name in sorted(names):
+                if name.endswith((".csv", ".json")):
+                    found.append(os.path.join(root, name))
+        before = len(self._files)
+        self.submit_files(found)
+        count = len(self._files) - before
+        if count:
+            logger.info("Uploader: %d noch nicht übertragene Archivdateien gefunden", count)
+        return count
+
+    # ----------------------------------------------------------------- Spool
+
+    def _batch_due(self) -> bool:
+        with self._lock:
+            if self._pending_since is None:
+                return False
+            return self._pending_bytes >= self.batch_bytes or time.monotonic() - self._pending_since >= self.batch_age
+
+    def _spooled_batches(self) -> List[str]:
+        names = [n for n in os.listdir(self.spool_dir) if n.endswith(_BATCH_SUFFIX)]
+        return sorted(names)
+
+    def _remove_parts(self) -> None:
+        # Reste eines abgebrochenen Spoolvorgangs (z.B. Absturz, Platte voll)
+        for name in os.listdir(self.spool_dir):
+            if name.endswith(_PART_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.spool_dir, name))
+                    logger.info("Unvollständigen Batch %s aus dem Spool entfernt", name)
+                except OSError as e:
+                    logger.warning("Unvollständiger Batch %s nicht entfernbar: %s", name, e)
+
+    def _take_pending(self) -> Tuple[List[str], List[Dict[str, Any]], int, Optional[float]]:
+        with self._lock:
+            taken = (self._files, self._summaries, self._pending_bytes, self._pending_since)
+            self._files, self._summaries = [], []
+            self._pending_bytes = 0
+            self._pending_since = None
+        return taken
+
+    def _restore_pending(self, files: List[str], summaries: List[Dict[str, Any]], size: int, since: Optional[float]) -> None:
+        # Nicht gespoolte Einträge vor die inzwischen neu eingereihten zurücklegen
+        with self._lock:
+            self._files = files + [path for path in self._files if path not in files]
+            self._summaries = summaries + self._summaries
+            self._pending_bytes += size
+            if since is not None and (self._pending_since is None or since < self._pending_since):
+                self._pending_since = since
+
+    def spool_batch(self) -> Optional[str]:
+        """
+        Schreibt alle wartenden Dateien und Zusammenfassungen als Batch in den Spool.
+        Scheitert das Schreiben, bleiben sie für den nächsten Versuch eingereiht.
+
+        Returns:
+            Name des Batches oder None, wenn nichts wartete.
+
+        Raises:
+            OSError: Batch konnte nicht geschrieben werden (z.B. Platte voll).
+        """
+        files, summaries, size, since = self._take_pending()
+        if not files and not summaries:
+            return None
+        batch = f"{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+        part = os.path.join(self.spool_dir, batch + _PART_SUFFIX)
+        meta_path = os.path.join(self.spool_dir, batch + ".json")
+        try:
+            entries, meta = self._write_batch(batch, part, files, summaries)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(part, os.path.join(self.spool_dir, batch + _BATCH_SUFFIX))
+        except BaseException:
+            for path in (part, meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._restore_pending(files, summaries, size, since)
+            raise
+        with self._lock:
+            self._spooled.update(entries)
+            self._save_state()
+        logger.info("Batch %s gespoolt: %d Dateien, %d Zusammenfassungen, %d Byte", batch, len(entries), len(summaries), meta["size"])
+        self._enforce_limit()
+        return batch
+
+    def _write_batch(self, batch: str, part: str, files: List[str], summaries: List[Dict[str, Any]]) -> Tuple[List[str], Dict[str, Any]]:
+        entries = []
+        with open(part, "wb") as raw:
+            hashing = _HashingWriter(raw)
+            with gzip.GzipFile(fileobj=hashing, mode="wb", compresslevel=self.compress_level, mtime=0) as gz:
+                with tarfile.open(fileobj=_ThrottledWriter(gz, self.cpu_share), mode="w|") as tar:
+                    for path in files:
+                        rel = self._relative(path)
+                        try:
+                            tar.add(path, arcname=f"{FILES_DIR}/{rel}", recursive=False)
+                        except OSError as e:
+                            logger.warning("Archivdatei %s nicht lesbar, ausgelassen: %s", path, e)
+                            continue
+                        entries.append(rel)
+                    if summaries:
+                        self._add_bytes(tar, LIVE_NAME, "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in summaries).encode("utf-8"))
+                    manifest = {"bench": self.bench_name, "batch": batch, "created": datetime.now().isoformat(), "files": entries, "summaries": len(summaries)}
+                    self._add_bytes(tar, MANIFEST_NAME, json.dumps(manifest).encode("utf-8"))
+        meta = {"size": hashing.size, "sha256": hashing.sha256.hexdigest(), "files": len(entries), "summaries": len(summaries)}
+        return entries, meta
+
+    @staticmethod
+    def _add_bytes(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+
+    def _enforce_limit(self) -> None:
+        batches = self._spooled_batches()
+        sizes = {b: os.path.getsize(os.path.join(self.spool_dir, b)) for b in batches}
+        total = sum(sizes.values())
+        while batches and total > self.spool_limit:
+            oldest = batches.pop(0)
+            total -= sizes[oldest]
+            self._remove(oldest[:-len(_BATCH_SUFFIX)])
+            self.batches_dropped += 1
+            logger.error("Spool voll (%d Byte), ältester Batch %s verworfen", self.spool_limit, oldest)
+
+    def _remove(self, batch: str) -> None:
+        for suffix in (_BATCH_SUFFIX, ".json"):
+            try:
+                os.remove(os.path.join(self.spool_dir, batch + suffix))
+            except FileNotFoundError:
+                pass
+
+    # ---------------------------------------------------------------- Upload
+
+    def _connection(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+        return cls(self.url.hostname, self.url.port, timeout=self.timeout)
+
+    def _target(self, batch: str) -> str:
+        return f"{self.url.path.rstrip('/')}/upload/{quote(self.bench_name, safe='')}/{batch}"
+
+    def upload_batch(self, batch: str) -> None:
+        """
+        Lädt einen gespoolten Batch hoch; setzt beim vom Collector gemeldeten Offset fort.
+
+        Raises:
+            OSError: Netzwerkfehler oder vorübergehender Collector-Fehler (Batch bleibt im Spool).
+            UploadError: Collector lehnt den Batch endgültig ab (Manifest/Prüfsumme).
+        """
+        with open(os.path.join(self.spool_dir, batch + ".json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        size, digest = meta["size"], meta["sha256"]
+        target = self._target(batch)
+        conn = self._connection()
+        try:
+            conn.request("HEAD", target)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                raise ConnectionError(f"Collector antwortet {response.status}")
+            if response.getheader(HEADER_COMPLETE) == "1":
+                offset = size
+            else:
+                offset = int(response.getheader(HEADER_OFFSET) or 0) if response.status == 200 else 0
+            if offset:
+                logger.info("Batch %s: setze Upload bei %d/%d Byte fort", batch, offset, size)
+            with open(os.path.join(self.spool_dir, batch + _BATCH_SUFFIX), "rb") as f:
+                while offset < size:
+                    f.seek(offset)
+                    chunk = f.read(self.chunk_size)
+                    self._bucket.consume(len(chunk))
+                    conn.request("PATCH", target, body=chunk, headers={
+                        HEADER_OFFSET: str(offset),
+                        HEADER_LENGTH: str(size),
+                        HEADER_DIGEST: f"sha256={digest}",
+                        "Content-Type": "application/offset+octet-stream",
+                    })
+                    response = conn.getresponse()
+                    body = response.read()
+                    if response.status == 409:
+                        # Collector hat einen anderen Stand (z.B. Chunk doppelt gesendet)
+                        offset = int(response.getheader(HEADER_OFFSET) or 0)
+                        continue
+                    if response.status == STATUS_REJECTED:
+                        raise UploadError(f"Collector antwortet {response.status}: {body[:200]!r}")
+                    if response.status not in (200, 201, 204):
+                        # Vorübergehend (z.B. 503): Batch bleibt im Spool, erneuter Versuch mit Backoff
+                        raise ConnectionError(f"Collector antwortet {response.status}: {body[:200]!r}")
+                    self.bytes_uploaded += len(chunk)
+                    offset = int(response.getheader(HEADER_OFFSET) or offset + len(chunk))
+        finally:
+            conn.close()
+        self._remove(batch)
+        self.batches_uploaded += 1
+        logger.info("Batch %s übertragen (%d Byte)", batch, size)
+
+    def _upload_spooled(self) -> None:
+        for name in self._spooled_batches():
+            if self._stop.is_set():
+                return
+            batch = name[:-len(_BATCH_SUFFIX)]
+            try:
+                self.upload_batch(batch)
+            except UploadError as e:
+                # Abgelehnte Batches blockieren sonst die Warteschlange dauerhaft
+                logger.error("Batch %s abgelehnt, wird verworfen: %s", batch, e)
+                self._remove(batch)
+                self.batches_dropped += 1
+                continue
+            if not self.online:
+                logger.info("Collector %s wieder erreichbar", self.url.netloc)
+            self.online = True
+            self._delay = 0.0
+
+    # ---------------------------------------------------------------- Thread
+
+    def _lower_priority(self) -> None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+
+    def _run(self) -> None:
+        self._lower_priority()
+        while not self._stop.is_set():
+            self._wake.wait(min(self.batch_age, 5.0) if self._delay == 0 else self._delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                if self._batch_due():
+                    self.spool_batch()
+                self._upload_spooled()
+            except OSError as e:
+                if self.online:
+                    logger.warning("Collector %s nicht erreichbar, puffere im Spool: %s", self.url.netloc, e)
+                self.online = False
+                self._delay = min(self.retry_max, max(1.0, self._delay * 2))
+            except Exception as e:
+                logger.error("Fehler im Uploader: %s", e, exc_info=True)
+                self._delay = min(self.retry_max, max(1.0, self._delay * 2))
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="Uploader", daemon=True)
+        self._thread.start()
+        logger.info("Uploader gestartet: %s als %s, Spool %s", self.url.geturl(), self.bench_name, self.spool_dir)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Beendet den Thread und spoolt noch Wartendes, damit nichts verloren geht."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        try:
+            self.spool_batch()
+        except OSError as e:
+            logger.error("Wartende Uploads konnten nicht gespoolt werden: %s", e)
+        logger.info("Uploader beendet: %d Batches übertragen, %d im Spool", self.batches_uploaded, len(self._spooled_batches()))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = len(self._files) + len(self._summaries)
+        return {
+            "online": self.online,
+            "pending": pending,
+            "spooled": len(self._spooled_batches()),
+            "uploaded": self.batches_uploaded,
+            "bytes_uploaded": self.bytes_uploaded,
+            "dropped": self.batches_dropped,
+        }
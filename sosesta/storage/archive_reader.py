@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Lesen des Messdaten-Archivs: Laufdateien (`<Zeitstempel>.run.csv`, alle Kanäle
+verschachtelt, siehe ArchiveWriter) und Kanal-Dateien älterer Versionen
+(`<SN>/<Zeitstempel>_<SN>.csv`). Ansichten je Seriennummer werden bei Bedarf aus
+den Laufdateien erzeugt.
+
+Aufruf (im Paketverzeichnis):
+    python -m storage.archive_reader archive/
+    python -m storage.archive_reader archive/ --sn 4711 --export /tmp/export
+"""
+import argparse
+import ast
+import csv
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from storage.archive_writer import (
+    RECORD_CONFIG, RECORD_RESPONSE, RECORD_SESSION, RECORD_SUMMARY, RECORD_TAGS,
+    RESPONSE_HEADER, SAMPLE_HEADER, SESSION_END, SESSION_RESUME, SESSION_SPLIT,
+)
+
+logger = logging.getLogger(__name__)
+
+# <Zeitstempel>_<SN>.csv, Response-Dateien (<...>_response.csv) werden ausgelassen
+RUN_FILE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2}_\d{6})_(.+)\.csv$")
+# <Zeitstempel>[_n].run.csv (Laufdatei mit allen Kanälen)
+MUX_FILE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2}_\d{6})(?:_\d+)?\.run\.csv$")
+
+
+@dataclass
+class ArchivedSample:
+    """Eine Zeile einer Kanal-Archivdatei."""
+    timestamp: datetime
+    relay_on: bool
+    redlab_signal: float
+    current: float
+    bus_voltage: float
+    signal_ok: bool
+    serial_number: str
+    channel: int                 # 0-basiert (in der Datei 1-basiert)
+    supply_error_counter: int
+    signal_error_counter: int
+    stale: bool = False          # Messwerte veraltet (Spalte fehlt in älteren Archiven)
+
+
+@dataclass
+class ArchivedChannel:
+    """Eine Kanalsitzung: ConfigSnapshot, Samples und – aus Laufdateien – Sitzungsdaten."""
+    path: str
+    channel: int
+    serial_number: str
+    config_snapshot: Dict = field(default_factory=dict)
+    samples: List[ArchivedSample] = field(default_factory=list)
+    start: Optional[datetime] = None          # Sitzungsstart
+    end: Optional[datetime] = None            # None: abgebrochen oder in Folgedatei fortgesetzt
+    summary: Dict = field(default_factory=dict)
+    responses: List[List[str]] = field(default_factory=list)   # Zeilen im Layout RESPONSE_HEADER
+
+
+@dataclass
+class RunSession:
+    """Eintrag der Sitzungstabelle einer Laufdatei mit dem Byte-Bereich der Sitzung."""
+    path: str
+    channel: int
+    serial_number: str
+    start: datetime
+    end: Optional[datetime]
+    begin_offset: int                         # Offset des start/resume-Satzes
+    end_offset: int                           # Offset hinter dem end/split-Satz bzw. Dateiende
+    continued: bool = False                   # Fortsetzung aus der vorherigen Laufdatei
+
+
+def _parse_snapshot(text: str) -> Dict:
+    try:
+        value = ast.literal_eval(text)
+        return value if isinstance(value, dict) else {}
+    except (ValueError, SyntaxError):
+        logger.warning("ConfigSnapshot konnte nicht gelesen werden")
+        return {}
+
+
+def is_run_file(path: str) -> bool:
+    return MUX_FILE_PATTERN.match(os.path.basename(path)) is not None
+
+
+def iter_rows(path: str) -> Iterator[List[str]]:
+    """Liefert die Datenzeilen einer Archivdatei ohne Kopf-, Snapshot- und Sitzungssätze."""
+    with open(path, newline="") as f:
+        for row in csv.reader(f, delimiter=";"):
+            if not row or row[0] in RECORD_TAGS:
+                continue
+            yield row
+
+
+def read_snapshot(path: str) -> Dict:
+    """Liest nur den ersten ConfigSnapshot (steht je nach Version in Zeile 1 oder 2)."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        for _, row in zip(range(2), reader):
+            if row and row[0] == "ConfigSnapshot:" and len(row) > 1:
+                return _parse_snapshot(row[1])
+    return {}
+
+
+def parse_row(row: List[str]) -> ArchivedSample:
+    return ArchivedSample(
+        timestamp=datetime.fromisoformat(row[0]),
+        relay_on=row[1] == "ON",
+        redlab_signal=float(row[2]),
+        current=float(row[3]),
+        bus_voltage=float(row[4]),
+        signal_ok=row[5] == "OK",
+        serial_number=row[6],
+        channel=int(row[7]) - 1,
+        supply_error_counter=int(row[8]),
+        signal_error_counter=int(row[9]),
+        stale=len(row) > 10 and row[10] == "STALE",
+    )
+
+
+def read_channel_file(path: str) -> ArchivedChannel:
+    """
+    Liest eine Kanal-Archivdatei im aktuellen Layout (ConfigSnapshot, Kopfzeile, Daten)
+    sowie im älteren Layout mit Kopfzeile vor dem ConfigSnapshot.
+    """
+    name = os.path.basename(path)
+    match = RUN_FILE_PATTERN.match(name)
+    archived = ArchivedChannel(path=path, channel=-1, serial_number=match.group(2) if match else "")
+    archived.config_snapshot = read_snapshot(path)
+    for row in iter_rows(path):
+        try:
+            archived.samples.append(parse_row(row))
+        except (ValueError, IndexError):
+            logger.warning("Ungültige Archivzeile in %s: %s", name, row)
+    if archived.samples:
+        archived.channel = archived.samples[0].channel
+    return archived
+
+
+def read_run_rows(path: str, serial_number: Optional[str] = None) -> List[Tuple[ArchivedChannel, List[List[str]]]]:
+    """
+    Zerlegt eine Laufdatei in ihre Kanalsitzungen, ohne die Samples zu parsen.
+
+    Args:
+        path: Laufdatei.
+        serial_number: Nur Sitzungen dieser Seriennummer (None = alle).
+
+    Returns:
+        Liste (Sitzung ohne Samples, Rohzeilen der Samples) in Startreihenfolge.
+    """
+    name = os.path.basename(path)
+    sessions: List[Tuple[ArchivedChannel, List[List[str]]]] = []
+    running: Dict[str, Tuple[ArchivedChannel, List[List[str]]]] = {}   # Kanal (1-basiert) -> Sitzung
+    snapshot: Dict = {}
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        for row in csv.reader(f, delimiter=";"):
+            if not row:
+                continue
+            tag = row[0]
+            try:
+                if tag not in RECORD_TAGS:
+                    entry = running.get(row[7])
+                    if entry is not None:
+                        entry[1].append(row)
+                elif tag == RECORD_SESSION:
+                    event, kanal, sn, start, at = row[1:6]
+                    if event in (SESSION_END, SESSION_SPLIT):
+                        entry = running.pop(kanal, None)
+                        if entry is not None and event == SESSION_END:
+                            entry[0].end = datetime.fromisoformat(at)
+                    elif serial_number is None or sn == serial_number:
+                        archived = ArchivedChannel(
+                            path=path, channel=int(kanal) - 1, serial_number=sn,
+                            config_snapshot=snapshot, start=datetime.fromisoformat(start),
+                        )
+                        running[kanal] = (archived, [])
+                        sessions.append(running[kanal])
+                elif tag == RECORD_CONFIG and len(row) > 1:
+                    snapshot = _parse_snapshot(row[1])
+                elif tag == RECORD_RESPONSE:
+                    entry = running.get(row[2])
+                    if entry is not None:
+                        entry[0].responses.append(row[1:])
+                elif tag == RECORD_SUMMARY:
+                    entry = running.get(row[1])
+                    if entry is not None:
+                        entry[0].summary = json.loads(row[3])
+            except (ValueError, IndexError):
+                logger.warning("Ungültiger Satz in %s: %s", name, row)
+    return sessions
+
+
+def read_run_file(path: str, serial_number: Optional[str] = None) -> List[ArchivedChannel]:
+    """Liest alle (bzw. die Sitzungen einer Seriennummer) Kanalsitzungen einer Laufdatei mit Samples."""
+    name = os.path.basename(path)
+    sessions = []
+    for archived, rows in read_run_rows(path, serial_number):
+        for row in rows:
+            try:
+                archived.samples.append(parse_row(row))
+            except (ValueError, IndexError):
+                logger.warning("Ungültige Archivzeile in %s: %s", name, row)
+        sessions.append(archived)
+    return sessions
+
+
+def read_channels(path: str) -> List[ArchivedChannel]:
+    """Liest eine Archivdatei beider Layouts: alle Sitzungen einer Laufdatei bzw. die eine Kanal-Datei."""
+    if is_run_file(path):
+        return read_run_file(path)
+    return [read_channel_file(path)]
+
+
+def list_sessions(path: str) -> List[RunSession]:
+    """
+    Sitzungstabelle einer Laufdatei. Es werden nur die Sitzungssätze geparst, die
+    übrigen Zeilen lediglich übersprungen.
+    """
+    prefix = (RECORD_SESSION + ";").encode()
+    sessions: List[RunSession] = []
+    running: Dict[int, RunSession] = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            line_offset = offset
+            offset += len(line)
+            if not line.startswith(prefix):
+                continue
+            try:
+                _, event, kanal, sn, start, at = line.decode("utf-8", errors="replace").rstrip("\r\n").split(";")[:6]
+                channel = int(kanal) - 1
+                if event in (SESSION_END, SESSION_SPLIT):
+                    session = running.pop(channel, None)
+                    if session is not None:
+                        session.end_offset = offset
+                        session.end = datetime.fromisoformat(at) if event == SESSION_END else None
+                    continue
+                session = RunSession(
+                    path=path, channel=channel, serial_number=sn, start=datetime.fromisoformat(start), end=None,
+                    begin_offset=line_offset, end_offset=-1, continued=event == SESSION_RESUME,
+                )
+            except ValueError:
+                logger.warning("Ungültiger Sitzungssatz in %s: %r", os.path.basename(path), line)
+                continue
+            running[channel] = session
+            sessions.append(session)
+    for session in running.values():
+        session.end_offset = offset
+    return sessions
+
+
+def find_runs(path: str) -> Dict[str, List[str]]:
+    """
+    Sucht Archivdateien (Laufdateien und Kanal-Dateien älterer Versionen) und
+    gruppiert sie nach Laufzeitstempel.
+
+    Args:
+        path: Archiv-Wurzel, SN-Ordner oder einzelne CSV-Datei.
+
+    Returns:
+        Dict Laufzeitstempel -> sortierte Liste der Dateien.
+    """
+    runs: Dict[str, List[str]] = {}
+    if os.path.isfile(path):
+        candidates = [path]
+    else:
+        candidates = [os.path.join(root, f) for root, _, files in os.walk(path) for f in files]
+    for candidate in candidates:
+        name = os.path.basename(candidate)
+        match = MUX_FILE_PATTERN.match(name) or RUN_FILE_PATTERN.match(name)
+        if not match or name.endswith("_response.csv"):
+            continue
+        runs.setdefault(match.group(1), []).append(candidate)
+    return {run: sorted(files) for run, files in sorted(runs.items())}
+
+
+def run_start(run_id: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(run_id[:17], "%Y-%m-%d_%H%M%S")
+    except ValueError:
+        return None
+
+
+# ------------------------------------------------------------ Ansicht je SN
+
+def sn_view(path: str, serial_number: str) -> List[ArchivedChannel]:
+    """
+    Alle Sitzungen einer Seriennummer unter `path`, nach Start sortiert. Sitzungen,
+    die bei einem Dateiwechsel in die nächste Laufdatei weiterlaufen, werden wieder
+    zusammengesetzt; Kanal-Dateien älterer Versionen werden unverändert übernommen.
+    """
+    merged: Dict[Tuple[int, datetime], ArchivedChannel] = {}
+    legacy: List[ArchivedChannel] = []
+    for files in find_runs(path).values():
+        for file in files:
+            if is_run_file(file):
+                for archived in read_run_file(file, serial_number):
+                    key = (archived.channel, archived.start)
+                    if key not in merged:
+                        merged[key] = archived
+                        continue
+                    part = merged[key]
+                    part.samples.extend(archived.samples)
+                    part.responses.extend(archived.responses)
+                    part.end = archived.end
+                    part.summary = archived.summary or part.summary
+            else:
+                match = RUN_FILE_PATTERN.match(os.path.basename(file))
+                if match and match.group(2) == serial_number:
+                    archived = read_channel_file(file)
+                    archived.start = run_start(match.group(1))
+                    legacy.append(archived)
+    sessions = list(merged.values()) + legacy
+    return sorted(sessions, key=lambda a: a.start or datetime.min)
+
+
+def export_sn(path: str, serial_number: str, out_dir: str) -> List[str]:
+    """
+    Schreibt die Sitzungen einer Seriennummer im Kanal-Layout älterer Versionen
+    (`<out>/<SN>/<Zeitstempel>_<SN>.csv`, `_response.csv`, `_summary.json`).
+
+    Returns:
+        Pfade der geschriebenen Dateien.
+    """
+    folder = os.path.join(out_dir, serial_number)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for archived in sn_view(path, serial_number):
+        stem = os.path.join(folder, f"{(archived.start or datetime.now()):%Y-%m-%d_%H%M%S}_{serial_number}")
+        with open(stem + ".csv", mode="w", newline="") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow([RECORD_CONFIG, archived.config_snapshot])
+            writer.writerow(SAMPLE_HEADER)
+            for s in archived.samples:
+                writer.writerow([
+                    s.timestamp.isoformat(), "ON" if s.relay_on else "OFF",
+                    f"{s.redlab_signal:.2f}", f"{s.current:.2f}", f"{s.bus_voltage:.2f}",
+                    "OK" if s.signal_ok else "FEHLER", s.serial_number, str(s.channel + 1),
+                    str(s.supply_error_counter), str(s.signal_error_counter), "STALE" if s.stale else "",
+                ])
+        paths.append(stem + ".csv")
+        if archived.responses:
+            with open(stem + "_response.csv", mode="w", newline="") as f:
+                writer = csv.writer(f, delimiter=";")
+                writer.writerow(RESPONSE_HEADER)
+                writer.writerows(archived.responses)
+            paths.append(stem + "_response.csv")
+        if archived.summary:
+            with open(stem + "_summary.json", mode="w", encoding="utf-8") as f:
+                json.dump(archived.summary, f, indent=2)
+            paths.append(stem + "_summary.json")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sitzungen im Messdaten-Archiv auflisten bzw. je Seriennummer exportieren")
+    parser.add_argument("path", help="Archivverzeichnis oder einzelne Laufdatei")
+    parser.add_argument("--sn", help="Nur Sitzungen dieser Seriennummer")
+    parser.add_argument("--export", metavar="DIR", help="Sitzungen der Seriennummer im Kanal-Layout nach DIR schreiben")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.export:
+        if not args.sn:
+            parser.error("--export benötigt --sn")
+        for written in export_sn(args.path, args.sn, args.export):
+            print(written)
+        return
+    for run, files in find_runs(args.path).items():
+        for file in files:
+            if not is_run_file(file):
+                match = RUN_FILE_PATTERN.match(os.path.basename(file))
+                if match and args.sn in (None, match.group(2)):
+                    print(f"{run}  {match.group(2):<16} (Kanal-Datei) {file}")
+                continue
+            for session in list_sessions(file):
+                if args.sn not in (None, session.serial_number):
+                    continue
+                end = f"{session.end:%Y-%m-%d %H:%M:%S}" if session.end else "offen"
+                mark = " (Fortsetzung)" if session.continued else ""
+                print(f"{run}  {session.serial_number:<16} Kanal {session.channel + 1}  {session.start:%Y-%m-%d %H:%M:%S} – {end}{mark}")
+
+
+if __name__ == "__main__":
+    main()
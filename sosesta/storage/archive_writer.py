@@ -0,0 +1,329 @@
+import csv
+import io
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_HEADER = ["Timestamp", "Relay", "RedLab [V]", "Current [mA]", "Bus [V]", "Status", "SN", "Kanal", "SupplyErrors", "SignalErrors", "Stale"]
+RESPONSE_HEADER = ["Timestamp", "Kanal", "SN", "Edge", "Relay", "Initial [V]", "Final [V]", "TransitionTime [ms]", "SettlingTime [ms]", "Overshoot [%]", "TriggerDelay [ms]", "Rate [Hz]"]
+
+# Laufdatei: <archive>/<Zeitstempel>.run.csv
+RUN_SUFFIX = ".run.csv"
+RUN_VERSION = 2
+
+# Satzarten der Laufdatei (erste Spalte); Datenzeilen haben das Layout SAMPLE_HEADER
+RECORD_RUN = "Run"                  # Run;<Version>;<Lauf-ID>
+RECORD_CONFIG = "ConfigSnapshot:"   # ConfigSnapshot:;<dict>  (gilt für die folgenden Sitzungen)
+RECORD_CHANNELS = "Channels"        # Channels;<Kanal>=<SN>;...  (beim Öffnen laufende Sitzungen)
+RECORD_SESSION = "Session"          # Session;<Ereignis>;<Kanal>;<SN>;<Sitzungsstart>;<Zeitpunkt>
+RECORD_RESPONSE = "Response"        # Response;<Felder wie RESPONSE_HEADER>
+RECORD_SUMMARY = "Summary"          # Summary;<Kanal>;<SN>;<JSON>
+RECORD_TAGS = (RECORD_RUN, RECORD_CONFIG, RECORD_CHANNELS, RECORD_SESSION, RECORD_RESPONSE, RECORD_SUMMARY, SAMPLE_HEADER[0])
+
+# Sitzungsereignisse; split/resume markieren eine Sitzung, die bei der Rotation in
+# die nächste Laufdatei weiterläuft
+SESSION_START = "start"
+SESSION_END = "end"
+SESSION_SPLIT = "split"
+SESSION_RESUME = "resume"
+
+
+def _ms(value: Optional[float]) -> str:
+    return "" if value is None else f"{value * 1000:.3f}"
+
+
+class ArchiveWriter:
+    """
+    Schreibt die Messdaten aller Kanäle in eine gemeinsame Laufdatei
+    `<archive>/<Zeitstempel>.run.csv`: ein Kopf mit ConfigSnapshot und Kanal->SN-Tabelle,
+    danach Sitzungs-, Sprungantwort- und Zusammenfassungssätze sowie die Samples aller
+    Kanäle verschachtelt. Jeder Takt wird mit genau einem Schreibaufruf angehängt
+    (ungepuffert, O_APPEND), ein Takt steht damit ganz oder gar nicht in der Datei.
+
+    Jeder Kanal wird weiterhin einzeln geöffnet und geschlossen (eigene Testsitzung
+    mit eigenem Zeitstempel); die Laufdatei beginnt mit der ersten Sitzung und endet,
+    wenn keine Sitzung mehr läuft, spätestens aber nach `max_run_hours` bzw.
+    `max_run_bytes` – laufende Sitzungen werden dann in einer neuen Laufdatei
+    fortgesetzt. Ansichten je Seriennummer erzeugt storage.archive_reader bei Bedarf.
+
+    Threadsicher: Samples (Erfassung) und Sprungantworten (ResponseTimeMonitor)
+    können aus unterschiedlichen Threads geschrieben werden. Listener erhalten nach
+    dem Schließen einer Laufdatei deren Pfad (z.B. Upload).
+
+    Args:
+        base_path: Archiv-Wurzelverzeichnis.
+        channels: Kanäle, die `open` gemeinsam startet.
+        max_run_hours: Laufdatei nach dieser Dauer (Messzeit) wechseln, 0 = nie.
+        max_run_bytes: Laufdatei ab dieser Größe wechseln, 0 = nie.
+    """
+    def __init__(self, base_path: str, channels: Iterable[int], max_run_hours: float = 24.0, max_run_bytes: int = 0):
+        self.base_path = base_path
+        self.channels = list(channels)
+        self.max_run_hours = max_run_hours
+        self.max_run_bytes = max_run_bytes
+        self.serial_numbers: Dict[int, str] = {}
+        self.path: Optional[str] = None
+        self._file = None
+        self._bytes = 0
+        self._run_start = 0.0
+        self._snapshot: Optional[dict] = None              # zuletzt geschriebener ConfigSnapshot
+        self._sessions: Dict[int, Tuple[str, str]] = {}   # Kanal -> (SN, Sitzungsstart ISO)
+        self._configs: Dict[int, dict] = {}                # Kanal -> ConfigSnapshot der Sitzung
+        self._last_sample: Dict[int, float] = {}           # Kanal -> Zeitstempel des letzten Samples
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[List[str]], None]] = []
+
+    @classmethod
+    def from_config(cls, base_path: str, channels: Iterable[int], cfg: Dict) -> "ArchiveWriter":
+        """Erzeugt den Writer aus dem Konfigurationsblock `archive`."""
+        return cls(
+            base_path, channels,
+            max_run_hours=float(cfg.get("max_run_hours", 24.0)),
+            max_run_bytes=int(cfg.get("max_run_bytes", 0)),
+        )
+
+    def add_listener(self, callback: Callable[[List[str]], None]) -> None:
+        """Registriert einen Callback, der mit dem Pfad jeder abgeschlossenen Laufdatei aufgerufen wird."""
+        self._listeners.append(callback)
+
+    def _notify(self, paths: List[str]) -> None:
+        if not paths:
+            return
+        for callback in list(self._listeners):
+            try:
+                callback(paths)
+            except Exception as e:
+                logger.error("Fehler in Archiv-Listener: %s", e, exc_info=True)
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._sessions)
+
+    def is_channel_open(self, channel: int) -> bool:
+        return channel in self._sessions
+
+    # ------------------------------------------------------------ Laufdatei
+
+    @staticmethod
+    def _format(rows: List[list]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=';').writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def _write_locked(self, rows: List[list]) -> None:
+        """Hängt alle Sätze mit einem Schreibaufruf an die Laufdatei an."""
+        data = self._format(rows)
+        view = memoryview(data)
+        while view:
+            written = self._file.write(view)
+            view = view[written:]
+        self._bytes += len(data)
+
+    def _session_row(self, event: str, channel: int, at: datetime) -> list:
+        sn, start = self._sessions[channel]
+        return [RECORD_SESSION, event, str(channel + 1), sn, start, at.isoformat()]
+
+    def _create_locked(self, start_time: datetime, config_snapshot: dict) -> None:
+        os.makedirs(self.base_path, exist_ok=True)
+        stem = start_time.strftime("%Y-%m-%d_%H%M%S")
+        path = os.path.join(self.base_path, stem + RUN_SUFFIX)
+        n = 1
+        while os.path.exists(path):
+            n += 1
+            path = os.path.join(self.base_path, f"{stem}_{n}{RUN_SUFFIX}")
+        self._file = open(path, mode="ab", buffering=0)
+        self.path = path
+        self._bytes = 0
+        self._run_start = start_time.timestamp()
+        self._snapshot = config_snapshot
+        run_id = os.path.basename(path)[:-len(RUN_SUFFIX)]
+        self._write_locked([
+            [RECORD_RUN, str(RUN_VERSION), run_id],
+            [RECORD_CONFIG, config_snapshot],
+            [RECORD_CHANNELS] + [f"{ch + 1}={sn}" for ch, (sn, _) in sorted(self._sessions.items())],
+            SAMPLE_HEADER,
+        ])
+        logger.info("Laufdatei geöffnet: %s", path)
+
+    def _close_file_locked(self) -> List[str]:
+        if self._file is None:
+            return []
+        path = self.path
+        try:
+            self._file.close()
+        except Exception as e:
+            logger.warning("Fehler beim Schließen der Laufdatei %s: %s", path, e)
+        self._file = None
+        self.path = None
+        logger.info("Laufdatei geschlossen: %s", path)
+        return [path]
+
+    def _rotate_locked(self, at: datetime) -> List[str]:
+        """Setzt die laufenden Sitzungen in einer neuen Laufdatei fort."""
+        self._write_locked([self._session_row(SESSION_SPLIT, ch, at) for ch in sorted(self._sessions)])
+        closed = self._close_file_locked()
+        channels = sorted(self._sessions)
+        self._create_locked(at, self._configs[channels[0]])
+        rows = []
+        for ch in channels:
+            if self._configs[ch] != self._snapshot:
+                self._snapshot = self._configs[ch]
+                rows.append([RECORD_CONFIG, self._snapshot])
+            rows.append(self._session_row(SESSION_RESUME, ch, at))
+        self._write_locked(rows)
+        return closed
+
+    # ------------------------------------------------------------- Sitzungen
+
+    def open(self, start_time: datetime, serial_numbers: Dict[int, str], config_snapshot: dict) -> None:
+        """Startet für alle Kanäle gleichzeitig eine Sitzung in einer neuen Laufdatei (gemeinsamer Lauf)."""
+        with self._lock:
+            closed = self._close_locked()
+            for i in self.channels:
+                self._open_channel_locked(i, start_time, serial_numbers.get(i, ""), config_snapshot)
+        self._notify(closed)
+        logger.info("Archiv geöffnet: %d Kanäle, Lauf %s", len(self.channels), start_time.strftime("%Y-%m-%d_%H%M%S"))
+
+    def open_channel(self, channel: int, start_time: datetime, serial_number: str, config_snapshot: dict) -> str:
+        """
+        Startet die Sitzung eines Kanals; eine noch laufende Sitzung des Kanals wird
+        vorher beendet. Ohne offene Laufdatei wird eine neue angelegt.
+
+        Returns:
+            Pfad der Laufdatei.
+        """
+        with self._lock:
+            closed = self._close_channel_locked(channel)
+            path = self._open_channel_locked(channel, start_time, serial_number, config_snapshot)
+        self._notify(closed)
+        logger.info("Archiv Kanal %d geöffnet: %s", channel + 1, path)
+        return path
+
+    def _open_channel_locked(self, channel: int, start_time: datetime, serial_number: str, config_snapshot: dict) -> str:
+        sn = serial_number or f"Kanal{channel+1}"
+        self.serial_numbers[channel] = sn
+        self._sessions[channel] = (sn, start_time.isoformat())
+        self._last_sample.pop(channel, None)
+        self._configs[channel] = config_snapshot
+        rows = []
+        if self._file is None:
+            self._create_locked(start_time, config_snapshot)
+        elif config_snapshot != self._snapshot:
+            self._snapshot = config_snapshot
+            rows.append([RECORD_CONFIG, config_snapshot])
+        rows.append(self._session_row(SESSION_START, channel, start_time))
+        self._write_locked(rows)
+        return self.path
+
+    def write_samples(self, sensors: Dict[int, "SensorData"]) -> None:
+        """
+        Hängt eine Zeile je Kanal mit offener Sitzung an (ein Schreibaufruf je Takt),
+        mit dem Messzeitpunkt des jeweiligen Kanals (SensorData.timestamp).
+        """
+        closed = []
+        with self._lock:
+            if self._file is None:
+                return
+            rows = []
+            latest = 0.0
+            for i, data in sensors.items():
+                if i not in self._sessions:
+                    continue
+                latest = max(latest, data.timestamp)
+                self._last_sample[i] = data.timestamp
+                rows.append([
+                    datetime.fromtimestamp(data.timestamp).isoformat(), "ON" if data.relay_on else "OFF",
+                    f"{data.redlab_signal:.2f}",
+                    f"{data.current:.2f}",
+                    f"{data.bus_voltage:.2f}",
+                    "OK" if data.signal_ok else "FEHLER",
+                    self._sessions[i][0], str(i+1),
+                    str(data.supply_error_counter),
+                    str(data.signal_error_counter),
+                    "STALE" if data.stale else ""
+                ])
+            if not rows:
+                return
+            try:
+                self._write_locked(rows)
+            except Exception as e:
+                logger.error("Fehler beim Schreiben der Laufdatei: %s", e)
+                return
+            if (self.max_run_bytes and self._bytes >= self.max_run_bytes) or \
+                    (self.max_run_hours and latest - self._run_start >= self.max_run_hours * 3600):
+                closed = self._rotate_locked(datetime.fromtimestamp(latest))
+        self._notify(closed)
+
+    def write_response(self, response: "StepResponse") -> None:
+        """Hängt eine gemessene Sprungantwort als Satz an die Laufdatei an."""
+        with self._lock:
+            i = response.channel
+            if i not in self._sessions or self._file is None:
+                return
+            try:
+                self._write_locked([[
+                    RECORD_RESPONSE,
+                    datetime.fromtimestamp(response.wall_time).isoformat(),
+                    str(i+1), self._sessions[i][0], response.edge,
+                    "ON" if response.relay_on else "OFF",
+                    f"{response.initial:.3f}", f"{response.final:.3f}",
+                    _ms(response.transition_time), _ms(response.settling_time),
+                    f"{response.overshoot:.1f}", _ms(response.trigger_delay),
+                    f"{response.rate:.0f}",
+                ]])
+            except Exception as e:
+                logger.error("Fehler beim Schreiben der Sprungantwort Kanal %d: %s", i + 1, e)
+
+    def write_summary(self, summaries: Dict[int, dict], run_info: dict) -> None:
+        """Hängt pro Kanal die Sitzungszusammenfassung (Statistik, Drift-Alarme) als JSON-Satz an."""
+        with self._lock:
+            rows = []
+            for i, summary in summaries.items():
+                if i not in self._sessions:
+                    continue
+                sn = self._sessions[i][0]
+                rows.append([RECORD_SUMMARY, str(i+1), sn, json.dumps({**run_info, "serial_number": sn, **summary})])
+            if not rows or self._file is None:
+                return
+            try:
+                self._write_locked(rows)
+            except Exception as e:
+                logger.error("Fehler beim Schreiben der Zusammenfassung: %s", e)
+
+    def _close_channel_locked(self, channel: int, at: Optional[datetime] = None) -> List[str]:
+        if channel not in self._sessions:
+            return []
+        if at is None:
+            # Messzeit statt Uhrzeit, damit Replay und simulierte Zeit stimmige Sitzungen ergeben
+            last = self._last_sample.get(channel)
+            at = datetime.fromtimestamp(last) if last is not None else datetime.now()
+        try:
+            self._write_locked([self._session_row(SESSION_END, channel, at)])
+        except Exception as e:
+            logger.warning("Fehler beim Beenden der Sitzung Kanal %d: %s", channel + 1, e)
+        del self._sessions[channel]
+        del self._configs[channel]
+        return [] if self._sessions else self._close_file_locked()
+
+    def _close_locked(self) -> List[str]:
+        paths = []
+        for channel in list(self._sessions):
+            paths.extend(self._close_channel_locked(channel))
+        return paths + self._close_file_locked()
+
+    def close_channel(self, channel: int) -> None:
+        """Beendet die Sitzung eines Kanals; mit der letzten Sitzung wird die Laufdatei geschlossen."""
+        with self._lock:
+            paths = self._close_channel_locked(channel)
+        self._notify(paths)
+
+    def close(self) -> None:
+        """Beendet alle Sitzungen und schließt die Laufdatei."""
+        with self._lock:
+            paths = self._close_locked()
+        self._notify(paths)
@@ -0,0 +1,14 @@
+"""
+Speicher-Modul: Schreiben und Lesen des Messdaten-Archivs.
+"""
+from .archive_writer import ArchiveWriter
+from .archive_reader import (
+    ArchivedChannel, ArchivedSample, RunSession, read_channel_file, read_run_file, read_channels,
+    list_sessions, find_runs, sn_view, export_sn,
+)
+from .pyramid import SummaryPyramid, PlotData
+
+__all__ = [
+    "ArchiveWriter", "ArchivedChannel", "ArchivedSample", "RunSession", "read_channel_file", "read_run_file",
+    "read_channels", "list_sessions", "find_runs", "sn_view", "export_sn", "SummaryPyramid", "PlotData",
+]
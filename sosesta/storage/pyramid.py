@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from storage.archive_reader import ArchivedSample, RunSession, parse_row
+from storage.archive_writer import RECORD_TAGS
+
+logger = logging.getLogger(__name__)
+
+# Aggregierte Messgrößen (Felder von ArchivedSample)
+QUANTITIES = ("redlab_signal", "current", "bus_voltage")
+
+PYRAMID_SUFFIX = ".pyr"
+PYRAMID_VERSION = 1
+
+# Block: t_start, t_end, Samples, Signalfehler, CSV-Offset der ersten Zeile, je Größe min/max/mean
+RECORD = struct.Struct("<ddIIQ" + "fff" * len(QUANTITIES))
+
+Record = Tuple[float, ...]   # (t_start, t_end, count, errors, offset, min0, max0, mean0, min1, ...)
+
+
+@dataclass
+class PlotData:
+    """Ausschnitt einer Messgröße für die Darstellung (level -1 = Rohdaten)."""
+    level: int
+    times: List[float] = field(default_factory=list)
+    mins: List[float] = field(default_factory=list)
+    maxs: List[float] = field(default_factory=list)
+    means: List[float] = field(default_factory=list)
+    errors: List[int] = field(default_factory=list)
+
+
+def pyramid_path(csv_path: str, session: Optional[RunSession] = None) -> str:
+    if session is None:
+        return csv_path + PYRAMID_SUFFIX
+    return f"{csv_path}.{session.channel + 1}_{session.begin_offset}{PYRAMID_SUFFIX}"
+
+
+def _iter_samples_with_offsets(path: str, start: int = 0, session: Optional[RunSession] = None) -> Iterator[Tuple[int, ArchivedSample]]:
+    """
+    Liefert (Byte-Offset, Sample) für jede Datenzeile ab `start`; mit `session` nur
+    die Zeilen dieser Sitzung einer Laufdatei.
+    """
+    end = None
+    kanal = None
+    if session is not None:
+        start = max(start, session.begin_offset)
+        end = session.end_offset
+        kanal = str(session.channel + 1)
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            line_offset = offset
+            offset += len(line)
+            if end is not None and line_offset >= end:
+                return
+            text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if not text or text.startswith(RECORD_TAGS):
+                continue
+            row = text.split(";")
+            if kanal is not None and (len(row) < 8 or row[7] != kanal):
+                continue
+            try:
+                yield line_offset, parse_row(row)
+            except (ValueError, IndexError):
+                continue
+
+
+def _merge(records: List[Record]) -> Record:
+    """Fasst aufeinanderfolgende Blöcke zu einem Block der nächsten Ebene zusammen."""
+    count = sum(r[2] for r in records)
+    merged = [records[0][0], records[-1][1], count, sum(r[3] for r in records), records[0][4]]
+    for q in range(len(QUANTITIES)):
+        base = 5 + 3 * q
+        merged.append(min(r[base] for r in records))
+        merged.append(max(r[base + 1] for r in records))
+        merged.append(sum(r[base + 2] * r[2] for r in records) / count)
+    return tuple(merged)
+
+
+class SummaryPyramid:
+    """
+    Mehrstufige min/max/mean-Zusammenfassung einer Kanal-Archivdatei bzw. einer
+    Kanalsitzung in einer Laufdatei.
+
+    Ebene 0 fasst je `base` Rohzeilen zu einem Block zusammen, jede weitere Ebene je
+    `factor` Blöcke der vorherigen. Die Pyramide liegt als `<datei>.csv.pyr` (bzw.
+    `<datei>.run.csv.<Kanal>_<Offset>.pyr` je Sitzung) neben der CSV: eine
+    JSON-Kopfzeile (Quelle, Ebenen) gefolgt von Blöcken fester Größe.
+    Abfragen suchen per Bisektion mit Seek und lesen nur den benötigten Ausschnitt
+    genau einer Ebene; Rohzeilen werden erst bei maximalem Zoom über den
+    gespeicherten CSV-Offset gelesen.
+
+    Args:
+        csv_path: Kanal-Archivdatei oder Laufdatei.
+        session: Sitzung der Laufdatei (siehe storage.archive_reader.list_sessions).
+    """
+    def __init__(self, csv_path: str, session: Optional[RunSession] = None):
+        self.csv_path = csv_path
+        self.session = session
+        self.path = pyramid_path(csv_path, session)
+        with open(self.path, "rb") as f:
+            self.header = json.loads(f.readline())
+            self._data_start = f.tell()
+        self.levels: List[Dict[str, int]] = self.header["levels"]
+        self.samples: int = self.header["samples"]
+
+    # ------------------------------------------------------------------ Aufbau
+
+    @staticmethod
+    def _source_id(csv_path: str, session: Optional[RunSession] = None) -> Dict[str, float]:
+        # Abgeschlossene Sitzungen ändern sich nicht, auch wenn die Laufdatei weiterwächst
+        if session is not None and session.end_offset < os.path.getsize(csv_path):
+            return {"begin": session.begin_offset, "end": session.end_offset}
+        stat = os.stat(csv_path)
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    @classmethod
+    def open(cls, csv_path: str, base: int = 16, factor: int = 8, session: Optional[RunSession] = None) -> "SummaryPyramid":
+        """Öffnet die zwischengespeicherte Pyramide oder baut sie neu, falls sie fehlt oder veraltet ist."""
+        try:
+            pyramid = cls(csv_path, session)
+            if pyramid.header.get("version") == PYRAMID_VERSION and pyramid.header.get("source") == cls._source_id(csv_path, session):
+                return pyramid
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls.build(csv_path, base, factor, session)
+
+    @classmethod
+    def build(cls, csv_path: str, base: int = 16, factor: int = 8, session: Optional[RunSession] = None) -> "SummaryPyramid":
+        """Liest die CSV (bzw. den Bereich der Sitzung) einmal vollständig und schreibt die Pyramide daneben."""
+        source = cls._source_id(csv_path, session)
+        level0: List[Record] = []
+        block: List[Tuple[int, ArchivedSample]] = []
+        samples = 0
+        for offset, sample in _iter_samples_with_offsets(csv_path, session=session):
+            block.append((offset, sample))
+            samples += 1
+            if len(block) == base:
+                level0.append(cls._block(block))
+                block = []
+        if block:
+            level0.append(cls._block(block))
+
+        levels_data = [level0]
+        while len(levels_data[-1]) > factor:
+            previous = levels_data[-1]
+            levels_data.append([_merge(previous[i:i + factor]) for i in range(0, len(previous), factor)])
+
+        levels = []
+        position = 0
+        for records in levels_data:
+            levels.append({"offset": position, "count": len(records)})
+            position += len(records) * RECORD.size
+        header = {
+            "version": PYRAMID_VERSION, "source": source, "samples": samples,
+            "base": base, "factor": factor, "quantities": list(QUANTITIES), "levels": levels,
+        }
+        path = pyramid_path(csv_path, session)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for records in levels_data:
+                f.write(b"".join(RECORD.pack(*r) for r in records))
+        os.replace(tmp, path)
+        logger.info("Pyramide für %s: %d Samples, %d Ebenen", os.path.basename(path), samples, len(levels))
+        return cls(csv_path, session)
+
+    @staticmethod
+    def _block(rows: List[Tuple[int, ArchivedSample]]) -> Record:
+        first, last = rows[0][1], rows[-1][1]
+        record = [
+            first.timestamp.timestamp(), last.timestamp.timestamp(), len(rows),
+            sum(1 for _, s in rows if not s.signal_ok), rows[0][0],
+        ]
+        for name in QUANTITIES:
+            values = [getattr(s, name) for _, s in rows]
+            record += [min(values), max(values), sum(values) / len(values)]
+        return tuple(record)
+
+    # ---------------------------------------------------------------- Abfrage
+
+    @property
+    def time_range(self) -> Tuple[float, float]:
+        top = len(self.levels) - 1
+        if not self.levels or not self.levels[top]["count"]:
+            return 0.0, 0.0
+        with open(self.path, "rb") as f:
+            first = self._read(f, top, 0, 1)[0]
+            last = self._read(f, top, self.levels[top]["count"] - 1, 1)[0]
+        return first[0], last[1]
+
+    def _read(self, f: BinaryIO, level: int, start: int, count: int) -> List[Record]:
+        f.seek(self._data_start + self.levels[level]["offset"] + start * RECORD.size)
+        return list(RECORD.iter_unpack(f.read(count * RECORD.size)))
+
+    def _bisect(self, f: BinaryIO, level: int, t: float) -> int:
+        """Index des ersten Blocks, dessen Ende >= t ist."""
+        lo, hi = 0, self.levels[level]["count"]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read(f, level, mid, 1)[0][1] < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _block_range(self, f: BinaryIO, level: int, t_start: float, t_end: float) -> Tuple[int, int]:
+        first = self._bisect(f, level, t_start)
+        last = self._bisect(f, level, t_end)
+        return first, min(last + 1, self.levels[level]["count"])
+
+    def query(self, quantity: str, t_start: float, t_end: float, max_points: int = 1000) -> PlotData:
+        """
+        Liefert einen Ausschnitt mit höchstens etwa `max_points` Punkten: die feinste
+        Ebene, deren Blöcke im Zeitbereich hineinpassen, oder Rohdaten, wenn schon
+        diese wenige genug sind.
+        """
+        q = QUANTITIES.index(quantity)
+        with open(self.path, "rb") as f:
+            chosen = None
+            for level in range(len(self.levels)):
+                first, last = self._block_range(f, level, t_start, t_end)
+                if level == 0 and (last - first) * self.header["base"] <= max_points:
+                    return self._raw(f, quantity, first, t_start, t_end)
+                if last - first <= max_points:
+                    chosen = (level, first, last)
+                    break
+            if chosen is None:
+                chosen = (len(self.levels) - 1, 0, self.levels[-1]["count"])
+            level, first, last = chosen
+            records = self._read(f, level, first, last - first)
+
+        data = PlotData(level=level)
+        base = 5 + 3 * q
+        for r in records:
+            data.times.append((r[0] + r[1]) / 2)
+            data.mins.append(r[base])
+            data.maxs.append(r[base + 1])
+            data.means.append(r[base + 2])
+            data.errors.append(r[3])
+        return data
+
+    def _raw(self, f: BinaryIO, quantity: str, first_block: int, t_start: float, t_end: float) -> PlotData:
+        data = PlotData(level=-1)
+        if first_block >= self.levels[0]["count"]:
+            return data
+        offset = self._read(f, 0, first_block, 1)[0][4]
+        for sample in self.raw_samples(offset, t_end):
+            t = sample.timestamp.timestamp()
+            if t < t_start:
+                continue
+            value = getattr(sample, quantity)
+            data.times.append(t)
+            data.mins.append(value)
+            data.maxs.append(value)
+            data.means.append(value)
+            data.errors.append(0 if sample.signal_ok else 1)
+        return data
+
+    def raw_samples(self, offset: int, t_end: Optional[float] = None) -> Iterator[ArchivedSample]:
+        """Liest Rohzeilen ab Byte-Offset der CSV bis einschließlich `t_end`."""
+        for _, sample in _iter_samples_with_offsets(self.csv_path, offset, self.session):
+            if t_end is not None and sample.timestamp.timestamp() > t_end:
+                return
+            yield sample